@@ -1,25 +1,23 @@
-import requests
 import json
 import os
 import sys
 
-def get_naver_domestic_sector_etfs():
+try:
+    from toss_crawling.etf_universe import ETF_LIST_URL, fetch_etf_list, refresh_universe, get_universe_codes, describe_universe
+except ImportError:
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.append(project_root)
+    from toss_crawling.etf_universe import ETF_LIST_URL, fetch_etf_list, refresh_universe, get_universe_codes, describe_universe
+
+def get_naver_domestic_sector_etfs(etf_list=None):
     """
     네이버 ETF API를 호출하여 '국내 업종/테마' (etfTabCode == 2) 종목들만 추출하여 출력합니다.
     """
-    url = "https://finance.naver.com/api/sise/etfItemList.nhn"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36',
-        'Referer': 'https://finance.naver.com/sise/etf.nhn'
-    }
-    
     try:
-        print(f"🌐 네이버 ETF API 호출 중: {url}")
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        data_json = response.json()
-        
-        etf_list = data_json.get('result', {}).get('etfItemList', [])
+        if etf_list is None:
+            print(f"🌐 네이버 ETF API 호출 중: {ETF_LIST_URL}")
+            etf_list = fetch_etf_list()
         
         if not etf_list:
             print("❌ API 응답에 ETF 데이터가 없습니다.")
@@ -51,13 +49,25 @@ def get_naver_domestic_sector_etfs():
         return []
 
 def main():
+    """
+    '국내 업종/테마' ETF 목록을 출력합니다.
+    --save 를 주면 전체 ETF 목록으로 ETF 유니버스 파일(toss_crawling/etf_universe.json)을 갱신합니다. (수집기/점수 계산이 사용)
+    """
     print("=== 네이버 '국내 업종/테마' ETF 리스트 수집 시작 ===")
-    etfs = get_naver_domestic_sector_etfs()
+    etf_list = None
+    if "--save" in sys.argv:
+        try:
+            print(f"🌐 네이버 ETF API 호출 중: {ETF_LIST_URL}")
+            etf_list = fetch_etf_list()
+            refresh_universe(etf_list)
+            print(f"🎯 {describe_universe(get_universe_codes())}")
+        except Exception as e:
+            print(f"❌ ETF 유니버스 갱신 실패: {e}")
+            sys.exit(1)
+
+    etfs = get_naver_domestic_sector_etfs(etf_list)
     
     if etfs:
-        # 필요 시 파일로 저장하는 로직 추가 가능 (예: CSV 또는 JSON)
-        # with open("domestic_sector_etfs.json", "w", encoding="utf-8") as f:
-        #     json.dump(etfs, f, ensure_ascii=False, indent=4)
         print(f"\n✨ 총 {len(etfs)}개의 종목 수집 완료")
     else:
         print("❌ 수집된 데이터가 없습니다.")
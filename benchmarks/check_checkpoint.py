@@ -0,0 +1,126 @@
+"""
+세션 체크포인트(toss_crawling/checkpoint.py) 왕복 검증
+
+수집기가 체크포인트에 넣는 상태를 save_checkpoint -> load_checkpoint(JSON + gzip 파일)로 넘긴 뒤 복원한 결과가 원래와 같은지 확인합니다.
+    - request_policy 마지막 정상 응답: 본문/인코딩/받은 시각이 같고, 복원 후 브레이커가 열리면 그 응답이 stale로 쓰이는지
+    - ScoreHistory: 복원한 이력에 같은 턴을 이어 넣었을 때 모멘텀이 원래 이력과 같은지
+    - BarBuilder: 복원한 분봉 상태에 같은 스냅샷을 이어 넣었을 때 봉이 같은지
+    - 파일에 pickle이 아닌 JSON만 들어 있는지, 허용되지 않은 값(임의 객체)은 저장하지 않는지
+불일치가 있으면 종료 코드 1을 반환합니다.
+
+사용 예:
+    python benchmarks/check_checkpoint.py
+"""
+import os
+import sys
+import gzip
+import json
+import random
+import tempfile
+import contextlib
+import io
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+for path in (PROJECT_ROOT, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from run_benchmarks import FixtureResponse
+from toss_crawling import checkpoint, request_policy, score_history
+from toss_crawling.ohlcv_bars import BarBuilder
+
+KST = timezone(timedelta(hours=9))
+
+
+def main():
+    failures = []
+    rng = random.Random(5)
+    start = datetime(2026, 10, 19, 9, 0, tzinfo=KST)
+    codes = [f"{i:06d}" for i in range(50)]
+
+    # 오전 세션 상태
+    body = "<html>상승 종목</html>".encode("euc-kr")
+    response = FixtureResponse(body)
+    response.encoding = "euc-kr"
+    policy = request_policy.get_policy("naver_sise:/sise/sise_rise.naver")
+    policy.last_good["https://finance.naver.com/sise/sise_rise.naver?sosok=0"] = request_policy.FetchResult(response, fetched_at=1760832000.5)
+
+    history = score_history.ScoreHistory()
+    bars = BarBuilder("1m,5m")
+    turns = [(start + timedelta(minutes=t), [
+        {"etf_code": code, "total_score": rng.uniform(-5, 5), "foreign_score": rng.uniform(-3, 3),
+         "institution_score": rng.uniform(-3, 3), "current_price": 10000 + rng.randrange(100), "volume": 1000 * t + i}
+        for i, code in enumerate(codes) if rng.random() > 0.1
+    ]) for t in range(40)]
+    for moment, records in turns[:20]:
+        history.push(moment.isoformat(), records)
+        bars.update(records, moment.isoformat())
+
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        saved_at = start + timedelta(minutes=20)
+        path = checkpoint.save_checkpoint("check", {
+            "market_open_confirmed": True,
+            "last_good": request_policy.export_last_good(),
+            "score_history": history.export_state(),
+            "bars": bars.export_state(),
+        }, now=saved_at, directory=tmp)
+        if path is None:
+            failures.append("체크포인트 저장 실패")
+            state = {}
+        else:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                json.load(f)    # JSON으로만 읽혀야 함
+            state = checkpoint.load_checkpoint("check", now=saved_at + timedelta(minutes=5), directory=tmp) or {}
+        if checkpoint.save_checkpoint("bad", {"obj": object()}, now=saved_at, directory=tmp) is not None:
+            failures.append("임의 객체가 저장됨")
+
+    # 마지막 정상 응답
+    request_policy._policies.clear()
+    request_policy.restore_last_good(state.get("last_good"))
+    restored = request_policy.get_policy("naver_sise:/sise/sise_rise.naver").last_good.get(
+        "https://finance.naver.com/sise/sise_rise.naver?sosok=0")
+    if restored is None or restored.response.content != body or restored.response.text != body.decode("euc-kr") \
+            or restored.fetched_at != 1760832000.5:
+        failures.append("마지막 정상 응답 복원 불일치")
+    stale = request_policy._stale(request_policy.get_policy("naver_sise:/sise/sise_rise.naver"),
+                                  "https://finance.naver.com/sise/sise_rise.naver?sosok=0")
+    if stale is None or not stale.stale or stale.response.content != body:
+        failures.append("복원한 응답이 stale로 쓰이지 않음")
+
+    # 점수 이력 / 분봉: 복원본과 원본에 같은 턴을 이어 넣어 비교
+    with contextlib.redirect_stdout(io.StringIO()):
+        ok = score_history.restore_score_history(state.get("score_history"))
+    restored_history = score_history.get_score_history()
+    restored_bars = BarBuilder("1m,5m")
+    if not ok or not restored_bars.restore_state(state.get("bars")):
+        failures.append("점수 이력/분봉 상태 복원 실패")
+    else:
+        for moment, records in turns[20:]:
+            history.push(moment.isoformat(), records)
+            restored_history.push(moment.isoformat(), records)
+            expected = bars.update(records, moment.isoformat())
+            actual = restored_bars.update(records, moment.isoformat())
+            if expected != actual:
+                failures.append(f"{moment:%H:%M} 분봉 불일치")
+        if history.momentum() != restored_history.momentum():
+            failures.append("모멘텀 불일치")
+        if bars.flush() != restored_bars.flush():
+            failures.append("진행 중인 분봉 불일치")
+        if not isinstance(restored_history.times, np.ndarray) or restored_history.times.dtype != np.float64:
+            failures.append("점수 이력 배열 형식 불일치")
+
+    if failures:
+        print(f"🚨 불일치 {len(failures)}건")
+        for failure in failures[:10]:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("✅ 체크포인트 왕복 검증 통과 (JSON, 마지막 정상 응답/점수 이력/분봉)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+toss_crawling/etf_similarity.py 검증
+
+ETF_PDF 추출본 입력(fixtures/etf_pdf.json.gz, 합성 여부는 fixtures/MANIFEST.json)으로
+    - 희소 행렬 계산 결과가 pandas merge로 모든 ETF 쌍을 비교한 기준 구현과 같은지,
+    - 캐시 저장/로드 후 결과가 같고, 같은 데이터면 다시 계산하지 않는지(지문 일치),
+    - 데이터가 바뀌면 지문이 달라지는지
+확인하고 두 방식의 소요 시간을 출력합니다. 불일치가 있으면 종료 코드 1을 반환합니다.
+
+사용 예:
+    python benchmarks/check_etf_similarity.py
+"""
+import os
+import sys
+import time
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+for path in (PROJECT_ROOT, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import numpy as np
+
+from run_benchmarks import load_json_fixture
+from toss_crawling.supabase_client import transform_etf_pdf
+from toss_crawling import etf_similarity
+
+
+def reference_similarity(df_pdf):
+    """기준 구현: ETF 쌍을 공통 종목으로 merge하여 가중 중복도와 코사인 유사도를 계산합니다."""
+    frame = df_pdf[df_pdf["구성비중(%)"] > 0]
+    frame = frame.groupby(["ETF종목코드", "구성종목코드"], as_index=False)["구성비중(%)"].sum()
+    frame["w"] = frame["구성비중(%)"] / frame.groupby("ETF종목코드")["구성비중(%)"].transform("sum")
+    norms = np.sqrt((frame["w"] ** 2).groupby(frame["ETF종목코드"]).sum())
+
+    pairs = frame.merge(frame, on="구성종목코드", suffixes=("_a", "_b"))
+    pairs = pairs[pairs["ETF종목코드_a"] != pairs["ETF종목코드_b"]]
+    pairs["min"] = np.minimum(pairs["w_a"], pairs["w_b"])
+    pairs["dot"] = pairs["w_a"] * pairs["w_b"]
+    result = pairs.groupby(["ETF종목코드_a", "ETF종목코드_b"])[["min", "dot"]].sum().reset_index()
+    result["cosine"] = result["dot"] / (norms.loc[result["ETF종목코드_a"]].to_numpy() * norms.loc[result["ETF종목코드_b"]].to_numpy())
+    return {(a, b): (o, c) for a, b, o, c in result[["ETF종목코드_a", "ETF종목코드_b", "min", "cosine"]].itertuples(index=False)}
+
+
+def main():
+    df_pdf = transform_etf_pdf(load_json_fixture("etf_pdf.json.gz"))
+    failures = []
+
+    started = time.perf_counter()
+    expected = reference_similarity(df_pdf)
+    reference_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    similarity = etf_similarity.build_similarity(df_pdf)
+    sparse_ms = (time.perf_counter() - started) * 1000
+
+    if similarity.pairs != len(expected):
+        failures.append(f"쌍 수 불일치: {similarity.pairs} != {len(expected)}")
+    for (a, b), (overlap, cosine) in expected.items():
+        got = (similarity.similarity(a, b, "overlap"), similarity.similarity(a, b, "cosine"))
+        if not np.allclose(got, (min(overlap, 1.0), min(cosine, 1.0)), rtol=1e-9, atol=1e-12):
+            failures.append(f"{a}-{b}: {got} != {(overlap, cosine)}")
+            if len(failures) > 10:
+                break
+
+    # top_k는 기준 구현의 내림차순과 같은 값을 가져야 함
+    for code in similarity.codes[:50]:
+        ranked = sorted((v[0] for (a, _), v in expected.items() if a == code), reverse=True)[:5]
+        got = [score for _, _, score in similarity.top_k(code, k=5)]
+        if not np.allclose(got, np.round(np.minimum(ranked, 1.0), 6)):
+            failures.append(f"top_k {code}: {got} != {ranked}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "etf_similarity.npz")
+        built = etf_similarity.load_similarity(df_pdf, path=path)
+        cached = etf_similarity.load_similarity(df_pdf.sample(frac=1.0, random_state=1), path=path)
+        if cached.built_at != built.built_at or cached.fingerprint != built.fingerprint:
+            failures.append("같은 데이터(행 순서만 다름)인데 다시 계산됨")
+        if not all(np.array_equal(cached.data[m], built.data[m]) for m in etf_similarity.METRICS):
+            failures.append("캐시 로드 결과 불일치")
+
+        changed = df_pdf.copy()
+        changed.loc[0, "구성비중(%)"] += 1.0
+        if etf_similarity.pdf_fingerprint(changed) == built.fingerprint:
+            failures.append("데이터 변경이 지문에 반영되지 않음")
+
+    print(f"ℹ️ ETF {len(similarity)}개, 쌍 {similarity.pairs}개 | pandas merge {reference_ms:.1f}ms, 희소 행렬 {sparse_ms:.1f}ms")
+    if failures:
+        print(f"🚨 불일치 {len(failures)}건")
+        for failure in failures[:10]:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("✅ ETF 유사도 검증 통과")
+
+
+if __name__ == "__main__":
+    main()
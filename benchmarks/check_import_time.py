@@ -0,0 +1,97 @@
+"""
+수집 스크립트 임포트 시간 점검 (python -X importtime)
+
+cron 형태로 짧게 실행되는 스냅샷 작업이 임포트만으로 시간을 쓰지 않는지 확인합니다.
+    - 각 모듈을 새 프로세스에서 `python -X importtime -c "import <모듈>"` 로 임포트하여 누적 시간을 측정합니다.
+    - 임포트 시점에 무거운 의존성(pandas, supabase SDK 등)이 로드되면 실패로 처리합니다.
+    - 누적 임포트 시간이 예산(--budget-ms, 기본 400ms)을 넘으면 실패로 처리합니다.
+
+사용 예:
+    python benchmarks/check_import_time.py
+    python benchmarks/check_import_time.py --budget-ms 250 --repeat 5
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+
+# 점검 대상 모듈 (임포트 시점에 네트워크/DB 연결 없이 로드되어야 함)
+MODULES = [
+    "toss_crawling.supabase_client",
+    "naver.naver_trend",
+    "naver.naver_premarket",
+    "naver.naver_realtime",
+    "naver.naver_etf_price",
+]
+
+# 임포트 시점에 로드되면 안 되는 무거운 패키지 (실제 사용 시점에 지연 로드)
+FORBIDDEN = ["pandas", "numpy", "supabase", "postgrest", "dotenv"]
+
+_LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+
+def profile_import(module):
+    """새 프로세스에서 모듈을 임포트하고 (누적 시간 us, 로드된 최상위 패키지 집합)을 반환합니다."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = PROJECT_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    # 클라이언트 생성은 지연되어야 하므로 접속 정보가 없어도 임포트는 성공해야 합니다.
+    env.pop("Project_URL", None)
+    env.pop("Secret_keys", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=PROJECT_ROOT, env=env,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{module} 임포트 실패:\n{result.stderr.strip().splitlines()[-1]}")
+
+    total_us = None
+    loaded = set()
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if not match:
+            continue
+        loaded.add(match.group(4).split(".")[0])
+        if match.group(4) == module:
+            total_us = int(match.group(2))
+    return total_us, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="수집 스크립트 임포트 시간 점검")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "400")))
+    parser.add_argument("--repeat", type=int, default=3, help="모듈별 측정 횟수 (최솟값 사용)")
+    args = parser.parse_args()
+
+    failures = []
+    for module in MODULES:
+        samples = []
+        loaded = set()
+        for _ in range(args.repeat):
+            total_us, loaded = profile_import(module)
+            samples.append(total_us / 1000)
+        elapsed_ms = min(samples)
+
+        heavy = sorted(set(FORBIDDEN) & loaded)
+        status = "✅"
+        if heavy:
+            status = "🚨"
+            failures.append(f"{module}: 임포트 시점에 {', '.join(heavy)} 로드")
+        if elapsed_ms > args.budget_ms:
+            status = "🚨"
+            failures.append(f"{module}: {elapsed_ms:.1f}ms > 예산 {args.budget_ms:.0f}ms")
+        print(f"{status} {module:<32} {elapsed_ms:8.1f} ms")
+
+    if failures:
+        print(f"🚨 임포트 시간 점검 실패 {len(failures)}건")
+        for failure in failures:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print(f"✅ 임포트 시간 점검 통과 (예산 {args.budget_ms:.0f}ms)")
+
+
+if __name__ == "__main__":
+    main()
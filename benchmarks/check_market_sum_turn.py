@@ -0,0 +1,119 @@
+"""
+전 종목 모드(get_naver_market_sum) 턴 소요 시간 측정
+
+sise_market_sum 페이지 요청을 fixtures 시세로 만든 시가총액 목록 페이지(build_market_sum_pages, 페이지당 50행)와
+모의 지연시간으로 바꾸고, 요청 정책(헤지/브레이커)과 호스트별 속도 제한(rate_limit)을 실제 설정 그대로 거쳐 여러 턴을 실행합니다.
+턴마다 소요 시간, 실제 HTTP 호출 수(헤지 포함), 헤지 수, 속도 제한 대기 합계를 출력하고,
+수집 주기(--cadence) 안에 턴이 끝나는지 표시합니다. 네트워크는 사용하지 않습니다.
+
+--scope holdings이면 naver_realtime의 기본값(NAVER_MARKET_SUM_SCOPE=holdings)처럼 구성종목 codes를 넘깁니다.
+구성종목은 시가총액 상위 --holding-pages 페이지의 종목으로 잡으며(ETF 구성종목은 대부분 대형주), 첫 턴은 모든 페이지,
+이후 턴은 첫 페이지와 구성종목이 있는 페이지만 요청하는지 HTTP 호출 수로 확인합니다.
+페이지마다 종목이 겹치지 않도록 페이지 본문의 종목코드는 (시장, 페이지, 순번)으로 바꿔서 돌려줍니다.
+
+모의 지연시간은 로그정규분포(중앙값 --latency-ms, 꼬리 --tail-sigma)이며, 페이지 수는 시장별 --pages로 고정합니다.
+
+사용 예:
+    python benchmarks/check_market_sum_turn.py                          # 시장별 28페이지 (56페이지), 2 req/s, 3턴
+    python benchmarks/check_market_sum_turn.py --no-hedge --turns 2
+    python benchmarks/check_market_sum_turn.py --scope holdings --holding-pages 4
+    RATE_LIMITS=finance.naver.com=4:8 python benchmarks/check_market_sum_turn.py
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import threading
+import contextlib
+import io
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+for path in (PROJECT_ROOT, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from run_benchmarks import setup_fixtures, build_market_sum_pages, FixtureResponse
+from naver import naver_utils
+from toss_crawling import request_policy, rate_limit
+
+
+def main():
+    parser = argparse.ArgumentParser(description="전 종목 모드 턴 소요 시간 측정")
+    parser.add_argument("--pages", type=int, default=28, help="시장별 페이지 수")
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=250, help="모의 응답 지연 중앙값")
+    parser.add_argument("--tail-sigma", type=float, default=0.8, help="로그정규 지연 분포의 sigma (클수록 느린 응답이 많음)")
+    parser.add_argument("--cadence", type=float, default=60, help="수집 주기(초)")
+    parser.add_argument("--no-hedge", action="store_true", help="헤지 요청 끄기 (REQUEST_HEDGE=0과 같음)")
+    parser.add_argument("--scope", choices=("all", "holdings"), default="all", help="요청 페이지 범위 (NAVER_MARKET_SUM_SCOPE)")
+    parser.add_argument("--holding-pages", type=int, default=6, help="--scope holdings에서 구성종목이 있는 시장별 상위 페이지 수")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    fx = setup_fixtures()
+    pages, _ = build_market_sum_pages(fx["sise_html"])
+    # fixtures 종목으로 만든 페이지 수가 --pages보다 적으므로 시장별로 돌려 가며 사용
+    by_market = {}
+    for url in pages:
+        sosok = int(re.search(r"sosok=(\d+)", url).group(1))
+        by_market.setdefault(sosok, []).append(pages[url])
+    rng = random.Random(args.seed)
+    lock = threading.Lock()
+    calls = {"http": 0}
+
+    def page_code(sosok, page, n):
+        return f"{sosok}{page:02d}{n:03d}"
+
+    def fake_get(url, headers=None, timeout=None):
+        with lock:
+            calls["http"] += 1
+            delay = rng.lognormvariate(0, args.tail_sigma) * args.latency_ms / 1000
+        time.sleep(delay)
+        sosok, page = (int(value) for value in re.search(r"sosok=(\d+)&page=(\d+)", url).groups())
+        bodies = by_market[sosok]
+        html = bodies[(page - 1) % len(bodies)].decode("euc-kr")
+        counter = iter(range(1, 10 ** 3))
+        html = re.sub(r"code=\d{6}", lambda _: f"code={page_code(sosok, page, next(counter))}", html)
+        return FixtureResponse(html.encode("euc-kr"))
+
+    codes = None
+    if args.scope == "holdings":
+        codes = {page_code(sosok, page, n) for sosok in (0, 1) for page in range(1, args.holding_pages + 1) for n in (1, 2, 3)}
+
+    naver_utils.requests.get = fake_get
+    request_policy.HEDGE_ENABLED = not args.no_hedge
+    for sosok in (0, 1):
+        naver_utils._market_sum_pages[sosok] = args.pages
+    bucket = rate_limit.get_bucket("finance.naver.com")
+
+    print(f"ℹ️ 페이지 {args.pages * 2}개/턴 (범위 {args.scope}), 속도 제한 {bucket.rate:g} req/s (burst {bucket.burst:g}), "
+          f"작업 스레드 {naver_utils.NAVER_SISE_WORKERS}, 헤지 {'끔' if args.no_hedge else '켬'}, 지연 중앙값 {args.latency_ms:g}ms")
+    for turn in range(1, args.turns + 1):
+        before_calls, before_wait = calls["http"], bucket.waited_seconds
+        hedged = {"count": 0}
+        original_inc = naver_utils.metrics.inc
+
+        def count_hedges(name, value=1):
+            if name == "hedged_requests":
+                hedged["count"] += value
+            original_inc(name, value)
+
+        naver_utils.metrics.inc = count_hedges
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            rows = naver_utils.get_naver_market_sum("2026-10-19T10:00:00+09:00", codes=codes)
+        elapsed = time.perf_counter() - started
+        naver_utils.metrics.inc = original_inc
+        # 첫 페이지에서 확인한 페이지 수(만든 페이지의 마지막 페이지)로 줄어들지 않도록 다시 고정
+        for sosok in (0, 1):
+            naver_utils._market_sum_pages[sosok] = args.pages
+        mark = "✅" if elapsed <= args.cadence else "🚨"
+        print(f"{mark} 턴 {turn}: {elapsed:5.1f}s | HTTP {calls['http'] - before_calls}회 (페이지 {args.pages * 2}), "
+              f"헤지 {hedged['count']} | 속도 제한 대기 합계 {bucket.waited_seconds - before_wait:.1f}s | 행 {len(rows)} | 주기 {args.cadence:g}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+naver/naver_score.py 검증
+
+fixtures의 네이버 상승/하락 페이지 시세와 ETF_PDF 추출본으로
+    - 로컬 엔진(NaverScoreEngine)의 ETF별 집계가 구성종목과 merge 후 groupby로 계산한 기준 값과 같은지,
+    - 메모리 DB 대역에 기준 구현을 서버 함수(calculate_naver_etf_score)로 등록했을 때
+      NAVER_SCORE_MODE=both 비교가 불일치 0으로 나오고, shadow 모드가 서버 함수를 그대로 호출하면서
+      로컬 결과는 그림자 테이블(<결과 테이블>_local)에만 저장하는지
+확인하고 턴당 계산 시간을 출력합니다. 불일치가 있으면 종료 코드 1을 반환합니다.
+
+사용 예:
+    python benchmarks/check_naver_score.py
+"""
+import os
+import sys
+import time
+import contextlib
+import io
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+for path in (PROJECT_ROOT, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+os.environ.setdefault("SUPABASE_BACKEND", "memory")
+
+import numpy as np
+import pandas as pd
+
+from run_benchmarks import setup_fixtures
+from naver.naver_utils import parse_naver_sise_html
+from naver import naver_score
+from toss_crawling.supabase_client import transform_etf_pdf, set_supabase
+from toss_crawling.fake_supabase import FakeSupabaseClient
+
+TURN = "2026-10-19T10:00:00+09:00"
+
+
+def reference_scores(quotes, df_pdf):
+    """기준 구현: 구성종목과 시세를 merge하고 ETF별로 groupby 합니다."""
+    df_quotes = pd.DataFrame(quotes)[["stk_cd", "flu_rt", "trde_qty"]].drop_duplicates("stk_cd", keep="last")
+    merged = df_pdf.merge(df_quotes, left_on="구성종목코드", right_on="stk_cd")
+    merged["score"] = merged["구성비중(%)"] / 100 * merged["flu_rt"]
+    grouped = merged.groupby("ETF종목코드").agg(
+        score=("score", "sum"),
+        rise_count=("flu_rt", lambda s: int((s > 0).sum())),
+        fall_count=("flu_rt", lambda s: int((s < 0).sum())),
+        holdings_count=("stk_cd", "size"),
+        weight_sum=("구성비중(%)", "sum"),
+        trde_qty=("trde_qty", "sum"),
+    )
+    return grouped.reindex(sorted(df_pdf["ETF종목코드"].unique()), fill_value=0)
+
+
+def main():
+    fx = setup_fixtures()
+    quotes = []
+    for market, type_name, html in fx["sise_html"]:
+        quotes.extend(parse_naver_sise_html(html, market, type_name, TURN))
+    df_pdf = transform_etf_pdf(fx["etf_pdf_rows"])
+    # fixtures 시세 종목과 겹치도록 구성종목 일부를 시세 종목으로 바꿈
+    swap = df_pdf.sample(frac=0.3, random_state=7).index
+    df_pdf.loc[swap, "구성종목코드"] = [quotes[i % len(quotes)]["stk_cd"] for i in range(len(swap))]
+    df_pdf = df_pdf.drop_duplicates(["ETF종목코드", "구성종목코드"])
+
+    failures = []
+    engine = naver_score.NaverScoreEngine(df_pdf)
+    started = time.perf_counter()
+    repeat = 50
+    for _ in range(repeat):
+        results = engine.score(quotes, TURN)
+    elapsed_ms = (time.perf_counter() - started) / repeat * 1000
+
+    expected = reference_scores(quotes, df_pdf)
+    got = pd.DataFrame(results).set_index("etf_code")
+    if list(got.index) != list(expected.index):
+        failures.append(f"ETF 목록 불일치 ({len(got)} != {len(expected)})")
+    else:
+        for column in naver_score.RESULT_COLUMNS:
+            if not np.allclose(got[column].to_numpy(dtype=float), expected[column].round(4).to_numpy(dtype=float), atol=1e-3):
+                failures.append(f"{column} 불일치")
+
+    # 메모리 DB 대역: 기준 구현을 서버 함수로 등록하고 both / local 모드를 실행
+    client = FakeSupabaseClient()
+
+    def fake_rpc(db, params):
+        stk = db.tables.get("naver_realtime_stk", [])
+        ref = reference_scores(stk, df_pdf).round(4)
+        db.load_table("naver_realtime_etf", [
+            {"etf_code": code, **{column: row[column] for column in naver_score.RESULT_COLUMNS}, "updated_at": TURN}
+            for code, row in ref.iterrows()
+        ])
+        return None
+
+    client.register_rpc("calculate_naver_etf_score", fake_rpc)
+    client.load_table("naver_realtime_stk", quotes)
+    set_supabase(client)
+    naver_score._engine = engine
+
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink):
+        naver_score.score_turn("realtime", quotes, TURN, mode="both")
+        summary = naver_score.compare_with_table("naver_realtime_etf", results)
+    bad = {column: stats for column, stats in summary.items() if isinstance(stats, dict) and stats["mismatches"]}
+    if bad or summary["local_only"] or summary["stored_only"]:
+        failures.append(f"both 모드 비교 불일치: {summary}")
+
+    # shadow 모드: 운영 결과 테이블은 서버 함수 결과 그대로, 로컬 결과는 그림자 테이블에만 저장
+    client.load_table("naver_realtime_etf", [])
+    rpc_calls = len(client.rpc_calls)
+    with contextlib.redirect_stdout(sink):
+        naver_score.score_turn("realtime", quotes, TURN, mode="shadow")
+    if len(client.rpc_calls) != rpc_calls + 1:
+        failures.append("shadow 모드에서 서버 함수가 호출되지 않음")
+    if any(set(row) - {"id", "etf_code", "updated_at", *naver_score.RESULT_COLUMNS} for row in client.tables["naver_realtime_etf"]):
+        failures.append("shadow 모드가 운영 결과 테이블에 로컬 결과를 씀")
+    shadow = naver_score.shadow_table("naver_realtime_etf")
+    stored = {row["etf_code"]: {k: v for k, v in row.items() if k != "id"} for row in client.tables.get(shadow, [])}
+    if stored != {row["etf_code"]: row for row in results}:
+        failures.append(f"shadow 모드 '{shadow}' 저장값이 계산 결과와 다름")
+
+    print(f"ℹ️ 시세 {len(quotes)}건, ETF {len(engine.etf_codes)}개, 구성종목 {len(engine.weights)}행 | 턴당 계산 {elapsed_ms:.2f}ms")
+    if failures:
+        print(f"🚨 불일치 {len(failures)}건")
+        for failure in failures[:10]:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("✅ 네이버 점수 로컬 엔진 검증 통과")
+
+
+if __name__ == "__main__":
+    main()
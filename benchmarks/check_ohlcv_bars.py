@@ -0,0 +1,153 @@
+"""
+toss_crawling/ohlcv_bars.py 검증
+
+synthetic_market으로 만든 하루치 ETF 시세 스냅샷(etfItemList)을 parse_naver_etf_items로 변환한 뒤
+    - BarBuilder로 증분 집계한 1m/5m/30m 봉(확정 + 세션 종료 시 진행 중인 봉)이
+      전체 스냅샷 이력을 pandas로 구간별 집계한 기준 값과 같은지,
+    - 오전 세션 도중 export_state/restore_state로 넘겨도 결과가 같은지,
+    - file / db(메모리 DB 대역) 저장 후 load_bars / load_bars_from_supabase로 읽은 봉이 같은지
+확인하고 턴당 갱신 시간을 출력합니다. 불일치가 있으면 종료 코드 1을 반환합니다.
+
+사용 예:
+    python benchmarks/check_ohlcv_bars.py
+    python benchmarks/check_ohlcv_bars.py --scale 3 --turns 120 --cadence 60
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+import io
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+for path in (PROJECT_ROOT, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+os.environ.setdefault("SUPABASE_BACKEND", "memory")
+
+import numpy as np
+import pandas as pd
+
+from synthetic_market import SyntheticMarket
+from naver.naver_etf_price import parse_naver_etf_items
+from toss_crawling import ohlcv_bars
+from toss_crawling.ohlcv_bars import BarBuilder, BAR_FIELDS
+from toss_crawling.supabase_client import set_supabase
+from toss_crawling.fake_supabase import FakeSupabaseClient
+
+
+def reference_bars(snapshots, resolutions):
+    """기준 구현: 모든 스냅샷을 한 DataFrame으로 모아 (ETF, 구간)별로 집계합니다."""
+    df = pd.DataFrame([row for rows in snapshots for row in rows])
+    df = df[df["current_price"] > 0]
+    df["epoch"] = pd.to_datetime(df["updated_at"]).map(lambda ts: int(ts.timestamp()))
+    df["prev_volume"] = df.groupby("etf_code")["volume"].shift()
+    expected = {}
+    for name, seconds in resolutions.items():
+        df["bucket"] = df["epoch"] - df["epoch"] % seconds
+        grouped = df.groupby(["etf_code", "bucket"], sort=True).agg(
+            open=("current_price", "first"), high=("current_price", "max"), low=("current_price", "min"),
+            close=("current_price", "last"), first_volume=("volume", "first"), base=("prev_volume", "first"),
+            last_volume=("volume", "last"), snapshot_count=("current_price", "size"),
+        )
+        base = grouped["base"].fillna(grouped["first_volume"])
+        grouped["volume"] = (grouped["last_volume"] - base).clip(lower=0).astype(int)
+        expected[name] = grouped[["open", "high", "low", "close", "volume", "snapshot_count"]]
+    return expected
+
+
+def to_frame(columns_list):
+    rows = [dict(zip(columns, values)) for columns in columns_list for values in zip(*columns.values())]
+    if not rows:
+        return pd.DataFrame(columns=BAR_FIELDS)
+    df = pd.DataFrame(rows)
+    df["bucket"] = pd.to_datetime(df["bucket_start"]).map(lambda ts: int(ts.timestamp()))
+    return df
+
+
+def compare(got, expected, label, failures):
+    for name, ref in expected.items():
+        part = got[got["resolution"] == name].drop_duplicates(["etf_code", "bucket"], keep="last")
+        part = part.set_index(["etf_code", "bucket"]).sort_index()
+        if list(part.index) != list(ref.index):
+            failures.append(f"[{label}] {name} 봉 목록 불일치 ({len(part)} != {len(ref)})")
+            continue
+        for column in ref.columns:
+            if not np.allclose(part[column].to_numpy(dtype=float), ref[column].to_numpy(dtype=float)):
+                failures.append(f"[{label}] {name} {column} 불일치")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="분봉 증분 집계 검증")
+    parser.add_argument("--scale", type=float, default=1)
+    parser.add_argument("--turns", type=int, default=60)
+    parser.add_argument("--cadence", type=float, default=60, help="턴 주기(초)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    market = SyntheticMarket(scale=args.scale, seed=args.seed, cadence_seconds=args.cadence)
+    day = market.generate_day(args.turns)
+    snapshots = [parse_naver_etf_items(items, turn) for turn, items in zip(day["turns"], day["etf_items"])]
+    # 거래정지 행과 중간에 새로 들어오는 ETF를 섞음
+    snapshots[1][0]["current_price"] = 0.0
+    snapshots = [rows if i >= args.turns // 3 else rows[:-5] for i, rows in enumerate(snapshots)]
+
+    resolutions = ohlcv_bars.parse_resolutions("1m,5m,30m")
+    expected = reference_bars(snapshots, resolutions)
+    failures = []
+
+    builder = BarBuilder("1m,5m,30m")
+    finalized = []
+    started = time.perf_counter()
+    for rows in snapshots:
+        finalized.extend(builder.update(rows, rows[0]["updated_at"]))
+    elapsed_ms = (time.perf_counter() - started) / len(snapshots) * 1000
+    compare(to_frame(finalized + builder.flush()), expected, "증분", failures)
+
+    # 세션 중간에 상태를 넘겨받아 이어서 집계 (진행 중인 봉은 flush 후 다시 저장되어 나중 값이 우선)
+    half = len(snapshots) // 2
+    first, handed = BarBuilder("1m,5m,30m"), []
+    for rows in snapshots[:half]:
+        handed.extend(first.update(rows, rows[0]["updated_at"]))
+    handed.extend(first.flush())
+    second = BarBuilder("1m,5m,30m")
+    if not second.restore_state(first.export_state()):
+        failures.append("체크포인트 상태 복원 실패")
+    for rows in snapshots[half:]:
+        handed.extend(second.update(rows, rows[0]["updated_at"]))
+    compare(to_frame(handed + second.flush()), expected, "세션 이어받기", failures)
+    if BarBuilder("1m,5m").restore_state(first.export_state()):
+        failures.append("주기 설정이 다른 상태를 복원함")
+
+    # 저장 후 읽기: 로컬 파일 / 메모리 DB 대역
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        client = FakeSupabaseClient()
+        set_supabase(client)
+        ohlcv_bars.OHLCV_BARS_DIR = tmp
+        ohlcv_bars.write_bars(handed + second.flush(), sink="both")
+        trading_day = snapshots[0][0]["updated_at"][:10]
+        code = snapshots[-1][0]["etf_code"]
+        for name in resolutions:
+            ref = expected[name].loc[code]
+            from_file = ohlcv_bars.load_bars(trading_day, name, etf_code=code)
+            from_db = ohlcv_bars.load_bars_from_supabase(code, name)
+            for label, bars in (("file", from_file), ("db", from_db)):
+                closes = [bar["close"] for bar in bars]
+                if len(bars) != len(ref) or not np.allclose(closes, ref["close"].to_numpy(dtype=float)):
+                    failures.append(f"[{label}] {name} 읽은 봉 불일치 ({len(bars)} != {len(ref)})")
+
+    bars = sum(len(ref) for ref in expected.values())
+    print(f"ℹ️ 스냅샷 {len(snapshots)}턴 × ETF {len(snapshots[-1])}개 -> 봉 {bars:,}개 | 턴당 갱신 {elapsed_ms:.2f}ms")
+    if failures:
+        print(f"🚨 불일치 {len(failures)}건")
+        for failure in failures[:10]:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("✅ 분봉 증분 집계 검증 통과")
+
+
+if __name__ == "__main__":
+    main()
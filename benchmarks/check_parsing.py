@@ -0,0 +1,156 @@
+"""
+toss_crawling/parsing.py 교차 검증 (시드 고정 무작위 입력 기반 속성 검사)
+
+기준 구현(reference_parsers.py)과 새 스칼라 파서, 배열(batch) 파서의 결과가 같은지
+무작위로 생성한 금액/날짜/시세 셀 문자열로 확인합니다. 무작위 입력 앞에는 항상 고정 경계 사례(FIXED_*: 빈 문자열, "-",
+조/억/만 조합, 앞뒤 공백이 있는 날짜 등)를 넣어 시드와 관계없이 검사합니다. 불일치가 있으면 종료 코드 1을 반환합니다.
+
+사용 예:
+    python benchmarks/check_parsing.py --cases 20000 --seed 1
+"""
+import os
+import sys
+import math
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+for path in (PROJECT_ROOT, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import reference_parsers as ref
+from toss_crawling import parsing
+
+AMOUNT_TOKENS = ["0", "1", "2", "5", "9", "12", "345", "1,234", "9,999", "0.5", ".", ",", " ", "-", "조", "억", "만", "원",
+                 "순매수", "순매도", "순", "매수", "\t", "x", "e", "1e3"]
+NUMBER_TOKENS = ["0", "1", "7", "12", "1,234", "56,789", ".", ".5", "+", "-", "%", ",", " "]
+
+# 고정 경계 사례 (시드와 관계없이 항상 검사)
+FIXED_AMOUNTS = ["", " ", "-", "원", "0원", "-0원", "조", "억", "만", "1조", "1억", "1만", "1조원", "1조 1원",
+                 "1조 2,345억원", "1조2,345억5,678만원", "2,345억 5,678만원", "1조 5,678만원", "-1조 2,345억원",
+                 "순매수 3억원", "순매도 1조 2억원", "순매도 -1억원", "1억 1억원", "억만원", "1,2억원", "0.5억원",
+                 " 1조 2,345억원 ", "1조\t2억원"]
+FIXED_DATES = ["", " ", "-", "기준", "오늘", "어제", " 오늘 ", "어제 ", "오늘 14:30 기준", " 어제 15:30 기준 ",
+               "10월 19일", " 10월 19일 ", "10월19일", "1월 1일", "12월 31일", "2월 30일",
+               "2026-10-19", " 2026-10-19 ", "2026-1-5", "2026-13-01", "2026-10-19 기준"]
+FIXED_NUMBERS = ["", " ", "-", "+", "%", ",", ".", "0", "-0", "+0.00%", " 1,234 ", "1,234\n", "-1,234", "+12.34%",
+                 "12.34 %", "1,23,4", ".5", "5.", "--1", "+-1"]
+
+
+def random_amount(rng):
+    """실제 형식('1조 2,345억원')과 비정형 조합을 섞어 금액 문자열을 생성합니다."""
+    if rng.random() < 0.5:
+        jo = rng.choice(["", f"{rng.randint(1, 9)}조 "])
+        eok = rng.choice(["", f"{rng.randint(1, 9999):,}억"])
+        man = rng.choice(["", f"{rng.randint(1, 9999):,}만"])
+        prefix = rng.choice(["", "순매수 ", "순매도 ", "-"])
+        return f"{prefix}{jo}{eok}{man}원"
+    return "".join(rng.choice(AMOUNT_TOKENS) for _ in range(rng.randint(0, 8)))
+
+
+def random_number(rng):
+    if rng.random() < 0.6:
+        sign = rng.choice(["", "+", "-"])
+        value = rng.choice([f"{rng.randint(0, 10**7):,}", f"{rng.uniform(0, 30):.2f}"])
+        lead, unit, tail = rng.choice(["", " "]), rng.choice(["", "%"]), rng.choice(["", " ", "\n"])
+        return f"{lead}{sign}{value}{unit}{tail}"
+    return "".join(rng.choice(NUMBER_TOKENS) for _ in range(rng.randint(0, 5)))
+
+
+def random_date(rng):
+    return rng.choice([
+        "", "오늘", "어제", "오늘 14:30 기준", "어제 15:30 기준",
+        f"{rng.randint(1, 12)}월 {rng.randint(1, 31)}일", f"{rng.randint(1, 12)}월{rng.randint(1, 31)}일",
+        f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}", "2026-1-5", "기준",
+    ])
+
+
+def same(a, b):
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b
+
+
+def outcome(func, text):
+    try:
+        return ("ok", func(text))
+    except ValueError:
+        return ("error", None)
+
+
+def check_amounts(rng, cases, failures):
+    samples = FIXED_AMOUNTS + [random_amount(rng) for _ in range(cases)]
+    batch = parsing.parse_amounts(samples)
+    for s, b in zip(samples, batch):
+        expected = ref.parse_amount(s)
+        scalar = parsing.parse_amount(s)
+        if not same(float(expected), float(scalar)):
+            failures.append(("parse_amount", s, expected, scalar))
+        if not math.isnan(expected) and abs(float(b) - expected) > 1e-9:
+            failures.append(("parse_amounts", s, expected, float(b)))
+
+
+INT64_MIN, INT64_MAX = -(2 ** 63), 2 ** 63 - 1
+
+
+def check_dates(rng, cases, failures):
+    base = datetime(2026, 10, 19, 10, 0, tzinfo=timezone(timedelta(hours=9)))
+    for s in FIXED_DATES + [random_date(rng) for _ in range(cases)]:
+        expected = ref.parse_date(s, base)
+        actual = parsing.parse_date(s, now=base)
+        if expected != actual:
+            failures.append(("parse_date", s, expected, actual))
+
+
+def check_numbers(rng, cases, failures):
+    pairs = [
+        ("close_pric", ref.naver_close_price, parsing.parse_number, parsing.parse_numbers),
+        ("flu_rt", ref.naver_flu_rt, parsing.parse_number, parsing.parse_numbers),
+        ("pre", ref.naver_pre, parsing.parse_unsigned, parsing.parse_unsigned_numbers),
+        ("trde_qty", ref.naver_trde_qty, parsing.parse_int, parsing.parse_ints),
+    ]
+    samples = FIXED_NUMBERS + [random_number(rng) for _ in range(cases)]
+    for name, reference, scalar, batch in pairs:
+        valid = []
+        for s in samples:
+            status, expected = outcome(reference, s)
+            if status == "ok":
+                valid.append((s, expected))
+                status_new, actual = outcome(scalar, s)
+                if status_new != "ok" or float(actual) != float(expected):
+                    failures.append((name, s, expected, actual))
+        # 기준 구현이 성공하는 입력은 배열 파서도 같은 값이어야 합니다. (int64 범위 밖의 정수는 OverflowError가 약속된 동작)
+        if batch is parsing.parse_ints:
+            valid = [(s, expected) for s, expected in valid if INT64_MIN <= expected <= INT64_MAX]
+        values = batch([s for s, _ in valid])
+        for (s, expected), actual in zip(valid, values):
+            if float(actual) != float(expected):
+                failures.append((f"{name}[batch]", s, expected, float(actual)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="parsing.py 교차 검증")
+    parser.add_argument("--cases", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = []
+    check_amounts(rng, args.cases, failures)
+    check_dates(rng, args.cases, failures)
+    check_numbers(rng, args.cases, failures)
+
+    if failures:
+        print(f"🚨 불일치 {len(failures)}건 (seed={args.seed})")
+        for name, s, expected, actual in failures[:20]:
+            print(f"   - {name}: {s!r} -> 기준 {expected!r} / 신규 {actual!r}")
+        sys.exit(1)
+    fixed = len(FIXED_AMOUNTS) + len(FIXED_DATES) + len(FIXED_NUMBERS)
+    print(f"✅ 파서 교차 검증 통과 (고정 경계 사례 {fixed}건 + 무작위 {args.cases}건 x 3종, seed={args.seed})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+toss_crawling/score_replay.py 검증
+
+fixtures의 토스 랭킹 스냅샷으로 만든 하루치 toss_yg_score_stk 레코드와 ETF_PDF 추출본으로
+    - 한 번에 계산한 모든 턴의 점수가, 턴마다 그 시점까지의 데이터를 transform_toss_data로 통합하고
+      구성종목과 merge하여 계산한 기준 값과 같은지,
+    - 재계산 결과를 저장값으로 넣었을 때 비교 결과가 오차 0으로 나오는지
+확인하고 하루치 재계산 시간을 출력합니다. 불일치가 있으면 종료 코드 1을 반환합니다.
+
+사용 예:
+    python benchmarks/check_score_replay.py --turns 390 --samples 12
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+for path in (PROJECT_ROOT, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import numpy as np
+import pandas as pd
+
+from run_benchmarks import build_toss_day_rows, load_json_fixture
+from toss_crawling.supabase_client import transform_toss_data, transform_etf_pdf, prepare_toss_chunk
+from toss_crawling import score_replay
+
+
+def reference_turn(rows, turn, df_pdf):
+    """기준 구현: turn 시점까지의 행을 통합하고 구성종목과 merge하여 ETF 점수를 계산합니다."""
+    df_total, _ = transform_toss_data([r for r in rows if r["collected_at"] <= turn and r["stock_code"]])
+    merged = df_pdf.merge(df_total, left_on="구성종목코드", right_on="종목코드")
+    merged["score"] = merged["구성비중(%)"] / 100 * merged["금액"]
+    pivot = merged.pivot_table(index="ETF종목코드", columns="투자자", values="score", aggfunc="sum", fill_value=0)
+    result = pd.DataFrame({
+        "foreign_score": pivot.get("외국인", 0.0),
+        "institution_score": pivot.get("기관", 0.0),
+    })
+    result["total_score"] = result["foreign_score"] + result["institution_score"]
+    result["holdings_count"] = merged.drop_duplicates(["ETF종목코드", "구성종목코드"]).groupby("ETF종목코드").size()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YG Score 재계산 검증")
+    parser.add_argument("--turns", type=int, default=390)
+    parser.add_argument("--samples", type=int, default=12, help="기준 구현과 비교할 턴 수")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    snapshots = {rt: load_json_fixture(f"toss_ranking_{rt}.json.gz") for rt in ("buy", "sell")}
+    rows = build_toss_day_rows(snapshots, turns=args.turns, seed=args.seed)
+    # 턴마다 일부 종목이 랭킹에서 빠지도록 하여 이전 턴 값 이어 쓰기(carry forward)도 검증
+    rng = random.Random(args.seed)
+    rows = [r for r in rows if rng.random() > 0.2]
+    df_pdf = transform_etf_pdf(load_json_fixture("etf_pdf.json.gz"))
+    # 스냅샷 종목코드와 겹치도록 구성종목 일부를 스냅샷 종목으로 바꿈
+    stock_codes = sorted({r["stock_code"] for r in rows if r["stock_code"]})
+    swap = df_pdf.sample(frac=0.3, random_state=args.seed).index
+    df_pdf.loc[swap, "구성종목코드"] = [stock_codes[i % len(stock_codes)] for i in range(len(swap))]
+
+    started = time.perf_counter()
+    replayed = score_replay.replay_day(prepare_toss_chunk(pd.DataFrame(rows)), df_pdf)
+    elapsed = time.perf_counter() - started
+
+    failures = []
+    turns = sorted({r["collected_at"] for r in rows})
+    for turn in rng.sample(turns, min(args.samples, len(turns))):
+        expected = reference_turn(rows, turn, df_pdf)
+        got = replayed[replayed["updated_at"] == turn].set_index("etf_code")
+        if sorted(got.index) != sorted(expected.index):
+            failures.append(f"{turn}: ETF 목록 불일치 ({len(got)} != {len(expected)})")
+            continue
+        for column in score_replay.SCORE_COLUMNS + ["holdings_count"]:
+            if not np.allclose(got[column].to_numpy(), expected.loc[got.index, column].round(4).to_numpy(), atol=1e-3):
+                failures.append(f"{turn}: {column} 불일치")
+
+    _, summary = score_replay.compare_with_stored(replayed, replayed.copy())
+    if summary["matched"] != len(replayed) or summary["total_score"]["max_abs_diff"] != 0:
+        failures.append(f"자기 비교 불일치: {summary}")
+
+    print(f"ℹ️ 턴 {len(turns)}개, 원본 {len(rows)}행 -> 점수 {len(replayed)}행 | 재계산 {elapsed:.2f}s")
+    if failures:
+        print(f"🚨 불일치 {len(failures)}건")
+        for failure in failures[:10]:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("✅ YG Score 재계산 검증 통과")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+toss_yg_score_stk 증분 로드(TossSnapshotLoader / load_toss_data_from_supabase 기본 경로) 검증
+
+메모리 DB 대역(FakeSupabaseClient)에 하루치 턴을 수집기와 같은 방식(upsert, on_conflict=investor, stock_code, ranking_type, collected_at)으로
+저장하면서, 매 단계마다 증분 로더의 통합 결과가 전체 재조회(load_toss_data_from_supabase(full=True), aggregate_toss_chunks)와 같은지 확인합니다.
+    - 턴마다 매수 랭킹만 저장된 뒤 / 같은 collected_at으로 매도 랭킹이 나중에 저장된 뒤 (워터마크 턴의 늦은 행)
+    - 같은 턴을 재시도 upsert로 다시 쓴 뒤 (금액/종목명이 바뀐 행, 워터마크 턴의 행 교체)
+    - 새 행이 없는 refresh, 종목이 랭킹에서 빠졌다 돌아오는 경우(이전 턴 값 유지), 날짜가 바뀐 경우(상태 초기화)
+불일치가 있으면 종료 코드 1을 반환합니다. 네트워크는 사용하지 않습니다.
+
+사용 예:
+    python benchmarks/check_toss_incremental.py
+    python benchmarks/check_toss_incremental.py --turns 60 --stocks 200 --page-size 50
+"""
+import os
+import sys
+import random
+import argparse
+import contextlib
+import io
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+for path in (PROJECT_ROOT, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+os.environ.setdefault("SUPABASE_BACKEND", "memory")
+
+import pandas as pd
+
+from toss_crawling.supabase_client import set_supabase, get_supabase, load_toss_data_from_supabase, TossSnapshotLoader
+from toss_crawling.fake_supabase import FakeSupabaseClient
+
+INVESTORS = ("외국인", "기관")
+ON_CONFLICT = "investor, stock_code, ranking_type, collected_at"
+
+
+def make_rows(rng, stocks, ranking_type, collected_at, per_investor):
+    rows = []
+    for investor in INVESTORS:
+        for code, name in rng.sample(stocks, per_investor):
+            rows.append({
+                "investor": investor, "stock_code": code, "stock_name": name, "ranking_type": ranking_type,
+                "amount": rng.randrange(1, 10 ** 9), "collected_at": collected_at,
+            })
+    return rows
+
+
+def upsert(rows):
+    get_supabase().table("toss_yg_score_stk").upsert(rows, on_conflict=ON_CONFLICT).execute()
+
+
+def compare(loader, label, failures, stats):
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected, expected_at = load_toss_data_from_supabase(full=True)
+        fetched = loader.refresh()
+    actual, actual_at = loader.aggregate()
+    stats["incremental"] += fetched or 0
+    stats["full"] += sum(row["collected_at"][:10] == loader.target_date for row in get_supabase().tables.get("toss_yg_score_stk", []))
+    if expected is None or actual is None:
+        if (expected is None) != (actual is None):
+            failures.append(f"{label}: 한쪽만 결과 없음")
+        return
+    keys = ["투자자", "종목명", "종목코드"]
+    expected = expected.sort_values(keys).reset_index(drop=True)
+    actual = actual.sort_values(keys).reset_index(drop=True)
+    try:
+        pd.testing.assert_frame_equal(actual, expected)
+    except AssertionError as e:
+        failures.append(f"{label}: 통합 결과 불일치 ({str(e).splitlines()[0]})")
+    if actual_at != expected_at:
+        failures.append(f"{label}: 기준시각 불일치 ({actual_at} != {expected_at})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="toss_yg_score_stk 증분 로드 검증")
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--stocks", type=int, default=120, help="종목 풀 크기")
+    parser.add_argument("--per-investor", type=int, default=30, help="턴/매매타입/투자자별 랭킹 종목 수")
+    parser.add_argument("--page-size", type=int, default=37, help="증분 로더의 조회 페이지 크기 (작게 잡아 페이지 경계를 검증)")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    stocks = [(f"{i:06d}", f"종목{i}") for i in range(args.stocks)]
+    set_supabase(FakeSupabaseClient())
+    loader = TossSnapshotLoader(page_size=args.page_size)
+    failures = []
+    stats = {"incremental": 0, "full": 0}
+
+    compare(loader, "빈 테이블", failures, stats)
+    for day in ("2026-10-16", "2026-10-19"):
+        for turn in range(args.turns):
+            collected_at = f"{day}T09:{turn:02d}:00+09:00"
+            label = f"{day} 턴 {turn + 1}"
+            bought = make_rows(rng, stocks, "buy", collected_at, args.per_investor)
+            upsert(bought)
+            compare(loader, f"{label} 매수 저장 후", failures, stats)
+
+            upsert(make_rows(rng, stocks, "sell", collected_at, args.per_investor))
+            compare(loader, f"{label} 매도 저장 후 (같은 collected_at)", failures, stats)
+
+            # 재시도 upsert: 같은 턴의 일부 행 금액과 종목명이 바뀜 (충돌 키에 종목명이 없어 같은 행이 갱신됨)
+            retried = [dict(row, amount=row["amount"] + 1) for row in rng.sample(bought, 5)]
+            retried[0]["stock_name"] += "(우)"
+            upsert(retried)
+            compare(loader, f"{label} 재시도 upsert 후", failures, stats)
+
+            if turn % 7 == 3:
+                compare(loader, f"{label} 새 행 없음", failures, stats)
+
+    print(f"ℹ️ 2일 × {args.turns}턴, 턴당 {len(INVESTORS) * args.per_investor * 2}행 | "
+          f"조회 행 수 합계: 증분 {stats['incremental']:,} / 전체 재조회 {stats['full']:,}")
+    if failures:
+        print(f"🚨 불일치 {len(failures)}건")
+        for failure in failures[:10]:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("✅ 증분 로드 검증 통과 (전체 재조회 결과와 동일)")
+
+
+if __name__ == "__main__":
+    main()
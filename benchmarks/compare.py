@@ -0,0 +1,49 @@
+"""
+두 벤치마크 결과(JSON)를 비교합니다.
+
+사용 예:
+    python benchmarks/compare.py benchmarks/results/<base>.json benchmarks/results/<new>.json --fail-above 1.2
+"""
+import sys
+import json
+import argparse
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크 결과 비교")
+    parser.add_argument("base", help="기준 결과 JSON")
+    parser.add_argument("new", help="비교 대상 결과 JSON")
+    parser.add_argument("--metric", default="median_ms", help="비교 지표 (기본: median_ms)")
+    parser.add_argument("--fail-above", type=float, default=None, help="new/base 비율이 이 값을 넘으면 종료 코드 1")
+    args = parser.parse_args()
+
+    base, new = load(args.base), load(args.new)
+    print(f"기준: {base['meta']['git_commit']}  →  비교: {new['meta']['git_commit']}  ({args.metric})")
+    print(f"{'benchmark':<26}{'base':>12}{'new':>12}{'ratio':>9}")
+
+    regressions = []
+    for name in sorted(set(base["benchmarks"]) | set(new["benchmarks"])):
+        b = base["benchmarks"].get(name, {}).get(args.metric)
+        n = new["benchmarks"].get(name, {}).get(args.metric)
+        if b is None or n is None:
+            print(f"{name:<26}{b if b is not None else '-':>12}{n if n is not None else '-':>12}{'-':>9}")
+            continue
+        ratio = n / b if b else float("inf")
+        mark = ""
+        if args.fail_above and ratio > args.fail_above:
+            regressions.append(name)
+            mark = "  ⚠️"
+        print(f"{name:<26}{b:>12.3f}{n:>12.3f}{ratio:>8.2f}x{mark}")
+
+    if regressions:
+        print(f"🚨 성능 저하 감지: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
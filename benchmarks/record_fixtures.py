@@ -0,0 +1,169 @@
+"""
+벤치마크 입력(fixtures) 기록 스크립트
+
+실제 서비스에서 입력을 받아 benchmarks/fixtures 에 gzip으로 저장합니다. 장중에 실행하면 가장 현실적인 입력이 됩니다.
+    --naver : 네이버 상승/하락 시세 페이지(type_2 테이블) 4종
+    --etf   : 네이버 ETF 전종목 API 응답
+    --toss  : 토스증권 투자자별 순매수/순매도 랭킹 스냅샷 (Chrome 필요)
+    --pdf   : Supabase ETF_PDF 테이블 추출본 (Project_URL / Secret_keys 필요)
+    --universe : 기록한 ETF API 응답으로 ETF 유니버스 파일(toss_crawling/etf_universe.json)을 만듦
+옵션을 지정하지 않으면 네이버 시세와 ETF API만 기록합니다.
+
+기록한 파일은 fixtures/MANIFEST.json에 synthetic=false와 기록 시각으로 표시됩니다.
+저장소의 기본 fixtures는 네트워크 없이 만든 합성 대역(synthetic=true)이므로, 합성 입력으로는 유니버스를 만들지 않습니다.
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+from datetime import datetime, timedelta, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import requests
+
+from run_benchmarks import SISE_FIXTURES, MANIFEST_PATH, load_manifest, load_json_fixture, is_synthetic
+
+ETF_LIST_URL = "https://finance.naver.com/api/sise/etfItemList.nhn"
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Referer': 'https://finance.naver.com/sise/etf.nhn'
+}
+
+
+def write_fixture(name, content, source):
+    """실제 응답을 fixture로 저장하고 MANIFEST에 기록본(synthetic=false)으로 표시합니다."""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    with gzip.open(os.path.join(FIXTURE_DIR, name), "wb") as f:
+        f.write(content)
+    manifest = load_manifest()
+    manifest[name] = {
+        "synthetic": False,
+        "source": source,
+        "recorded_at": datetime.now(timezone(timedelta(hours=9))).replace(microsecond=0).isoformat(),
+    }
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(manifest.items())), f, ensure_ascii=False, indent=1)
+        f.write("\n")
+    print(f"💾 {name} 저장 ({len(content):,} bytes)")
+
+
+def record_naver_sise():
+    for url, market, type_name, fixture_name in SISE_FIXTURES:
+        response = requests.get(url, headers=HEADERS, timeout=10)
+        response.raise_for_status()
+        write_fixture(fixture_name, response.content, url)
+        time.sleep(0.5)
+
+
+def record_naver_etf():
+    response = requests.get(ETF_LIST_URL, headers=HEADERS, timeout=10)
+    response.raise_for_status()
+    write_fixture("naver_etf_item_list.json.gz", response.content, ETF_LIST_URL)
+
+
+def build_universe_from_fixture():
+    """기록한 ETF API 응답으로 ETF 유니버스를 만듭니다. 합성 대역이면 운영 파일을 만들지 않고 종료합니다."""
+    from toss_crawling.etf_universe import refresh_universe, describe_universe, get_universe_codes
+
+    name = "naver_etf_item_list.json.gz"
+    if is_synthetic(name):
+        print(f"🚨 {name}은(는) 합성 대역입니다(fixtures/MANIFEST.json). 실제 응답을 --etf로 먼저 기록하세요. 유니버스를 만들지 않습니다.")
+        sys.exit(1)
+    refresh_universe(load_json_fixture(name).get("result", {}).get("etfItemList", []))
+    print(f"🎯 {describe_universe(get_universe_codes())}")
+
+
+def record_toss():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--window-size=1920,5000")
+
+    for ranking_type in ("buy", "sell"):
+        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+        try:
+            driver.get(f"https://www.tossinvest.com/?ranking-type=domestic_investor_trend&ranking={ranking_type}")
+            WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.CSS_SELECTOR, "a[href*='/stocks/']")))
+            time.sleep(5)
+            for _ in range(5):
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                time.sleep(2)
+
+            spans = driver.find_elements(By.XPATH, "//span[contains(text(), '기준') and (contains(text(), '오늘') or contains(text(), '어제'))]")
+            span_texts = [s.text.strip() for s in spans]
+            items = [
+                {"text": el.text, "href": el.get_attribute("href")}
+                for el in driver.find_elements(By.CSS_SELECTOR, "a[href*='/stocks/']")
+            ]
+            snap = {
+                "ranking_type": ranking_type,
+                "base_times": {"외국인": span_texts[0] if span_texts else "", "기관": span_texts[1] if len(span_texts) > 1 else ""},
+                "items": items,
+            }
+            write_fixture(f"toss_ranking_{ranking_type}.json.gz", json.dumps(snap, ensure_ascii=False).encode("utf-8"),
+                          f"https://www.tossinvest.com/?ranking-type=domestic_investor_trend&ranking={ranking_type}")
+        finally:
+            driver.quit()
+
+
+def record_etf_pdf():
+    from toss_crawling.supabase_client import get_supabase
+
+    all_data = []
+    limit = 1000
+    offset = 0
+    while True:
+        response = get_supabase().table("ETF_PDF").select("*").range(offset, offset + limit - 1).execute()
+        if not response.data:
+            break
+        all_data.extend(response.data)
+        if len(response.data) < limit:
+            break
+        offset += limit
+    write_fixture("etf_pdf.json.gz", json.dumps(all_data, ensure_ascii=False).encode("utf-8"), "Supabase ETF_PDF")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벤치마크 입력 기록")
+    parser.add_argument("--naver", action="store_true")
+    parser.add_argument("--etf", action="store_true")
+    parser.add_argument("--toss", action="store_true")
+    parser.add_argument("--pdf", action="store_true")
+    parser.add_argument("--universe", action="store_true", help="기록한 ETF API 응답으로 ETF 유니버스 파일 갱신 (합성 입력이면 거부)")
+    args = parser.parse_args()
+
+    if not any([args.naver, args.etf, args.toss, args.pdf, args.universe]):
+        args.naver = args.etf = True
+
+    if args.naver:
+        record_naver_sise()
+    if args.etf:
+        record_naver_etf()
+    if args.toss:
+        record_toss()
+    if args.pdf:
+        record_etf_pdf()
+    if args.universe:
+        build_universe_from_fixture()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+기준(baseline) 파서 구현 사본
+
+toss_crawling/parsing.py 로 옮기기 전의 토스/네이버 문자열 파싱 로직을 그대로 보관합니다.
+check_parsing.py 의 교차 검증과 벤치마크 비교 기준으로만 사용합니다.
+"""
+import re
+from datetime import timedelta
+
+
+def parse_amount(amount_str):
+    if not amount_str:
+        return 0
+    try:
+        amount_str = amount_str.replace("순매수", "").replace("순매도", "").replace(",", "").replace(" ", "").replace("-", "").replace("원", "")
+        total_amount = 0.0
+
+        if "조" in amount_str:
+            parts = amount_str.split("조")
+            try:
+                if parts[0].strip():
+                    total_amount += float(parts[0]) * 10000
+            except (ValueError, TypeError):
+                pass
+            amount_str = parts[1] if len(parts) > 1 else ""
+
+        if "억" in amount_str:
+            parts = amount_str.split("억")
+            try:
+                if parts[0].strip():
+                    total_amount += float(parts[0])
+            except (ValueError, TypeError):
+                pass
+            amount_str = parts[1] if len(parts) > 1 else ""
+
+        if "만" in amount_str:
+            parts = amount_str.split("만")
+            try:
+                if parts[0].strip():
+                    total_amount += float(parts[0]) / 10000
+            except (ValueError, TypeError):
+                pass
+
+        return round(total_amount, 4)
+    except Exception:
+        return 0
+
+
+def parse_date(date_str, kst_now):
+    """토스증권 날짜 형식 변환 (기준 구현은 get_kst_now()를 호출하므로 여기서는 기준 시각을 인자로 받습니다)"""
+    today_str = kst_now.strftime('%Y-%m-%d')
+    current_year = kst_now.year
+
+    if not date_str:
+        return today_str
+    if "오늘" in date_str:
+        return today_str
+    if "어제" in date_str:
+        return (kst_now - timedelta(days=1)).strftime('%Y-%m-%d')
+
+    match = re.search(r'(\d+)월\s*(\d+)일', date_str)
+    if match:
+        month = int(match.group(1))
+        day = int(match.group(2))
+        return f"{current_year}-{month:02d}-{day:02d}"
+
+    if re.match(r'\d{4}-\d{2}-\d{2}', date_str):
+        return date_str
+
+    return today_str
+
+
+def naver_close_price(text):
+    close_pric_str = text.strip().replace(',', '')
+    return float(close_pric_str) if close_pric_str else 0.0
+
+
+def naver_pre(text):
+    pre_str = re.sub(r'[^0-9.]', '', text.strip().replace(',', ''))
+    return float(pre_str) if pre_str else 0.0
+
+
+def naver_flu_rt(text):
+    flu_rt_str = text.strip().replace('%', '').replace(',', '').replace('+', '')
+    return float(flu_rt_str) if flu_rt_str else 0.0
+
+
+def naver_trde_qty(text):
+    trde_qty_str = text.strip().replace(',', '')
+    return int(trde_qty_str) if trde_qty_str else 0
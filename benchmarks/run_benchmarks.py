@@ -0,0 +1,560 @@
+"""
+오프라인 벤치마크 실행기
+
+benchmarks/fixtures 의 입력(네이버 type_2 시세 HTML, 네이버 ETF JSON, 토스 랭킹 스냅샷, ETF_PDF 추출본)만으로
+파싱/변환/턴 처리 핫패스를 측정하고 결과를 JSON으로 저장합니다. (네트워크, Supabase 접속 불필요)
+
+입력마다 실제 기록본인지 합성 대역(기록 형식만 같은 가짜 데이터)인지 fixtures/MANIFEST.json의 synthetic으로 표시하고,
+결과 JSON의 meta.synthetic_fixtures에 합성 입력 목록을 남깁니다. 합성 입력의 종목/ETF 코드는 실제와 다르므로
+운영 데이터(ETF 유니버스 등)를 만드는 데 쓰지 않습니다. (record_fixtures.py로 실제 응답을 기록하면 synthetic=false)
+
+사용 예:
+    python benchmarks/run_benchmarks.py                      # 전체 실행 -> benchmarks/results/<commit>.json
+    python benchmarks/run_benchmarks.py --only toss_parse     # 이름에 'toss_parse'가 포함된 항목만 실행
+    python benchmarks/compare.py results/base.json results/new.json
+"""
+import os
+import sys
+import io
+import gzip
+import json
+import time
+import types
+import random
+import argparse
+import platform
+import statistics
+import subprocess
+import contextlib
+from datetime import datetime, timedelta, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+MANIFEST_PATH = os.path.join(FIXTURE_DIR, "MANIFEST.json")
+RESULT_DIR = os.path.join(BENCH_DIR, "results")
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+if BENCH_DIR not in sys.path:
+    sys.path.insert(0, BENCH_DIR)
+
+SISE_FIXTURES = [
+    ("https://finance.naver.com/sise/sise_rise.naver?sosok=0", "KOSPI", "상승", "naver_sise_rise_kospi.html.gz"),
+    ("https://finance.naver.com/sise/sise_rise.naver?sosok=1", "KOSDAQ", "상승", "naver_sise_rise_kosdaq.html.gz"),
+    ("https://finance.naver.com/sise/sise_fall.naver?sosok=0", "KOSPI", "하락", "naver_sise_fall_kospi.html.gz"),
+    ("https://finance.naver.com/sise/sise_fall.naver?sosok=1", "KOSDAQ", "하락", "naver_sise_fall_kosdaq.html.gz"),
+]
+
+
+def read_fixture(name, mode="rb"):
+    with gzip.open(os.path.join(FIXTURE_DIR, name), mode) as f:
+        return f.read()
+
+
+def load_json_fixture(name):
+    return json.loads(read_fixture(name, "rt"))
+
+
+def load_manifest():
+    """fixtures/MANIFEST.json (파일명 -> synthetic, source, recorded_at). 없으면 빈 dict"""
+    try:
+        with open(MANIFEST_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def is_synthetic(name):
+    """fixture가 합성 대역이면 True (MANIFEST에 없으면 기록 여부를 알 수 없으므로 합성으로 취급)"""
+    return load_manifest().get(name, {}).get("synthetic", True)
+
+
+def synthetic_fixtures():
+    return sorted(name for name in os.listdir(FIXTURE_DIR) if name.endswith(".gz") and is_synthetic(name))
+
+
+class SnapshotElement:
+    """토스 랭킹 스냅샷 항목을 WebElement 인터페이스(text, get_attribute)로 감싸는 객체"""
+
+    def __init__(self, text, href):
+        self.text = text
+        self._href = href
+
+    def get_attribute(self, name):
+        return self._href if name == "href" else None
+
+
+class FixtureResponse:
+    """requests.get 대신 fixtures 페이지를 돌려주는 응답 객체"""
+
+    def __init__(self, content):
+        self.content = content
+        self.encoding = None
+
+    def raise_for_status(self):
+        pass
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def build_toss_day_rows(snapshots, turns, seed=7):
+    """토스 스냅샷 1턴 분량을 turns개 턴으로 복제하여 하루치 toss_yg_score_stk 레코드를 만듭니다."""
+    from toss_crawling.toss_yg_score_stk import extract_toss_items
+
+    rng = random.Random(seed)
+    base = datetime(2026, 10, 19, 9, 0, tzinfo=timezone(timedelta(hours=9)))
+    rows = []
+    next_id = 1
+    for turn in range(turns):
+        collected_at = (base + timedelta(minutes=turn)).isoformat()
+        for ranking_type, snap in snapshots.items():
+            items = [SnapshotElement(i["text"], i["href"]) for i in snap["items"]]
+            data, _ = extract_toss_items(items, ranking_type, collected_at, snap["base_times"], False)
+            for record in data:
+                record = dict(record)
+                record["id"] = next_id
+                record["amount"] = round(record["amount"] * rng.uniform(0.8, 1.2), 4)
+                next_id += 1
+                rows.append(record)
+    return rows
+
+
+def build_market_sum_pages(sise_html, per_page=50):
+    """
+    fixtures 상승/하락 페이지의 종목으로 시가총액 목록(sise_market_sum) 형식의 페이지들을 만듭니다.
+    (전 종목 모드 측정용, {url: euc-kr bytes}와 원본 종목 수를 반환)
+    """
+    from naver.naver_utils import parse_naver_sise_html, MARKET_SUM_URL, MARKET_SUM_MARKETS
+
+    rows = {}
+    for market, type_name, html in sise_html:
+        for row in parse_naver_sise_html(html, market, type_name, ""):
+            rows.setdefault(row["stk_cd"], row)
+
+    pages = {}
+    for market, sosok in MARKET_SUM_MARKETS:
+        market_rows = [row for row in rows.values() if row["market"] == market]
+        last_page = max(1, -(-len(market_rows) // per_page))
+        for page in range(1, last_page + 1):
+            body = []
+            for n, row in enumerate(market_rows[(page - 1) * per_page:page * per_page], start=(page - 1) * per_page + 1):
+                blind = row["type"] if row["pre"] else "보합"
+                body.append(
+                    f'<tr><td class="no">{n}</td><td><a href="/item/main.naver?code={row["stk_cd"]}" class="tltle">{row["stk_nm"]}</a></td>'
+                    f'<td class="number">{row["close_pric"]:,.0f}</td>'
+                    f'<td class="number"><em class="bu_p"><span class="blind">{blind}</span></em><span class="tah"> {abs(row["pre"]):,.0f} </span></td>'
+                    f'<td class="number"><span class="tah p11">{row["flu_rt"]:+.2f}%</span></td><td class="number">100</td>'
+                    f'<td class="number">12,345</td><td class="number">1,000,000</td><td class="number">12.34</td>'
+                    f'<td class="number">{row["trde_qty"]:,}</td><td class="number">10.5</td><td class="number">5.2</td><td class="center"></td></tr>'
+                )
+            html = (
+                '<html><body><table class="type_2"><tbody>' + "".join(body) + '</tbody></table>'
+                f'<table class="Nnavi"><tr><td class="pgRR"><a href="/sise/sise_market_sum.naver?sosok={sosok}&page={last_page}">맨뒤</a></td></tr></table>'
+                '</body></html>'
+            )
+            pages[MARKET_SUM_URL.format(sosok=sosok, page=page)] = html.encode("euc-kr")
+    return pages, len(rows)
+
+
+def setup_fixtures():
+    """벤치마크에 필요한 입력을 한 번만 로드합니다. (측정 구간에서 제외)"""
+    fx = {}
+    fx["sise_pages"] = [(url, market, type_name, read_fixture(fn)) for url, market, type_name, fn in SISE_FIXTURES]
+    fx["sise_html"] = [(market, type_name, content.decode("euc-kr")) for _, market, type_name, content in fx["sise_pages"]]
+    fx["etf_json_bytes"] = read_fixture("naver_etf_item_list.json.gz")
+    fx["toss_snapshots"] = {rt: load_json_fixture(f"toss_ranking_{rt}.json.gz") for rt in ("buy", "sell")}
+    fx["etf_pdf_rows"] = load_json_fixture("etf_pdf.json.gz")
+
+    amount_strings = []
+    for snap in fx["toss_snapshots"].values():
+        for item in snap["items"]:
+            for line in item["text"].split("\n"):
+                if any(unit in line for unit in ["조", "억", "만"]):
+                    amount_strings.append(line.strip())
+    fx["amount_strings"] = amount_strings
+    fx["date_strings"] = ["오늘", "어제", "1월 30일", "12월 3일", "2026-10-17", "오늘 14:30 기준", "", "3월5일"] * 100
+    return fx
+
+
+def bench_naver_sise_parse(fx):
+    from naver.naver_utils import parse_naver_sise_html
+
+    def run():
+        n = 0
+        for market, type_name, html in fx["sise_html"]:
+            n += len(parse_naver_sise_html(html, market, type_name, "2026-10-19T10:00:00+09:00"))
+        return n
+    return run
+
+
+def bench_naver_etf_parse(fx):
+    from naver.naver_etf_price import parse_naver_etf_items
+
+    def run():
+        etf_list = json.loads(fx["etf_json_bytes"])["result"]["etfItemList"]
+        return len(parse_naver_etf_items(etf_list, "2026-10-19T10:00:00+09:00"))
+    return run
+
+
+def _etf_price_records(fx):
+    from naver.naver_etf_price import parse_naver_etf_items
+
+    etf_list = json.loads(fx["etf_json_bytes"])["result"]["etfItemList"]
+    return parse_naver_etf_items(etf_list, "2026-10-19T10:00:00+09:00")
+
+
+def bench_etf_payload_sdk(fx):
+    """기존 저장 경로의 직렬화: 이력용 dict 리스트를 다시 만들고 두 테이블 모두 500행 단위 json.dumps (SDK 기본 직렬화)"""
+    from naver.naver_etf_price import HISTORY_FIELDS
+
+    data = _etf_price_records(fx)
+
+    def run():
+        history = [{field: d[field] for field in HISTORY_FIELDS} for d in data]
+        sent = 0
+        for rows in (data, history):
+            for i in range(0, len(rows), 500):
+                sent += len(json.dumps(rows[i:i + 500]).encode("utf-8"))
+        return len(data)
+    return run
+
+
+def _bench_etf_payload(fmt, compress):
+    def factory(fx):
+        """컬럼 단위 저장 경로(bulk_write)로 naver_etf_price + 이력 요청 본문을 만듭니다. (전송 없이 본문 생성 비용만 측정)"""
+        from naver import naver_etf_price
+        from toss_crawling import bulk_write
+        from toss_crawling.supabase_client import set_supabase
+
+        data = _etf_price_records(fx)
+        set_supabase(types.SimpleNamespace(post_table=lambda table, body, headers, params: None))
+        bulk_write.BULK_WRITE_FORMAT, bulk_write.BULK_WRITE_GZIP = fmt, compress
+
+        def run():
+            naver_etf_price.save_etf_prices(data)
+            return len(data)
+        return run
+    return factory
+
+
+def bench_toss_parse_amount(fx):
+    from toss_crawling.toss_yg_score_stk import parse_amount
+
+    def run():
+        for s in fx["amount_strings"]:
+            parse_amount(s)
+        return len(fx["amount_strings"])
+    return run
+
+
+def bench_toss_parse_amounts(fx):
+    from toss_crawling.parsing import parse_amounts
+
+    def run():
+        return len(parse_amounts(fx["amount_strings"]))
+    return run
+
+
+def bench_toss_parse_date(fx):
+    from toss_crawling.toss_yg_score_stk import parse_date
+
+    def run():
+        for s in fx["date_strings"]:
+            parse_date(s)
+        return len(fx["date_strings"])
+    return run
+
+
+def bench_toss_extract_items(fx):
+    from toss_crawling.toss_yg_score_stk import extract_toss_items
+
+    elements = {rt: [SnapshotElement(i["text"], i["href"]) for i in snap["items"]] for rt, snap in fx["toss_snapshots"].items()}
+
+    def run():
+        n = 0
+        for rt, snap in fx["toss_snapshots"].items():
+            data, _ = extract_toss_items(elements[rt], rt, "2026-10-19T10:00:00+09:00", snap["base_times"], False)
+            n += len(data)
+        return n
+    return run
+
+
+def bench_toss_transform_day(fx):
+    from toss_crawling.supabase_client import transform_toss_data
+
+    rows = build_toss_day_rows(fx["toss_snapshots"], turns=120)
+
+    def run():
+        transform_toss_data(rows)
+        return len(rows)
+    return run
+
+
+def bench_etf_pdf_transform(fx):
+    from toss_crawling.supabase_client import transform_etf_pdf
+
+    def run():
+        return len(transform_etf_pdf(fx["etf_pdf_rows"]))
+    return run
+
+
+def bench_score_history_turn(fx):
+    """ETF 1,500개 x 390턴(하루치) 이력이 쌓인 상태에서 1턴 추가 + 모멘텀/상위 종목 계산"""
+    from toss_crawling.score_history import ScoreHistory
+
+    rng = random.Random(7)
+    codes = [f"{i:06d}" for i in range(1500)]
+    history = ScoreHistory()
+    base = datetime(2026, 10, 19, 9, 0, tzinfo=timezone(timedelta(hours=9))).timestamp()
+
+    def turn_records():
+        return [{"etf_code": code, "total_score": rng.uniform(-10, 10), "foreign_score": rng.uniform(-5, 5),
+                 "institution_score": rng.uniform(-5, 5)} for code in codes]
+
+    for turn in range(390):
+        history.push(base + 60 * turn, turn_records())
+    records = turn_records()
+    state = {"turn": 390}
+
+    def run():
+        history.push(base + 60 * state["turn"], records)
+        state["turn"] += 1
+        history.momentum()
+        for w in history.windows:
+            history.top_movers(w)
+        return len(records)
+    return run
+
+
+def bench_toss_replay_day(fx):
+    """하루치(390턴) toss_yg_score_stk 스냅샷으로 모든 턴의 YG Score를 재계산"""
+    import pandas as pd
+    from toss_crawling.supabase_client import prepare_toss_chunk, transform_etf_pdf
+    from toss_crawling.score_replay import replay_day
+
+    snapshots = prepare_toss_chunk(pd.DataFrame(build_toss_day_rows(fx["toss_snapshots"], turns=390)))
+    df_pdf = transform_etf_pdf(fx["etf_pdf_rows"])
+
+    def run():
+        return len(replay_day(snapshots, df_pdf))
+    return run
+
+
+def bench_etf_similarity_build(fx):
+    from toss_crawling.supabase_client import transform_etf_pdf
+    from toss_crawling.etf_similarity import build_similarity
+
+    df_pdf = transform_etf_pdf(fx["etf_pdf_rows"])
+
+    def run():
+        return build_similarity(df_pdf).pairs
+    return run
+
+
+def bench_snapshot_store_join(fx):
+    """공유 스냅샷 저장소에 시세/ETF/수급 1턴을 발행한 뒤, 전 종목의 최신 시세+수급을 조인합니다."""
+    import atexit
+    import tempfile
+    from naver.naver_etf_price import parse_naver_etf_items
+    from naver.naver_utils import parse_naver_sise_html
+    from toss_crawling.snapshot_store import SnapshotStore
+    from toss_crawling.toss_yg_score_stk import extract_toss_items
+
+    tmp = tempfile.TemporaryDirectory()
+    atexit.register(tmp.cleanup)
+    store = SnapshotStore(os.path.join(tmp.name, "snapshot_store"))
+    timestamp = "2026-10-19T10:00:00+09:00"
+    quotes = [row for market, type_name, html in fx["sise_html"] for row in parse_naver_sise_html(html, market, type_name, timestamp)]
+    etfs = parse_naver_etf_items(json.loads(fx["etf_json_bytes"])["result"]["etfItemList"], timestamp)
+    flows = {}
+    for ranking_type, snap in fx["toss_snapshots"].items():
+        items = [SnapshotElement(i["text"], i["href"]) for i in snap["items"]]
+        data, _ = extract_toss_items(items, ranking_type, timestamp, snap["base_times"], False)
+        for item in data:
+            field = "foreign" if item["investor"] == "외국인" else "institution"
+            flows.setdefault(item["stock_code"], {"stock_code": item["stock_code"]})[field] = item["amount"]
+    codes = [row["stk_cd"] for row in quotes]
+
+    def run():
+        store.publish("quote", quotes, key="stk_cd", timestamp=timestamp)
+        store.publish("etf", etfs, key="etf_code", timestamp=timestamp)
+        store.publish("flow", list(flows.values()), key="stock_code", timestamp=timestamp)
+        joined = store.join(codes, sources=("quote", "flow"))
+        return len(joined["quote"]["close_pric"])
+    return run
+
+
+def bench_naver_local_score(fx):
+    """수집한 상승/하락 시세와 ETF_PDF 구성비중으로 1턴의 네이버 ETF 점수를 로컬 엔진(naver_score)으로 계산합니다."""
+    from naver.naver_utils import parse_naver_sise_html
+    from naver.naver_score import NaverScoreEngine
+    from toss_crawling.supabase_client import transform_etf_pdf
+
+    quotes = []
+    for market, type_name, html in fx["sise_html"]:
+        quotes.extend(parse_naver_sise_html(html, market, type_name, "2026-10-19T10:00:00+09:00"))
+    engine = NaverScoreEngine(transform_etf_pdf(fx["etf_pdf_rows"]))
+
+    def run():
+        return len(engine.score(quotes, "2026-10-19T10:00:00+09:00"))
+    return run
+
+
+def bench_naver_realtime_turn(fx):
+    """fixtures 페이지와 로컬 DB 대역으로 naver_realtime 1턴(수집 -> 저장 -> 점수 요청)을 실행합니다."""
+    from naver import naver_utils, naver_realtime
+    from toss_crawling import rate_limit
+    from toss_crawling.fake_supabase import FakeSupabaseClient
+    from toss_crawling.supabase_client import set_supabase
+
+    # fixtures 페이지를 쓰므로 호출 속도 제한은 두지 않음 (반복 측정이 대기 시간으로 채워지지 않도록)
+    rate_limit._buckets["finance.naver.com"] = rate_limit.TokenBucket("finance.naver.com", rate=1e9, burst=1e9)
+    pages = {url: content for url, _, _, content in fx["sise_pages"]}
+    naver_utils.requests = types.SimpleNamespace(get=lambda url, **kwargs: FixtureResponse(pages[url]))
+    naver_realtime.time = types.SimpleNamespace(sleep=lambda seconds: None)
+    set_supabase(FakeSupabaseClient(latency_ms=fx["db_latency_ms"]))
+
+    def run():
+        collected = naver_realtime.collect_realtime_quotes("2026-10-19T10:00:00+09:00")
+        naver_realtime.save_realtime_quotes(collected)
+        return len(collected)
+    return run
+
+
+def bench_naver_full_universe_turn(fx):
+    """시가총액 목록 전 페이지를 동시에 요청하는 전 종목 모드 1턴(수집 -> 저장 -> 점수 요청)을 실행합니다."""
+    from naver import naver_utils, naver_realtime
+    from toss_crawling import rate_limit
+    from toss_crawling.fake_supabase import FakeSupabaseClient
+    from toss_crawling.supabase_client import set_supabase
+
+    rate_limit._buckets["finance.naver.com"] = rate_limit.TokenBucket("finance.naver.com", rate=1e9, burst=1e9)
+    pages, _ = build_market_sum_pages(fx["sise_html"])
+    naver_utils.requests = types.SimpleNamespace(get=lambda url, **kwargs: FixtureResponse(pages[url]))
+    set_supabase(FakeSupabaseClient(latency_ms=fx["db_latency_ms"]))
+
+    def run():
+        collected = naver_realtime.collect_realtime_quotes("2026-10-19T10:00:00+09:00", full_universe=True)
+        naver_realtime.save_realtime_quotes(collected)
+        return len(collected)
+    return run
+
+
+BENCHMARKS = {
+    "naver_sise_parse": bench_naver_sise_parse,
+    "naver_etf_parse": bench_naver_etf_parse,
+    "etf_payload_sdk": bench_etf_payload_sdk,
+    "etf_payload_json": _bench_etf_payload("json", False),
+    "etf_payload_csv": _bench_etf_payload("csv", False),
+    "etf_payload_csv_gzip": _bench_etf_payload("csv", True),
+    "toss_parse_amount": bench_toss_parse_amount,
+    "toss_parse_amounts": bench_toss_parse_amounts,
+    "toss_parse_date": bench_toss_parse_date,
+    "toss_extract_items": bench_toss_extract_items,
+    "toss_transform_day": bench_toss_transform_day,
+    "toss_replay_day": bench_toss_replay_day,
+    "etf_pdf_transform": bench_etf_pdf_transform,
+    "etf_similarity_build": bench_etf_similarity_build,
+    "naver_local_score": bench_naver_local_score,
+    "naver_realtime_turn": bench_naver_realtime_turn,
+    "naver_full_universe_turn": bench_naver_full_universe_turn,
+    "score_history_turn": bench_score_history_turn,
+    "snapshot_store_join": bench_snapshot_store_join,
+}
+
+
+def measure(run, repeat, warmup):
+    """run()을 warmup회 실행한 뒤 repeat회 측정하여 통계를 반환합니다. (출력은 버림)"""
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink):
+        for _ in range(warmup):
+            run()
+        timings = []
+        items = 0
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            items = run()
+            timings.append(time.perf_counter() - t0)
+            sink.seek(0)
+            sink.truncate()
+
+    timings_ms = sorted(t * 1000 for t in timings)
+    median_ms = statistics.median(timings_ms)
+    return {
+        "repeat": repeat,
+        "items": items,
+        "min_ms": round(timings_ms[0], 4),
+        "median_ms": round(median_ms, 4),
+        "mean_ms": round(statistics.fmean(timings_ms), 4),
+        "p95_ms": round(timings_ms[min(len(timings_ms) - 1, int(len(timings_ms) * 0.95))], 4),
+        "stdev_ms": round(statistics.stdev(timings_ms), 4) if len(timings_ms) > 1 else 0.0,
+        "items_per_sec": round(items / (median_ms / 1000), 1) if median_ms > 0 and items else None,
+    }
+
+
+def git_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=PROJECT_ROOT, capture_output=True, text=True).stdout.strip())
+        return commit or "unknown", dirty
+    except OSError:
+        return "unknown", False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 벤치마크 실행")
+    parser.add_argument("--repeat", type=int, default=20, help="측정 반복 횟수")
+    parser.add_argument("--warmup", type=int, default=2, help="측정 전 워밍업 횟수")
+    parser.add_argument("--only", action="append", default=[], help="이름에 포함된 항목만 실행 (여러 번 지정 가능)")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="턴 벤치마크의 로컬 DB 대역 요청 지연(ms)")
+    parser.add_argument("--out", help="결과 JSON 경로 (기본: benchmarks/results/<commit>.json)")
+    args = parser.parse_args()
+
+    # 오프라인 실행: 실제 Supabase 대신 메모리 대역(fake_supabase)으로 클라이언트 모듈을 로드합니다.
+    os.environ.setdefault("SUPABASE_BACKEND", "memory")
+
+    commit, dirty = git_info()
+    fx = setup_fixtures()
+    synthetic = synthetic_fixtures()
+    if synthetic:
+        print(f"ℹ️ 합성 입력 {len(synthetic)}개로 측정합니다 (fixtures/MANIFEST.json): {', '.join(synthetic)}")
+    fx["db_latency_ms"] = args.db_latency_ms
+
+    results = {}
+    for name, factory in BENCHMARKS.items():
+        if args.only and not any(key in name for key in args.only):
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            run = factory(fx)
+        stats = measure(run, args.repeat, args.warmup)
+        results[name] = stats
+        print(f"⏱️ {name:<24} median {stats['median_ms']:>10.3f} ms | p95 {stats['p95_ms']:>10.3f} ms | items {stats['items']}")
+
+    report = {
+        "meta": {
+            "git_commit": commit,
+            "git_dirty": dirty,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": datetime.now(timezone(timedelta(hours=9))).isoformat(),
+            "synthetic_fixtures": synthetic,
+        },
+        "options": {"repeat": args.repeat, "warmup": args.warmup, "db_latency_ms": args.db_latency_ms},
+        "benchmarks": results,
+    }
+
+    out_path = args.out or os.path.join(RESULT_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"💾 결과 저장: {out_path}")
+
+
+if __name__ == "__main__":
+    main()
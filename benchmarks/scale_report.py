@@ -0,0 +1,214 @@
+"""
+규모별 처리 시간/메모리 리포트
+
+synthetic_market.SyntheticMarket으로 운영 규모의 여러 배수(--scales)에 해당하는 하루 데이터를 만들고,
+수집기가 쓰는 기존 함수에 그대로 넣어 단계별 시간과 최대 메모리(tracemalloc peak)를 측정합니다.
+    toss_load      : 페이지(1000행) 단위 prepare_toss_chunk + aggregate_toss_chunks (load_toss_data_from_supabase의 DB 이후 경로)
+    toss_replay    : score_replay.replay_day (하루치 모든 턴의 YG Score)
+    score_history  : 재계산한 턴별 ETF 점수를 ScoreHistory에 넣고 모멘텀 계산
+    etf_pdf        : transform_etf_pdf (ETF_PDF 원본 -> 구성종목 DataFrame)
+    naver_score    : NaverScoreEngine 생성 + 턴마다 로컬 ETF 점수 계산
+    etf_write      : 턴마다 parse_naver_etf_items + save_etf_prices 요청 본문 생성 (전송 없음, BULK_WRITE_FORMAT)
+시간은 tracemalloc 없이 한 번, 메모리는 tracemalloc을 켜고 다시 한 번 실행하여 측정합니다. (--no-memory로 생략)
+마지막에 단계별로 가장 작은 규모 대비 가장 큰 규모의 시간/메모리 증가 지수(log 증가비 / log 입력 행 수 비)를 출력하여
+입력 크기보다 빠르게 늘어나는(지수 > 1.2) 단계를 표시합니다.
+toss_replay는 구성비중을 밀집 행렬[수급 종목, ETF]로 만들므로 메모리가 (종목 수 × ETF 수)로 늘어납니다.
+(scale 10에서 약 650 MiB) 30배 이상은 --stages에서 toss_replay/score_history를 빼고 실행합니다.
+
+사용 예:
+    python benchmarks/scale_report.py                                  # scale 1, 3, 10 / 30턴 / 60초 주기
+    python benchmarks/scale_report.py --scales 1,30,100 --stages toss_load,naver_score,etf_write --no-memory
+    python benchmarks/scale_report.py --scales 1,10 --turns 120 --cadence 5 --out /tmp/scale.json
+"""
+import os
+import io
+import sys
+import json
+import math
+import time
+import types
+import argparse
+import platform
+import tracemalloc
+import contextlib
+from datetime import datetime, timedelta, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+for path in (PROJECT_ROOT, BENCH_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+os.environ.setdefault("SUPABASE_BACKEND", "memory")
+
+import pandas as pd
+
+from synthetic_market import SyntheticMarket
+from run_benchmarks import git_info
+from naver import naver_etf_price
+from naver.naver_score import NaverScoreEngine
+from toss_crawling.supabase_client import prepare_toss_chunk, aggregate_toss_chunks, transform_etf_pdf, set_supabase
+from toss_crawling.score_replay import replay_day
+from toss_crawling.score_history import ScoreHistory
+
+SUPERLINEAR_EXPONENT = 1.2
+
+
+def stage_toss_load(day, state):
+    rows = day["toss"]
+    chunks = (prepare_toss_chunk(pd.DataFrame(rows[i:i + 1000])) for i in range(0, len(rows), 1000))
+    aggregate_toss_chunks(chunks)
+    return len(rows)
+
+
+def stage_toss_replay(day, state):
+    state["replayed"] = replay_day(prepare_toss_chunk(pd.DataFrame(day["toss"])), state["df_pdf"])
+    return len(day["toss"])
+
+
+def stage_score_history(day, state):
+    replayed = state["replayed"]
+    history = ScoreHistory()
+    for turn, frame in replayed.groupby("updated_at", sort=True):
+        history.push(datetime.fromisoformat(turn).timestamp(), frame.to_dict("records"))
+        history.momentum()
+    return len(replayed)
+
+
+def stage_etf_pdf(day, state):
+    state["df_pdf"] = transform_etf_pdf(day["etf_pdf"])
+    return len(day["etf_pdf"])
+
+
+def stage_naver_score(day, state):
+    engine = NaverScoreEngine(state["df_pdf"])
+    for turn, quotes in zip(day["turns"], day["quotes"]):
+        engine.score(quotes, turn)
+    return sum(len(quotes) for quotes in day["quotes"])
+
+
+def stage_etf_write(day, state):
+    set_supabase(types.SimpleNamespace(post_table=lambda table, body, headers, params: None))
+    for turn, items in zip(day["turns"], day["etf_items"]):
+        naver_etf_price.save_etf_prices(naver_etf_price.parse_naver_etf_items(items, turn))
+    return sum(len(items) for items in day["etf_items"])
+
+
+# 실행 순서 (toss_replay는 etf_pdf, score_history는 toss_replay 결과 사용)
+STAGES = {
+    "etf_pdf": stage_etf_pdf,
+    "toss_load": stage_toss_load,
+    "toss_replay": stage_toss_replay,
+    "score_history": stage_score_history,
+    "naver_score": stage_naver_score,
+    "etf_write": stage_etf_write,
+}
+
+
+def run_stage(func, day, state, trace):
+    """(입력 행 수, 초, 최대 메모리 MiB 또는 None)"""
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows = func(day, state)
+    seconds = time.perf_counter() - started
+    peak = None
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return rows, seconds, peak
+
+
+def run_scale(scale, args):
+    market = SyntheticMarket(scale=scale, seed=args.seed, cadence_seconds=args.cadence)
+    print(f"\n🧪 {market.describe()}")
+    started = time.perf_counter()
+    day = market.generate_day(args.turns, full_universe=args.full_universe)
+    print(f"   {args.turns}턴 생성 {time.perf_counter() - started:.1f}s")
+
+    results = {}
+    for trace in ([False, True] if args.memory else [False]):
+        state = {}
+        for name, func in STAGES.items():
+            if name not in args.stages:
+                continue
+            rows, seconds, peak = run_stage(func, day, state, trace)
+            entry = results.setdefault(name, {"rows": rows})
+            if trace:
+                entry["peak_mib"] = round(peak, 2)
+            else:
+                entry["seconds"] = round(seconds, 4)
+                entry["per_turn_ms"] = round(seconds / args.turns * 1000, 3)
+
+    for name, entry in results.items():
+        peak = f"{entry['peak_mib']:>9.1f} MiB" if "peak_mib" in entry else ""
+        print(f"   ⏱️ {name:<14} 입력 {entry['rows']:>10,}행 | {entry['seconds']:>9.3f}s | 턴당 {entry['per_turn_ms']:>9.2f}ms {peak}")
+    return {"describe": market.describe(), "stages": results}
+
+
+def scaling_exponents(report):
+    """단계별 (가장 작은 규모 -> 가장 큰 규모) 시간/메모리 증가 지수"""
+    scales = sorted(report, key=float)
+    if len(scales) < 2:
+        return {}
+    low, high = report[scales[0]]["stages"], report[scales[-1]]["stages"]
+    exponents = {}
+    for name in high:
+        rows_ratio = high[name]["rows"] / max(1, low[name]["rows"])
+        if rows_ratio <= 1:
+            continue
+        exponents[name] = {"time": round(math.log(high[name]["seconds"] / max(1e-9, low[name]["seconds"])) / math.log(rows_ratio), 2)}
+        if "peak_mib" in high[name]:
+            exponents[name]["memory"] = round(math.log(max(1e-3, high[name]["peak_mib"]) / max(1e-3, low[name]["peak_mib"])) / math.log(rows_ratio), 2)
+    return exponents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="규모별 처리 시간/메모리 리포트")
+    parser.add_argument("--scales", default="1,3,10", help="운영 규모 대비 배수 (쉼표 구분)")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"측정할 단계 (쉼표 구분, 기본 전체: {','.join(STAGES)})")
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--cadence", type=float, default=60, help="턴 주기(초)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--full-universe", action="store_true", help="네이버 시세를 전 종목으로 생성")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="tracemalloc 메모리 측정 생략")
+    parser.add_argument("--out", help="리포트 JSON 경로")
+    args = parser.parse_args()
+    args.stages = [name.strip() for name in args.stages.split(",") if name.strip()]
+    # 의존 단계 포함 (toss_replay -> etf_pdf, score_history -> toss_replay, naver_score -> etf_pdf)
+    needs = {"toss_replay": ["etf_pdf"], "score_history": ["toss_replay", "etf_pdf"], "naver_score": ["etf_pdf"]}
+    args.stages = [name for name in STAGES if name in args.stages or any(name in needs.get(s, []) for s in args.stages)]
+
+    report = {}
+    for scale in [float(s) for s in args.scales.split(",") if s.strip()]:
+        report[f"{scale:g}"] = run_scale(scale, args)
+
+    exponents = scaling_exponents(report)
+    if exponents:
+        scales = sorted(report, key=float)
+        print(f"\n📈 증가 지수 (scale {scales[0]} -> {scales[-1]}, 1.0 = 입력 행 수에 비례)")
+        for name, exponent in exponents.items():
+            memory = f" | 메모리 {exponent['memory']:>5.2f}" if "memory" in exponent else ""
+            mark = "  ⚠️ 입력보다 빠르게 증가" if max(exponent.values()) > SUPERLINEAR_EXPONENT else ""
+            print(f"   {name:<14} 시간 {exponent['time']:>5.2f}{memory}{mark}")
+
+    if args.out:
+        commit, dirty = git_info()
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "git_commit": commit,
+                    "git_dirty": dirty,
+                    "python": platform.python_version(),
+                    "created_at": datetime.now(timezone(timedelta(hours=9))).isoformat(),
+                },
+                "options": {"turns": args.turns, "cadence": args.cadence, "seed": args.seed, "full_universe": args.full_universe},
+                "scales": report,
+                "exponents": exponents,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"💾 리포트 저장: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+합성 시장 데이터 생성기 (규모 테스트용)
+
+fixtures는 운영 규모(턴당 토스 랭킹 약 200행, 네이버 상승/하락 수백 행, ETF 약 1000개) 한 턴 분량뿐이므로,
+10~100배 규모(전 종목 시세, 더 많은 ETF, 초 단위 주기)에서 로드/점수 계산/저장이 어떻게 늘어나는지 보려면 입력을 만들어야 합니다.
+SyntheticMarket은 시드로 재현되는 가상 시장을 만들고, 턴마다 수집기가 만드는 것과 같은 형식의 레코드를 생성합니다.
+    - 종목: 시장(KOSPI/KOSDAQ), 전일 종가(로그정규), 종목별 변동성. 턴마다 주기(cadence)에 맞춘 랜덤워크로 현재가와 누적 거래량이 변함
+    - 수급: 외국인/기관의 종목별 누적 순매수(억)가 두꺼운 꼬리 분포의 증분으로 변하고, 순매수/순매도 상위 종목이 토스 랭킹이 됨
+    - ETF: 구성종목은 시가총액이 큰 종목일수록 자주 편입(Zipf), 비중은 디리클레 분포. ETF 등락률은 구성종목 등락의 가중합 + 추적오차
+생성 레코드 형식
+    toss_rows       : toss_yg_score_stk (extract_toss_items 결과 + id)
+    naver_quote_rows: naver_realtime_stk (parse_naver_sise_html 결과, 상승/하락 상위 또는 전 종목)
+    etf_items       : 네이버 etfItemList 응답 항목 (parse_naver_etf_items 입력)
+    etf_pdf_rows    : ETF_PDF 원본 레코드 (transform_etf_pdf 입력)
+규모(scale)는 종목 수, ETF 수, 랭킹 길이, 상승/하락 행 수에 모두 곱해지며, 1이면 운영 규모와 비슷합니다.
+
+사용 예:
+    python benchmarks/synthetic_market.py --scale 10 --turns 60 --cadence 10 --out /tmp/synthetic   # 메모리 DB 초기 데이터
+    SUPABASE_BACKEND=memory FAKE_SUPABASE_DATA_DIR=/tmp/synthetic python toss_crawling/score_replay.py --date 2026-10-19 --no-compare
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+KST = timezone(timedelta(hours=9))
+
+# scale=1 기준 규모 (운영 규모와 비슷하게)
+BASE_STOCKS = 2500
+BASE_ETFS = 1000
+BASE_RANKED = 50            # 투자자 × 매매타입별 토스 랭킹 길이 (4개 목록 = 턴당 200행)
+BASE_MOVERS = 600           # 상승/하락 페이지 행 수
+HOLDINGS_PER_ETF = 30
+
+INVESTORS = ("외국인", "기관")
+NAME_HEADS = ("삼성", "한국", "대한", "현대", "동양", "제일", "금호", "신한", "세진", "우리", "태평", "한양", "미래", "동방")
+NAME_TAILS = ("전자", "화학", "중공업", "바이오", "제약", "건설", "금융", "에너지", "통신", "식품", "소재", "로직스")
+ETF_BRANDS = ("KODEX", "TIGER", "ACE", "SOL", "HANARO", "KBSTAR", "RISE", "PLUS")
+ETF_THEMES = ("반도체", "2차전지", "바이오", "자동차", "조선", "방산", "은행", "게임", "K-뷰티", "AI", "리츠", "고배당")
+TRADING_SECONDS = 6.5 * 3600
+
+
+class SyntheticMarket:
+    def __init__(self, scale=1.0, seed=7, cadence_seconds=60, start=None, holdings_per_etf=HOLDINGS_PER_ETF):
+        self.scale = scale
+        self.seed = seed
+        self.cadence_seconds = cadence_seconds
+        self.start = start or datetime(2026, 10, 19, 9, 0, tzinfo=KST)
+        self.rng = np.random.default_rng(seed)
+        self.n_stocks = max(10, int(BASE_STOCKS * scale))
+        self.n_etfs = max(1, int(BASE_ETFS * scale))
+        self.n_ranked = max(1, min(int(BASE_RANKED * scale), self.n_stocks // 2))
+        self.n_movers = max(1, min(int(BASE_MOVERS * scale), self.n_stocks))
+        self.turn = 0
+        self.next_id = 1
+        self._build_stocks()
+        self._build_etfs(holdings_per_etf)
+
+    # --- 유니버스 ---
+    def _build_stocks(self):
+        rng = self.rng
+        codes = rng.choice(1_000_000, size=self.n_stocks + self.n_etfs, replace=False)
+        self.stock_codes = np.array([f"{c:06d}" for c in codes[:self.n_stocks]], dtype=object)
+        self.etf_codes = np.array([f"{c:06d}" for c in codes[self.n_stocks:]], dtype=object)
+        self.stock_names = [f"{NAME_HEADS[i % len(NAME_HEADS)]}{NAME_TAILS[(i // len(NAME_HEADS)) % len(NAME_TAILS)]}{i}"
+                            for i in range(self.n_stocks)]
+        self.markets = np.where(rng.random(self.n_stocks) < 0.4, "KOSPI", "KOSDAQ").astype(object)
+        self.prev_close = np.maximum(100, np.round(rng.lognormal(9.0, 1.2, self.n_stocks), -1))
+        self.price = self.prev_close.copy()
+        self.daily_vol = rng.uniform(0.015, 0.045, self.n_stocks)
+        # 시가총액 순위 (편입 빈도, 거래량, 수급 규모에 사용)
+        self.size_rank = rng.permutation(self.n_stocks)
+        self.turnover = np.maximum(1_000, rng.lognormal(11.5, 1.5, self.n_stocks))
+        self.volume = np.zeros(self.n_stocks, dtype=np.int64)
+        self.flow_scale = 50 / np.sqrt(1 + self.size_rank)          # 대형주일수록 수급 금액(억)이 큼
+        self.flows = np.zeros((len(INVESTORS), self.n_stocks))
+
+    def _build_etfs(self, holdings_per_etf):
+        rng = self.rng
+        popularity = 1 / (1 + self.size_rank) ** 0.8
+        popularity /= popularity.sum()
+        counts = np.clip(rng.poisson(holdings_per_etf, self.n_etfs), 5, self.n_stocks)
+        etf_idx = np.repeat(np.arange(self.n_etfs), counts)
+        holding_idx = rng.choice(self.n_stocks, size=len(etf_idx), p=popularity)
+        # 같은 ETF에 중복으로 뽑힌 구성종목은 하나만 남김
+        _, first = np.unique(etf_idx.astype(np.int64) * self.n_stocks + holding_idx, return_index=True)
+        etf_idx, holding_idx = etf_idx[first], holding_idx[first]
+        # ETF별 디리클레 비중 (감마 표본을 ETF별 합으로 나눔), 현금/기타 자산 비중(0~5%)을 뺀 나머지를 구성종목에 배분
+        gamma = rng.gamma(0.8, size=len(etf_idx))
+        invested = 100 - rng.uniform(0, 5, self.n_etfs)
+        weights = gamma / np.bincount(etf_idx, weights=gamma, minlength=self.n_etfs)[etf_idx] * invested[etf_idx]
+        self.pdf_etf_idx = etf_idx
+        self.pdf_holding_idx = holding_idx
+        self.pdf_weights = np.round(weights, 2)
+        self.etf_names = [f"{ETF_BRANDS[i % len(ETF_BRANDS)]} {ETF_THEMES[(i // len(ETF_BRANDS)) % len(ETF_THEMES)]} {i}"
+                          for i in range(self.n_etfs)]
+        self.etf_tab = rng.integers(1, 8, self.n_etfs)
+        self.etf_base = np.round(rng.uniform(5_000, 50_000, self.n_etfs))
+        self.etf_tracking = np.zeros(self.n_etfs)
+        self.etf_volume = np.zeros(self.n_etfs, dtype=np.int64)
+
+    # --- 턴 진행 ---
+    def timestamp(self, turn=None):
+        turn = self.turn if turn is None else turn
+        return (self.start + timedelta(seconds=turn * self.cadence_seconds)).isoformat()
+
+    def step(self):
+        """한 주기(cadence)만큼 시장을 진행하고 이번 턴 시각(ISO)을 반환합니다."""
+        rng = self.rng
+        dt = self.cadence_seconds / TRADING_SECONDS
+        shock = rng.standard_t(4, self.n_stocks) * self.daily_vol * np.sqrt(dt)
+        self.price = np.clip(self.price * np.exp(shock), self.prev_close * 0.7, self.prev_close * 1.3)
+        self.volume += rng.poisson(self.turnover * dt * 10).astype(np.int64)
+        self.flows += rng.standard_t(3, self.flows.shape) * self.flow_scale * np.sqrt(dt) * 10
+        self.etf_tracking += rng.normal(0, 0.01, self.n_etfs)
+        self.etf_volume += rng.poisson(2_000 * dt * 100, self.n_etfs).astype(np.int64)
+        timestamp = self.timestamp()
+        self.turn += 1
+        return timestamp
+
+    def flu_rt(self):
+        return np.round((self.price / self.prev_close - 1) * 100, 2)
+
+    # --- 레코드 생성 ---
+    def naver_quote_rows(self, collected_at, full_universe=False):
+        """상승/하락 상위 n_movers 종목(full_universe이면 전 종목)의 네이버 시세 레코드"""
+        flu = self.flu_rt()
+        pre = np.round(self.price - self.prev_close)
+        if full_universe:
+            order = np.arange(self.n_stocks)
+        else:
+            movers = np.flatnonzero(flu != 0)
+            order = movers[np.argsort(-np.abs(flu[movers]), kind="stable")[:self.n_movers]]
+        return [
+            {
+                "stk_cd": self.stock_codes[i],
+                "stk_nm": self.stock_names[i],
+                "close_pric": float(np.round(self.price[i])),
+                "pre": float(pre[i]),
+                "flu_rt": float(flu[i]),
+                "trde_qty": int(self.volume[i]),
+                "market": self.markets[i],
+                "type": "상승" if flu[i] > 0 else "하락" if flu[i] < 0 else "보합",
+                "collected_at": collected_at,
+            }
+            for i in order.tolist()
+        ]
+
+    def toss_rows(self, collected_at):
+        """외국인/기관 순매수(buy)·순매도(sell) 상위 n_ranked 종목의 toss_yg_score_stk 레코드"""
+        rows = []
+        for investor_idx, investor in enumerate(INVESTORS):
+            flows = self.flows[investor_idx]
+            ranked = np.argsort(flows, kind="stable")
+            for ranking_type, indices in (("buy", ranked[::-1][:self.n_ranked]), ("sell", ranked[:self.n_ranked])):
+                for i in indices.tolist():
+                    rows.append({
+                        "investor": investor,
+                        "stock_name": self.stock_names[i],
+                        "stock_code": self.stock_codes[i],
+                        "amount": round(abs(float(flows[i])), 4),
+                        "ranking_type": ranking_type,
+                        "collected_at": collected_at,
+                        "id": self.next_id,
+                    })
+                    self.next_id += 1
+        return rows
+
+    def etf_change_rates(self):
+        contribution = np.bincount(self.pdf_etf_idx, weights=self.pdf_weights / 100 * self.flu_rt()[self.pdf_holding_idx],
+                                   minlength=self.n_etfs)
+        return np.round(contribution + self.etf_tracking, 2)
+
+    def etf_items(self):
+        """네이버 etfItemList 응답 항목 (parse_naver_etf_items 입력 형식)"""
+        change_rate = self.etf_change_rates()
+        now_val = np.round(self.etf_base * (1 + change_rate / 100))
+        change_val = now_val - self.etf_base
+        return [
+            {
+                "itemcode": self.etf_codes[i],
+                "etfTabCode": int(self.etf_tab[i]),
+                "itemname": self.etf_names[i],
+                "nowVal": int(now_val[i]),
+                "risefall": "2" if change_val[i] > 0 else "5" if change_val[i] < 0 else "3",
+                "changeVal": int(abs(change_val[i])),
+                "changeRate": float(change_rate[i]),
+                "nav": round(float(now_val[i]) * 0.999, 2),
+                "threeMonthEarnRate": 0.0,
+                "quant": int(self.etf_volume[i]),
+                "amonut": int(self.etf_volume[i] * now_val[i] // 1_000_000),
+                "marketSum": int(self.etf_base[i] // 10),
+            }
+            for i in range(self.n_etfs)
+        ]
+
+    def etf_pdf_rows(self):
+        """ETF_PDF 원본 레코드 (transform_etf_pdf 입력 형식)"""
+        return [
+            {
+                "etf_code": self.etf_codes[e],
+                "etf_name": self.etf_names[e],
+                "holdings_code": self.stock_codes[h],
+                "holdings_name": self.stock_names[h],
+                "holdings_weight": float(w),
+            }
+            for e, h, w in zip(self.pdf_etf_idx.tolist(), self.pdf_holding_idx.tolist(), self.pdf_weights.tolist())
+        ]
+
+    def generate_day(self, turns, full_universe=False):
+        """
+        turns개 턴을 진행하며 레코드를 모읍니다.
+        {"turns": 턴 시각 목록, "toss": 하루치 토스 행, "quotes": 턴별 시세 행, "etf_items": 턴별 ETF 항목, "etf_pdf": ETF_PDF 행}
+        """
+        day = {"turns": [], "toss": [], "quotes": [], "etf_items": [], "etf_pdf": self.etf_pdf_rows()}
+        for _ in range(turns):
+            timestamp = self.step()
+            day["turns"].append(timestamp)
+            day["toss"].extend(self.toss_rows(timestamp))
+            day["quotes"].append(self.naver_quote_rows(timestamp, full_universe=full_universe))
+            day["etf_items"].append(self.etf_items())
+        return day
+
+    def describe(self):
+        return (f"scale {self.scale:g} (seed {self.seed}): 종목 {self.n_stocks:,}, ETF {self.n_etfs:,}, "
+                f"구성종목 {len(self.pdf_weights):,}행, 토스 {len(INVESTORS) * 2 * self.n_ranked:,}행/턴, "
+                f"상승/하락 {self.n_movers:,}행/턴, 주기 {self.cadence_seconds:g}s")
+
+
+def write_tables(day, out_dir):
+    """메모리 DB 대역(FAKE_SUPABASE_DATA_DIR) 초기 데이터 형식(<테이블명>.json.gz)으로 저장합니다. (시세/ETF는 마지막 턴)"""
+    try:
+        from naver.naver_etf_price import parse_naver_etf_items
+    except ImportError:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        from naver.naver_etf_price import parse_naver_etf_items
+
+    tables = {
+        "ETF_PDF": day["etf_pdf"],
+        "toss_yg_score_stk": day["toss"],
+        "naver_realtime_stk": day["quotes"][-1] if day["quotes"] else [],
+        "naver_etf_price": parse_naver_etf_items(day["etf_items"][-1], day["turns"][-1]) if day["turns"] else [],
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    for table, rows in tables.items():
+        path = os.path.join(out_dir, f"{table}.json.gz")
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False)
+        print(f"💾 {table}: {len(rows):,}행 -> {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="합성 시장 데이터 생성")
+    parser.add_argument("--scale", type=float, default=1.0, help="운영 규모 대비 배수")
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--cadence", type=float, default=60, help="턴 주기(초)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--full-universe", action="store_true", help="시세를 전 종목으로 생성")
+    parser.add_argument("--out", required=True, help="<테이블명>.json.gz를 저장할 디렉토리")
+    args = parser.parse_args()
+
+    market = SyntheticMarket(scale=args.scale, seed=args.seed, cadence_seconds=args.cadence)
+    print(f"🧪 {market.describe()}")
+    started = time.perf_counter()
+    day = market.generate_day(args.turns, full_universe=args.full_universe)
+    print(f"✅ {args.turns}턴 생성 ({time.perf_counter() - started:.1f}s)")
+    write_tables(day, args.out)
+
+
+if __name__ == "__main__":
+    main()
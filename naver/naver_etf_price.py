@@ -3,6 +3,7 @@ import sys
 import os
 import time
 import signal
+from datetime import datetime
 
 # 전역 변수로 종료 요청 상태 관리
 stop_requested = False
@@ -17,12 +18,57 @@ signal.signal(signal.SIGTERM, signal_handler)
 
 # Supabase 연동
 try:
-    from toss_crawling.supabase_client import supabase, get_kst_now, check_market_open
+    from toss_crawling.supabase_client import get_supabase, get_kst_now, check_market_open
+    from toss_crawling import metrics
+    from toss_crawling.score_push import publish_scores
+    from toss_crawling.retention import purge_tables, start_background_purge
+    from toss_crawling.market_calendar import get_market_status, get_holiday_name, get_session, sleep_until
+    from toss_crawling.checkpoint import save_checkpoint, load_checkpoint
+    from toss_crawling.etf_universe import ensure_fresh, get_universe_codes, describe_universe
+    from toss_crawling.request_policy import fetch, export_last_good, restore_last_good
+    from toss_crawling.snapshot_store import publish_snapshot
+    from toss_crawling.bulk_write import bulk_write, to_columns, project
+    from toss_crawling.ohlcv_bars import record_snapshot, flush_bars, get_bar_builder, bars_enabled, OHLCV_BARS_TABLE, OHLCV_BARS_SINK
 except ImportError:
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     if project_root not in sys.path:
         sys.path.append(project_root)
-    from toss_crawling.supabase_client import supabase, get_kst_now, check_market_open
+    from toss_crawling.supabase_client import get_supabase, get_kst_now, check_market_open
+    from toss_crawling import metrics
+    from toss_crawling.score_push import publish_scores
+    from toss_crawling.retention import purge_tables, start_background_purge
+    from toss_crawling.market_calendar import get_market_status, get_holiday_name, get_session, sleep_until
+    from toss_crawling.checkpoint import save_checkpoint, load_checkpoint
+    from toss_crawling.etf_universe import ensure_fresh, get_universe_codes, describe_universe
+    from toss_crawling.request_policy import fetch, export_last_good, restore_last_good
+    from toss_crawling.snapshot_store import publish_snapshot
+    from toss_crawling.bulk_write import bulk_write, to_columns, project
+    from toss_crawling.ohlcv_bars import record_snapshot, flush_bars, get_bar_builder, bars_enabled, OHLCV_BARS_TABLE, OHLCV_BARS_SINK
+
+# naver_etf_price_history에 남기는 컬럼 (naver_etf_price 저장 데이터에서 컬럼만 골라 사용)
+HISTORY_FIELDS = ("etf_code", "etf_name", "current_price", "change_rate", "volume", "updated_at")
+
+
+def parse_naver_etf_items(etf_list, now_kst):
+    """네이버 ETF API의 etfItemList 항목들을 naver_etf_price 레코드 리스트로 변환합니다."""
+    collected_data = []
+
+    for item in etf_list:
+        collected_data.append({
+            "etf_code": str(item.get('itemcode', '')).zfill(6),
+            "etf_name": item.get('itemname', ''),
+            "current_price": float(item.get('nowVal', 0)),
+            "change_price": float(item.get('changeVal', 0)),
+            "change_rate": float(item.get('changeRate', 0)),
+            "nav": float(item.get('nav', 0)),
+            "three_month_return": float(item.get('threeMonthLowerQty', 0)),
+            "volume": int(item.get('quant', 0)),
+            "trading_value": int(item.get('amonut', 0)),
+            "market_cap": int(item.get('marketSum', 0)),
+            "updated_at": now_kst,
+        })
+
+    return collected_data
 
 
 def get_naver_etf_info():
@@ -33,35 +79,42 @@ def get_naver_etf_info():
         'Referer': 'https://finance.naver.com/sise/etf.nhn'
     }
 
+    def request():
+        return requests.get(url, headers=headers, timeout=10)
+
     try:
         print(f"🌐 네이버 ETF API 호출 중: {url}")
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        data_json = response.json()
+        # 느린 응답은 헤지 요청으로 대체하고, 연속 실패 시에는 마지막 정상 응답(stale)을 사용 (속도 제한 토큰은 시간 측정 전에 받음)
+        with metrics.span("page_load"):
+            result = fetch("naver_etf_list", request, limiter=url)
+        response = result.response
+        now_kst = get_kst_now().isoformat()
+        if result.stale:
+            # stale 응답은 원래 받은 시각으로 기록 (이전 시세가 이번 턴 시세로 저장되지 않도록)
+            now_kst = datetime.fromtimestamp(result.fetched_at, get_kst_now().tzinfo).isoformat()
+            print(f"⚠️ 서킷 브레이커 open: {result.age:.0f}초 전({now_kst}) ETF 응답을 사용합니다. (stale, 원래 시각으로 기록)")
+            metrics.inc("stale_payloads")
+        else:
+            metrics.inc("bytes_fetched", len(response.content))
+        metrics.inc("hedged_requests", int(result.hedged))
+        with metrics.span("parse"):
+            data_json = response.json()
 
         etf_list = data_json.get('result', {}).get('etfItemList', [])
         if not etf_list:
             print("❌ API 응답에 ETF 데이터가 없습니다.")
             return []
 
-        now_kst = get_kst_now().isoformat()
-        collected_data = []
-
-        for item in etf_list:
-            collected_data.append({
-                "etf_code": str(item.get('itemcode', '')).zfill(6),
-                "etf_name": item.get('itemname', ''),
-                "current_price": float(item.get('nowVal', 0)),
-                "change_price": float(item.get('changeVal', 0)),
-                "change_rate": float(item.get('changeRate', 0)),
-                "nav": float(item.get('nav', 0)),
-                "three_month_return": float(item.get('threeMonthLowerQty', 0)),
-                "volume": int(item.get('quant', 0)),
-                "trading_value": int(item.get('amonut', 0)),
-                "market_cap": int(item.get('marketSum', 0)),
-                "updated_at": now_kst,
-            })
+        # 전 종목 응답으로 유니버스 파일을 (오래되었을 때만) 갱신하고, 설정된 유니버스 밖의 ETF는 변환/저장하지 않음
+        ensure_fresh(etf_list)
+        universe_codes = get_universe_codes()
+        if universe_codes is not None:
+            etf_list = [item for item in etf_list if str(item.get('itemcode', '')).zfill(6) in universe_codes]
+
+        with metrics.span("parse"):
+            collected_data = parse_naver_etf_items(etf_list, now_kst)
 
+        metrics.inc("rows_collected", len(collected_data))
         return collected_data
 
     except Exception as e:
@@ -69,19 +122,33 @@ def get_naver_etf_info():
         return []
 
 
-def delete_old_etf_price_data():
+def save_etf_prices(data):
+    """
+    수집한 ETF 시세를 컬럼 데이터로 한 번만 바꾼 뒤 naver_etf_price(upsert)와 naver_etf_price_history(insert, HISTORY_FIELDS)에 저장합니다.
+    (요청 본문 형식/압축은 bulk_write의 BULK_WRITE_* 설정)
+    """
+    columns = to_columns(data)
+    with metrics.span("db_write"):
+        sent = bulk_write("naver_etf_price", columns, upsert=True)
+        sent += bulk_write("naver_etf_price_history", project(columns, HISTORY_FIELDS))
+    metrics.inc("rows_written", len(data) * 2)
+    return sent
+
+
+def delete_old_etf_price_data(background=False):
     """오늘(KST 기준) 이전의 ETF 시세 관련 데이터를 모두 삭제합니다."""
-    try:
-        now_kst = get_kst_now()
-        today_start_kst = now_kst.replace(hour=0, minute=0, second=0, microsecond=0)
-        threshold_str = today_start_kst.isoformat()
-
-        print(f"🧹 [ETF 시세] 오늘({today_start_kst.strftime('%Y-%m-%d')}) 이전 데이터 삭제 중...")
-        supabase.table("naver_etf_price").delete().lt("updated_at", threshold_str).execute()
-        supabase.table("naver_etf_price_history").delete().lt("updated_at", threshold_str).execute()
-        print("✅ [ETF 시세] 지난 데이터 삭제 프로세스 완료")
-    except Exception as e:
-        print(f"🚨 [ETF 시세] 지난 데이터 삭제 오류: {e}")
+    now_kst = get_kst_now()
+    today_start_kst = now_kst.replace(hour=0, minute=0, second=0, microsecond=0)
+    targets = [("naver_etf_price", "updated_at"), ("naver_etf_price_history", "updated_at")]
+    if bars_enabled() and OHLCV_BARS_SINK in ("db", "both"):
+        targets.append((OHLCV_BARS_TABLE, "bucket_start"))
+
+    print(f"🧹 [ETF 시세] 오늘({today_start_kst.strftime('%Y-%m-%d')}) 이전 데이터 삭제 {'시작 (백그라운드)' if background else '중...'}")
+    if background:
+        start_background_purge(targets, today_start_kst, label="ETF 시세")
+        return
+    purge_tables(targets, today_start_kst, label="ETF 시세")
+    print("✅ [ETF 시세] 지난 데이터 삭제 프로세스 완료")
 
 
 def main():
@@ -97,8 +164,35 @@ def main():
         end_hour, end_minute = 15, 20
 
     print(f"=== 네이버 ETF 전종목 시세 수집 시작 (세션: {'오전' if is_morning else '오후' if is_afternoon else '기본'}, 종료 예정: {end_hour:02d}:{end_minute:02d}) ===")
+    print(f"🎯 {describe_universe(get_universe_codes())}")
+    bar_builder = get_bar_builder()
+    if bar_builder is not None:
+        print(f"🕯️ 분봉 집계 사용: {', '.join(bar_builder.resolutions)} → {OHLCV_BARS_SINK}")
+
+    # 거래일 캘린더로 시작 시점에 바로 개장 여부를 판단합니다. (연도 정보가 없으면 08:58 프리마켓 데이터 확인으로 대체)
+    today = get_kst_now()
+    today_str = today.strftime("%Y-%m-%d")
+    market_status = get_market_status(today)
+    if market_status is False:
+        print(f"ℹ️ [{today_str}] KRX 휴장일({get_holiday_name(today)})입니다. 수집 없이 종료합니다. (기존 데이터 보존)")
+        sys.exit(0)
+    session = get_session(today)
+    if market_status:
+        print(f"📅 [{today_str}] 거래일 캘린더 기준 개장일 (정규장 {session[0].strftime('%H:%M')}~{session[1].strftime('%H:%M')})")
+    else:
+        print(f"📅 [{today_str}] 거래일 캘린더에 {today.year}년 정보가 없습니다. 08:58 프리마켓 데이터로 개장 여부를 확인합니다.")
 
     is_market_open_confirmed = False
+    # 지난 데이터 정리는 프리마켓 데이터로 개장이 교차 확인된 뒤에만 수행합니다. (캘린더가 틀린 경우 기존 데이터 보존)
+    is_cleanup_done = is_afternoon
+    # 같은 거래일의 직전 세션(오전) 체크포인트가 있으면 개장 판단과 마지막 정상 응답을 이어받습니다.
+    warm_state = load_checkpoint("naver_etf_price", today)
+    if warm_state:
+        is_market_open_confirmed = warm_state.get("market_open_confirmed", False)
+        is_cleanup_done = is_cleanup_done or warm_state.get("cleanup_done", False)
+        restore_last_good(warm_state.get("last_good"))
+        if bar_builder is not None and bar_builder.restore_state(warm_state.get("bars")):
+            print(f"🕯️ 직전 세션의 진행 중인 분봉을 이어받았습니다. (ETF {len(bar_builder.codes)}개)")
 
     while True:
         try:
@@ -111,14 +205,24 @@ def main():
                 time.sleep(30)
                 continue
 
-            # 시장 개장 여부 확인 (08:58 이후 프리마켓 데이터 기준)
+            # 시장 개장 여부 확인
+            if not is_market_open_confirmed and market_status:
+                # 캘린더로 개장일이 확정된 경우: 개장 전에 미리 준비하고 정규장 시작 시각에 첫 턴을 시작
+                if now < session[0]:
+                    print(f"\n🔥 개장 전 준비 중 (Supabase 클라이언트 생성)... 정규장 시작({session[0].strftime('%H:%M')})에 첫 수집을 시작합니다.")
+                    get_supabase()
+                    if not sleep_until(session[0], should_stop=lambda: stop_requested):
+                        break
+                is_market_open_confirmed = True
+                continue
+
+            # 캘린더에 정보가 없는 경우: 기존처럼 08:58 이후 프리마켓 데이터 기준으로 확인
             if not is_market_open_confirmed:
                 if current_time_str < "0858":
                     print(f"🕒 시장 개장 여부 확인을 위해 08:58까지 대기합니다... (현재: {now.strftime('%H:%M:%S')})", end='\r')
                     time.sleep(10)
                     continue
 
-                today_str = now.strftime("%Y-%m-%d")
                 print(f"\n🔍 [{today_str}] 시장 개장 여부 확인 중 (프리마켓 데이터 기준)...")
                 try:
                     if not check_market_open(today_str):
@@ -127,8 +231,9 @@ def main():
 
                     print(f"✅ [{today_str}] 개장일 확인됨. 기존 데이터를 정리하고 수집을 시작합니다.")
                     if not is_afternoon:
-                        delete_old_etf_price_data()
+                        delete_old_etf_price_data(background=True)
                     is_market_open_confirmed = True
+                    is_cleanup_done = True
                 except Exception as e:
                     print(f"⚠️ 개장 확인 중 오류 발생: {e}. 안전을 위해 1분 후 재시도합니다.")
                     time.sleep(60)
@@ -139,33 +244,34 @@ def main():
                 print(f"\n🕒 현재 시각(KST) {now.strftime('%H:%M:%S')} - 종료 시간({end_hour:02d}:{end_minute:02d})이 되어 종료합니다.")
                 break
 
+            # 캘린더로 시작한 경우: 프리마켓 데이터로 개장을 교차 확인한 뒤 지난 데이터를 정리합니다.
+            if not is_cleanup_done:
+                try:
+                    if check_market_open(today_str):
+                        print(f"✅ [{today_str}] 프리마켓 데이터로 개장 교차 확인됨. 기존 데이터를 정리합니다.")
+                        delete_old_etf_price_data(background=True)
+                        is_cleanup_done = True
+                    else:
+                        print(f"⚠️ [{today_str}] 캘린더상 개장일이지만 프리마켓 데이터가 없습니다. 지난 데이터 정리는 다음 턴으로 미룹니다.")
+                except Exception as e:
+                    print(f"⚠️ 개장 교차 확인 중 오류 발생: {e}. 다음 턴에 다시 확인합니다.")
+
             print(f"\n--- 수집 시작 시각: {now.replace(microsecond=0).isoformat()} ---")
+            metrics.start_turn("naver_etf_price", turn_id=now.replace(microsecond=0).isoformat())
             data = get_naver_etf_info()
 
             if data:
                 print(f"✨ 총 {len(data)}개의 ETF 데이터를 수집했습니다.")
                 print("💾 Supabase 저장 중...")
-                batch_size = 500
-                for i in range(0, len(data), batch_size):
-                    supabase.table("naver_etf_price").upsert(data[i:i + batch_size]).execute()
-
-                history_data = [
-                    {
-                        "etf_code": d["etf_code"],
-                        "etf_name": d["etf_name"],
-                        "current_price": d["current_price"],
-                        "change_rate": d["change_rate"],
-                        "volume": d["volume"],
-                        "updated_at": d["updated_at"],
-                    }
-                    for d in data
-                ]
-                for i in range(0, len(history_data), batch_size):
-                    supabase.table("naver_etf_price_history").insert(history_data[i:i + batch_size]).execute()
+                save_etf_prices(data)
+                publish_snapshot("etf", data, key="etf_code", timestamp=data[0]["updated_at"], full_turn=True)
+                record_snapshot(data, data[0]["updated_at"])
+                publish_scores("naver_etf_price", data)
 
                 print("✅ Supabase 업데이트 완료")
             else:
                 print("❌ 수집된 데이터가 없습니다.")
+            metrics.end_turn()
 
         except Exception as e:
             print(f"❌ 루프 실행 중 오류 발생: {e}")
@@ -184,6 +290,13 @@ def main():
                 break
             time.sleep(1)
 
+    flush_bars()
+    save_checkpoint("naver_etf_price", {
+        "market_open_confirmed": is_market_open_confirmed,
+        "cleanup_done": is_cleanup_done,
+        "last_good": export_last_good(),
+        "bars": bar_builder.export_state() if bar_builder is not None else None,
+    })
     print("=== 모든 프로세스 종료 ===")
 
 
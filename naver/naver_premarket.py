@@ -4,32 +4,41 @@ import time
 
 # Supabase 연동
 try:
-    from toss_crawling.supabase_client import supabase, get_kst_now
+    from toss_crawling.supabase_client import get_supabase, get_kst_now
+    from toss_crawling import metrics
+    from toss_crawling.score_push import publish_table
+    from toss_crawling.retention import purge_tables, start_background_purge
+    from toss_crawling.market_calendar import get_market_status, get_holiday_name
 except ImportError:
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     if project_root not in sys.path:
         sys.path.append(project_root)
-    from toss_crawling.supabase_client import supabase, get_kst_now
+    from toss_crawling.supabase_client import get_supabase, get_kst_now
+    from toss_crawling import metrics
+    from toss_crawling.score_push import publish_table
+    from toss_crawling.retention import purge_tables, start_background_purge
+    from toss_crawling.market_calendar import get_market_status, get_holiday_name
 
 try:
     from naver.naver_utils import get_naver_sise
+    from naver.naver_score import score_turn
 except ImportError:
     from naver_utils import get_naver_sise
+    from naver_score import score_turn
 
 
-def delete_old_premarket_data():
+def delete_old_premarket_data(background=False):
     """오늘(KST 기준) 이전의 프리마켓 관련 데이터를 모두 삭제합니다."""
-    try:
-        now_kst = get_kst_now()
-        today_start_kst = now_kst.replace(hour=0, minute=0, second=0, microsecond=0)
-        threshold_str = today_start_kst.isoformat()
+    now_kst = get_kst_now()
+    today_start_kst = now_kst.replace(hour=0, minute=0, second=0, microsecond=0)
+    targets = [("naver_premarket_stk", "collected_at"), ("naver_premarket_etf", "updated_at")]
 
-        print(f"🧹 [프리마켓] 오늘({today_start_kst.strftime('%Y-%m-%d')}) 이전 데이터 삭제 중...")
-        supabase.table("naver_premarket_stk").delete().lt("collected_at", threshold_str).execute()
-        supabase.table("naver_premarket_etf").delete().lt("updated_at", threshold_str).execute()
-        print("✅ [프리마켓] 지난 데이터 삭제 프로세스 완료")
-    except Exception as e:
-        print(f"🚨 [프리마켓] 지난 데이터 삭제 오류: {e}")
+    print(f"🧹 [프리마켓] 오늘({today_start_kst.strftime('%Y-%m-%d')}) 이전 데이터 삭제 {'시작 (백그라운드)' if background else '중...'}")
+    if background:
+        start_background_purge(targets, today_start_kst, label="프리마켓")
+        return
+    purge_tables(targets, today_start_kst, label="프리마켓")
+    print("✅ [프리마켓] 지난 데이터 삭제 프로세스 완료")
 
 
 def main():
@@ -39,6 +48,11 @@ def main():
 
     print(f"=== 네이버 프리마켓(Nextrade) 최종 집계 시작 (현재: {now.strftime('%H:%M:%S')}) ===")
 
+    # 휴장일이면 08:51까지 기다리지 않고 바로 종료 (캘린더에 연도 정보가 없으면 기존처럼 수집 후 비교)
+    if get_market_status(now) is False:
+        print(f"ℹ️ [{now.strftime('%Y-%m-%d')}] KRX 휴장일({get_holiday_name(now)})입니다. 수집 없이 종료합니다. (기존 데이터 보존)")
+        sys.exit(0)
+
     # 08:51분 이전이라면 대기
     if current_time_str < target_time:
         print(f"🕒 아직 {target_time[:2]}:{target_time[2:]} 전입니다. {target_time}까지 대기합니다.")
@@ -52,6 +66,7 @@ def main():
         print("\n🚀 지정된 시간이 되어 수집을 시작합니다.")
 
     turn_timestamp = now.replace(microsecond=0).isoformat()
+    metrics.start_turn("naver_premarket", turn_id=turn_timestamp)
 
     urls = [
         ("https://finance.naver.com/sise/nxt_sise_rise.naver?sosok=0", "KOSPI", "상승"),
@@ -64,13 +79,13 @@ def main():
     for url, market, type_name in urls:
         data = get_naver_sise(url, market, type_name, turn_timestamp)
         all_collected.extend(data)
-        time.sleep(0.5)
 
     if all_collected:
         print(f"✨ 총 {len(all_collected)}개 프리마켓 데이터 수집 완료")
         try:
             print("🔍 기존 데이터와 비교 중...")
-            existing_response = supabase.table("naver_premarket_stk").select("stk_cd, close_pric, flu_rt, trde_qty").execute()
+            with metrics.span("db_read"):
+                existing_response = get_supabase().table("naver_premarket_stk").select("stk_cd, close_pric, flu_rt, trde_qty").execute()
             existing_data = {row['stk_cd']: row for row in existing_response.data}
 
             is_changed = len(all_collected) != len(existing_data)
@@ -89,22 +104,26 @@ def main():
             if not is_changed:
                 print("ℹ️ 기존 데이터와 값이 동일합니다. (장이 열리지 않았거나 업데이트가 없는 상태)")
                 print("⏩ 업데이트를 스킵하고 종료합니다.")
+                metrics.end_turn(status="unchanged")
                 sys.exit(0)
 
             print("🔄 데이터 변경이 감지되었습니다. 업데이트를 진행합니다.")
-            supabase.table("naver_premarket_stk").delete().gte("stk_cd", "0").execute()
+            with metrics.span("db_write"):
+                get_supabase().table("naver_premarket_stk").delete(returning="minimal").gte("stk_cd", "0").execute()
 
-            batch_size = 1000
-            for i in range(0, len(all_collected), batch_size):
-                supabase.table("naver_premarket_stk").upsert(all_collected[i:i + batch_size]).execute()
+                batch_size = 1000
+                for i in range(0, len(all_collected), batch_size):
+                    get_supabase().table("naver_premarket_stk").upsert(all_collected[i:i + batch_size]).execute()
+            metrics.inc("rows_written", len(all_collected))
             print(f"🎉 Supabase 저장 완료 ({len(all_collected)}개)")
 
-            print("📊 [Server-Side] 네이버 프리마켓 점수 계산 요청 중...")
-            supabase.rpc('calculate_naver_premarket_score', {}).execute()
-            print("✅ [Server-Side] 네이버 프리마켓 점수 업데이트 완료")
+            # ETF 점수: 서버 함수(항상) + 로컬 계산 그림자 저장(shadow) 또는 교차 검증(both) (NAVER_SCORE_MODE)
+            score_turn("premarket", all_collected, updated_at=turn_timestamp)
+            publish_table("naver_premarket_etf", "naver_premarket_etf")
         except Exception as e:
             print(f"❌ 저장 및 계산 중 오류: {e}")
 
+    metrics.end_turn()
     print("=== 프리마켓 수집 및 집계 완료. 프로세스를 종료합니다. ===")
     sys.exit(0)
 
@@ -16,37 +16,122 @@ signal.signal(signal.SIGTERM, signal_handler)
 
 # Supabase 연동
 try:
-    from toss_crawling.supabase_client import supabase, get_kst_now, check_market_open
+    from toss_crawling.supabase_client import get_supabase, get_kst_now, check_market_open
+    from toss_crawling import metrics, profiling
+    from toss_crawling.score_push import publish_table
+    from toss_crawling.retention import purge_tables, start_background_purge
+    from toss_crawling.market_calendar import get_market_status, get_holiday_name, get_session, sleep_until
+    from toss_crawling.checkpoint import save_checkpoint, load_checkpoint
+    from toss_crawling.request_policy import export_last_good, restore_last_good
+    from toss_crawling.pipeline import TurnPipeline
+    from toss_crawling.snapshot_store import publish_snapshot
 except ImportError:
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     if project_root not in sys.path:
         sys.path.append(project_root)
-    from toss_crawling.supabase_client import supabase, get_kst_now, check_market_open
+    from toss_crawling.supabase_client import get_supabase, get_kst_now, check_market_open
+    from toss_crawling import metrics, profiling
+    from toss_crawling.score_push import publish_table
+    from toss_crawling.retention import purge_tables, start_background_purge
+    from toss_crawling.market_calendar import get_market_status, get_holiday_name, get_session, sleep_until
+    from toss_crawling.checkpoint import save_checkpoint, load_checkpoint
+    from toss_crawling.request_policy import export_last_good, restore_last_good
+    from toss_crawling.pipeline import TurnPipeline
+    from toss_crawling.snapshot_store import publish_snapshot
 
 try:
-    from naver.naver_utils import get_naver_sise
+    from naver.naver_utils import get_naver_sise, get_naver_market_sum
+    from naver.naver_score import NAVER_SCORE_MODE, score_turn, get_engine
 except ImportError:
-    from naver_utils import get_naver_sise
+    from naver_utils import get_naver_sise, get_naver_market_sum
+    from naver_score import NAVER_SCORE_MODE, score_turn, get_engine
 
+# 수집 범위: movers(기본, 상승/하락 페이지) 또는 full(시가총액 목록 전 페이지 = 전 종목, --full-universe 인자로도 지정)
+# 전 종목 모드의 턴 소요 시간은 대략 요청 페이지 수 / finance.naver.com 초당 호출 수(RATE_LIMITS)입니다.
+NAVER_REALTIME_MODE = os.getenv("NAVER_REALTIME_MODE", "movers").strip().lower()
+# 전 종목 모드의 페이지 범위: holdings(기본, 첫 턴 이후에는 ETF_PDF 구성종목이 있는 페이지만) 또는 all(매 턴 모든 페이지)
+# 점수 계산에는 구성종목 시세만 쓰이므로, 속도 제한(기본 2 req/s)을 올리지 않고 요청 페이지 수를 줄입니다.
+NAVER_MARKET_SUM_SCOPE = os.getenv("NAVER_MARKET_SUM_SCOPE", "holdings").strip().lower()
 
-def delete_old_naver_data():
+
+def delete_old_naver_data(background=False):
     """오늘(KST 기준) 이전의 네이버 관련 데이터를 모두 삭제합니다."""
+    now_kst = get_kst_now()
+    today_start_kst = now_kst.replace(hour=0, minute=0, second=0, microsecond=0)
+    targets = [("naver_realtime_stk", "collected_at"), ("naver_realtime_etf", "updated_at")]
+
+    print(f"🧹 [네이버] 오늘({today_start_kst.strftime('%Y-%m-%d')}) 이전 데이터 삭제 {'시작 (백그라운드)' if background else '중...'}")
+    if background:
+        start_background_purge(targets, today_start_kst, label="네이버")
+        return
+    purge_tables(targets, today_start_kst, label="네이버")
+    print("✅ [네이버] 지난 데이터 삭제 프로세스 완료")
+
+
+REALTIME_URLS = [
+    ("https://finance.naver.com/sise/sise_rise.naver?sosok=0", "KOSPI", "상승"),
+    ("https://finance.naver.com/sise/sise_rise.naver?sosok=1", "KOSDAQ", "상승"),
+    ("https://finance.naver.com/sise/sise_fall.naver?sosok=0", "KOSPI", "하락"),
+    ("https://finance.naver.com/sise/sise_fall.naver?sosok=1", "KOSDAQ", "하락"),
+]
+
+
+def collect_realtime_quotes(turn_timestamp, full_universe=False):
+    """
+    상승/하락 시세 페이지(KOSPI, KOSDAQ)를 순회하여 이번 턴의 종목 시세를 수집합니다.
+    full_universe이면 시가총액 목록 페이지를 동시에 요청하여 보합 종목을 포함한 전 종목을 수집합니다.
+    (NAVER_MARKET_SUM_SCOPE=holdings이면 첫 턴 이후에는 ETF_PDF 구성종목이 있는 페이지만 요청)
+    """
+    if full_universe:
+        codes = None
+        if NAVER_MARKET_SUM_SCOPE == "holdings":
+            engine = get_engine()
+            codes = set(engine.stock_codes.tolist()) if engine is not None else None
+        return get_naver_market_sum(turn_timestamp, should_stop=lambda: stop_requested, codes=codes)
+
+    all_collected = []
+    for url, market, type_name in REALTIME_URLS:
+        if stop_requested:
+            break
+        data = get_naver_sise(url, market, type_name, turn_timestamp)
+        all_collected.extend(data)
+    return all_collected
+
+
+def save_realtime_quotes(all_collected):
+    """naver_realtime_stk 테이블을 이번 턴 시세로 교체하고 ETF 점수를 계산합니다. (NAVER_SCORE_MODE)"""
+    # stale 페이지 행은 원래 수집 시각을 가지므로, 턴 시각은 가장 최근 수집 시각으로 정함
+    turn_at = max(row["collected_at"] for row in all_collected) if all_collected else None
     try:
-        now_kst = get_kst_now()
-        today_start_kst = now_kst.replace(hour=0, minute=0, second=0, microsecond=0)
-        threshold_str = today_start_kst.isoformat()
-
-        print(f"🧹 [네이버] 오늘({today_start_kst.strftime('%Y-%m-%d')}) 이전 데이터 삭제 중...")
-        supabase.table("naver_realtime_stk").delete().lt("collected_at", threshold_str).execute()
-        supabase.table("naver_realtime_etf").delete().lt("updated_at", threshold_str).execute()
-        print("✅ [네이버] 지난 데이터 삭제 프로세스 완료")
+        with metrics.span("db_write"):
+            print("🧹 기존 'naver_realtime_stk' 데이터 삭제 중...")
+            get_supabase().table("naver_realtime_stk").delete(returning="minimal").gte("stk_cd", "0").execute()
+
+            batch_size = 1000
+            for i in range(0, len(all_collected), batch_size):
+                get_supabase().table("naver_realtime_stk").upsert(all_collected[i:i + batch_size]).execute()
+        metrics.inc("rows_written", len(all_collected))
+        print(f"🎉 Supabase 저장 완료 ({len(all_collected)}개)")
+        # 같은 호스트의 다른 프로세스가 DB 조회 없이 최신 시세를 볼 수 있도록 공유 스냅샷 저장소에도 발행 (SNAPSHOT_STORE=1)
+        # 테이블을 이번 턴 시세로 교체했으므로 저장소도 턴 전체로 발행 (페이지에서 빠진 종목은 비움)
+        publish_snapshot("quote", all_collected, key="stk_cd", timestamp=turn_at, full_turn=True)
+
+        # ETF 점수: 서버 함수(항상) + 로컬 계산 그림자 저장(shadow) 또는 교차 검증(both) (NAVER_SCORE_MODE)
+        score_turn("realtime", all_collected, updated_at=turn_at)
+        publish_table("naver_etf", "naver_realtime_etf")
     except Exception as e:
-        print(f"🚨 [네이버] 지난 데이터 삭제 오류: {e}")
+        print(f"❌ 저장 및 계산 중 오류: {e}")
 
 
 def main():
     is_morning = "morning" in sys.argv
     is_afternoon = "afternoon" in sys.argv
+    if "--profile" in sys.argv:
+        profiling.enable()
+    full_universe = "--full-universe" in sys.argv or NAVER_REALTIME_MODE == "full"
+    # 파이프라인 모드: 저장+점수 계산을 작업 스레드에서 실행하여 다음 턴 수집과 겹칩니다.
+    # (점수 RPC가 naver_realtime_stk 전체를 읽으므로 저장과 점수 계산은 한 단계로 묶어 턴 순서대로 실행)
+    pipeline = TurnPipeline("naver_realtime", [("persist_score", save_realtime_quotes)], enabled="--pipeline" in sys.argv or None)
 
     start_hour, start_minute = 8, 50
     end_hour, end_minute = 15, 20
@@ -56,9 +141,30 @@ def main():
     elif is_afternoon:
         end_hour, end_minute = 15, 20
 
-    print(f"=== 네이버 실시간 시세 수집 루프 시작 (세션: {'오전' if is_morning else '오후' if is_afternoon else '기본'}, 종료 예정: {end_hour:02d}:{end_minute:02d}) ===")
+    print(f"=== 네이버 실시간 시세 수집 루프 시작 (세션: {'오전' if is_morning else '오후' if is_afternoon else '기본'}, 종료 예정: {end_hour:02d}:{end_minute:02d}, 범위: {'전 종목' if full_universe else '상승/하락'}, 점수: {NAVER_SCORE_MODE}) ===")
+
+    # 거래일 캘린더로 시작 시점에 바로 개장 여부를 판단합니다. (연도 정보가 없으면 08:58 프리마켓 데이터 확인으로 대체)
+    today = get_kst_now()
+    today_str = today.strftime("%Y-%m-%d")
+    market_status = get_market_status(today)
+    if market_status is False:
+        print(f"ℹ️ [{today_str}] KRX 휴장일({get_holiday_name(today)})입니다. 수집 없이 종료합니다. (기존 데이터 보존)")
+        sys.exit(0)
+    session = get_session(today)
+    if market_status:
+        print(f"📅 [{today_str}] 거래일 캘린더 기준 개장일 (정규장 {session[0].strftime('%H:%M')}~{session[1].strftime('%H:%M')})")
+    else:
+        print(f"📅 [{today_str}] 거래일 캘린더에 {today.year}년 정보가 없습니다. 08:58 프리마켓 데이터로 개장 여부를 확인합니다.")
 
     is_market_open_confirmed = False
+    # 지난 데이터 정리는 프리마켓 데이터로 개장이 교차 확인된 뒤에만 수행합니다. (캘린더가 틀린 경우 기존 데이터 보존)
+    is_cleanup_done = is_afternoon
+    # 같은 거래일의 직전 세션(오전) 체크포인트가 있으면 개장 판단과 마지막 정상 응답을 이어받습니다.
+    warm_state = load_checkpoint("naver_realtime", today)
+    if warm_state:
+        is_market_open_confirmed = warm_state.get("market_open_confirmed", False)
+        is_cleanup_done = is_cleanup_done or warm_state.get("cleanup_done", False)
+        restore_last_good(warm_state.get("last_good"))
 
     while True:
         now = get_kst_now()
@@ -70,14 +176,26 @@ def main():
             time.sleep(30)
             continue
 
-        # 시장 개장 여부 확인 (08:58 이후 프리마켓 데이터 기준)
+        # 시장 개장 여부 확인
+        if not is_market_open_confirmed and market_status:
+            # 캘린더로 개장일이 확정된 경우: 개장 전에 미리 준비하고 정규장 시작 시각에 첫 턴을 시작
+            if now < session[0]:
+                print(f"\n🔥 개장 전 준비 중 (Supabase 클라이언트 생성)... 정규장 시작({session[0].strftime('%H:%M')})에 첫 수집을 시작합니다.")
+                get_supabase()
+                if NAVER_SCORE_MODE != "rpc":
+                    get_engine()
+                if not sleep_until(session[0], should_stop=lambda: stop_requested):
+                    break
+            is_market_open_confirmed = True
+            continue
+
+        # 캘린더에 정보가 없는 경우: 기존처럼 08:58 이후 프리마켓 데이터 기준으로 확인
         if not is_market_open_confirmed:
             if current_time_str < "0858":
                 print(f"🕒 시장 개장 여부 확인을 위해 08:58까지 대기합니다... (현재: {now.strftime('%H:%M:%S')})", end='\r')
                 time.sleep(10)
                 continue
 
-            today_str = now.strftime("%Y-%m-%d")
             print(f"\n🔍 [{today_str}] 시장 개장 여부 확인 중 (프리마켓 데이터 기준)...")
             try:
                 if not check_market_open(today_str):
@@ -86,8 +204,9 @@ def main():
 
                 print(f"✅ [{today_str}] 개장일 확인됨. 기존 데이터를 정리하고 수집을 시작합니다.")
                 if not is_afternoon:
-                    delete_old_naver_data()
+                    delete_old_naver_data(background=True)
                 is_market_open_confirmed = True
+                is_cleanup_done = True
             except Exception as e:
                 print(f"⚠️ 개장 확인 중 오류 발생: {e}. 안전을 위해 1분 후 재시도합니다.")
                 time.sleep(60)
@@ -98,57 +217,59 @@ def main():
             print(f"\n🕒 현재 시각(KST) {now.strftime('%H:%M:%S')} - 종료 시간({end_hour:02d}:{end_minute:02d})이 되어 종료합니다.")
             break
 
+        # 캘린더로 시작한 경우: 프리마켓 데이터로 개장을 교차 확인한 뒤 지난 데이터를 정리합니다.
+        if not is_cleanup_done:
+            try:
+                if check_market_open(today_str):
+                    print(f"✅ [{today_str}] 프리마켓 데이터로 개장 교차 확인됨. 기존 데이터를 정리합니다.")
+                    delete_old_naver_data(background=True)
+                    is_cleanup_done = True
+                else:
+                    print(f"⚠️ [{today_str}] 캘린더상 개장일이지만 프리마켓 데이터가 없습니다. 지난 데이터 정리는 다음 턴으로 미룹니다.")
+            except Exception as e:
+                print(f"⚠️ 개장 교차 확인 중 오류 발생: {e}. 다음 턴에 다시 확인합니다.")
+
+        turn_started = time.monotonic()
         turn_timestamp = now.replace(microsecond=0).isoformat()
         print(f"\n--- 수집 시작 시각: {turn_timestamp} ---")
+        metrics.start_turn("naver_realtime", turn_id=turn_timestamp)
+        profiling.start_turn("naver_realtime", turn_id=turn_timestamp)
 
-        urls = [
-            ("https://finance.naver.com/sise/sise_rise.naver?sosok=0", "KOSPI", "상승"),
-            ("https://finance.naver.com/sise/sise_rise.naver?sosok=1", "KOSDAQ", "상승"),
-            ("https://finance.naver.com/sise/sise_fall.naver?sosok=0", "KOSPI", "하락"),
-            ("https://finance.naver.com/sise/sise_fall.naver?sosok=1", "KOSDAQ", "하락"),
-        ]
-
-        all_collected = []
-        for url, market, type_name in urls:
-            if stop_requested:
-                break
-            data = get_naver_sise(url, market, type_name, turn_timestamp)
-            all_collected.extend(data)
-            time.sleep(0.5)
+        all_collected = collect_realtime_quotes(turn_timestamp, full_universe=full_universe)
 
         if stop_requested:
             break
 
         if all_collected:
             print(f"✨ 총 {len(all_collected)}개 데이터 수집 완료")
-            try:
-                print("🧹 기존 'naver_realtime_stk' 데이터 삭제 중...")
-                supabase.table("naver_realtime_stk").delete().gte("stk_cd", "0").execute()
+            pipeline.submit(turn_timestamp, all_collected)
 
-                batch_size = 1000
-                for i in range(0, len(all_collected), batch_size):
-                    supabase.table("naver_realtime_stk").upsert(all_collected[i:i + batch_size]).execute()
-                print(f"🎉 Supabase 저장 완료 ({len(all_collected)}개)")
-
-                print("📊 [Server-Side] 네이버 ETF 점수 계산 요청 중...")
-                supabase.rpc('calculate_naver_etf_score', {}).execute()
-                print("✅ [Server-Side] 네이버 ETF 점수 업데이트 완료")
-            except Exception as e:
-                print(f"❌ 저장 및 계산 중 오류: {e}")
+        profiling.end_turn()
+        metrics.end_turn()
 
         if stop_requested:
             break
 
-        # 시간대별 대기 시간 설정 (09~10시: 1분, 10시 이후: 5분)
+        # 시간대별 수집 주기 (09~10시: 1분, 10시 이후: 5분), 다음 턴은 이번 턴 시작 시각 기준으로 예약 (수집 시간만큼 주기가 늘어나지 않도록)
+        cadence = 60 if now.hour < 10 else 300
+        elapsed = time.monotonic() - turn_started
+        wait_seconds = max(0.0, cadence - elapsed)
         now_after = get_kst_now()
-        wait_seconds = 60 if now_after.hour < 10 else 300
-        print(f"🔄 수집 완료. {wait_seconds // 60}분 대기 후 다음 수집을 시작합니다... (현재 시각: {now_after.strftime('%H:%M:%S')})")
-
-        for _ in range(wait_seconds):
-            if stop_requested:
-                break
-            time.sleep(1)
-
+        if wait_seconds > 0:
+            print(f"🔄 수집 완료({elapsed:.1f}초). {wait_seconds:.1f}초 대기 후 다음 수집을 시작합니다... (주기 {cadence}초, 현재 시각: {now_after.strftime('%H:%M:%S')})")
+        else:
+            print(f"⏳ 수집에 {elapsed:.1f}초가 걸려 주기({cadence}초)를 넘었습니다. 대기 없이 바로 다음 수집을 시작합니다.")
+
+        deadline = turn_started + cadence
+        while not stop_requested and time.monotonic() < deadline:
+            time.sleep(max(0.0, min(1.0, deadline - time.monotonic())))
+
+    pipeline.close()
+    save_checkpoint("naver_realtime", {
+        "market_open_confirmed": is_market_open_confirmed,
+        "cleanup_done": is_cleanup_done,
+        "last_good": export_last_good(),
+    })
     print("=== 모든 프로세스 종료 ===")
     sys.exit(0)
 
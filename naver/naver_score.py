@@ -0,0 +1,233 @@
+"""
+네이버 ETF / 프리마켓 점수 로컬 계산 엔진
+
+naver_realtime / naver_premarket 은 턴마다 종목 시세 테이블을 교체한 뒤 서버 함수(calculate_naver_etf_score,
+calculate_naver_premarket_score)에 점수 계산을 맡기므로, 매 턴 DB가 ETF_PDF 전체를 다시 읽어 계산하고 그 동안 수집 턴이 기다립니다.
+이 모듈은 같은 ETF 단위 집계를 수집한 시세 행(stk_cd, flu_rt, trde_qty)과 ETF_PDF 구성비중으로 직접 계산합니다.
+    - 구성종목 행마다 (구성종목 위치, ETF 위치, 비중)을 배열로 한 번만 만들어 두고(NaverScoreEngine),
+      턴마다 시세를 구성종목 위치에 맞춰 넣은 뒤 np.bincount로 ETF별 합을 구합니다. (구성종목 행 수에 비례, 밀집 행렬 없음)
+    - 결과는 유니버스의 모든 ETF에 대해 만듭니다. (수집된 구성종목이 없으면 0)
+
+기준 산식(reference_formula, 턴 기준)
+    점수          = Σ 구성비중(%) / 100 × 등락률(%)     (수집된 구성종목의 ETF 등락 기여분, %p)
+    상승/하락 종목수 = 등락률 > 0 / < 0 인 수집된 구성종목 수
+    종목수         = 시세가 수집된 구성종목 수
+    비중 합계(%)   = 시세가 수집된 구성종목의 구성비중 합
+    거래량         = 시세가 수집된 구성종목의 거래량 합
+서버 함수의 SQL은 이 저장소에 없으므로, 위 산식은 score_replay 와 같이 비교 기준이 되는 Python 구현이며
+컬럼 이름과 결과 테이블의 고유 키도 확인되지 않았습니다. 그래서 운영 결과 테이블(naver_realtime_etf, naver_premarket_etf)은
+어떤 모드에서도 서버 함수만 씁니다. (check_market_open도 naver_premarket_etf를 읽음)
+로컬 결과는 비교하거나 별도의 그림자 테이블(<결과 테이블>_local, sql/naver_score_shadow.sql)에만 저장하며,
+서버 함수의 산식과 키가 확인되어 both 비교가 계속 일치할 때 서버 함수를 대체할지 결정합니다.
+
+모드 (NAVER_SCORE_MODE)
+    rpc    : 기존과 같이 서버 함수만 호출 (기본)
+    shadow : 서버 함수를 호출하고, 로컬 계산 결과를 그림자 테이블에 저장 (대시보드/재계산에서 나란히 비교, local도 같은 뜻)
+    both   : 서버 함수를 호출하고, 로컬 계산 결과를 저장된 결과 테이블과 비교하여 출력 (저장 없음)
+
+환경 변수:
+    NAVER_SCORE_MODE         : rpc / shadow / both (기본 rpc)
+    NAVER_SCORE_TOLERANCE    : both 모드에서 불일치로 셀 컬럼별 절대 오차 (기본 0.001)
+    NAVER_SCORE_SHADOW_SUFFIX: 그림자 테이블 이름 접미사 (기본 _local)
+
+사용 예:
+    NAVER_SCORE_MODE=both python naver/naver_realtime.py morning
+"""
+import os
+import sys
+import time
+
+try:
+    from toss_crawling.supabase_client import get_supabase, get_kst_now, load_etf_pdf_from_supabase
+    from toss_crawling import metrics
+except ImportError:
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.append(project_root)
+    from toss_crawling.supabase_client import get_supabase, get_kst_now, load_etf_pdf_from_supabase
+    from toss_crawling import metrics
+
+NAVER_SCORE_MODE = os.getenv("NAVER_SCORE_MODE", "rpc").strip().lower()
+if NAVER_SCORE_MODE == "local":
+    NAVER_SCORE_MODE = "shadow"
+NAVER_SCORE_TOLERANCE = float(os.getenv("NAVER_SCORE_TOLERANCE", "0.001"))
+NAVER_SCORE_SHADOW_SUFFIX = os.getenv("NAVER_SCORE_SHADOW_SUFFIX", "_local").strip() or "_local"
+SCORE_MODES = ("rpc", "shadow", "both")
+
+# 점수 종류별 서버 함수와 결과 테이블
+TARGETS = {
+    "realtime": ("calculate_naver_etf_score", "naver_realtime_etf"),
+    "premarket": ("calculate_naver_premarket_score", "naver_premarket_etf"),
+}
+RESULT_COLUMNS = ["score", "rise_count", "fall_count", "holdings_count", "weight_sum", "trde_qty"]
+
+_engine = None
+
+
+def reference_formula(flu_rt, trde_qty, weights, etf_idx, n_etfs):
+    """
+    기준 산식. 인자는 구성종목 행 단위 배열이며, flu_rt/trde_qty는 시세가 없는 구성종목이면 NaN 입니다.
+    (etf_idx: 행이 속한 ETF 위치, weights: 구성비중(%)) {컬럼명: ETF별 값 배열}을 반환합니다.
+    """
+    import numpy as np
+
+    quoted = ~np.isnan(flu_rt)
+    flu = np.where(quoted, flu_rt, 0.0)
+
+    def per_etf(values):
+        return np.bincount(etf_idx, weights=values, minlength=n_etfs)
+
+    return {
+        "score": per_etf(weights / 100 * flu),
+        "rise_count": per_etf(flu > 0),
+        "fall_count": per_etf(flu < 0),
+        "holdings_count": per_etf(quoted),
+        "weight_sum": per_etf(np.where(quoted, weights, 0.0)),
+        "trde_qty": per_etf(np.where(quoted, trde_qty, 0.0)),
+    }
+
+
+class NaverScoreEngine:
+    """ETF_PDF 구성종목(transform_etf_pdf 형식)으로 만든 배열로 턴마다 ETF 점수를 계산합니다."""
+
+    def __init__(self, df_pdf, formula=reference_formula):
+        import numpy as np
+
+        self.formula = formula
+        df_pdf = df_pdf[df_pdf["구성종목코드"].astype(str).str.fullmatch(r"\d{6}")]
+        self.etf_codes, self.etf_idx = np.unique(df_pdf["ETF종목코드"].astype(str).to_numpy(), return_inverse=True)
+        self.stock_codes, self.holding_idx = np.unique(df_pdf["구성종목코드"].astype(str).to_numpy(), return_inverse=True)
+        self.weights = df_pdf["구성비중(%)"].to_numpy(dtype=np.float64)
+        names = df_pdf.drop_duplicates("ETF종목코드").set_index("ETF종목코드")["ETF종목명"] \
+            if "ETF종목명" in df_pdf.columns else None
+        self.etf_names = names.reindex(self.etf_codes).fillna("").tolist() if names is not None else [""] * len(self.etf_codes)
+
+    def score_arrays(self, quotes):
+        """이번 턴 시세 레코드(stk_cd, flu_rt, trde_qty)로 {컬럼명: ETF별 값 배열}을 계산합니다."""
+        import numpy as np
+
+        n_stocks = len(self.stock_codes)
+        flu_rt = np.full(n_stocks, np.nan)
+        trde_qty = np.full(n_stocks, np.nan)
+        if quotes:
+            codes = np.array([q["stk_cd"] for q in quotes])
+            row = np.searchsorted(self.stock_codes, codes)
+            matched = (row < n_stocks) & (self.stock_codes[np.minimum(row, n_stocks - 1)] == codes)
+            flu_rt[row[matched]] = np.fromiter((float(q["flu_rt"]) for q in quotes), np.float64, len(quotes))[matched]
+            trde_qty[row[matched]] = np.fromiter((float(q["trde_qty"]) for q in quotes), np.float64, len(quotes))[matched]
+        return self.formula(flu_rt[self.holding_idx], trde_qty[self.holding_idx], self.weights, self.etf_idx, len(self.etf_codes))
+
+    def score(self, quotes, updated_at):
+        """결과 테이블에 저장할 ETF별 레코드 리스트를 반환합니다."""
+        arrays = self.score_arrays(quotes)
+        columns = {
+            "score": arrays["score"].round(4).tolist(),
+            "rise_count": arrays["rise_count"].astype(int).tolist(),
+            "fall_count": arrays["fall_count"].astype(int).tolist(),
+            "holdings_count": arrays["holdings_count"].astype(int).tolist(),
+            "weight_sum": arrays["weight_sum"].round(4).tolist(),
+            "trde_qty": arrays["trde_qty"].astype(int).tolist(),
+        }
+        return [
+            {"etf_code": code, "etf_name": name, **{column: values[i] for column, values in columns.items()}, "updated_at": updated_at}
+            for i, (code, name) in enumerate(zip(self.etf_codes.tolist(), self.etf_names))
+        ]
+
+
+def get_engine(reload=False):
+    """ETF_PDF로 만든 엔진을 반환합니다. (프로세스당 한 번 로드, 실패 시 None)"""
+    global _engine
+    if _engine is None or reload:
+        df_pdf = load_etf_pdf_from_supabase()
+        if df_pdf is None or df_pdf.empty:
+            return None
+        _engine = NaverScoreEngine(df_pdf)
+        print(f"🧮 네이버 점수 로컬 엔진 준비: ETF {len(_engine.etf_codes)}개, 구성종목 {len(_engine.stock_codes)}개 ({len(_engine.weights)}행)")
+    return _engine
+
+
+def shadow_table(table):
+    """로컬 계산 결과를 저장하는 그림자 테이블 이름 (운영 결과 테이블과 분리)"""
+    return f"{table}{NAVER_SCORE_SHADOW_SUFFIX}"
+
+
+def save_results(table, results, batch_size=1000):
+    """로컬 계산 결과를 그림자 테이블에 etf_code 기준으로 upsert합니다. (운영 결과 테이블에는 쓰지 않음)"""
+    target = shadow_table(table)
+    for i in range(0, len(results), batch_size):
+        get_supabase().table(target).upsert(results[i:i + batch_size], on_conflict="etf_code").execute()
+    metrics.inc("rows_written", len(results))
+    return target
+
+
+def compare_with_table(table, results, tolerance=None):
+    """
+    로컬 계산 결과와 결과 테이블(서버 함수가 저장한 값)을 etf_code로 맞춰 공통 숫자 컬럼별로 비교합니다.
+    요약 dict(일치/한쪽에만 있는 행 수, 컬럼별 최대 오차와 불일치 수)를 반환합니다.
+    """
+    tolerance = NAVER_SCORE_TOLERANCE if tolerance is None else tolerance
+    stored = {}
+    offset, page_size = 0, 1000
+    while True:
+        page = get_supabase().table(table).select("*").range(offset, offset + page_size - 1).execute().data
+        stored.update((str(row["etf_code"]).zfill(6), row) for row in page)
+        if len(page) < page_size:
+            break
+        offset += page_size
+
+    local = {row["etf_code"]: row for row in results}
+    common = local.keys() & stored.keys()
+    summary = {"matched": len(common), "local_only": len(local.keys() - stored.keys()), "stored_only": len(stored.keys() - local.keys())}
+    sample = next((stored[code] for code in common), {})
+    for column in RESULT_COLUMNS:
+        if column not in sample:
+            continue
+        diffs = [abs(float(local[code][column]) - float(stored[code][column] or 0)) for code in common]
+        summary[column] = {"max_abs_diff": max(diffs, default=0.0), "mismatches": sum(d > tolerance for d in diffs)}
+    return summary
+
+
+def score_turn(kind, quotes, updated_at=None, mode=None):
+    """
+    시세 테이블 저장 이후의 점수 단계를 모드에 따라 실행합니다. (kind: realtime / premarket)
+    rpc: 서버 함수, shadow: 서버 함수 + 로컬 계산 결과를 그림자 테이블에 저장, both: 서버 함수 + 로컬 계산 결과 비교
+    """
+    mode = mode or NAVER_SCORE_MODE
+    mode = "shadow" if mode == "local" else mode
+    if mode not in SCORE_MODES:
+        print(f"⚠️ 알 수 없는 NAVER_SCORE_MODE({mode})입니다. 서버 함수로 계산합니다.")
+        mode = "rpc"
+    rpc_name, table = TARGETS[kind]
+    updated_at = updated_at or get_kst_now().replace(microsecond=0).isoformat()
+
+    # 운영 결과 테이블은 모든 모드에서 서버 함수가 씀
+    print(f"📊 [Server-Side] 네이버 {kind} 점수 계산 요청 중... ({rpc_name})")
+    with metrics.span("rpc"):
+        get_supabase().rpc(rpc_name, {}).execute()
+    print("✅ [Server-Side] 네이버 점수 업데이트 완료")
+    if mode == "rpc":
+        return None
+
+    engine = get_engine()
+    if engine is None:
+        print("⚠️ ETF PDF를 불러오지 못해 이번 턴은 로컬 점수 계산을 건너뜁니다.")
+        return None
+
+    started = time.perf_counter()
+    with metrics.span("score"):
+        results = engine.score(quotes, updated_at)
+    elapsed = time.perf_counter() - started
+
+    if mode == "shadow":
+        with metrics.span("db_write"):
+            target = save_results(table, results)
+        print(f"✅ [Local] 네이버 {kind} 점수 {len(results)}건 계산({elapsed * 1000:.1f}ms) 및 그림자 테이블 '{target}' 저장 완료")
+        return results
+
+    with metrics.span("db_read"):
+        summary = compare_with_table(table, results)
+    diffs = ", ".join(f"{column} 최대 오차 {stats['max_abs_diff']:.4f}/불일치 {stats['mismatches']}"
+                      for column, stats in summary.items() if isinstance(stats, dict))
+    print(f"🔍 [Local vs Server] {kind} 계산 {elapsed * 1000:.1f}ms | 일치 {summary['matched']}행, "
+          f"로컬에만 {summary['local_only']}행, 서버에만 {summary['stored_only']}행 | {diffs or '공통 점수 컬럼 없음'}")
+    return results
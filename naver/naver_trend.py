@@ -1,5 +1,4 @@
 import requests
-import pandas as pd
 import os
 import sys
 import time
@@ -9,12 +8,20 @@ from bs4 import BeautifulSoup
 
 # Supabase 연동
 try:
-    from toss_crawling.supabase_client import supabase
+    from toss_crawling.supabase_client import get_supabase
+    from toss_crawling import metrics
+    from toss_crawling.retention import purge_tables
+    from toss_crawling.rate_limit import acquire
+    from toss_crawling.parsing import parse_int
 except ImportError:
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     if project_root not in sys.path:
         sys.path.append(project_root)
-    from toss_crawling.supabase_client import supabase
+    from toss_crawling.supabase_client import get_supabase
+    from toss_crawling import metrics
+    from toss_crawling.retention import purge_tables
+    from toss_crawling.rate_limit import acquire
+    from toss_crawling.parsing import parse_int
 
 # [설정] 스냅샷 수집 기준 시간
 TARGET_TIMES = ["09:30", "10:00", "11:30", "13:20", "14:30", "15:30"]
@@ -27,20 +34,16 @@ def delete_old_trend_data():
     """
     오늘(KST 기준) 이전의 시장 동향 데이터를 삭제합니다.
     """
-    try:
-        now_kst = get_korea_now()
-        today_start_kst = now_kst.replace(hour=0, minute=0, second=0, microsecond=0)
-        # '거래일' 컬럼이 date 형식이므로 날짜 문자열로 비교
-        threshold_date = today_start_kst.strftime('%Y-%m-%d')
-
-        print(f"🧹 [시장동향] 오늘({threshold_date}) 이전 데이터 삭제 중...")
-        
-        # '거래일' < threshold_date 인 데이터 삭제
-        supabase.table("naver_market_trend").delete().lt("거래일", threshold_date).execute()
-        
-        print(f"✅ [시장동향] 지난 데이터 삭제 프로세스 완료")
-    except Exception as e:
-        print(f"🚨 [시장동향] 지난 데이터 삭제 오류: {e}")
+    now_kst = get_korea_now()
+    # '거래일' 컬럼이 date 형식이므로 날짜 문자열로 비교
+    threshold_date = now_kst.strftime('%Y-%m-%d')
+
+    print(f"🧹 [시장동향] 오늘({threshold_date}) 이전 데이터 삭제 중...")
+
+    # '거래일' < threshold_date 인 데이터를 날짜 구간 단위로 삭제
+    purge_tables([("naver_market_trend", "거래일")], threshold_date, label="시장동향")
+
+    print(f"✅ [시장동향] 지난 데이터 삭제 프로세스 완료")
 
 def get_nearest_target_time():
     """현재 시간 기준 가장 최근에 도달한(또는 지나간) 타겟 시간을 반환합니다."""
@@ -60,7 +63,7 @@ def is_already_recorded_in_supabase(date, target_time):
     """수파베이스에 해당 날짜와 타겟 시간의 데이터가 이미 존재하는지 확인합니다."""
     try:
         # 한글 컬럼명 "거래일", "거래시간" 사용
-        response = supabase.table("naver_market_trend") \
+        response = get_supabase().table("naver_market_trend") \
             .select("id") \
             .eq("거래일", date) \
             .eq("거래시간", target_time) \
@@ -76,22 +79,28 @@ def get_market_trend(market_code):
     url = f"https://finance.naver.com/sise/sise_index.naver?code={market_code}"
     headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36'}
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        dl = soup.find('dl', class_='lst_kos_info')
-        
-        # 한글 키를 사용하는 딕셔너리 구성
-        trend = {'시장': market_code, '개인': 0, '외국인': 0, '기관': 0}
-        if dl:
-            dds = dl.find_all('dd', class_='dd')
-            for dd in dds:
-                text = dd.get_text(strip=True)
-                val_elem = dd.find('span')
-                if val_elem:
-                    val = val_elem.get_text(strip=True).replace('억', '').replace(',', '').replace('+', '')
-                    if "개인" in text: trend['개인'] = int(val)
-                    elif "외국인" in text: trend['외국인'] = int(val)
-                    elif "기관" in text: trend['기관'] = int(val)
+        with metrics.span("page_load"):
+            acquire(url)
+            response = requests.get(url, headers=headers, timeout=10)
+        metrics.inc("bytes_fetched", len(response.content))
+
+        with metrics.span("parse"):
+            soup = BeautifulSoup(response.text, 'html.parser')
+            dl = soup.find('dl', class_='lst_kos_info')
+            
+            # 한글 키를 사용하는 딕셔너리 구성
+            trend = {'시장': market_code, '개인': 0, '외국인': 0, '기관': 0}
+            if dl:
+                dds = dl.find_all('dd', class_='dd')
+                for dd in dds:
+                    text = dd.get_text(strip=True)
+                    val_elem = dd.find('span')
+                    if val_elem:
+                        val = parse_int(val_elem.get_text(strip=True))
+                        if "개인" in text: trend['개인'] = val
+                        elif "외국인" in text: trend['외국인'] = val
+                        elif "기관" in text: trend['기관'] = val
+        metrics.inc("rows_collected")
         return trend
     except Exception as e:
         print(f"❌ {market_code} 매매동향 수집 실패: {e}")
@@ -116,6 +125,7 @@ def main():
 
     # 4. 데이터 수집 및 저장
     print(f"📸 [{now_kst.strftime('%H:%M:%S')}] {target_time} 스냅샷 수집 및 수파베이스 저장 시작!")
+    metrics.start_turn("naver_trend", turn_id=f"{today_date} {target_time}")
     insert_data = []
     for m in ['KOSPI', 'KOSDAQ']:
         t_data = get_market_trend(m)
@@ -127,11 +137,14 @@ def main():
     
     if insert_data:
         try:
-            supabase.table("naver_market_trend").upsert(insert_data).execute()
+            with metrics.span("db_write"):
+                get_supabase().table("naver_market_trend").upsert(insert_data).execute()
+            metrics.inc("rows_written", len(insert_data))
             print(f"💾 {target_time} 수파베이스 저장 성공 ({len(insert_data)}건)")
         except Exception as e:
             print(f"❌ 수파베이스 저장 오류: {e}")
     
+    metrics.end_turn()
     print("=== 수집 완료 및 프로세스 종료 ===")
 
 if __name__ == "__main__":
@@ -1,75 +1,270 @@
 import re
+import os
+import sys
 import requests
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
 
+try:
+    from toss_crawling import metrics
+    from toss_crawling.parsing import parse_number, parse_unsigned, parse_int
+    from toss_crawling.request_policy import fetch
+except ImportError:
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.append(project_root)
+    from toss_crawling import metrics
+    from toss_crawling.parsing import parse_number, parse_unsigned, parse_int
+    from toss_crawling.request_policy import fetch
+
+
+KST = timezone(timedelta(hours=9))
+SISE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+# type_2 테이블의 열 위치 (현재가, 전일비, 등락률, 거래량)
+# - 상승/하락 페이지: N, 종목명, 현재가, 전일비, 등락률, 거래량, 매수호가, ...
+# - 시가총액 페이지: N, 종목명, 현재가, 전일비, 등락률, 액면가, 시가총액, 상장주식수, 외국인비율, 거래량, PER, ROE
+SISE_COLUMNS = (2, 3, 4, 5)
+MARKET_SUM_COLUMNS = (2, 3, 4, 9)
+
+# 전 종목 모드: 시가총액 순 전체 목록(sise_market_sum)을 시장별로 모든 페이지 수집
+MARKET_SUM_URL = "https://finance.naver.com/sise/sise_market_sum.naver?sosok={sosok}&page={page}"
+MARKET_SUM_MARKETS = (("KOSPI", 0), ("KOSDAQ", 1))
+NAVER_SISE_WORKERS = int(os.getenv("NAVER_SISE_WORKERS", "8"))
+
+_PAGE_RE = re.compile(r'page=(\d+)')
+_market_sum_pages = {}      # sosok -> 마지막으로 확인한 페이지 수 (다음 턴에 첫 페이지를 기다리지 않고 전부 요청)
+_market_sum_page_codes = {} # (sosok, page) -> 그 페이지에서 마지막으로 본 종목 코드 (codes로 범위를 줄일 때 사용)
+_market_sum_full_sweep = True   # 다음 턴에 모든 페이지를 요청할지 (첫 턴, 또는 대상 종목이 요청한 페이지 밖으로 밀려난 경우)
+_executor = None
+
+
+def _row_direction(pre_cell):
+    """전일비 셀의 상승/하락 표시(blind 텍스트)로 등락 구분을 판단합니다."""
+    if "상승" in pre_cell or "상한" in pre_cell:
+        return "상승"
+    if "하락" in pre_cell or "하한" in pre_cell:
+        return "하락"
+    return "보합"
+
+
+def parse_last_page(html):
+    """시세 목록 페이지 하단 페이지 이동 링크에서 마지막 페이지 번호를 찾습니다. (없으면 1)"""
+    soup = BeautifulSoup(html, 'html.parser')
+    last = soup.find('td', class_='pgRR')
+    links = last.find_all('a') if last else []
+    if not links:
+        navi = soup.find('table', class_='Nnavi')
+        links = navi.find_all('a') if navi else []
+    pages = [int(m.group(1)) for a in links for m in [_PAGE_RE.search(a.get('href', ''))] if m]
+    return max(pages, default=1)
+
+
+def parse_naver_sise_html(html, market_name, type_name, now_kst, columns=SISE_COLUMNS):
+    """
+    네이버 증권 시세 페이지 HTML에서 type_2 테이블을 파싱하여 종목 리스트를 반환합니다. (테이블이 없으면 None)
+    type_name이 None이면(시가총액 페이지처럼 상승/하락이 섞인 목록) 행마다 전일비 표시로 상승/하락/보합을 정합니다.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    table = soup.find('table', class_='type_2')
+    if not table:
+        return None
+    close_idx, pre_idx, flu_idx, qty_idx = columns
+
+    rows = table.find_all('tr')
+    names, codes, close_cells, pre_cells, flu_cells, qty_cells = [], [], [], [], [], []
+
+    # 행 단위로는 셀 텍스트만 모으고, 숫자 변환은 열마다 parsing의 스칼라 파서(translate 기반)로 처리합니다.
+    for row in rows:
+        tds = row.find_all('td')
+        if len(tds) < 10:
+            continue
+
+        a_tag = tds[1].find('a')
+        if not a_tag:
+            continue
+
+        href = a_tag.get('href', '')
+        code_match = re.search(r'code=(\d{6})', href)
+        names.append(a_tag.text.strip())
+        codes.append(code_match.group(1) if code_match else "")
+        close_cells.append(tds[close_idx].text)
+        pre_cells.append(tds[pre_idx].text)
+        flu_cells.append(tds[flu_idx].text)
+        qty_cells.append(tds[qty_idx].text)
+
+    if not names:
+        return []
+
+    close_prics = [parse_number(cell) for cell in close_cells]
+    pres = [parse_unsigned(cell) for cell in pre_cells]
+    flu_rts = [parse_number(cell) for cell in flu_cells]
+    trde_qtys = [parse_int(cell) for cell in qty_cells]
+    directions = [_row_direction(cell) for cell in pre_cells] if type_name is None else [type_name] * len(names)
+
+    collected_data = []
+    for stk_cd, stk_nm, close_pric, pre, flu_rt, trde_qty, row_type in zip(codes, names, close_prics, pres, flu_rts, trde_qtys, directions):
+        if not stk_cd:
+            continue
+        # 상승/하락 페이지는 부호 없는 등락률만 뒤집고, 혼합 목록은 전일비(부호 없음)에 하락 표시를 반영
+        if "하락" in row_type and (flu_rt > 0 or type_name is None):
+            flu_rt = -abs(flu_rt)
+            pre = -pre
+
+        collected_data.append({
+            "stk_cd": stk_cd,
+            "stk_nm": stk_nm,
+            "close_pric": close_pric,
+            "pre": pre,
+            "flu_rt": flu_rt,
+            "trde_qty": trde_qty,
+            "market": market_name,
+            "type": row_type,
+            "collected_at": now_kst,
+        })
+
+    return collected_data
+
+
+def _fetch_sise_html(url, label):
+    """
+    시세 페이지를 요청 정책(헤지/서킷 브레이커)과 속도 제한을 거쳐 가져와 (HTML 문자열, stale 페이지의 수집 시각) 으로 반환합니다.
+    정상 응답이면 수집 시각은 None이고, 브레이커가 열려 마지막 정상 페이지를 쓴 경우 그 페이지를 받은 시각(KST ISO)입니다.
+    """
+    def request():
+        return requests.get(url, headers=SISE_HEADERS, timeout=10)
+
+    # 지연시간/헤지/브레이커는 페이지 경로 단위, 마지막 정상 페이지는 URL 단위로 관리하고 속도 제한 토큰은 시간 측정 전에 받음
+    # (느린 응답은 헤지 요청으로 대체하고, 연속 실패 시에는 마지막 정상 페이지(stale)를 사용)
+    with metrics.span("page_load"):
+        result = fetch(f"naver_sise:{urlparse(url).path}", request, cache_key=url, limiter=url)
+    response = result.response
+    stale_at = None
+    if result.stale:
+        stale_at = datetime.fromtimestamp(result.fetched_at, KST).replace(microsecond=0).isoformat()
+        print(f"⚠️ [{label}] 서킷 브레이커 open: {result.age:.0f}초 전({stale_at}) 페이지를 사용합니다. (stale, 수집 시각은 원래 시각으로 기록)")
+        metrics.inc("stale_payloads")
+    else:
+        metrics.inc("bytes_fetched", len(response.content))
+    metrics.inc("hedged_requests", int(result.hedged))
+    response.encoding = 'euc-kr'
+    return response.text, stale_at
+
 
 def get_naver_sise(url, market_name, type_name, now_kst):
     """네이버 증권 시세 페이지(상승/하락 테이블)를 크롤링하여 종목 리스트를 반환합니다."""
     print(f"🚀 [{market_name} {type_name}] 크롤링 중: {url}")
 
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    }
-
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        response.encoding = 'euc-kr'
+        html, stale_at = _fetch_sise_html(url, f"{market_name} {type_name}")
+
+        with metrics.span("parse"):
+            collected_data = parse_naver_sise_html(html, market_name, type_name, stale_at or now_kst)
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        table = soup.find('table', class_='type_2')
-        if not table:
+        if collected_data is None:
             print(f"❌ 테이블을 찾을 수 없습니다: {market_name} {type_name}")
             return []
 
-        rows = table.find_all('tr')
-        collected_data = []
-
-        for row in rows:
-            tds = row.find_all('td')
-            if len(tds) < 10:
-                continue
-
-            a_tag = tds[1].find('a')
-            if not a_tag:
-                continue
-
-            stk_nm = a_tag.text.strip()
-            href = a_tag.get('href', '')
-            code_match = re.search(r'code=(\d{6})', href)
-            stk_cd = code_match.group(1) if code_match else ""
-
-            close_pric_str = tds[2].text.strip().replace(',', '')
-            close_pric = float(close_pric_str) if close_pric_str else 0.0
-
-            pre_str = re.sub(r'[^0-9.]', '', tds[3].text.strip().replace(',', ''))
-            pre = float(pre_str) if pre_str else 0.0
-
-            flu_rt_str = tds[4].text.strip().replace('%', '').replace(',', '').replace('+', '')
-            flu_rt = float(flu_rt_str) if flu_rt_str else 0.0
-
-            trde_qty_str = tds[5].text.strip().replace(',', '')
-            trde_qty = int(trde_qty_str) if trde_qty_str else 0
-
-            if stk_cd:
-                if "하락" in type_name and flu_rt > 0:
-                    flu_rt = -flu_rt
-                    pre = -pre
-
-                collected_data.append({
-                    "stk_cd": stk_cd,
-                    "stk_nm": stk_nm,
-                    "close_pric": close_pric,
-                    "pre": pre,
-                    "flu_rt": flu_rt,
-                    "trde_qty": trde_qty,
-                    "market": market_name,
-                    "type": type_name,
-                    "collected_at": now_kst,
-                })
-
+        metrics.inc("rows_collected", len(collected_data))
         return collected_data
 
     except Exception as e:
         print(f"❌ 오류 발생 ({market_name} {type_name}): {e}")
         return []
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=NAVER_SISE_WORKERS, thread_name_prefix="naver-sise")
+    return _executor
+
+
+def _get_market_sum_page(market_name, sosok, page, now_kst):
+    """시가총액 목록 한 페이지를 가져와 (종목 리스트, 마지막 페이지 번호) 를 반환합니다. (실패 시 None, None)"""
+    url = MARKET_SUM_URL.format(sosok=sosok, page=page)
+    try:
+        html, stale_at = _fetch_sise_html(url, f"{market_name} 전종목 {page}p")
+        with metrics.span("parse"):
+            collected_data = parse_naver_sise_html(html, market_name, None, stale_at or now_kst, columns=MARKET_SUM_COLUMNS)
+            last_page = parse_last_page(html) if page == 1 else None
+        if collected_data is None:
+            print(f"❌ 테이블을 찾을 수 없습니다: {market_name} 전종목 {page}p")
+            return None, None
+        return collected_data, last_page
+    except Exception as e:
+        print(f"❌ 오류 발생 ({market_name} 전종목 {page}p): {e}")
+        return None, None
+
+
+def get_naver_market_sum(now_kst, markets=MARKET_SUM_MARKETS, should_stop=None, codes=None):
+    """
+    시장별 시가총액 목록(sise_market_sum)의 페이지를 동시에 요청하여 시세를 하나의 스냅샷으로 반환합니다.
+    동시 요청 수는 NAVER_SISE_WORKERS이고, 실제 호출 속도는 호스트별 속도 제한(rate_limit)이 정합니다.
+    턴 소요 시간은 (요청 페이지 수 - burst) / 초당 요청 수 에 가깝습니다. 모든 페이지(56페이지)를 요청하면 기본 2 req/s에서
+    26~29초(HTTP 56회, 속도 제한이 꽉 차 있으면 헤지 요청은 보내지 않음)로, 상승/하락 4페이지(약 3초)보다 훨씬 깁니다.
+    (benchmarks/check_market_sum_turn.py, 모의 지연 중앙값 250ms)
+    그래서 codes(예: ETF_PDF 구성종목)가 주어지면 첫 턴에만 모든 페이지를 받아 페이지별 종목을 기록하고, 이후 턴에는
+    첫 페이지와 codes 종목이 있던 페이지만 요청합니다. 요청한 페이지에서 codes 종목이 빠지면(순위 변동) 다음 턴에 다시 모든 페이지를 받습니다.
+    페이지 수는 지난 턴에 확인한 값으로 한 번에 요청하고, 첫 페이지에서 페이지가 늘어난 것이 확인되면 나머지를 이어서 요청합니다.
+    (수집 중 순위가 바뀌어 두 페이지에 걸친 종목은 먼저 나온 페이지 기준으로 한 번만 포함)
+    """
+    global _market_sum_full_sweep
+    executor = _get_executor()
+    futures = {}
+    scoped = codes is not None and not _market_sum_full_sweep
+    # 이번 턴에 받아야 하는 대상 종목 (지난번에 본 페이지 기준)
+    expected = set().union(*(page_codes & codes for page_codes in _market_sum_page_codes.values())) if scoped else set()
+
+    def submit(market_name, sosok, pages):
+        for page in pages:
+            if should_stop and should_stop():
+                return
+            futures[(sosok, page)] = executor.submit(_get_market_sum_page, market_name, sosok, page, now_kst)
+
+    for market_name, sosok in markets:
+        pages = range(1, _market_sum_pages.get(sosok, 1) + 1)
+        if scoped:
+            pages = [page for page in pages if page == 1 or _market_sum_page_codes.get((sosok, page), set()) & codes]
+            print(f"🚀 [{market_name} 전종목] 크롤링 중: 대상 종목이 있는 {len(pages)}/{_market_sum_pages.get(sosok, '?')}페이지")
+        else:
+            print(f"🚀 [{market_name} 전종목] 크롤링 중: {_market_sum_pages.get(sosok, '?')}페이지")
+        submit(market_name, sosok, pages)
+
+    # 첫 페이지에서 확인한 페이지 수가 지난 턴보다 많으면(처음 턴 포함) 나머지 페이지를 요청
+    for market_name, sosok in markets:
+        first = futures.get((sosok, 1))
+        _, last_page = first.result() if first else (None, None)
+        if last_page:
+            known = _market_sum_pages.get(sosok, 1)
+            _market_sum_pages[sosok] = last_page
+            for key in [key for key in _market_sum_page_codes if key[0] == sosok and key[1] > last_page]:
+                del _market_sum_page_codes[key]
+            if last_page > known:
+                submit(market_name, sosok, range(known + 1, last_page + 1))
+
+    collected, seen, failed = [], set(), []
+    for (sosok, page), future in sorted(futures.items()):
+        rows, _ = future.result()
+        if rows is None:
+            failed.append(f"{sosok}:{page}")
+            continue
+        _market_sum_page_codes[(sosok, page)] = {row["stk_cd"] for row in rows}
+        for row in rows:
+            if row["stk_cd"] not in seen:
+                seen.add(row["stk_cd"])
+                collected.append(row)
+
+    if failed:
+        print(f"⚠️ 전종목 수집 중 {len(failed)}개 페이지 실패 (시장:페이지 {', '.join(failed)})")
+    if codes is not None:
+        missing = expected - seen
+        _market_sum_full_sweep = bool(missing)
+        if missing:
+            print(f"ℹ️ 대상 종목 {len(missing)}개가 요청한 페이지에 없어 다음 턴에 모든 페이지를 다시 요청합니다.")
+    metrics.inc("rows_collected", len(collected))
+    return collected
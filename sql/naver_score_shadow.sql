@@ -0,0 +1,16 @@
+-- 네이버 점수 로컬 계산 결과 그림자 테이블 (naver/naver_score.py, NAVER_SCORE_MODE=shadow)
+-- 운영 결과 테이블(naver_realtime_etf, naver_premarket_etf)과 분리하여 로컬 산식(reference_formula)의 결과만 저장합니다.
+-- 테이블 이름 접미사는 NAVER_SCORE_SHADOW_SUFFIX (기본 _local)
+create table if not exists naver_realtime_etf_local (
+    etf_code       text primary key,
+    etf_name       text,
+    score          double precision,
+    rise_count     integer,
+    fall_count     integer,
+    holdings_count integer,
+    weight_sum     double precision,
+    trde_qty       bigint,
+    updated_at     timestamptz
+);
+
+create table if not exists naver_premarket_etf_local (like naver_realtime_etf_local including all);
@@ -0,0 +1,35 @@
+-- 장중 점수 모멘텀 컬럼 (toss_crawling/score_history.py, SCORE_MOMENTUM_PERSIST=1)
+-- 기본 창(SCORE_HISTORY_WINDOWS=5,15,30) 기준입니다. 창을 바꾸면 score_history.momentum_columns()의 이름대로 컬럼을 추가하세요.
+-- 값이 없는 창(표본 2개 미만)은 null로 저장됩니다.
+alter table toss_yg_score_etf
+    add column if not exists score_delta_5m          double precision,
+    add column if not exists score_ma_5m             double precision,
+    add column if not exists foreign_delta_5m        double precision,
+    add column if not exists institution_delta_5m    double precision,
+    add column if not exists score_delta_15m         double precision,
+    add column if not exists score_ma_15m            double precision,
+    add column if not exists foreign_delta_15m       double precision,
+    add column if not exists institution_delta_15m   double precision,
+    add column if not exists score_delta_30m         double precision,
+    add column if not exists score_ma_30m            double precision,
+    add column if not exists foreign_delta_30m       double precision,
+    add column if not exists institution_delta_30m   double precision;
+
+-- 모멘텀 저장은 점수 저장(save_score_to_supabase)과 같은 on_conflict=(etf_code, updated_at) upsert 입니다.
+-- PostgREST upsert는 이 컬럼 조합의 고유 제약/인덱스가 있어야 하므로, 없을 때만 만듭니다.
+do $$
+begin
+    if not exists (
+        select 1
+        from pg_index i
+        join pg_class t on t.oid = i.indrelid
+        where t.relname = 'toss_yg_score_etf'
+          and i.indisunique
+          and i.indnkeyatts = 2
+          and (select array_agg(a.attname::text order by a.attname)
+               from pg_attribute a
+               where a.attrelid = t.oid and a.attnum = any(i.indkey)) = array['etf_code', 'updated_at']
+    ) then
+        create unique index toss_yg_score_etf_etf_code_updated_at_key on toss_yg_score_etf (etf_code, updated_at);
+    end if;
+end $$;
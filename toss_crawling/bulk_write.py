@@ -0,0 +1,151 @@
+"""
+컬럼 단위 대량 저장 (PostgREST 직접 POST)
+
+supabase SDK의 upsert/insert는 레코드(dict) 리스트를 받아 기본 json 모듈로 직렬화하므로, 같은 데이터를 여러 테이블에 나눠 쓰면
+테이블마다 dict 리스트를 새로 만들고 직렬화합니다. 이 모듈은 컬럼(필드 -> 값 리스트) 형태의 데이터에서 요청 본문을 바로 만들어
+SDK가 쓰는 HTTP 세션으로 PostgREST에 POST 합니다.
+    - to_columns로 레코드를 한 번만 컬럼으로 바꾸고, 다른 테이블에 쓸 필드는 project로 고릅니다. (값 리스트를 복사하지 않음)
+    - 본문 형식(BULK_WRITE_FORMAT)
+        json : 행 객체 배열. 구간의 행 dict(to_records)를 orjson으로 한 번에 직렬화 (numpy 값 포함, OPT_SERIALIZE_NUMPY)
+               orjson은 NaN/Infinity를 null로 쓰므로 본문은 항상 유효한 JSON입니다. (orjson은 필수 의존성, requirements.txt)
+        csv  : 헤더 + 행 (Content-Type: text/csv, PostgREST의 CSV 대량 입력). 빈 값은 NULL, 타입은 서버가 컬럼 정의로 변환
+        sdk  : 기존처럼 SDK의 upsert/insert 사용 (레코드 dict를 만들어 전달)
+    - BULK_WRITE_GZIP=1 이면 본문을 gzip으로 압축하고 Content-Encoding: gzip을 붙입니다.
+      PostgREST 자체는 압축된 요청 본문을 풀지 않으므로, 앞단 게이트웨이가 요청 본문 압축 해제를 지원하는 경우에만 켭니다.
+    - upsert는 Prefer: resolution=merge-duplicates (+ on_conflict), 응답 본문은 받지 않습니다. (return=minimal)
+메모리 DB 대역(SUPABASE_BACKEND=memory)은 post_table로 같은 본문을 해석하므로, 벤치마크에서도 인코딩 경로를 그대로 측정합니다.
+
+환경 변수:
+    BULK_WRITE_FORMAT     : json / csv / sdk (기본 json)
+    BULK_WRITE_GZIP       : 1이면 요청 본문 gzip 압축 (기본 0)
+    BULK_WRITE_GZIP_LEVEL : gzip 압축 수준 1~9 (기본 5)
+    BULK_WRITE_BATCH_SIZE : 요청당 행 수 (기본 1000)
+"""
+import io
+import os
+import csv
+import gzip
+
+try:
+    from toss_crawling.supabase_client import get_supabase
+    from toss_crawling import metrics
+except ImportError:
+    from supabase_client import get_supabase
+    import metrics
+
+BULK_WRITE_FORMAT = os.getenv("BULK_WRITE_FORMAT", "json").strip().lower()
+BULK_WRITE_GZIP = os.getenv("BULK_WRITE_GZIP", "0").strip() in ("1", "true", "yes")
+BULK_WRITE_GZIP_LEVEL = int(os.getenv("BULK_WRITE_GZIP_LEVEL", "5"))
+BULK_WRITE_BATCH_SIZE = int(os.getenv("BULK_WRITE_BATCH_SIZE", "1000"))
+FORMATS = ("json", "csv", "sdk")
+
+
+def to_columns(records, fields=None):
+    """레코드(dict) 리스트를 {필드: 값 리스트}로 바꿉니다. fields가 없으면 첫 레코드의 키 순서를 사용합니다."""
+    if not records:
+        return {field: [] for field in fields or ()}
+    fields = list(fields or records[0])
+    return {field: [record.get(field) for record in records] for field in fields}
+
+
+def project(columns, fields):
+    """컬럼 데이터에서 fields만 고릅니다. (값 리스트는 공유)"""
+    return {field: columns[field] for field in fields}
+
+
+def row_count(columns):
+    return len(next(iter(columns.values()), ()))
+
+
+def iter_rows(columns, start=0, stop=None):
+    """컬럼 데이터의 [start, stop) 구간을 값 튜플로 순회합니다."""
+    return zip(*(values[start:stop] for values in columns.values()))
+
+
+def to_records(columns, start=0, stop=None):
+    fields = list(columns)
+    return [dict(zip(fields, row)) for row in iter_rows(columns, start, stop)]
+
+
+def encode_json(columns, start=0, stop=None):
+    """[start, stop) 구간을 행 객체 배열(JSON bytes)로 인코딩합니다. (NaN/Infinity는 null)"""
+    import orjson  # 수집기 임포트 시간에 포함되지 않도록 첫 저장 때 로드
+
+    return orjson.dumps(to_records(columns, start, stop), option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def encode_csv(columns, start=0, stop=None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    writer.writerows(iter_rows(columns, start, stop))
+    return buffer.getvalue().encode("utf-8")
+
+
+def build_request(columns, start, stop, fmt, compress):
+    """[start, stop) 구간의 요청 본문(bytes)과 헤더를 만듭니다."""
+    if fmt == "csv":
+        body, content_type = encode_csv(columns, start, stop), "text/csv"
+    else:
+        body, content_type = encode_json(columns, start, stop), "application/json"
+    headers = {"Content-Type": content_type}
+    if compress:
+        body = gzip.compress(body, compresslevel=BULK_WRITE_GZIP_LEVEL)
+        headers["Content-Encoding"] = "gzip"
+    return body, headers
+
+
+def _post(client, table, body, headers, params):
+    """PostgREST에 본문을 그대로 POST 합니다. (메모리 대역이면 post_table)"""
+    if hasattr(client, "post_table"):
+        return client.post_table(table, body, headers, params)
+
+    from postgrest.exceptions import APIError
+
+    rest = client.postgrest
+    response = rest.session.post(str(rest.base_url.joinpath(table)), content=body, params=params,
+                                 headers={**dict(rest.headers), **headers})
+    if response.status_code >= 400:
+        try:
+            error = response.json()
+        except ValueError:
+            error = {"message": response.text, "code": str(response.status_code), "hint": None, "details": None}
+        raise APIError(error)
+    return response
+
+
+def bulk_write(table, columns, upsert=False, on_conflict=None, fmt=None, compress=None, batch_size=None):
+    """
+    컬럼 데이터를 table에 insert(upsert=True이면 upsert)합니다. 보낸 본문 바이트 수를 반환합니다. (sdk 형식이면 0)
+    실패하면 SDK와 같이 postgrest APIError를 그대로 올립니다.
+    """
+    fmt = fmt or BULK_WRITE_FORMAT
+    if fmt not in FORMATS:
+        print(f"⚠️ 알 수 없는 BULK_WRITE_FORMAT({fmt})입니다. json으로 저장합니다.")
+        fmt = "json"
+    compress = BULK_WRITE_GZIP if compress is None else compress
+    batch_size = batch_size or BULK_WRITE_BATCH_SIZE
+    total = row_count(columns)
+    client = get_supabase()
+
+    if fmt == "sdk":
+        for i in range(0, total, batch_size):
+            query = client.table(table)
+            batch = to_records(columns, i, i + batch_size)
+            (query.upsert(batch, on_conflict=on_conflict or "") if upsert else query.insert(batch)).execute()
+        return 0
+
+    prefer = ["return=minimal"]
+    params = {}
+    if upsert:
+        prefer.append("resolution=merge-duplicates")
+        if on_conflict:
+            params["on_conflict"] = on_conflict
+    sent = 0
+    for i in range(0, total, batch_size):
+        body, headers = build_request(columns, i, i + batch_size, fmt, compress)
+        headers["Prefer"] = ",".join(prefer)
+        _post(client, table, body, headers, params)
+        sent += len(body)
+    metrics.inc("bytes_sent", sent)
+    return sent
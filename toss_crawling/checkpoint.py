@@ -0,0 +1,124 @@
+"""
+세션 간 웜 스타트 체크포인트 (오전 → 오후)
+
+워크플로는 하루를 오전(morning)/오후(afternoon) 작업으로 나누어 실행하므로, 오후 작업은 ETF_PDF 재로드, 개장 여부 재확인,
+장중 점수 이력 초기화 등 빈 상태에서 다시 시작합니다. 수집기는 세션 종료 시 웜 상태(dict)를 save_checkpoint로 저장하고,
+시작 시 load_checkpoint로 읽어 같은 거래일이고 충분히 최근(CHECKPOINT_MAX_AGE_MINUTES)에 저장된 경우에만 복원합니다.
+    - 파일은 {CHECKPOINT_DIR}/{collector}.json.gz (JSON + gzip) 하나이며, 임시 파일에 쓴 뒤 교체합니다.
+    - 워크플로에서는 오전 작업이 이 디렉토리를 artifact로 올리고 오후 작업이 내려받습니다.
+    - artifact는 작업 밖을 거쳐 오므로 pickle(임의 객체 복원)을 쓰지 않고 일반 데이터(dict/list/문자열/숫자/None)만 저장합니다.
+      수집기 상태의 객체(응답, 점수 이력, 분봉)는 각 모듈의 export/restore 함수로 일반 데이터와 numpy 배열로 바꿔 넘깁니다.
+    - numpy 배열(수치/불리언 dtype만)은 {"__ndarray__": dtype, "shape": [...], "data": base64} 로 저장하고 읽을 때 배열로 되돌립니다.
+    - 읽기/쓰기 실패는 수집을 막지 않도록 출력만 하고, 복원 실패 시에는 기존처럼 처음부터 시작합니다.
+      (이전 형식인 {collector}.pkl.gz 파일은 읽지 않음)
+
+환경 변수:
+    CHECKPOINT                  : 0이면 저장/복원하지 않음 (기본 1)
+    CHECKPOINT_DIR              : 체크포인트 디렉토리 (기본 .cache/checkpoints)
+    CHECKPOINT_MAX_AGE_MINUTES  : 이보다 오래된 체크포인트는 무시 (기본 60)
+"""
+import os
+import gzip
+import json
+import base64
+from datetime import datetime, timedelta, timezone
+
+CHECKPOINT_ENABLED = os.getenv("CHECKPOINT", "1").strip() not in ("0", "false", "no")
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", "").strip() or os.path.join(".cache", "checkpoints")
+CHECKPOINT_MAX_AGE_MINUTES = float(os.getenv("CHECKPOINT_MAX_AGE_MINUTES", "60"))
+SCHEMA_VERSION = 2     # 1: pickle 형식 (더 이상 읽지 않음)
+ARRAY_DTYPES = ("float64", "float32", "int64", "int32", "bool")
+
+KST = timezone(timedelta(hours=9))
+
+
+def checkpoint_path(collector, directory=None):
+    return os.path.join(directory or CHECKPOINT_DIR, f"{collector}.json.gz")
+
+
+def _kst(now):
+    now = now or datetime.now(KST)
+    return now.astimezone(KST) if now.tzinfo else now.replace(tzinfo=KST)
+
+
+def _encode(value):
+    """json.dump의 default: numpy 배열/스칼라를 일반 데이터로 바꿉니다. (그 밖의 객체는 저장하지 않음)"""
+    import numpy as np
+
+    if isinstance(value, np.ndarray) and value.dtype.name in ARRAY_DTYPES:
+        data = base64.b64encode(np.ascontiguousarray(value).tobytes()).decode("ascii")
+        return {"__ndarray__": value.dtype.name, "shape": list(value.shape), "data": data}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"체크포인트에 저장할 수 없는 값입니다: {type(value).__name__}")
+
+
+def _decode(obj):
+    """json.load의 object_hook: _encode로 저장한 배열을 되돌립니다."""
+    if "__ndarray__" not in obj:
+        return obj
+    import numpy as np
+
+    if obj["__ndarray__"] not in ARRAY_DTYPES:
+        raise ValueError(f"허용되지 않은 배열 형식입니다: {obj['__ndarray__']}")
+    return np.frombuffer(base64.b64decode(obj["data"]), dtype=obj["__ndarray__"]).reshape(obj["shape"]).copy()
+
+
+def save_checkpoint(collector, state, now=None, directory=None):
+    """수집기(collector)의 웜 상태를 저장합니다. (저장한 경로 반환, 비활성화/실패 시 None)"""
+    if not CHECKPOINT_ENABLED:
+        return None
+    now = _kst(now)
+    path = checkpoint_path(collector, directory)
+    payload = {
+        "schema": SCHEMA_VERSION,
+        "collector": collector,
+        "trading_day": now.strftime("%Y-%m-%d"),
+        "saved_at": now.isoformat(),
+        "state": state,
+    }
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(payload, f, ensure_ascii=False, allow_nan=False, default=_encode)
+        os.replace(tmp_path, path)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"⚠️ [{collector}] 체크포인트 저장 실패: {e}")
+        return None
+    print(f"💾 [{collector}] 세션 체크포인트 저장 ({', '.join(state)}; {os.path.getsize(path) / 1024:.1f} KiB): {path}")
+    return path
+
+
+def load_checkpoint(collector, now=None, max_age_minutes=None, directory=None):
+    """
+    같은 거래일에 max_age_minutes 안에 저장된 체크포인트의 상태(dict)를 반환합니다.
+    없거나, 다른 날짜이거나, 오래되었거나, 읽을 수 없으면 None 입니다.
+    """
+    if not CHECKPOINT_ENABLED:
+        return None
+    now = _kst(now)
+    max_age_minutes = CHECKPOINT_MAX_AGE_MINUTES if max_age_minutes is None else max_age_minutes
+    path = checkpoint_path(collector, directory)
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f, object_hook=_decode)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠️ [{collector}] 체크포인트를 읽을 수 없어 처음부터 시작합니다: {e}")
+        return None
+
+    if not isinstance(payload, dict) or payload.get("schema") != SCHEMA_VERSION or payload.get("collector") != collector:
+        print(f"ℹ️ [{collector}] 체크포인트 형식이 달라 무시합니다: {path}")
+        return None
+    if payload["trading_day"] != now.strftime("%Y-%m-%d"):
+        print(f"ℹ️ [{collector}] 다른 거래일({payload['trading_day']})의 체크포인트라 무시합니다.")
+        return None
+    age_minutes = (now - datetime.fromisoformat(payload["saved_at"])).total_seconds() / 60
+    if age_minutes > max_age_minutes:
+        print(f"ℹ️ [{collector}] 체크포인트가 {age_minutes:.0f}분 전에 저장되어(기준 {max_age_minutes:g}분) 무시합니다.")
+        return None
+
+    print(f"♻️ [{collector}] {payload['saved_at']} 세션 체크포인트 복원 ({', '.join(payload['state'])})")
+    return payload["state"]
@@ -0,0 +1,265 @@
+"""
+ETF 구성종목(PDF) 기반 유사도 행렬 (희소 행렬, 디스크 캐시)
+
+ETF_PDF 구성종목 비중으로 ETF x 종목 희소 행렬 A(행별 비중 합 = 1)를 만들고, A·Aᵀ를 종목(열)별 외적의 합으로 계산합니다.
+같은 종목을 보유한 ETF 쌍만 생성하므로 전체 ETF 쌍을 pandas merge로 비교하는 것보다 훨씬 적은 연산으로 끝납니다.
+    - overlap : 가중 중복도 Σ min(w_a, w_b)  (0~1, 1이면 구성이 동일)
+    - cosine  : 비중 벡터의 코사인 유사도 Σ w_a·w_b / (|a|·|b|)
+결과는 CSR 형식(indptr, indices, data)으로 저장하며, PDF 데이터의 지문(fingerprint)이 같으면 다시 계산하지 않고 캐시를 읽습니다.
+점수 소비 측에서 사실상 같은 ETF의 신호를 하나로 묶을 때(dedupe) 사용합니다.
+
+환경 변수:
+    ETF_SIMILARITY_PATH : 캐시 파일 경로 (기본 <프로젝트>/.cache/etf_similarity.npz)
+
+사용 예:
+    python toss_crawling/etf_similarity.py --top 069500 -k 10
+    python toss_crawling/etf_similarity.py --rebuild
+"""
+import os
+import sys
+import hashlib
+import argparse
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+CACHE_PATH = os.getenv("ETF_SIMILARITY_PATH", "").strip() or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "etf_similarity.npz"
+)
+METRICS = ("overlap", "cosine")
+CACHE_VERSION = 1
+
+
+def pdf_fingerprint(df_pdf):
+    """구성종목 데이터(ETF, 종목, 비중)의 지문. 행 순서와 무관하며 내용이 같으면 같은 값을 반환합니다."""
+    frame = df_pdf[["ETF종목코드", "구성종목코드", "구성비중(%)"]].sort_values(["ETF종목코드", "구성종목코드", "구성비중(%)"])
+    digest = hashlib.sha1(f"v{CACHE_VERSION}".encode())
+    digest.update("\x1f".join(frame["ETF종목코드"].astype(str)).encode("utf-8"))
+    digest.update("\x1f".join(frame["구성종목코드"].astype(str)).encode("utf-8"))
+    digest.update(np.ascontiguousarray(frame["구성비중(%)"].to_numpy(dtype=np.float64)).tobytes())
+    return digest.hexdigest()
+
+
+class EtfSimilarity:
+    """ETF 간 유사도 희소 행렬(CSR, 대각 제외)과 조회 API"""
+
+    def __init__(self, codes, names, indptr, indices, data, fingerprint="", built_at=""):
+        self.codes = list(codes)
+        self.names = list(names)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data            # {"overlap": ndarray, "cosine": ndarray}
+        self.fingerprint = fingerprint
+        self.built_at = built_at
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def pairs(self):
+        """0이 아닌 (a, b) 쌍 수 (양방향)"""
+        return len(self.indices)
+
+    def _row(self, etf_code, metric):
+        if metric not in METRICS:
+            raise ValueError(f"metric은 {METRICS} 중 하나여야 합니다: {metric}")
+        i = self.index.get(str(etf_code).zfill(6))
+        if i is None:
+            return None, None
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:end], self.data[metric][start:end]
+
+    def similarity(self, a, b, metric="overlap"):
+        """두 ETF의 유사도 (공통 종목이 없거나 모르는 ETF면 0.0, 같은 ETF면 1.0)"""
+        a, b = str(a).zfill(6), str(b).zfill(6)
+        if a == b:
+            return 1.0
+        columns, values = self._row(a, metric)
+        j = self.index.get(b)
+        if columns is None or j is None:
+            return 0.0
+        pos = np.searchsorted(columns, j)
+        return float(values[pos]) if pos < len(columns) and columns[pos] == j else 0.0
+
+    def top_k(self, etf_code, k=10, metric="overlap"):
+        """etf_code와 가장 유사한 ETF k개를 [(etf_code, etf_name, 유사도), ...]로 반환합니다. (모르는 ETF면 빈 목록)"""
+        columns, values = self._row(etf_code, metric)
+        if columns is None or not len(columns):
+            return []
+        k = min(k, len(columns))
+        order = np.argpartition(-values, k - 1)[:k]
+        order = order[np.argsort(-values[order], kind="stable")]
+        return [(self.codes[j], self.names[j], round(float(values[o]), 6)) for o, j in zip(order, columns[order])]
+
+    def dedupe(self, etf_codes, threshold=0.8, metric="overlap"):
+        """
+        etf_codes(우선순위 순, 예: 점수 내림차순)에서 앞서 선택된 ETF와 유사도가 threshold 이상인 ETF를 제외합니다.
+        (반환: 남은 코드 목록, {제외된 코드: 대표 코드})
+        """
+        kept = []
+        kept_rows = set()
+        dropped = {}
+        for code in etf_codes:
+            code = str(code).zfill(6)
+            columns, values = self._row(code, metric)
+            duplicate_of = None
+            if columns is not None and kept_rows:
+                for j in columns[values >= threshold]:
+                    if j in kept_rows:
+                        duplicate_of = self.codes[j]
+                        break
+            if duplicate_of is None:
+                kept.append(code)
+                if code in self.index:
+                    kept_rows.add(self.index[code])
+            else:
+                dropped[code] = duplicate_of
+        return kept, dropped
+
+    def save(self, path=None):
+        """캐시 파일로 저장합니다. (임시 파일에 쓴 뒤 교체)"""
+        target = path or CACHE_PATH
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        tmp_path = f"{target}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            version=np.array(CACHE_VERSION),
+            codes=np.array(self.codes, dtype=str),
+            names=np.array(self.names, dtype=str),
+            indptr=self.indptr,
+            indices=self.indices,
+            overlap=self.data["overlap"],
+            cosine=self.data["cosine"],
+            fingerprint=np.array(self.fingerprint),
+            built_at=np.array(self.built_at),
+        )
+        os.replace(tmp_path, target)
+
+    @classmethod
+    def load(cls, path=None):
+        """캐시 파일을 읽습니다. (없거나 버전이 다르면 None)"""
+        target = path or CACHE_PATH
+        if not os.path.exists(target):
+            return None
+        with np.load(target) as cache:
+            if int(cache["version"]) != CACHE_VERSION:
+                return None
+            return cls(
+                cache["codes"].tolist(), cache["names"].tolist(), cache["indptr"], cache["indices"],
+                {"overlap": cache["overlap"], "cosine": cache["cosine"]},
+                fingerprint=str(cache["fingerprint"]), built_at=str(cache["built_at"]),
+            )
+
+
+def build_similarity(df_pdf, fingerprint=None):
+    """
+    transform_etf_pdf 형식의 구성종목 DataFrame으로 유사도 행렬을 계산합니다.
+    같은 (ETF, 종목) 행은 비중을 합치고, 비중이 0 이하인 종목(현금 등)은 제외합니다.
+    """
+    frame = df_pdf[["ETF종목코드", "구성종목코드", "구성비중(%)"]]
+    frame = frame[frame["구성비중(%)"] > 0]
+    frame = frame.groupby(["ETF종목코드", "구성종목코드"], sort=False, as_index=False)["구성비중(%)"].sum()
+
+    names = df_pdf.drop_duplicates("ETF종목코드").set_index("ETF종목코드")["ETF종목명"] \
+        if "ETF종목명" in df_pdf.columns else None
+    codes = np.unique(df_pdf["ETF종목코드"].astype(str).to_numpy())
+    etf = np.searchsorted(codes, frame["ETF종목코드"].astype(str).to_numpy())
+    _, holding = np.unique(frame["구성종목코드"].astype(str).to_numpy(), return_inverse=True)
+    weight = frame["구성비중(%)"].to_numpy(dtype=np.float64)
+
+    # 행(ETF)별 비중 합 1로 정규화
+    totals = np.bincount(etf, weights=weight, minlength=len(codes))
+    weight = weight / totals[etf]
+    norms = np.sqrt(np.bincount(etf, weights=weight * weight, minlength=len(codes)))
+
+    # 종목(열)별로 묶어, 같은 종목을 보유한 ETF 쌍(left, right)을 모두 펼침 = A·Aᵀ의 열별 외적
+    order = np.argsort(holding, kind="stable")
+    etf, holding, weight = etf[order], holding[order], weight[order]
+    group_start = np.flatnonzero(np.r_[True, holding[1:] != holding[:-1]])
+    group_size = np.diff(np.r_[group_start, len(holding)])
+
+    row_size = np.repeat(group_size, group_size)        # 각 행이 짝지어질 상대 수 (= 소속 그룹 크기)
+    row_start = np.repeat(group_start, group_size)
+    left = np.repeat(np.arange(len(holding)), row_size)
+    block_start = np.cumsum(row_size) - row_size
+    right = np.repeat(row_start, row_size) + (np.arange(len(left)) - np.repeat(block_start, row_size))
+
+    keep = etf[left] != etf[right]
+    left, right = left[keep], right[keep]
+    pair_key = etf[left].astype(np.int64) * len(codes) + etf[right]
+    keys, inverse = np.unique(pair_key, return_inverse=True)
+
+    overlap = np.bincount(inverse, weights=np.minimum(weight[left], weight[right]), minlength=len(keys))
+    dot = np.bincount(inverse, weights=weight[left] * weight[right], minlength=len(keys))
+
+    rows = keys // len(codes)
+    indices = (keys % len(codes)).astype(np.int32)
+    indptr = np.searchsorted(rows, np.arange(len(codes) + 1)).astype(np.int64)
+    cosine = dot / (norms[rows] * norms[indices])
+
+    return EtfSimilarity(
+        codes.tolist(),
+        [str(names.get(code, "")) if names is not None else "" for code in codes],
+        indptr, indices,
+        {"overlap": np.minimum(overlap, 1.0), "cosine": np.minimum(cosine, 1.0)},
+        fingerprint=fingerprint or pdf_fingerprint(df_pdf),
+        built_at=datetime.now(timezone(timedelta(hours=9))).replace(microsecond=0).isoformat(),
+    )
+
+
+def load_similarity(df_pdf=None, path=None, rebuild=False):
+    """
+    유사도 행렬을 반환합니다. PDF 데이터의 지문이 캐시와 같으면 캐시를 그대로 쓰고, 다르면 다시 계산하여 저장합니다.
+    df_pdf가 없으면 Supabase ETF_PDF 테이블에서 읽습니다. (읽기 실패 시 캐시가 있으면 캐시 사용)
+    """
+    cached = None if rebuild else EtfSimilarity.load(path)
+
+    if df_pdf is None:
+        try:
+            from toss_crawling.supabase_client import load_etf_pdf_from_supabase
+        except ImportError:
+            from supabase_client import load_etf_pdf_from_supabase
+        df_pdf = load_etf_pdf_from_supabase()
+        if df_pdf is None or df_pdf.empty:
+            if cached is not None:
+                print(f"⚠️ ETF PDF 데이터를 읽지 못해 캐시된 유사도 행렬을 사용합니다. (생성 {cached.built_at})")
+            return cached
+
+    fingerprint = pdf_fingerprint(df_pdf)
+    if cached is not None and cached.fingerprint == fingerprint:
+        print(f"✅ ETF 유사도 캐시 사용: ETF {len(cached)}개, 쌍 {cached.pairs}개 (생성 {cached.built_at})")
+        return cached
+
+    print("🔄 ETF PDF 변경 감지: 유사도 행렬을 다시 계산합니다...")
+    similarity = build_similarity(df_pdf, fingerprint=fingerprint)
+    try:
+        similarity.save(path)
+    except OSError as e:
+        print(f"⚠️ 유사도 캐시 저장 실패: {e}")
+    print(f"✅ ETF 유사도 행렬 계산 완료: ETF {len(similarity)}개, 쌍 {similarity.pairs}개")
+    return similarity
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ETF 구성종목 유사도 행렬 (캐시 갱신/조회)")
+    parser.add_argument("--top", metavar="ETF_CODE", help="해당 ETF와 유사한 ETF 목록 출력")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--metric", choices=METRICS, default="overlap")
+    parser.add_argument("--rebuild", action="store_true", help="캐시를 무시하고 다시 계산")
+    args = parser.parse_args()
+
+    similarity = load_similarity(rebuild=args.rebuild)
+    if similarity is None:
+        print("🚨 유사도 행렬을 만들 수 없습니다.")
+        sys.exit(1)
+    if args.top:
+        results = similarity.top_k(args.top, k=args.k, metric=args.metric)
+        if not results:
+            print(f"ℹ️ {args.top}: 유사한 ETF가 없거나 모르는 ETF입니다.")
+        for code, name, score in results:
+            print(f"   {code} {name:<30} {args.metric} {score:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+ETF 유니버스 (수집/점수 계산 대상 ETF 목록, 로컬 캐시)
+
+네이버 ETF API(etfItemList)의 분류(etfTabCode)와 종목명 키워드로 ETF마다 카테고리 태그를 붙여 etf_universe.json 에 저장하고,
+수집기와 점수 계산이 설정된 유니버스의 ETF만 가져오고 계산하고 저장하도록 코드 집합을 제공합니다.
+    - 파일에는 전체 ETF와 태그가 들어 있고, 어떤 ETF를 대상으로 할지는 ETF_UNIVERSE 설정으로 고릅니다.
+    - 유니버스 파일이 없거나 ETF_UNIVERSE=all 이면 필터를 적용하지 않습니다. (기존처럼 전 종목)
+    - version은 코드 목록의 해시로, 목록이 바뀔 때만 달라집니다. (수집 로그에 함께 출력)
+    - 유니버스 파일은 네이버 ETF API의 실제 응답으로만 만듭니다. (fetch_etf_list, 또는 수집기가 받아 온 응답)
+      저장소에는 커밋하지 않으며, 파일이 없는 러너(예: 토스 수집기)는 필터 없이 전 종목을 대상으로 합니다.
+    - schema가 다른 파일(검증되지 않은 입력으로 만든 schema 1 포함)은 읽지 않고 필터 없이 진행합니다.
+
+환경 변수:
+    ETF_UNIVERSE               : 대상 분류. etfTabCode 숫자 또는 태그 이름을 쉼표로 구분 (기본 "2" = 국내 업종/테마, "all"이면 전체)
+    ETF_UNIVERSE_PATH          : 유니버스 파일 경로 (기본 toss_crawling/etf_universe.json)
+    ETF_UNIVERSE_MAX_AGE_DAYS  : 이 기간(일)이 지나면 ETF API 응답으로 다시 만듦 (기본 7)
+
+갱신:
+    python ETF_LIST_PDF_LIST/etf_target_list_naver.py --save
+    python toss_crawling/etf_universe.py --show
+"""
+import os
+import sys
+import json
+import hashlib
+import argparse
+from datetime import datetime, timedelta, timezone
+
+KST = timezone(timedelta(hours=9))
+
+UNIVERSE_PATH = os.getenv("ETF_UNIVERSE_PATH", "").strip() or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "etf_universe.json"
+)
+UNIVERSE_SELECTION = os.getenv("ETF_UNIVERSE", "2").strip()
+MAX_AGE_DAYS = float(os.getenv("ETF_UNIVERSE_MAX_AGE_DAYS", "7"))
+SCHEMA_VERSION = 2     # 1: 합성 벤치마크 입력으로 만든 파일이 배포된 적이 있어 더 이상 읽지 않음
+
+ETF_LIST_URL = "https://finance.naver.com/api/sise/etfItemList.nhn"
+ETF_LIST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36',
+    'Referer': 'https://finance.naver.com/sise/etf.nhn'
+}
+
+# 네이버 ETF 분류 (etfTabCode)
+TAB_CATEGORIES = {
+    1: "국내 시장지수",
+    2: "국내 업종/테마",
+    3: "국내 파생",
+    4: "해외 주식",
+    5: "원자재",
+    6: "채권",
+    7: "기타",
+}
+
+# 종목명 키워드 태그 (분류와 함께 ETF_UNIVERSE에서 선택 가능)
+KEYWORD_TAGS = {
+    "레버리지": "레버리지",
+    "인버스": "인버스",
+    "합성": "합성",
+    "커버드콜": "커버드콜",
+    "액티브": "액티브",
+}
+
+_universe = None
+
+
+def build_universe(etf_list):
+    """네이버 etfItemList 항목들로 유니버스(전체 ETF + 분류/키워드 태그)를 만듭니다."""
+    etfs = {}
+    for item in etf_list:
+        code = str(item.get('itemcode', '')).zfill(6)
+        name = item.get('itemname', '')
+        tab_code = item.get('etfTabCode')
+        tags = [TAB_CATEGORIES.get(tab_code, "기타")]
+        tags += [tag for keyword, tag in KEYWORD_TAGS.items() if keyword in name]
+        etfs[code] = {"name": name, "tab_code": tab_code, "tags": tags}
+
+    etfs = dict(sorted(etfs.items()))
+    version = hashlib.sha1(json.dumps(etfs, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    return {
+        "schema": SCHEMA_VERSION,
+        "version": version,
+        "updated_at": datetime.now(KST).replace(microsecond=0).isoformat(),
+        "source": ETF_LIST_URL,
+        "etfs": etfs,
+    }
+
+
+def fetch_etf_list():
+    """네이버 ETF API에서 전체 ETF 목록(etfItemList)을 가져옵니다."""
+    import requests
+
+    response = requests.get(ETF_LIST_URL, headers=ETF_LIST_HEADERS, timeout=10)
+    response.raise_for_status()
+    return response.json().get('result', {}).get('etfItemList', [])
+
+
+def save_universe(universe, path=None):
+    """유니버스를 임시 파일에 쓴 뒤 교체하여 저장합니다. (수집기가 읽는 도중 깨진 파일을 보지 않도록)"""
+    global _universe
+    target = path or UNIVERSE_PATH
+    tmp_path = f"{target}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(universe, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+    os.replace(tmp_path, target)
+    if path is None:
+        _universe = universe
+
+
+def load_universe(path=None, reload=False):
+    """유니버스 파일을 읽어 반환합니다. (프로세스 안에서 한 번만 읽음, 없거나 형식이 다르면 None)"""
+    global _universe
+    if _universe is not None and not reload and path is None:
+        return _universe
+
+    target = path or UNIVERSE_PATH
+    try:
+        with open(target, encoding="utf-8") as f:
+            universe = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if universe.get("schema") != SCHEMA_VERSION:
+        print(f"⚠️ ETF 유니버스 파일 형식이 다릅니다(schema {universe.get('schema')}). 필터 없이 진행합니다: {target}")
+        return None
+
+    if path is None:
+        _universe = universe
+    return universe
+
+
+def is_stale(universe, max_age_days=MAX_AGE_DAYS, now=None):
+    """유니버스가 없거나 max_age_days보다 오래되었으면 True"""
+    if universe is None:
+        return True
+    now = now or datetime.now(KST)
+    updated_at = datetime.fromisoformat(universe["updated_at"])
+    return now - updated_at > timedelta(days=max_age_days)
+
+
+def refresh_universe(etf_list=None, path=None):
+    """ETF 목록(없으면 API 호출)으로 유니버스를 다시 만들어 저장합니다. 목록이 같으면 version은 그대로입니다."""
+    if etf_list is None:
+        etf_list = fetch_etf_list()
+    if not etf_list:
+        raise ValueError("ETF 목록이 비어 있어 유니버스를 만들 수 없습니다.")
+
+    previous = load_universe(path=path or UNIVERSE_PATH)
+    universe = build_universe(etf_list)
+    save_universe(universe, path=path)
+    if previous is None or previous.get("version") != universe["version"]:
+        print(f"✅ ETF 유니버스 갱신: 전체 {len(universe['etfs'])}개, version {universe['version']}")
+    return universe
+
+
+def ensure_fresh(etf_list, path=None):
+    """
+    수집기가 이미 받아 온 ETF 목록으로, 유니버스가 없거나 오래되었을 때만 갱신합니다. (추가 API 호출 없음)
+    갱신 실패는 수집을 막지 않도록 출력만 합니다.
+    """
+    if not is_stale(load_universe(path=path)):
+        return
+    try:
+        refresh_universe(etf_list, path=path)
+    except Exception as e:
+        print(f"⚠️ ETF 유니버스 갱신 실패: {e}")
+
+
+def _parse_selection(selection):
+    tab_codes, tags = set(), set()
+    for token in selection.split(","):
+        token = token.strip()
+        if not token:
+            continue
+        if token.isdigit():
+            tab_codes.add(int(token))
+        else:
+            tags.add(token)
+    return tab_codes, tags
+
+
+def get_universe_codes(selection=None, path=None):
+    """
+    설정된 유니버스의 ETF 코드 집합을 반환합니다.
+    (ETF_UNIVERSE=all 이거나 유니버스 파일이 없으면 None = 필터 없음)
+    """
+    selection = UNIVERSE_SELECTION if selection is None else selection
+    if not selection or selection.lower() == "all":
+        return None
+    universe = load_universe(path=path)
+    if universe is None:
+        return None
+
+    tab_codes, tags = _parse_selection(selection)
+    return {
+        code for code, etf in universe["etfs"].items()
+        if etf.get("tab_code") in tab_codes or tags.intersection(etf.get("tags", []))
+    }
+
+
+def describe_universe(codes=None):
+    """로그용 한 줄 요약"""
+    if codes is None:
+        return "ETF 유니버스: 전체 (필터 없음)"
+    universe = load_universe() or {}
+    return f"ETF 유니버스: {len(codes)}개 (ETF_UNIVERSE={UNIVERSE_SELECTION}, version {universe.get('version', '?')})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ETF 유니버스 파일 관리")
+    parser.add_argument("--refresh", action="store_true", help="네이버 ETF API로 유니버스를 다시 만들어 저장")
+    parser.add_argument("--show", action="store_true", help="현재 설정(ETF_UNIVERSE)으로 선택되는 ETF 출력")
+    args = parser.parse_args()
+
+    if args.refresh:
+        refresh_universe()
+    if args.show:
+        universe = load_universe()
+        if universe is None:
+            print(f"ℹ️ ETF 유니버스 파일이 없습니다: {UNIVERSE_PATH}")
+            sys.exit(1)
+        codes = get_universe_codes()
+        for code in sorted(codes if codes is not None else universe["etfs"]):
+            etf = universe["etfs"][code]
+            print(f"[{code}] {etf['name']} | {', '.join(etf['tags'])}")
+        print(describe_universe(codes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+import io
+import os
+import csv
+import gzip
+import json
+import time
+import random
+import threading
+from datetime import datetime, timezone
+
+from postgrest.exceptions import APIError
+
+# 로컬 부하 테스트용 메모리 Supabase 대역 설정 (SUPABASE_BACKEND=memory 일 때 supabase_client에서 사용)
+# - FAKE_SUPABASE_LATENCY_MS   : 요청(execute/rpc)마다 추가할 기본 지연(ms)
+# - FAKE_SUPABASE_JITTER_MS    : 지연에 더할 무작위 편차 상한(ms)
+# - FAKE_SUPABASE_FAILURE_RATE : 요청 실패(APIError) 주입 확률 (0.0 ~ 1.0)
+# - FAKE_SUPABASE_SEED         : 지연/실패 난수 시드
+# - FAKE_SUPABASE_DATA_DIR     : 초기 테이블 데이터 디렉토리 (<테이블명>.json 또는 .json.gz, 레코드 리스트)
+
+# upsert 시 on_conflict가 지정되지 않은 경우 사용할 테이블별 기본 키
+PRIMARY_KEYS = {
+    "naver_realtime_stk": ("stk_cd",),
+    "naver_premarket_stk": ("stk_cd",),
+    "naver_etf_price": ("etf_code",),
+    "naver_realtime_etf": ("etf_code",),
+    "naver_premarket_etf": ("etf_code",),
+    "naver_market_trend": ("거래일", "거래시간", "시장"),
+    "toss_yg_score_stk": ("investor", "stock_code", "ranking_type", "collected_at"),
+    "toss_yg_score_etf": ("etf_code", "updated_at"),
+}
+
+
+class FakeResponse:
+    """postgrest APIResponse와 동일하게 data / count 속성을 제공하는 응답 객체"""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def _parse_timestamp(value):
+    """ISO 날짜/시각 문자열을 타임존 정보가 있는 datetime으로 변환합니다. (타임존 없으면 UTC로 간주)"""
+    if not isinstance(value, str) or len(value) < 10 or value[4:5] != "-" or value[7:8] != "-":
+        return None
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _compare_key(row_value, filter_value):
+    """PostgREST 비교와 최대한 비슷하게 두 값을 같은 타입의 비교 키로 맞춥니다."""
+    if isinstance(row_value, bool) or isinstance(filter_value, bool):
+        return str(row_value).lower(), str(filter_value).lower()
+    if isinstance(row_value, (int, float)):
+        try:
+            return float(row_value), float(filter_value)
+        except (TypeError, ValueError):
+            return str(row_value), str(filter_value)
+    row_dt = _parse_timestamp(row_value)
+    filter_dt = _parse_timestamp(filter_value) if row_dt else None
+    if row_dt and filter_dt:
+        return row_dt, filter_dt
+    return str(row_value), str(filter_value)
+
+
+def _sort_key(value):
+    dt = _parse_timestamp(value)
+    if dt:
+        return (1, dt.timestamp())
+    if isinstance(value, (int, float)):
+        return (1, float(value))
+    return (2, str(value))
+
+
+class FakeQuery:
+    """supabase.table(...) 쿼리 빌더 중 수집기가 사용하는 부분집합을 메모리 테이블 위에서 구현합니다."""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table_name = table
+        self.op = "select"
+        self.columns = None
+        self.payload = None
+        self.on_conflict = ""
+        self.ignore_duplicates = False
+        self.returning = "representation"
+        self.count_method = None
+        self.head = False
+        self.filters = []
+        self.orders = []
+        self.offset = 0
+        self.limit_count = None
+
+    # --- 명령 ---
+    def select(self, *columns, count=None, head=None):
+        self.op = "select"
+        spec = ",".join(columns) if columns else "*"
+        fields = [c.strip() for c in spec.split(",") if c.strip()]
+        self.columns = None if "*" in fields else fields
+        self.count_method = count
+        self.head = bool(head)
+        return self
+
+    def insert(self, json, *, count=None, returning="representation", upsert=False, default_to_null=True):
+        self.op = "upsert" if upsert else "insert"
+        self.payload = json
+        self.count_method = count
+        self.returning = str(getattr(returning, "value", returning))
+        return self
+
+    def upsert(self, json, *, count=None, returning="representation", ignore_duplicates=False, on_conflict="", default_to_null=True):
+        self.op = "upsert"
+        self.payload = json
+        self.on_conflict = on_conflict
+        self.ignore_duplicates = ignore_duplicates
+        self.count_method = count
+        self.returning = str(getattr(returning, "value", returning))
+        return self
+
+    def delete(self, *, count=None, returning="representation"):
+        self.op = "delete"
+        self.count_method = count
+        self.returning = str(getattr(returning, "value", returning))
+        return self
+
+    # --- 필터 ---
+    def eq(self, column, value):
+        return self._add_compare(column, value, lambda a, b: a == b)
+
+    def neq(self, column, value):
+        return self._add_compare(column, value, lambda a, b: a != b)
+
+    def gt(self, column, value):
+        return self._add_compare(column, value, lambda a, b: a > b)
+
+    def gte(self, column, value):
+        return self._add_compare(column, value, lambda a, b: a >= b)
+
+    def lt(self, column, value):
+        return self._add_compare(column, value, lambda a, b: a < b)
+
+    def lte(self, column, value):
+        return self._add_compare(column, value, lambda a, b: a <= b)
+
+    def in_(self, column, values):
+        values = list(values)
+
+        def predicate(row):
+            v = row.get(column)
+            return v is not None and any(op_a == op_b for op_a, op_b in (_compare_key(v, x) for x in values))
+        self.filters.append(predicate)
+        return self
+
+    def _add_compare(self, column, value, op):
+        def predicate(row):
+            v = row.get(column)
+            if v is None or value is None:
+                return False
+            a, b = _compare_key(v, value)
+            try:
+                return op(a, b)
+            except TypeError:
+                return op(str(v), str(value))
+        self.filters.append(predicate)
+        return self
+
+    # --- 정렬/범위 ---
+    def order(self, column, *, desc=False, nullsfirst=None, foreign_table=None):
+        self.orders.append((column, desc))
+        return self
+
+    def range(self, start, end, foreign_table=None):
+        self.offset = start
+        self.limit_count = end - start + 1
+        return self
+
+    def limit(self, size, *, foreign_table=None):
+        self.limit_count = size
+        return self
+
+    # --- 실행 ---
+    def _matches(self, row):
+        return all(f(row) for f in self.filters)
+
+    def _project(self, row):
+        if self.columns is None:
+            return dict(row)
+        return {c: row.get(c) for c in self.columns}
+
+    def execute(self):
+        self.client._before_request(f"{self.op}:{self.table_name}")
+        with self.client.lock:
+            rows = self.client.tables.setdefault(self.table_name, [])
+            if self.op == "select":
+                return self._execute_select(rows)
+            if self.op == "delete":
+                return self._execute_delete(rows)
+            return self._execute_write(rows)
+
+    def _execute_select(self, rows):
+        matched = [r for r in rows if self._matches(r)]
+        for column, desc in reversed(self.orders):
+            non_null = [r for r in matched if r.get(column) is not None]
+            nulls = [r for r in matched if r.get(column) is None]
+            non_null.sort(key=lambda r: _sort_key(r[column]), reverse=desc)
+            matched = nulls + non_null if desc else non_null + nulls
+        total = len(matched)
+        if self.limit_count is not None:
+            matched = matched[self.offset:self.offset + self.limit_count]
+        elif self.offset:
+            matched = matched[self.offset:]
+        data = [] if self.head else [self._project(r) for r in matched]
+        return FakeResponse(data, total if self.count_method else None)
+
+    def _execute_delete(self, rows):
+        kept, deleted = [], []
+        for r in rows:
+            (deleted if self._matches(r) else kept).append(r)
+        self.client.tables[self.table_name] = kept
+        data = [] if self.returning == "minimal" else [dict(r) for r in deleted]
+        return FakeResponse(data, len(deleted) if self.count_method else None)
+
+    def _execute_write(self, rows):
+        payload = self.payload if isinstance(self.payload, list) else [self.payload]
+        if self.op == "upsert":
+            keys = tuple(c.strip() for c in self.on_conflict.split(",") if c.strip()) or PRIMARY_KEYS.get(self.table_name, ("id",))
+        else:
+            keys = None
+
+        written = []
+        index = self.client._index(self.table_name, keys) if keys else None
+        for record in payload:
+            record = dict(record)
+            key = tuple(record.get(k) for k in keys) if keys else None
+            if index is not None and key in index:
+                if self.ignore_duplicates:
+                    continue
+                index[key].update(record)
+                written.append(dict(index[key]))
+                continue
+            if "id" not in record:
+                record["id"] = self.client._next_id(self.table_name)
+            rows.append(record)
+            if index is not None:
+                index[key] = record
+            written.append(dict(record))
+
+        data = [] if self.returning == "minimal" else written
+        return FakeResponse(data, len(written) if self.count_method else None)
+
+
+class FakeRpc:
+    def __init__(self, client, name, params):
+        self.client = client
+        self.name = name
+        self.params = params or {}
+
+    def execute(self):
+        self.client._before_request(f"rpc:{self.name}")
+        self.client.rpc_calls.append((self.name, self.params))
+        handler = self.client.rpc_handlers.get(self.name)
+        data = handler(self.client, self.params) if handler else []
+        return FakeResponse(data)
+
+
+class FakeSupabaseClient:
+    """
+    Supabase Client 대역: 테이블을 메모리 레코드 리스트로 보관하고
+    요청마다 지연(latency)과 실패(failure)를 주입할 수 있습니다.
+    """
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, failure_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.RLock()
+        self.tables = {}
+        self.rpc_handlers = {}
+        self.rpc_calls = []
+        self.request_count = 0
+        self.failure_count = 0
+        self._ids = {}
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def from_(self, name):
+        return self.table(name)
+
+    def rpc(self, name, params=None):
+        return FakeRpc(self, name, params)
+
+    def post_table(self, table, body, headers, params=None):
+        """
+        PostgREST에 본문을 직접 POST 하는 요청(bulk_write)을 처리합니다. (gzip, JSON/CSV 본문, Prefer 헤더)
+        CSV 값은 문자열로 저장됩니다. (실제 PostgREST는 컬럼 타입으로 변환, 빈 값은 NULL)
+        """
+        params = params or {}
+        if headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        if headers.get("Content-Type") == "text/csv":
+            rows = [{k: (v if v != "" else None) for k, v in row.items()} for row in csv.DictReader(io.StringIO(body.decode("utf-8")))]
+        else:
+            rows = json.loads(body)
+        prefer = headers.get("Prefer", "")
+        query = FakeQuery(self, table)
+        if "resolution=merge-duplicates" in prefer:
+            query.upsert(rows, on_conflict=params.get("on_conflict", ""), returning="minimal")
+        else:
+            query.insert(rows, returning="minimal")
+        return query.execute()
+
+    def register_rpc(self, name, handler):
+        """rpc(name) 호출 시 실행할 handler(client, params) -> data 를 등록합니다."""
+        self.rpc_handlers[name] = handler
+
+    def load_table(self, name, rows):
+        """테이블을 주어진 레코드 리스트로 교체합니다."""
+        with self.lock:
+            self.tables[name] = [dict(r) for r in rows]
+            self._ids[name] = max((r["id"] for r in self.tables[name] if isinstance(r.get("id"), int)), default=0)
+
+    def _next_id(self, table):
+        if table not in self._ids:
+            self._ids[table] = max((r["id"] for r in self.tables.get(table, []) if isinstance(r.get("id"), int)), default=0)
+        self._ids[table] += 1
+        return self._ids[table]
+
+    def _index(self, table, keys):
+        return {tuple(r.get(k) for k in keys): r for r in self.tables.get(table, [])}
+
+    def _before_request(self, label):
+        with self.lock:
+            self.request_count += 1
+            delay = self.latency_ms + (self.random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+            fail = self.failure_rate > 0 and self.random.random() < self.failure_rate
+            if fail:
+                self.failure_count += 1
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if fail:
+            raise APIError({"message": f"injected failure ({label})", "code": "FAKE", "hint": None, "details": None})
+
+
+def load_tables_from_dir(client, data_dir):
+    """data_dir의 <테이블명>.json / <테이블명>.json.gz 파일을 테이블 초기 데이터로 적재합니다."""
+    for file_name in sorted(os.listdir(data_dir)):
+        path = os.path.join(data_dir, file_name)
+        if file_name.endswith(".json.gz"):
+            table = file_name[:-len(".json.gz")]
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                rows = json.load(f)
+        elif file_name.endswith(".json"):
+            table = file_name[:-len(".json")]
+            with open(path, encoding="utf-8") as f:
+                rows = json.load(f)
+        else:
+            continue
+        client.load_table(table, rows)
+        print(f"📥 [memory] '{table}' 테이블 초기 데이터 적재: {len(rows)}건")
+
+
+def create_fake_client():
+    """환경 변수(FAKE_SUPABASE_*) 설정으로 메모리 Supabase 대역을 생성합니다."""
+    seed = os.getenv("FAKE_SUPABASE_SEED", "").strip()
+    client = FakeSupabaseClient(
+        latency_ms=float(os.getenv("FAKE_SUPABASE_LATENCY_MS", "0") or 0),
+        jitter_ms=float(os.getenv("FAKE_SUPABASE_JITTER_MS", "0") or 0),
+        failure_rate=float(os.getenv("FAKE_SUPABASE_FAILURE_RATE", "0") or 0),
+        seed=int(seed) if seed else None,
+    )
+    data_dir = os.getenv("FAKE_SUPABASE_DATA_DIR", "").strip()
+    if data_dir:
+        load_tables_from_dir(client, data_dir)
+    print(f"🧪 메모리 Supabase 대역 사용 (지연 {client.latency_ms}ms±{client.jitter_ms}ms, 실패율 {client.failure_rate:.2%})")
+    return client
@@ -0,0 +1,234 @@
+"""
+KRX 거래일 캘린더 (로컬 캐시)
+
+휴장일과 개장/폐장 시각이 다른 날(연초 개장 지연, 수능일 등)을 krx_calendar.json 에 캐시해 두고,
+수집기가 시작 시점에 바로 개장 여부와 정규장 시각을 판단할 수 있게 합니다.
+    - 캐시에 해당 연도가 없으면 판단 불가(None)로 보고, 기존처럼 프리마켓 데이터 확인(check_market_open)으로 대체합니다.
+    - 프리마켓 데이터 확인은 지난 데이터 정리 등 되돌릴 수 없는 작업 직전의 교차 확인용으로 계속 사용합니다.
+
+캐시 갱신 (공공데이터포털 특일 정보 API, 서비스 키 필요):
+    DATA_GO_KR_SERVICE_KEY=... python toss_crawling/market_calendar.py --refresh 2027
+    python toss_crawling/market_calendar.py --show 2026
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, date, timedelta, timezone
+
+KST = timezone(timedelta(hours=9))
+
+CALENDAR_PATH = os.getenv("KRX_CALENDAR_PATH", "").strip() or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "krx_calendar.json"
+)
+
+# 정규장 기본 시각 (KST)
+DEFAULT_OPEN = "09:00"
+DEFAULT_CLOSE = "15:30"
+
+HOLIDAY_API_URL = "https://apis.data.go.kr/B090041/openapi/service/SpcdeInfoService/getRestDeInfo"
+
+_calendar = None
+
+
+def load_calendar(path=None, reload=False):
+    """캘린더 캐시 파일을 읽어 반환합니다. (프로세스 안에서 한 번만 읽음, 파일이 없으면 빈 캘린더)"""
+    global _calendar
+    if _calendar is not None and not reload and path is None:
+        return _calendar
+
+    target = path or CALENDAR_PATH
+    try:
+        with open(target, encoding="utf-8") as f:
+            calendar = json.load(f)
+    except FileNotFoundError:
+        print(f"⚠️ 거래일 캘린더 파일이 없습니다: {target} (프리마켓 데이터 확인으로 대체)")
+        calendar = {"years": {}}
+
+    if path is None:
+        _calendar = calendar
+    return calendar
+
+
+def save_calendar(calendar, path=None):
+    """캘린더를 임시 파일에 쓴 뒤 교체하여 저장합니다. (수집기가 읽는 도중 깨진 파일을 보지 않도록)"""
+    global _calendar
+    target = path or CALENDAR_PATH
+    tmp_path = f"{target}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(calendar, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp_path, target)
+    if path is None:
+        _calendar = calendar
+
+
+def _as_date(day):
+    if isinstance(day, datetime):
+        return day.astimezone(KST).date() if day.tzinfo else day.date()
+    if isinstance(day, date):
+        return day
+    return datetime.strptime(str(day)[:10], "%Y-%m-%d").date()
+
+
+def get_market_status(day):
+    """
+    해당 날짜의 개장 여부를 반환합니다.
+    (True: 개장, False: 휴장(주말 포함), None: 캘린더에 해당 연도가 없어 판단 불가)
+    """
+    day = _as_date(day)
+    if day.weekday() >= 5:
+        return False
+
+    year = load_calendar()["years"].get(str(day.year))
+    if year is None:
+        return None
+    return day.isoformat() not in year.get("holidays", {})
+
+
+def get_holiday_name(day):
+    """휴장일이면 사유(설날, 연말 휴장 등)를, 아니면 빈 문자열을 반환합니다."""
+    day = _as_date(day)
+    if day.weekday() >= 5:
+        return "주말"
+    year = load_calendar()["years"].get(str(day.year), {})
+    return year.get("holidays", {}).get(day.isoformat(), "")
+
+
+def get_session(day):
+    """
+    해당 날짜 정규장의 (개장 시각, 폐장 시각)을 KST datetime으로 반환합니다. (휴장일이면 None)
+    캘린더에 연도가 없으면 기본 시각(09:00~15:30)을 사용합니다.
+    """
+    day = _as_date(day)
+    if get_market_status(day) is False:
+        return None
+
+    year = load_calendar()["years"].get(str(day.year), {})
+    special = year.get("sessions", {}).get(day.isoformat(), {})
+    open_hm = special.get("open", DEFAULT_OPEN)
+    close_hm = special.get("close", DEFAULT_CLOSE)
+
+    def at(hm):
+        hour, minute = (int(x) for x in hm.split(":"))
+        return datetime(day.year, day.month, day.day, hour, minute, tzinfo=KST)
+
+    return at(open_hm), at(close_hm)
+
+
+def next_trading_day(day):
+    """day 다음의 개장일을 반환합니다. (캘린더에 없는 연도는 평일을 개장일로 간주)"""
+    day = _as_date(day) + timedelta(days=1)
+    while get_market_status(day) is False:
+        day += timedelta(days=1)
+    return day
+
+
+def sleep_until(target, should_stop=None, now_func=None):
+    """target(KST datetime) 시각까지 대기합니다. should_stop()이 True가 되면 즉시 반환합니다. (정시에 도달하면 True)"""
+    now_func = now_func or (lambda: datetime.now(KST))
+    while True:
+        if should_stop and should_stop():
+            return False
+        remaining = (target - now_func()).total_seconds()
+        if remaining <= 0:
+            return True
+        # 종료 신호에 빠르게 반응하면서도 개장 시각을 넘기지 않도록 최대 1초씩 대기
+        time.sleep(min(remaining, 1.0))
+
+
+def _fetch_public_holidays(year, service_key):
+    """공공데이터포털 특일 정보 API에서 해당 연도 공휴일(대체공휴일, 선거일 포함)을 가져옵니다."""
+    import requests
+
+    holidays = {}
+    for month in range(1, 13):
+        params = {
+            "solYear": str(year),
+            "solMonth": f"{month:02d}",
+            "ServiceKey": service_key,
+            "_type": "json",
+            "numOfRows": "50",
+        }
+        response = requests.get(HOLIDAY_API_URL, params=params, timeout=10)
+        response.raise_for_status()
+        body = response.json().get("response", {}).get("body", {})
+        items = (body.get("items") or {}).get("item", [])
+        if isinstance(items, dict):
+            items = [items]
+        for item in items:
+            if item.get("isHoliday") != "Y":
+                continue
+            locdate = str(item["locdate"])
+            holidays[f"{locdate[:4]}-{locdate[4:6]}-{locdate[6:]}"] = item.get("dateName", "공휴일")
+    return holidays
+
+
+def build_year(year, public_holidays, previous=None):
+    """
+    공휴일 목록에 KRX 고유 규칙을 더해 연도별 캘린더 항목을 만듭니다.
+    - 근로자의 날(5/1) 휴장, 연말 휴장(12/31, 주말이면 직전 평일)
+    - 연초 첫 개장일은 10:00 개장
+    - 수능일처럼 공휴일 API로 알 수 없는 특별 시각(previous의 sessions)은 그대로 유지
+    """
+    holidays = {day: name for day, name in public_holidays.items() if _as_date(day).weekday() < 5}
+
+    labor_day = date(year, 5, 1)
+    if labor_day.weekday() < 5:
+        holidays.setdefault(labor_day.isoformat(), "근로자의 날")
+
+    year_end = date(year, 12, 31)
+    while year_end.weekday() >= 5 or year_end.isoformat() in holidays:
+        year_end -= timedelta(days=1)
+    holidays[year_end.isoformat()] = "연말 휴장"
+
+    sessions = dict((previous or {}).get("sessions", {}))
+    first_day = date(year, 1, 1)
+    while first_day.weekday() >= 5 or first_day.isoformat() in holidays:
+        first_day += timedelta(days=1)
+    sessions[first_day.isoformat()] = {"open": "10:00", "close": DEFAULT_CLOSE, "note": "연초 개장 지연"}
+
+    return {"holidays": dict(sorted(holidays.items())), "sessions": dict(sorted(sessions.items()))}
+
+
+def refresh_calendar(years, service_key=None, path=None):
+    """지정한 연도들의 휴장일을 API에서 다시 받아 캐시를 갱신합니다."""
+    service_key = service_key or os.getenv("DATA_GO_KR_SERVICE_KEY", "").strip()
+    if not service_key:
+        raise ValueError("❌ DATA_GO_KR_SERVICE_KEY environment variable is missing or empty.")
+
+    calendar = load_calendar(path=path or CALENDAR_PATH)
+    for year in years:
+        print(f"🔄 {year}년 휴장일 갱신 중...")
+        public_holidays = _fetch_public_holidays(year, service_key)
+        calendar["years"][str(year)] = build_year(year, public_holidays, calendar["years"].get(str(year)))
+        print(f"✅ {year}년 휴장일 {len(calendar['years'][str(year)]['holidays'])}일")
+
+    calendar["updated_at"] = datetime.now(KST).replace(microsecond=0).isoformat()
+    calendar["source"] = "data.go.kr SpcdeInfoService + KRX 규칙"
+    save_calendar(calendar, path=path)
+    return calendar
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KRX 거래일 캘린더 캐시 관리")
+    parser.add_argument("--refresh", type=int, nargs="+", metavar="YEAR", help="API에서 해당 연도 휴장일을 다시 받아 저장")
+    parser.add_argument("--show", type=int, metavar="YEAR", help="해당 연도 휴장일과 특별 개장 시각 출력")
+    args = parser.parse_args()
+
+    if args.refresh:
+        refresh_calendar(args.refresh)
+    if args.show:
+        year = load_calendar()["years"].get(str(args.show))
+        if year is None:
+            print(f"ℹ️ {args.show}년 캘린더가 없습니다.")
+            sys.exit(1)
+        for day, name in year["holidays"].items():
+            print(f"🚫 {day} {name}")
+        for day, session in year["sessions"].items():
+            print(f"⏰ {day} {session['open']}~{session['close']} ({session.get('note', '')})")
+
+
+if __name__ == "__main__":
+    main()
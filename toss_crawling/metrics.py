@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+# 지표 출력 디렉토리 (비어 있으면 파일로 내보내지 않고 턴 요약만 출력합니다)
+# - {METRICS_DIR}/{collector}.jsonl : 턴 단위 JSON-lines 로그
+# - {METRICS_DIR}/{collector}.prom  : Prometheus textfile collector 형식 (누적값)
+METRICS_DIR = os.getenv("METRICS_DIR", "").strip()
+
+# 수집기 공통 단계(span) 및 카운터 이름
+STAGES = ("browser_launch", "page_load", "extract", "parse", "db_read", "db_write", "rpc", "score", "rate_limit_wait")
+COUNTERS = ("rows_collected", "rows_written", "retries", "bytes_fetched", "bytes_sent", "hedged_requests", "stale_payloads",
+            "momentum_persist_errors")
+
+_lock = threading.Lock()
+_collector = "collector"
+_turn = None
+_totals = {}
+# 작업 스레드가 turn_scope로 연 별도 턴 (스레드별)
+_local = threading.local()
+
+
+def _kst_now_iso():
+    return datetime.now(timezone(timedelta(hours=9))).isoformat()
+
+
+def _new_turn(collector, turn_id=None):
+    return {
+        "collector": collector,
+        "turn_id": turn_id,
+        "started_at": _kst_now_iso(),
+        "t0": time.perf_counter(),
+        "spans": {},
+        "counters": {},
+    }
+
+
+def _current_turn():
+    """진행 중인 턴을 반환합니다. (start_turn 없이 기록되면 암묵적으로 턴을 시작)"""
+    global _turn
+    scoped = getattr(_local, "turn", None)
+    if scoped is not None:
+        return scoped
+    if _turn is None:
+        _turn = _new_turn(_collector)
+    return _turn
+
+
+def start_turn(collector, turn_id=None):
+    """새 수집 턴을 시작합니다. 이전 턴이 종료되지 않았다면 버리고 새로 시작합니다."""
+    global _turn, _collector
+    with _lock:
+        _collector = collector
+        _turn = _new_turn(collector, turn_id)
+
+
+def record_span(stage, seconds):
+    """단계(stage) 소요 시간을 현재 턴에 누적합니다."""
+    with _lock:
+        spans = _current_turn()["spans"]
+        entry = spans.setdefault(stage, {"seconds": 0.0, "count": 0})
+        entry["seconds"] += seconds
+        entry["count"] += 1
+
+
+@contextmanager
+def span(stage):
+    """with 블록의 실행 시간을 단계(stage) 소요 시간으로 기록합니다."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(stage, time.perf_counter() - t0)
+
+
+def inc(name, value=1):
+    """현재 턴의 카운터(name)를 value만큼 증가시킵니다."""
+    if not value:
+        return
+    with _lock:
+        counters = _current_turn()["counters"]
+        counters[name] = counters.get(name, 0) + value
+
+
+@contextmanager
+def turn_scope(collector, turn_id=None):
+    """
+    with 블록 안에서 이 스레드가 기록하는 지표를 수집 루프의 턴과 분리된 별도 턴(collector)으로 모으고,
+    블록이 끝나면 end_turn과 같이 요약을 출력/기록합니다. (파이프라인 작업 스레드용)
+    상태는 yield한 dict의 "status"로 바꿀 수 있으며, 예외가 나면 error입니다.
+    """
+    _local.turn = _new_turn(collector, turn_id)
+    scope = {"status": "ok"}
+    try:
+        yield scope
+    except BaseException:
+        scope["status"] = "error"
+        raise
+    finally:
+        turn, _local.turn = _local.turn, None
+        _finish_turn(turn, scope["status"])
+
+
+def end_turn(status="ok"):
+    """
+    현재 턴을 종료하고 요약(dict)을 반환합니다.
+    METRICS_DIR이 설정되어 있으면 JSON-lines 로그와 Prometheus textfile을 갱신합니다.
+    """
+    global _turn
+    with _lock:
+        turn = _current_turn()
+        if turn is getattr(_local, "turn", None):
+            _local.turn = None
+        else:
+            _turn = None
+    return _finish_turn(turn, status)
+
+
+def _finish_turn(turn, status):
+    with _lock:
+        summary = {
+            "collector": turn["collector"],
+            "turn_id": turn["turn_id"],
+            "started_at": turn["started_at"],
+            "status": status,
+            "turn_seconds": round(time.perf_counter() - turn["t0"], 4),
+            "spans": {k: {"seconds": round(v["seconds"], 4), "count": v["count"]} for k, v in turn["spans"].items()},
+            "counters": dict(turn["counters"]),
+        }
+
+        totals = _totals.setdefault(turn["collector"], {
+            "turns": 0, "turn_seconds": 0.0, "last": None, "spans": {}, "counters": {},
+        })
+        totals["turns"] += 1
+        totals["turn_seconds"] += summary["turn_seconds"]
+        totals["last"] = summary
+        for stage, v in summary["spans"].items():
+            acc = totals["spans"].setdefault(stage, {"seconds": 0.0, "count": 0})
+            acc["seconds"] += v["seconds"]
+            acc["count"] += v["count"]
+        for name, v in summary["counters"].items():
+            totals["counters"][name] = totals["counters"].get(name, 0) + v
+
+    stage_text = ", ".join(f"{k} {v['seconds']:.2f}s" for k, v in summary["spans"].items())
+    print(f"⏱️ [{summary['collector']}] 턴 소요 {summary['turn_seconds']:.2f}s" + (f" | {stage_text}" if stage_text else ""))
+
+    if METRICS_DIR:
+        try:
+            os.makedirs(METRICS_DIR, exist_ok=True)
+            with open(os.path.join(METRICS_DIR, f"{summary['collector']}.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+            write_prometheus(summary["collector"])
+        except OSError as e:
+            print(f"⚠️ 지표 파일 기록 실패: {e}")
+
+    return summary
+
+
+def _format_prometheus(collector, totals):
+    label = f'collector="{collector}"'
+    lines = [
+        "# HELP collector_turns_total 완료된 수집 턴 수",
+        "# TYPE collector_turns_total counter",
+        f"collector_turns_total{{{label}}} {totals['turns']}",
+        "# HELP collector_turn_seconds_total 수집 턴 누적 소요 시간(초)",
+        "# TYPE collector_turn_seconds_total counter",
+        f"collector_turn_seconds_total{{{label}}} {totals['turn_seconds']:.4f}",
+        "# HELP collector_last_turn_seconds 마지막 수집 턴 소요 시간(초)",
+        "# TYPE collector_last_turn_seconds gauge",
+        f"collector_last_turn_seconds{{{label}}} {totals['last']['turn_seconds']:.4f}",
+        "# HELP collector_stage_seconds_total 단계별 누적 소요 시간(초)",
+        "# TYPE collector_stage_seconds_total counter",
+    ]
+    for stage, v in sorted(totals["spans"].items()):
+        lines.append(f'collector_stage_seconds_total{{{label},stage="{stage}"}} {v["seconds"]:.4f}')
+    lines += [
+        "# HELP collector_stage_calls_total 단계별 누적 실행 횟수",
+        "# TYPE collector_stage_calls_total counter",
+    ]
+    for stage, v in sorted(totals["spans"].items()):
+        lines.append(f'collector_stage_calls_total{{{label},stage="{stage}"}} {v["count"]}')
+    lines += [
+        "# HELP collector_last_turn_stage_seconds 마지막 턴의 단계별 소요 시간(초)",
+        "# TYPE collector_last_turn_stage_seconds gauge",
+    ]
+    for stage, v in sorted(totals["last"]["spans"].items()):
+        lines.append(f'collector_last_turn_stage_seconds{{{label},stage="{stage}"}} {v["seconds"]:.4f}')
+    for name, v in sorted(totals["counters"].items()):
+        lines += [
+            f"# TYPE collector_{name}_total counter",
+            f"collector_{name}_total{{{label}}} {v}",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(collector=None):
+    """수집기의 누적 지표를 Prometheus textfile 형식으로 원자적으로 기록합니다."""
+    collector = collector or _collector
+    with _lock:
+        totals = _totals.get(collector)
+        if not totals or not totals["last"]:
+            return
+        text = _format_prometheus(collector, totals)
+
+    path = os.path.join(METRICS_DIR, f"{collector}.prom")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
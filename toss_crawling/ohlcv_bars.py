@@ -0,0 +1,329 @@
+"""
+ETF 분봉(OHLCV) 증분 집계
+
+naver_etf_price_history는 1~5분 주기 스냅샷(current_price, 누적 volume)을 그대로 쌓으므로, 차트는 매번 하루치 이력 전체를
+SQL로 다시 집계해야 합니다. 이 모듈은 수집기 안에서 스냅샷이 들어올 때마다 ETF별 봉을 여러 주기(1m/5m/30m)로 갱신하고,
+구간(bucket)이 닫히면 완성된 봉만 봉 테이블(OHLCV_BARS_TABLE) 또는 로컬 파일에 씁니다. 차트는 봉 수만큼만 읽습니다.
+    - 진행 중인 봉은 주기별로 ETF 위치에 맞춘 배열(시가/고가/저가/종가/누적 거래량 기준값/스냅샷 수)로 보관하고,
+      턴마다 스냅샷 전체를 한 번에 반영합니다. (ETF 수에 비례, 이력 재조회 없음)
+    - 구간은 스냅샷 시각(updated_at)을 주기로 내림한 값이며, 다음 구간의 스냅샷이 들어오면 이전 구간을 확정합니다.
+      수집 주기보다 짧은 주기의 봉은 스냅샷이 있었던 구간에만 만들어집니다. (예: 5분 수집이면 1m 봉은 5분마다 하나)
+    - 거래량은 누적 거래량의 차이입니다. (직전 구간 마지막 누적값 → 이번 구간 마지막 누적값, 음수는 0)
+      당일 처음 보는 ETF는 첫 스냅샷의 누적값을 기준으로 하므로 그 이전 거래량은 포함하지 않습니다.
+    - 현재가가 0 이하인 행(거래정지 등)은 반영하지 않습니다. 이미 지난 구간의 스냅샷(시각 역전)은 해당 주기에서 무시합니다.
+    - 세션 종료 시 flush_bars로 진행 중인 봉도 저장하고, 상태는 체크포인트로 넘겨 오후 세션이 같은 구간을 이어서 갱신합니다.
+      같은 봉이 다시 저장되면 DB는 (etf_code, resolution, bucket_start) upsert, 파일은 나중 행이 우선합니다.
+
+저장 위치 (OHLCV_BARS_SINK)
+    off  : 집계하지 않음 (기본)
+    db   : 봉 테이블에 upsert (bulk_write, BULK_WRITE_* 설정)
+    file : {OHLCV_BARS_DIR}/{YYYY-MM-DD}/{주기}.csv 에 추가
+    both : db + file
+
+환경 변수:
+    OHLCV_BARS_SINK        : off / db / file / both (기본 off)
+    OHLCV_BARS_RESOLUTIONS : 봉 주기 (쉼표 구분, s/m/h 단위, 기본 1m,5m,30m)
+    OHLCV_BARS_TABLE       : 봉 테이블 (기본 naver_etf_price_bars)
+    OHLCV_BARS_DIR         : 파일 저장 디렉토리 (기본 .cache/bars)
+"""
+import os
+import csv
+from datetime import datetime, timedelta, timezone
+
+try:
+    from toss_crawling import metrics
+    from toss_crawling.bulk_write import bulk_write
+except ImportError:
+    import metrics
+    from bulk_write import bulk_write
+
+OHLCV_BARS_SINK = os.getenv("OHLCV_BARS_SINK", "off").strip().lower()
+OHLCV_BARS_RESOLUTIONS = os.getenv("OHLCV_BARS_RESOLUTIONS", "1m,5m,30m")
+OHLCV_BARS_TABLE = os.getenv("OHLCV_BARS_TABLE", "naver_etf_price_bars").strip()
+OHLCV_BARS_DIR = os.getenv("OHLCV_BARS_DIR", "").strip() or os.path.join(".cache", "bars")
+SINKS = ("off", "db", "file", "both")
+
+BAR_FIELDS = ("etf_code", "resolution", "bucket_start", "open", "high", "low", "close", "volume", "snapshot_count")
+UNITS = {"s": 1, "m": 60, "h": 3600}
+
+_builder = None
+
+
+def parse_resolutions(text):
+    """'1m,5m,30m' -> {'1m': 60, '5m': 300, '30m': 1800} (주기 오름차순)"""
+    resolutions = {}
+    for name in (part.strip().lower() for part in text.split(",")):
+        if not name:
+            continue
+        if name[-1] not in UNITS or not name[:-1].isdigit() or int(name[:-1]) <= 0:
+            raise ValueError(f"잘못된 봉 주기입니다: {name} (예: 1m, 5m, 30m)")
+        resolutions[name] = int(name[:-1]) * UNITS[name[-1]]
+    return dict(sorted(resolutions.items(), key=lambda item: item[1]))
+
+
+class BarBuilder:
+    """ETF별 진행 중인 봉을 주기별 배열로 보관하고, 스냅샷마다 갱신하여 확정된 봉을 컬럼 데이터로 돌려줍니다."""
+
+    ARRAYS = ("open", "high", "low", "close", "volume_base", "volume_close")
+
+    def __init__(self, resolutions=None):
+        import numpy as np
+
+        self.resolutions = parse_resolutions(resolutions or OHLCV_BARS_RESOLUTIONS)
+        self.codes = []
+        self.index = {}
+        self.tzinfo = None
+        # 직전 스냅샷의 누적 거래량 (ETF 위치별, 처음 보는 ETF는 NaN)
+        self.last_volume = np.empty(0)
+        self.state = {name: self._empty_state(0) for name in self.resolutions}
+
+    @staticmethod
+    def _empty_state(size):
+        import numpy as np
+
+        state = {name: np.full(size, np.nan) for name in BarBuilder.ARRAYS}
+        state["count"] = np.zeros(size, dtype=np.int64)
+        state["bucket"] = None
+        return state
+
+    def _grow(self, size):
+        """새 ETF가 들어오면 배열을 늘립니다. (기존 값 유지)"""
+        import numpy as np
+
+        extra = size - len(self.last_volume)
+        if extra <= 0:
+            return
+        self.last_volume = np.concatenate([self.last_volume, np.full(extra, np.nan)])
+        for state in self.state.values():
+            for name in self.ARRAYS:
+                state[name] = np.concatenate([state[name], np.full(extra, np.nan)])
+            state["count"] = np.concatenate([state["count"], np.zeros(extra, dtype=np.int64)])
+
+    def _positions(self, codes):
+        import numpy as np
+
+        for code in codes:
+            if code not in self.index:
+                self.index[code] = len(self.codes)
+                self.codes.append(code)
+        self._grow(len(self.codes))
+        return np.fromiter((self.index[code] for code in codes), np.int64, len(codes))
+
+    def _columns(self, name):
+        """주기 name의 진행 중인 봉 중 스냅샷이 있는 ETF의 봉을 컬럼 데이터로 만듭니다."""
+        import numpy as np
+
+        state = self.state[name]
+        if state["bucket"] is None:
+            return None
+        rows = np.flatnonzero(state["count"] > 0)
+        if not len(rows):
+            return None
+        bucket_start = datetime.fromtimestamp(state["bucket"], tz=self.tzinfo).isoformat()
+        volume = np.maximum(state["volume_close"][rows] - state["volume_base"][rows], 0)
+        return {
+            "etf_code": [self.codes[i] for i in rows.tolist()],
+            "resolution": [name] * len(rows),
+            "bucket_start": [bucket_start] * len(rows),
+            "open": state["open"][rows].tolist(),
+            "high": state["high"][rows].tolist(),
+            "low": state["low"][rows].tolist(),
+            "close": state["close"][rows].tolist(),
+            "volume": volume.astype(np.int64).tolist(),
+            "snapshot_count": state["count"][rows].tolist(),
+        }
+
+    def _close(self, name):
+        columns = self._columns(name)
+        self.state[name] = self._empty_state(len(self.codes))
+        return columns
+
+    def update(self, records, timestamp):
+        """
+        한 턴의 스냅샷(etf_code, current_price, volume)을 반영합니다.
+        이번 스냅샷으로 닫힌 구간의 봉을 컬럼 데이터 리스트로 반환합니다. (주기마다 최대 하나)
+        """
+        import numpy as np
+
+        moment = datetime.fromisoformat(timestamp) if isinstance(timestamp, str) else timestamp
+        self.tzinfo = moment.tzinfo
+        epoch = int(moment.timestamp())
+
+        records = [r for r in records if float(r.get("current_price") or 0) > 0]
+        finalized = []
+        if not records:
+            return finalized
+        idx = self._positions([r["etf_code"] for r in records])
+        price = np.fromiter((float(r["current_price"]) for r in records), np.float64, len(records))
+        volume = np.fromiter((float(r.get("volume") or 0) for r in records), np.float64, len(records))
+        previous = self.last_volume[idx]
+        base = np.where(np.isnan(previous), volume, previous)
+
+        for name, seconds in self.resolutions.items():
+            bucket = epoch - epoch % seconds
+            state = self.state[name]
+            if state["bucket"] is not None and bucket < state["bucket"]:
+                continue
+            if state["bucket"] is not None and bucket > state["bucket"]:
+                columns = self._close(name)
+                if columns:
+                    finalized.append(columns)
+                state = self.state[name]
+            state["bucket"] = bucket
+
+            fresh = state["count"][idx] == 0
+            state["open"][idx[fresh]] = price[fresh]
+            state["volume_base"][idx[fresh]] = base[fresh]
+            state["high"][idx] = np.fmax(state["high"][idx], price)
+            state["low"][idx] = np.fmin(state["low"][idx], price)
+            state["close"][idx] = price
+            state["volume_close"][idx] = volume
+            state["count"][idx] += 1
+
+        self.last_volume[idx] = volume
+        return finalized
+
+    def flush(self):
+        """진행 중인 봉을 컬럼 데이터 리스트로 반환합니다. (상태는 유지하므로 이후 스냅샷으로 계속 갱신)"""
+        return [columns for columns in map(self._columns, self.resolutions) if columns]
+
+    def export_state(self):
+        """체크포인트에 넣을 상태 (일반 데이터와 numpy 배열, 시간대는 UTC 오프셋 초)"""
+        offset = self.tzinfo.utcoffset(None) if self.tzinfo is not None else None
+        return {
+            "resolutions": dict(self.resolutions),
+            "codes": list(self.codes),
+            "utc_offset": offset.total_seconds() if offset is not None else None,
+            "last_volume": self.last_volume.copy(),
+            "state": {name: {key: (value.copy() if hasattr(value, "copy") else value) for key, value in state.items()}
+                      for name, state in self.state.items()},
+        }
+
+    def restore_state(self, saved):
+        """export_state 결과를 복원합니다. 주기 설정이 다르면 복원하지 않고 False를 반환합니다."""
+        if not saved or saved.get("resolutions") != self.resolutions:
+            return False
+        self.codes = list(saved["codes"])
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        offset = saved.get("utc_offset")
+        self.tzinfo = timezone(timedelta(seconds=offset)) if offset is not None else None
+        self.last_volume = saved["last_volume"]
+        self.state = saved["state"]
+        return True
+
+
+def bars_path(day, resolution, directory=None):
+    return os.path.join(directory or OHLCV_BARS_DIR, day, f"{resolution}.csv")
+
+
+def append_bar_file(columns, directory=None):
+    """봉 컬럼 데이터를 {디렉토리}/{YYYY-MM-DD}/{주기}.csv 에 추가합니다."""
+    day = columns["bucket_start"][0][:10]
+    path = bars_path(day, columns["resolution"][0], directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    is_new = not os.path.exists(path)
+    with open(path, "a", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        if is_new:
+            writer.writerow(BAR_FIELDS)
+        writer.writerows(zip(*(columns[field] for field in BAR_FIELDS)))
+
+
+def load_bars(day, resolution, etf_code=None, directory=None):
+    """로컬 파일의 봉을 bucket_start 순서로 읽습니다. 같은 봉이 여러 번 저장되었으면 나중 행을 사용합니다."""
+    path = bars_path(day, resolution, directory)
+    if not os.path.exists(path):
+        return []
+    bars = {}
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            if etf_code and row["etf_code"] != etf_code:
+                continue
+            for field in ("open", "high", "low", "close"):
+                row[field] = float(row[field])
+            row["volume"] = int(row["volume"])
+            row["snapshot_count"] = int(row["snapshot_count"])
+            bars[(row["etf_code"], row["bucket_start"])] = row
+    return sorted(bars.values(), key=lambda row: (row["bucket_start"], row["etf_code"]))
+
+
+def load_bars_from_supabase(etf_code, resolution, since=None, page_size=1000):
+    """봉 테이블에서 한 ETF의 봉을 bucket_start 순서로 읽습니다. (since: 이 시각 이후만)"""
+    try:
+        from toss_crawling.supabase_client import get_supabase
+    except ImportError:
+        from supabase_client import get_supabase
+
+    bars, offset = [], 0
+    while True:
+        query = get_supabase().table(OHLCV_BARS_TABLE).select("*").eq("etf_code", etf_code).eq("resolution", resolution)
+        if since:
+            query = query.gte("bucket_start", since)
+        page = query.order("bucket_start").range(offset, offset + page_size - 1).execute().data
+        bars.extend(page)
+        if len(page) < page_size:
+            return bars
+        offset += page_size
+
+
+def write_bars(finalized, sink=None):
+    """확정된 봉(컬럼 데이터 리스트)을 설정된 위치에 저장합니다."""
+    sink = sink or OHLCV_BARS_SINK
+    rows = 0
+    for columns in finalized:
+        if sink in ("db", "both"):
+            with metrics.span("db_write"):
+                bulk_write(OHLCV_BARS_TABLE, columns, upsert=True, on_conflict="etf_code,resolution,bucket_start")
+        if sink in ("file", "both"):
+            append_bar_file(columns)
+        rows += len(columns["etf_code"])
+    metrics.inc("rows_written", rows)
+    return rows
+
+
+def bars_enabled():
+    if OHLCV_BARS_SINK not in SINKS:
+        print(f"⚠️ 알 수 없는 OHLCV_BARS_SINK({OHLCV_BARS_SINK})입니다. 분봉 집계를 하지 않습니다.")
+        return False
+    return OHLCV_BARS_SINK != "off"
+
+
+def get_bar_builder():
+    """프로세스당 하나의 BarBuilder (분봉 집계가 꺼져 있으면 None)"""
+    global _builder
+    if _builder is None and bars_enabled():
+        _builder = BarBuilder()
+    return _builder
+
+
+def record_snapshot(records, timestamp):
+    """이번 턴 스냅샷으로 봉을 갱신하고 닫힌 구간의 봉을 저장합니다. 저장한 봉 수를 반환합니다."""
+    builder = get_bar_builder()
+    if builder is None:
+        return 0
+    try:
+        finalized = builder.update(records, timestamp)
+        if not finalized:
+            return 0
+        rows = write_bars(finalized)
+        buckets = ", ".join(f"{columns['resolution'][0]} {columns['bucket_start'][0][11:16]}" for columns in finalized)
+        print(f"🕯️ 분봉 확정 {rows}건 저장 ({buckets})")
+        return rows
+    except Exception as e:
+        print(f"⚠️ 분봉 갱신/저장 실패: {e}")
+        return 0
+
+
+def flush_bars():
+    """세션 종료 시 진행 중인 봉을 저장합니다."""
+    builder = get_bar_builder()
+    if builder is None:
+        return 0
+    try:
+        rows = write_bars(builder.flush())
+        if rows:
+            print(f"🕯️ 진행 중인 분봉 {rows}건 저장")
+        return rows
+    except Exception as e:
+        print(f"⚠️ 분봉 저장 실패: {e}")
+        return 0
@@ -0,0 +1,151 @@
+import re
+from datetime import datetime, timedelta, timezone
+
+KST = timezone(timedelta(hours=9))
+
+# 금액 문자열 정리: '순매수'/'순매도' 제거 후 쉼표, 공백, 부호(-), '원'을 한 번에 삭제
+_AMOUNT_DELETE = str.maketrans("", "", ", -원")
+# 조/억/만 단위 분해 (각 단위는 처음 등장한 구간만 사용)
+_AMOUNT_RE = re.compile(r"^(?:([^조]*)조)?(?:([^조억]*)억)?(?:([^조억만]*)만)?")
+
+# 숫자 셀 정리: 쉼표, 부호(+), %, '억' 삭제
+_NUMBER_DELETE = str.maketrans("", "", ",+%억")
+# 부호 없는 숫자만 남기기 (전일비 셀의 '상승'/'하락' 텍스트 등 제거)
+_UNSIGNED_RE = re.compile(r"[^0-9.]")
+
+_MONTH_DAY_RE = re.compile(r"(\d+)월\s*(\d+)일")
+_ISO_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def _to_float(part):
+    """단위 앞 숫자 구간을 float로 변환합니다. (비어 있거나 숫자가 아니면 None)"""
+    if part and part.strip():
+        try:
+            return float(part)
+        except ValueError:
+            return None
+    return None
+
+
+def parse_amount(amount_str):
+    """
+    토스증권 순매수/순매도 금액 문자열('1조 2,345억원', '5,000만원' 등)을 억 단위 float로 변환합니다.
+    부호는 제거되며 소수 4자리로 반올림합니다. (파싱할 수 없으면 0)
+    """
+    if not amount_str:
+        return 0
+    try:
+        cleaned = amount_str.replace("순매수", "").replace("순매도", "").translate(_AMOUNT_DELETE)
+        jo, eok, man = _AMOUNT_RE.match(cleaned).groups()
+        total_amount = 0.0
+        value = _to_float(jo) if jo is not None else None
+        if value is not None:
+            total_amount += value * 10000
+        value = _to_float(eok) if eok is not None else None
+        if value is not None:
+            total_amount += value
+        value = _to_float(man) if man is not None else None
+        if value is not None:
+            total_amount += value / 10000
+        return round(total_amount, 4)
+    except Exception:
+        return 0
+
+
+def parse_date(date_str, now=None):
+    """
+    토스증권 날짜 형식(오늘, 어제, 1월 30일 등)을 YYYY-MM-DD 형식으로 변환합니다.
+    now(기준 시각)를 넘기면 호출마다 현재 시각을 다시 구하지 않습니다. (기본: 현재 KST)
+    """
+    if now is None:
+        now = datetime.now(KST)
+    today_str = now.strftime('%Y-%m-%d')
+
+    if not date_str:
+        return today_str
+    if "오늘" in date_str:
+        return today_str
+    if "어제" in date_str:
+        return (now - timedelta(days=1)).strftime('%Y-%m-%d')
+
+    match = _MONTH_DAY_RE.search(date_str)
+    if match:
+        return f"{now.year}-{int(match.group(1)):02d}-{int(match.group(2)):02d}"
+
+    if _ISO_DATE_RE.match(date_str):
+        return date_str
+
+    return today_str
+
+
+def parse_number(text):
+    """네이버 시세 셀 문자열('12,345', '+1.23%', '-1,234억')을 float로 변환합니다. (빈 문자열은 0.0)"""
+    cleaned = text.strip().translate(_NUMBER_DELETE).strip()
+    return float(cleaned) if cleaned else 0.0
+
+
+def parse_int(text):
+    """네이버 시세 셀 문자열을 int로 변환합니다. (빈 문자열은 0)"""
+    cleaned = text.strip().translate(_NUMBER_DELETE).strip()
+    return int(cleaned) if cleaned else 0
+
+
+def parse_unsigned(text):
+    """숫자와 소수점 외의 문자를 모두 제거하여 부호 없는 float로 변환합니다. (전일비 셀용, 빈 값은 0.0)"""
+    cleaned = _UNSIGNED_RE.sub("", text)
+    return float(cleaned) if cleaned else 0.0
+
+
+def _parse_batch(func, values, dtype, errors, default):
+    """
+    스칼라 파서(func)를 배열 전체에 적용하여 dtype 배열로 반환합니다.
+    (pandas .str 체인보다 컴파일된 translate/정규식 스칼라 파서를 한 번씩 호출하는 편이 빠름)
+    문자열이 아닌 값(None/NaN)은 빈 값으로 보고, 잘못된 값은 errors('coerce' -> default, 'raise' -> ValueError) 처리
+    """
+    import numpy as np
+
+    values = values.tolist() if hasattr(values, "tolist") else values
+    if errors == "raise":
+        try:
+            return np.array(list(map(func, values)), dtype=dtype)
+        except (AttributeError, TypeError):
+            values = [v if isinstance(v, str) else "" for v in values]
+            return np.array(list(map(func, values)), dtype=dtype)
+
+    def safe(text):
+        try:
+            return func(text) if isinstance(text, str) else default
+        except ValueError:
+            return default
+    return np.array(list(map(safe, values)), dtype=dtype)
+
+
+def parse_amounts(values):
+    """parse_amount의 배열 버전: 금액 문자열 배열(list / ndarray / Series)을 억 단위 float64 배열로 변환합니다."""
+    import numpy as np
+
+    return _parse_batch(parse_amount, values, np.float64, "coerce", 0.0)
+
+
+def parse_numbers(values, errors="raise"):
+    """parse_number의 배열 버전: 시세 셀 문자열 배열을 float64 배열로 변환합니다."""
+    import numpy as np
+
+    return _parse_batch(parse_number, values, np.float64, errors, 0.0)
+
+
+def parse_ints(values, errors="raise"):
+    """
+    parse_int의 배열 버전: 시세 셀 문자열 배열을 int64 배열로 변환합니다.
+    int64 범위를 넘는 값은 errors와 관계없이 OverflowError를 발생시킵니다.
+    """
+    import numpy as np
+
+    return _parse_batch(parse_int, values, np.int64, errors, 0)
+
+
+def parse_unsigned_numbers(values, errors="raise"):
+    """parse_unsigned의 배열 버전: 숫자와 소수점만 남겨 부호 없는 float64 배열로 변환합니다."""
+    import numpy as np
+
+    return _parse_batch(parse_unsigned, values, np.float64, errors, 0.0)
@@ -0,0 +1,129 @@
+"""
+턴 파이프라인 (수집 → 저장 → 점수 계산 단계를 큐로 연결)
+
+수집기는 턴마다 수집, 저장, 서버 측 점수 계산(RPC)을 순서대로 실행하므로, 점수 계산이 끝나야 다음 턴 수집을 시작할 수 있습니다.
+파이프라인 모드(--pipeline 인자 또는 PIPELINE=1)에서는 수집 이후 단계를 단계별 작업 스레드가 실행하여
+N번째 턴의 점수 계산이 N+1번째 턴 수집과 겹치고, 처리량이 단계 합이 아니라 가장 느린 단계에 맞춰집니다.
+    - 단계마다 작업 스레드 1개와 FIFO 큐를 쓰므로, 같은 단계는 항상 턴 시각 순서대로 실행됩니다.
+    - 큐 크기(PIPELINE_QUEUE_SIZE)가 차면 submit이 기다립니다. (점수 계산이 밀리면 수집도 늦춰지는 backpressure)
+    - 한 단계가 실패한 턴은 이후 단계를 건너뜁니다. (다음 턴은 그대로 진행)
+    - close()는 남은 턴을 모두 처리한 뒤 돌아오므로, 종료 시에도 마지막 턴의 점수 계산까지 마칩니다.
+파이프라인 모드가 아니면 submit이 모든 단계를 바로 실행합니다. (기존 순차 실행과 동일)
+파이프라인 모드에서 작업 스레드가 기록한 지표(metrics)는 수집 루프의 턴과 섞이지 않도록 단계 실행마다 별도 턴
+({파이프라인 이름}_{단계 이름}, 턴 ID는 수집 턴과 같음)으로 모아 단계가 끝날 때 출력/기록합니다. (실패하면 status=error)
+
+환경 변수:
+    PIPELINE            : 1이면 --pipeline 인자 없이도 파이프라인 모드 (기본 0)
+    PIPELINE_QUEUE_SIZE : 단계별 대기 턴 수 상한 (기본 1)
+"""
+import os
+import time
+import queue
+import threading
+
+try:
+    from toss_crawling import metrics
+except ImportError:
+    import metrics
+
+PIPELINE_ENABLED = os.getenv("PIPELINE", "0").strip() in ("1", "true", "yes")
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "1"))
+
+_STOP = object()
+
+
+class TurnPipeline:
+    """
+    stages: [(단계 이름, 함수)] 목록. 각 함수는 이전 단계의 반환값(첫 단계는 submit의 payload)을 받아 다음 단계로 넘길 값을 반환합니다.
+    """
+
+    def __init__(self, name, stages, enabled=None, maxsize=None):
+        self.name = name
+        self.stages = list(stages)
+        self.enabled = PIPELINE_ENABLED if enabled is None else enabled
+        self.maxsize = PIPELINE_QUEUE_SIZE if maxsize is None else maxsize
+        self.queues = []
+        self.workers = []
+        self.backpressure_seconds = 0.0
+        if self.enabled:
+            self._start()
+
+    def _start(self):
+        self.queues = [queue.Queue(maxsize=max(1, self.maxsize)) for _ in self.stages]
+        for index, (stage_name, _) in enumerate(self.stages):
+            worker = threading.Thread(target=self._worker, args=(index,), name=f"{self.name}-{stage_name}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+        print(f"⏩ [{self.name}] 파이프라인 모드: {' → '.join(stage for stage, _ in self.stages)} (단계별 대기 {max(1, self.maxsize)}턴)")
+
+    def _run_stage(self, index, turn_id, payload):
+        stage_name, func = self.stages[index]
+        try:
+            return True, func(payload)
+        except Exception as e:
+            print(f"❌ [{self.name}] {stage_name} 단계 실패 (턴 {turn_id}): {e}. 이 턴의 이후 단계를 건너뜁니다.")
+            return False, None
+
+    def _worker(self, index):
+        stage_name = self.stages[index][0]
+        inbox = self.queues[index]
+        outbox = self.queues[index + 1] if index + 1 < len(self.queues) else None
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                if outbox is not None:
+                    outbox.put(_STOP)
+                return
+            turn_id, payload, queued_at = item
+            started = time.perf_counter()
+            with metrics.turn_scope(f"{self.name}_{stage_name}", turn_id=turn_id) as scope:
+                ok, result = self._run_stage(index, turn_id, payload)
+                if not ok:
+                    scope["status"] = "error"
+            finished = time.perf_counter()
+            if not ok:
+                continue
+            print(f"⏩ [{self.name}] {stage_name} 완료 (턴 {turn_id}, 대기 {started - queued_at:.1f}s, 실행 {finished - started:.1f}s)")
+            if outbox is not None:
+                outbox.put((turn_id, result, finished))
+
+    def submit(self, turn_id, payload):
+        """
+        턴 결과를 첫 단계로 넘깁니다. 파이프라인 모드가 아니면 모든 단계를 바로 실행하고,
+        파이프라인 모드에서는 큐가 차 있으면 자리가 날 때까지 기다립니다. (backpressure, 기다린 시간(초) 반환)
+        """
+        if not self.enabled:
+            for index in range(len(self.stages)):
+                ok, payload = self._run_stage(index, turn_id, payload)
+                if not ok:
+                    break
+            return 0.0
+
+        inbox = self.queues[0]
+        started = time.perf_counter()
+        try:
+            inbox.put_nowait((turn_id, payload, started))
+            return 0.0
+        except queue.Full:
+            print(f"⏳ [{self.name}] 이전 턴 처리가 밀려 있어 자리가 날 때까지 기다립니다... (턴 {turn_id})")
+            inbox.put((turn_id, payload, started))
+        waited = time.perf_counter() - started
+        self.backpressure_seconds += waited
+        return waited
+
+    def pending(self):
+        """큐에서 대기 중인 턴 수 (실행 중인 턴 제외)"""
+        return sum(q.qsize() for q in self.queues)
+
+    def close(self):
+        """남은 턴을 모두 처리하고 작업 스레드를 종료합니다."""
+        if not self.enabled or not self.workers:
+            return
+        if self.pending():
+            print(f"⏳ [{self.name}] 남은 턴 처리를 마친 뒤 종료합니다... (대기 {self.pending()}건)")
+        self.queues[0].put(_STOP)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+        if self.backpressure_seconds:
+            print(f"ℹ️ [{self.name}] 파이프라인 backpressure 누적 대기 {self.backpressure_seconds:.1f}s")
@@ -0,0 +1,182 @@
+"""
+수집 턴 프로파일링 (cProfile + tracemalloc, 선택적)
+
+턴 지표(metrics)는 어느 단계가 느린지까지만 알려 주므로, 느린 턴의 함수별 호출 시간과 메모리 할당 위치를 보려면
+프로파일이 필요합니다. 수집기가 --profile 인자로 실행되거나 PROFILE=1 이면
+    - PROFILE_EVERY번째 턴마다, 또는 PROFILE_SLOW_SECONDS보다 오래 걸린 턴에 대해
+    - {PROFILE_DIR}/{collector}_{턴 시각}_{소요}s.pstats (cProfile, snakeviz/pstats로 열기)
+    - {PROFILE_DIR}/{collector}_{턴 시각}_{소요}s.txt    (누적 시간 상위 함수 + tracemalloc 할당 상위 위치)
+를 남기고, 수집기별로 최근 PROFILE_KEEP개 턴의 파일만 보관합니다.
+느린 턴 기준이 설정되어 있으면 어떤 턴이 느릴지 미리 알 수 없으므로 모든 턴을 프로파일링하고 빠른 턴의 결과는 버립니다.
+꺼져 있을 때는 start_turn/end_turn이 플래그 확인만 하고 돌아갑니다.
+cProfile은 턴을 실행한 스레드만 측정합니다. (헤지 요청 등 작업 스레드 안의 시간은 대기 시간으로 보임)
+
+환경 변수:
+    PROFILE              : 1이면 --profile 인자 없이도 프로파일링 (기본 0)
+    PROFILE_DIR          : 결과 디렉토리 (기본 profiles)
+    PROFILE_EVERY        : N번째 턴마다 프로파일 저장, 0이면 사용 안 함 (기본 10)
+    PROFILE_SLOW_SECONDS : 이 시간(초)보다 오래 걸린 턴도 저장, 0이면 사용 안 함 (기본 0)
+    PROFILE_KEEP         : 수집기별 보관할 최근 턴 수 (기본 20)
+    PROFILE_TRACEMALLOC  : 0이면 메모리 할당 추적을 하지 않음 (기본 1)
+
+사용 예:
+    python toss_crawling/toss_yg_score_stk.py morning --profile
+    PROFILE=1 PROFILE_EVERY=0 PROFILE_SLOW_SECONDS=20 python naver/naver_realtime.py
+    python -m pstats profiles/naver_realtime_20260119T093000_12.41s.pstats
+"""
+import os
+import re
+import io
+import glob
+import time
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "").strip() or "profiles"
+PROFILE_EVERY = int(os.getenv("PROFILE_EVERY", "10"))
+PROFILE_SLOW_SECONDS = float(os.getenv("PROFILE_SLOW_SECONDS", "0"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+PROFILE_TRACEMALLOC = os.getenv("PROFILE_TRACEMALLOC", "1").strip() not in ("0", "false", "no")
+
+TOP_FUNCTIONS = 40          # 텍스트 리포트에 넣을 누적 시간 상위 함수 수
+TOP_ALLOCATIONS = 25        # 텍스트 리포트에 넣을 할당 상위 위치 수
+TRACE_FRAMES = 1            # tracemalloc이 할당마다 저장하는 스택 깊이 (클수록 느려짐)
+
+_enabled = os.getenv("PROFILE", "0").strip() in ("1", "true", "yes")
+_turn_count = 0
+_active = None
+
+
+def enable(enabled=True):
+    """프로파일링을 켜거나 끕니다. (수집기의 --profile 인자 처리용)"""
+    global _enabled
+    _enabled = enabled
+    if enabled:
+        mode = []
+        if PROFILE_EVERY > 0:
+            mode.append(f"{PROFILE_EVERY}턴마다")
+        if PROFILE_SLOW_SECONDS > 0:
+            mode.append(f"{PROFILE_SLOW_SECONDS:g}초 초과 턴")
+        print(f"🔬 턴 프로파일링 사용: {' + '.join(mode) or '저장 조건 없음'} → {PROFILE_DIR} (최근 {PROFILE_KEEP}턴 보관)")
+
+
+def is_enabled():
+    return _enabled
+
+
+def _sampled(turn_number):
+    return PROFILE_EVERY > 0 and turn_number % PROFILE_EVERY == 0
+
+
+def start_turn(collector, turn_id=None):
+    """턴 프로파일링을 시작합니다. 이번 턴이 저장 대상이 될 수 없으면 아무것도 하지 않습니다."""
+    global _turn_count, _active
+    if not _enabled:
+        return
+    _turn_count += 1
+    if _active is not None:
+        _stop(_active)
+        _active = None
+
+    sampled = _sampled(_turn_count)
+    if not sampled and PROFILE_SLOW_SECONDS <= 0:
+        return
+
+    import cProfile
+
+    started_tracing = False
+    if PROFILE_TRACEMALLOC:
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+            started_tracing = True
+
+    profiler = cProfile.Profile()
+    _active = {
+        "collector": collector,
+        "turn_id": turn_id or time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "number": _turn_count,
+        "sampled": sampled,
+        "profiler": profiler,
+        "started_tracing": started_tracing,
+        "t0": time.perf_counter(),
+    }
+    profiler.enable()
+
+
+def _stop(active):
+    active["profiler"].disable()
+    snapshot = None
+    if PROFILE_TRACEMALLOC:
+        import tracemalloc
+
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            if active["started_tracing"]:
+                tracemalloc.stop()
+    return snapshot
+
+
+def end_turn():
+    """
+    턴 프로파일링을 끝내고, 저장 조건(N번째 턴 또는 느린 턴)에 맞으면 결과 파일을 씁니다.
+    저장한 .pstats 경로를 반환합니다. (저장하지 않았으면 None)
+    """
+    global _active
+    active = _active
+    if active is None:
+        return None
+    _active = None
+
+    snapshot = _stop(active)
+    seconds = time.perf_counter() - active["t0"]
+    slow = PROFILE_SLOW_SECONDS > 0 and seconds >= PROFILE_SLOW_SECONDS
+    if not (active["sampled"] or slow):
+        return None
+
+    try:
+        path = _write_report(active, seconds, snapshot, "느린 턴" if slow else f"{PROFILE_EVERY}턴 주기")
+        prune(active["collector"])
+    except OSError as e:
+        print(f"⚠️ 프로파일 저장 실패: {e}")
+        return None
+    print(f"🔬 [{active['collector']}] 턴 프로파일 저장 ({seconds:.2f}s): {path}")
+    return path
+
+
+def _write_report(active, seconds, snapshot, reason):
+    import pstats
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = re.sub(r"[^0-9T]", "", str(active["turn_id"]).split("+")[0].split(".")[0])
+    base = os.path.join(PROFILE_DIR, f"{active['collector']}_{stamp}_{seconds:.2f}s")
+    path = f"{base}.pstats"
+    active["profiler"].dump_stats(path)
+
+    buffer = io.StringIO()
+    buffer.write(f"collector: {active['collector']}\nturn_id: {active['turn_id']}\n")
+    buffer.write(f"turn: #{active['number']} ({reason})\nturn_seconds: {seconds:.4f}\n\n")
+    buffer.write(f"=== 누적 시간 상위 {TOP_FUNCTIONS}개 함수 ===\n")
+    pstats.Stats(active["profiler"], stream=buffer).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+
+    if snapshot is not None:
+        stats = snapshot.statistics("lineno")
+        total = sum(stat.size for stat in stats)
+        buffer.write(f"\n=== 메모리 할당 상위 {TOP_ALLOCATIONS}개 위치 (추적 중 남아 있는 할당 {total / 1024:.1f} KiB) ===\n")
+        for stat in stats[:TOP_ALLOCATIONS]:
+            buffer.write(f"{stat.size / 1024:10.1f} KiB {stat.count:8d}회  {stat.traceback}\n")
+
+    with open(f"{base}.txt", "w", encoding="utf-8") as f:
+        f.write(buffer.getvalue())
+    return path
+
+
+def prune(collector, keep=None):
+    """수집기별로 최근 keep개 턴의 프로파일만 남기고 오래된 파일을 지웁니다."""
+    keep = PROFILE_KEEP if keep is None else keep
+    profiles = sorted(glob.glob(os.path.join(PROFILE_DIR, f"{collector}_*.pstats")), key=os.path.getmtime)
+    for path in profiles[:max(0, len(profiles) - keep)]:
+        for target in (path, f"{path[:-len('.pstats')]}.txt"):
+            try:
+                os.remove(target)
+            except FileNotFoundError:
+                pass
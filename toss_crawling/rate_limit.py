@@ -0,0 +1,193 @@
+"""
+외부 사이트 호출 속도 제한 (호스트별 토큰 버킷, 프로세스 공용)
+
+네이버 수집기들이 finance.naver.com 을 각자 time.sleep(0.5) 간격으로 호출하면, 동시에 실행되거나 병렬 요청을 쓸 때
+전체 호출 속도를 아무도 관리하지 않아 차단(throttling)을 부를 수 있습니다. 모든 호출 경로가 호출 직전에 acquire(url)을 거치면
+    - 호스트별 토큰 버킷(초당 rate개 보충, 최대 burst개 누적)으로 순간 burst 이후 평균 속도를 맞추고,
+    - 스레드(acquire)와 asyncio(acquire_async) 양쪽에서 같은 버킷을 공유하며,
+    - RATE_LIMIT_BACKEND=file 이면 버킷 상태를 파일 잠금(fcntl)으로 공유하여 별도 프로세스끼리도 같은 예산을 나눠 씁니다.
+토큰이 없으면 음수로 예약한 뒤 그만큼만 기다리므로, 대기 순서대로 간격을 두고 호출됩니다.
+생략해도 되는 호출(헤지 요청)은 try_acquire로 남은 토큰이 있을 때만 보냅니다.
+대기 시간은 턴 지표의 rate_limit_wait 단계(span)로 기록됩니다. (page_load 안에서 호출되면 그 시간에 포함됨)
+
+환경 변수:
+    RATE_LIMITS        : 호스트별 설정 "호스트=초당횟수:burst" 쉼표 구분 (기본 "finance.naver.com=2:4,www.tossinvest.com=0.5:2")
+    RATE_LIMIT_DEFAULT : 설정에 없는 호스트의 기본값 "초당횟수:burst" (기본 "2:4")
+    RATE_LIMIT_BACKEND : memory(기본, 프로세스 내 공유) 또는 file(프로세스 간 공유)
+    RATE_LIMIT_DIR     : file 백엔드의 상태 파일 디렉토리 (기본 <임시 디렉토리>/toss_rate_limit)
+"""
+import os
+import time
+import tempfile
+import threading
+from urllib.parse import urlparse
+
+try:
+    from toss_crawling import metrics
+except ImportError:
+    import metrics
+
+RATE_LIMITS = os.getenv("RATE_LIMITS", "finance.naver.com=2:4,www.tossinvest.com=0.5:2")
+RATE_LIMIT_DEFAULT = os.getenv("RATE_LIMIT_DEFAULT", "2:4")
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").strip().lower()
+RATE_LIMIT_DIR = os.getenv("RATE_LIMIT_DIR", "").strip() or os.path.join(tempfile.gettempdir(), "toss_rate_limit")
+
+
+def _parse_rate(text):
+    rate, _, burst = text.partition(":")
+    rate = float(rate)
+    return rate, float(burst) if burst else max(1.0, rate)
+
+
+def parse_limits(text=RATE_LIMITS):
+    """'host=rate:burst,...' 설정을 {host: (rate, burst)}로 변환합니다."""
+    limits = {}
+    for entry in text.split(","):
+        host, _, spec = entry.strip().partition("=")
+        if host and spec:
+            limits[host.strip().lower()] = _parse_rate(spec.strip())
+    return limits
+
+
+class TokenBucket:
+    """프로세스 내 토큰 버킷 (스레드 안전)"""
+
+    def __init__(self, name, rate, burst):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.lock = threading.Lock()
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.acquired = 0
+        self.waited_seconds = 0.0
+        self.max_wait = 0.0
+
+    def reserve(self, tokens=1, only_if_available=False):
+        """
+        토큰을 예약하고 기다려야 할 시간(초)을 반환합니다. (토큰이 모자라면 음수 잔고로 예약)
+        only_if_available이면 지금 쓸 수 있는 토큰이 모자랄 때 예약하지 않고 None을 반환합니다.
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if only_if_available and self.tokens < tokens:
+                return None
+            self.tokens -= tokens
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self._account(wait)
+            return wait
+
+    def _account(self, wait):
+        self.acquired += 1
+        self.waited_seconds += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def stats(self):
+        return {"acquired": self.acquired, "waited_seconds": round(self.waited_seconds, 4), "max_wait": round(self.max_wait, 4)}
+
+
+class FileTokenBucket(TokenBucket):
+    """
+    상태(토큰 잔고, 갱신 시각)를 파일에 두고 fcntl 잠금으로 갱신하는 토큰 버킷.
+    같은 RATE_LIMIT_DIR을 쓰는 모든 프로세스가 예산을 공유합니다. (시각은 프로세스 간 공통인 time.time 사용)
+    """
+
+    def __init__(self, name, rate, burst, directory=RATE_LIMIT_DIR):
+        super().__init__(name, rate, burst)
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{name.replace(':', '_')}.bucket")
+
+    def reserve(self, tokens=1, only_if_available=False):
+        import fcntl
+
+        with self.lock, open(self.path, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                parts = f.read().split()
+                now = time.time()
+                if len(parts) == 2:
+                    balance, updated = float(parts[0]), float(parts[1])
+                else:
+                    balance, updated = self.burst, now
+                balance = min(self.burst, balance + max(0.0, now - updated) * self.rate)
+                if only_if_available and balance < tokens:
+                    return None
+                balance -= tokens
+                f.seek(0)
+                f.truncate()
+                f.write(f"{balance:.6f} {now:.6f}")
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            wait = -balance / self.rate if balance < 0 else 0.0
+            self._account(wait)
+            return wait
+
+
+_limits = parse_limits()
+_default_limit = _parse_rate(RATE_LIMIT_DEFAULT)
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def _host(url_or_host):
+    if "://" in url_or_host:
+        return (urlparse(url_or_host).hostname or "").lower()
+    return url_or_host.lower()
+
+
+def get_bucket(url_or_host):
+    """호스트(또는 URL의 호스트)에 해당하는 버킷을 반환합니다. (처음 요청 시 생성)"""
+    host = _host(url_or_host)
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            rate, burst = _limits.get(host, _default_limit)
+            if RATE_LIMIT_BACKEND == "file":
+                try:
+                    bucket = FileTokenBucket(host, rate, burst)
+                except (ImportError, OSError) as e:
+                    print(f"⚠️ 파일 잠금 속도 제한을 쓸 수 없어 프로세스 내 제한으로 대체합니다: {e}")
+            if bucket is None:
+                bucket = TokenBucket(host, rate, burst)
+            _buckets[host] = bucket
+        return bucket
+
+
+def _record_wait(wait):
+    if wait > 0:
+        metrics.record_span("rate_limit_wait", wait)
+
+
+def acquire(url_or_host, tokens=1):
+    """호출 직전에 토큰을 받고, 필요하면 그만큼 기다립니다. (기다린 시간(초) 반환)"""
+    wait = get_bucket(url_or_host).reserve(tokens)
+    if wait > 0:
+        time.sleep(wait)
+    _record_wait(wait)
+    return wait
+
+
+def try_acquire(url_or_host, tokens=1):
+    """기다리지 않고 바로 쓸 수 있는 토큰이 있을 때만 받습니다. (받았으면 True, 헤지 요청처럼 생략 가능한 호출용)"""
+    return get_bucket(url_or_host).reserve(tokens, only_if_available=True) is not None
+
+
+async def acquire_async(url_or_host, tokens=1):
+    """acquire의 asyncio 버전 (이벤트 루프를 막지 않고 기다림)"""
+    import asyncio
+
+    wait = get_bucket(url_or_host).reserve(tokens)
+    if wait > 0:
+        await asyncio.sleep(wait)
+    _record_wait(wait)
+    return wait
+
+
+def stats():
+    """호스트별 누적 호출 수와 대기 시간"""
+    with _buckets_lock:
+        return {host: bucket.stats() for host, bucket in _buckets.items()}
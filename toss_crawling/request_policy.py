@@ -0,0 +1,268 @@
+"""
+외부 요청 정책: 헤지(hedged) 요청 + 엔드포인트별 서킷 브레이커 + 마지막 정상 응답 캐시
+
+네이버 시세/ETF API 한 번이 느리게 응답하면 10초 타임아웃의 대부분을 기다리느라 턴 전체가 늦어집니다.
+    - 헤지 요청: 응답이 엔드포인트별 최근 지연시간 p95(HEDGE_MIN~HEDGE_MAX 범위)를 넘기면 같은 요청을 한 번 더 보내고,
+      먼저 성공한 응답을 사용합니다. (느린 쪽은 버림, 최근 요청 대비 헤지 비율은 HEDGE_MAX_RATIO 이하로 제한)
+    - 서킷 브레이커: 연속 실패가 BREAKER_FAILURES회 이상이면 BREAKER_COOLDOWN초 동안 요청하지 않고(open),
+      이후 한 번 시험 요청(half-open)이 성공하면 다시 닫습니다.
+    - 브레이커가 열려 있는 동안은 마지막 정상 응답을 stale=True로 표시하여 돌려줍니다. (캐시가 없으면 CircuitOpenError)
+      stale 결과의 fetched_at은 원래 응답을 받은 시각이므로, 호출하는 쪽은 그 시각으로 기록하거나 저장을 건너뜁니다.
+    - 지연시간 표본/헤지 비율/브레이커는 엔드포인트(경로) 단위이고, 마지막 정상 응답은 요청(cache_key, 예: 페이지 URL)마다 따로 둡니다.
+    - limiter(URL 또는 호스트)를 주면 속도 제한 토큰을 시간 측정/헤지 대기 전에 받고, 헤지 요청은 기다리지 않고
+      받을 수 있는 토큰이 있을 때만 보냅니다. (속도 제한 대기가 지연시간 p95와 헤지 판단에 섞이지 않음)
+
+환경 변수:
+    REQUEST_HEDGE            : 0이면 헤지 요청을 보내지 않음 (기본 1)
+    REQUEST_HEDGE_MIN        : 헤지 대기 시간 하한(초, 기본 0.3)
+    REQUEST_HEDGE_MAX        : 헤지 대기 시간 상한(초, 기본 3)
+    REQUEST_BREAKER_FAILURES : 브레이커를 여는 연속 실패 횟수 (기본 3)
+    REQUEST_BREAKER_COOLDOWN : 브레이커가 열려 있는 시간(초, 기본 60)
+"""
+import os
+import json
+import time
+import base64
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+try:
+    from toss_crawling.rate_limit import acquire, try_acquire
+except ImportError:
+    from rate_limit import acquire, try_acquire
+
+HEDGE_ENABLED = os.getenv("REQUEST_HEDGE", "1").strip() not in ("0", "false", "no")
+HEDGE_MIN_SECONDS = float(os.getenv("REQUEST_HEDGE_MIN", "0.3"))
+HEDGE_MAX_SECONDS = float(os.getenv("REQUEST_HEDGE_MAX", "3"))
+HEDGE_MAX_RATIO = 0.2
+BREAKER_FAILURES = int(os.getenv("REQUEST_BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN_SECONDS = float(os.getenv("REQUEST_BREAKER_COOLDOWN", "60"))
+
+LATENCY_WINDOW = 100        # p95 계산에 쓰는 최근 성공 요청 수
+MIN_SAMPLES = 10            # 이보다 표본이 적으면 HEDGE_MAX를 대기 시간으로 사용
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="request-policy")
+
+
+class CircuitOpenError(Exception):
+    """브레이커가 열려 있고 돌려줄 캐시도 없을 때 발생합니다."""
+
+
+class FetchResult:
+    """요청 결과. stale이면 브레이커가 열려 있어 마지막 정상 응답(fetched_at 시각)을 돌려준 것입니다."""
+
+    def __init__(self, response, stale=False, hedged=False, elapsed=0.0, fetched_at=None):
+        self.response = response
+        self.stale = stale
+        self.hedged = hedged
+        self.elapsed = elapsed
+        self.fetched_at = fetched_at or time.time()
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+
+class CachedResponse:
+    """체크포인트에서 복원한 마지막 정상 응답 (requests.Response 중 수집기가 쓰는 속성만 제공)"""
+
+    def __init__(self, content, status_code=200, headers=None, encoding=None, url=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = dict(headers or {})
+        self.encoding = encoding
+        self.url = url
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        pass
+
+
+def _to_plain(result):
+    """FetchResult를 체크포인트에 넣을 일반 데이터로 바꿉니다. (본문은 base64)"""
+    response = result.response
+    return {
+        "content": base64.b64encode(response.content).decode("ascii"),
+        "status_code": getattr(response, "status_code", 200),
+        "content_type": (getattr(response, "headers", None) or {}).get("Content-Type"),
+        "encoding": response.encoding,
+        "url": getattr(response, "url", None),
+        "fetched_at": result.fetched_at,
+    }
+
+
+def _from_plain(saved):
+    headers = {"Content-Type": saved["content_type"]} if saved.get("content_type") else {}
+    response = CachedResponse(base64.b64decode(saved["content"]), saved.get("status_code", 200), headers,
+                              saved.get("encoding"), saved.get("url"))
+    return FetchResult(response, fetched_at=float(saved["fetched_at"]))
+
+
+class EndpointPolicy:
+    """엔드포인트 하나의 지연시간 표본, 브레이커 상태, 마지막 정상 응답"""
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.recent_hedges = deque(maxlen=LATENCY_WINDOW)
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.last_good = {}         # cache_key -> FetchResult
+
+    def hedge_delay(self):
+        """헤지 요청을 보내기 전까지 기다릴 시간 (최근 성공 지연시간의 p95)"""
+        with self.lock:
+            samples = sorted(self.latencies)
+        if len(samples) < MIN_SAMPLES:
+            return HEDGE_MAX_SECONDS
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        return min(max(p95, HEDGE_MIN_SECONDS), HEDGE_MAX_SECONDS)
+
+    def may_hedge(self):
+        with self.lock:
+            return sum(self.recent_hedges) < max(1, int(len(self.recent_hedges) * HEDGE_MAX_RATIO))
+
+    def allow_request(self):
+        """브레이커가 닫혀 있거나, 쿨다운이 지나 시험 요청 1회를 허용할 때 True"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < BREAKER_COOLDOWN_SECONDS or self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def record_success(self, result, cache_key):
+        with self.lock:
+            self.latencies.append(result.elapsed)
+            self.recent_hedges.append(result.hedged)
+            if self.opened_at is not None:
+                print(f"✅ [{self.name}] 요청 정상화: 서킷 브레이커를 닫습니다.")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+            self.last_good[cache_key] = result
+
+    def record_failure(self):
+        with self.lock:
+            self.recent_hedges.append(False)
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= BREAKER_FAILURES:
+                self.opened_at = time.monotonic()
+                print(f"🚧 [{self.name}] 연속 실패 {self.failures}회: {BREAKER_COOLDOWN_SECONDS:.0f}초 동안 요청을 중단합니다. (서킷 브레이커 open)")
+
+
+_policies = {}
+_policies_lock = threading.Lock()
+
+
+def get_policy(endpoint):
+    with _policies_lock:
+        policy = _policies.get(endpoint)
+        if policy is None:
+            policy = _policies[endpoint] = EndpointPolicy(endpoint)
+        return policy
+
+
+def export_last_good():
+    """엔드포인트별 {cache_key: 마지막 정상 응답(본문/상태/인코딩/받은 시각)} (세션 체크포인트 저장용 일반 데이터)"""
+    with _policies_lock:
+        policies = list(_policies.items())
+    exported = {}
+    for endpoint, policy in policies:
+        with policy.lock:
+            results = dict(policy.last_good)
+        if results:
+            exported[endpoint] = {cache_key: _to_plain(result) for cache_key, result in results.items()}
+    return exported
+
+
+def restore_last_good(last_good):
+    """체크포인트의 마지막 정상 응답을 복원하여, 새 세션 첫 요청부터 브레이커가 열리면 stale 응답을 쓸 수 있게 합니다."""
+    for endpoint, results in (last_good or {}).items():
+        policy = get_policy(endpoint)
+        with policy.lock:
+            for cache_key, saved in results.items():
+                try:
+                    policy.last_good.setdefault(cache_key, _from_plain(saved))
+                except (KeyError, TypeError, ValueError) as e:
+                    print(f"⚠️ [{endpoint}] 체크포인트의 마지막 정상 응답을 복원하지 못했습니다: {e}")
+
+
+def _call(request):
+    response = request()
+    response.raise_for_status()
+    return response
+
+
+def _hedged_call(policy, request, limiter=None):
+    """
+    request를 실행하고, hedge_delay 안에 끝나지 않으면 한 번 더 보내 먼저 성공한 응답을 반환합니다. (응답, 헤지 여부)
+    limiter가 있으면 헤지 요청은 바로 쓸 수 있는 속도 제한 토큰이 있을 때만 보냅니다.
+    """
+    primary = _executor.submit(_call, request)
+    if not HEDGE_ENABLED:
+        return primary.result(), False
+
+    done, _ = wait([primary], timeout=policy.hedge_delay())
+    if done or not policy.may_hedge() or (limiter is not None and not try_acquire(limiter)):
+        return primary.result(), False
+
+    pending = {primary, _executor.submit(_call, request)}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result(), True
+            error = future.exception()
+    raise error
+
+
+def _stale(policy, cache_key):
+    cached = policy.last_good.get(cache_key)
+    if cached is None:
+        return None
+    return FetchResult(cached.response, stale=True, elapsed=0.0, fetched_at=cached.fetched_at)
+
+
+def fetch(endpoint, request, cache_key=None, limiter=None):
+    """
+    request()(requests.Response를 반환하는 호출)를 엔드포인트 정책에 따라 실행하고 FetchResult를 반환합니다.
+    실패하면 예외를 그대로 올리되, 브레이커가 열려 있으면(이번 실패로 열린 경우 포함) 이 요청(cache_key, 기본 endpoint)의
+    마지막 정상 응답을 stale로 반환합니다. limiter(URL 또는 호스트)가 있으면 요청 전에 속도 제한 토큰을 받습니다. (시간 측정 제외)
+    """
+    policy = get_policy(endpoint)
+    cache_key = cache_key or endpoint
+    if not policy.allow_request():
+        stale = _stale(policy, cache_key)
+        if stale is not None:
+            return stale
+        raise CircuitOpenError(f"{endpoint}: 서킷 브레이커가 열려 있고 캐시된 응답이 없습니다.")
+
+    if limiter is not None:
+        acquire(limiter)
+    started = time.perf_counter()
+    try:
+        response, hedged = _hedged_call(policy, request, limiter)
+    except Exception:
+        policy.record_failure()
+        # 이번 실패로 브레이커가 열렸다면 바로 마지막 정상 응답으로 대체
+        stale = _stale(policy, cache_key) if policy.opened_at is not None else None
+        if stale is not None:
+            return stale
+        raise
+
+    result = FetchResult(response, hedged=hedged, elapsed=time.perf_counter() - started)
+    policy.record_success(result, cache_key)
+    return result
@@ -0,0 +1,141 @@
+"""
+지난 데이터 정리(retention) 엔진
+
+테이블 전체에 `delete().lt(...)` 한 번을 보내면 삭제된 모든 행이 응답으로 돌아오고(return=representation),
+하루치 분 단위 스냅샷을 지우는 동안 테이블 잠금이 오래 유지됩니다. 여기서는
+    - 가장 오래된 행부터 시간 구간(청크) 단위로 나누어 삭제하고,
+    - 삭제 응답은 건수만 받으며 (count=exact, returning=minimal),
+    - 청크 소요 시간에 맞춰 구간 크기를 조절하고, 시간 예산을 넘으면 중단(다음 실행에서 이어서 정리)하며,
+    - 수집 루프를 막지 않도록 백그라운드 스레드로 실행할 수 있습니다.
+
+환경 변수:
+    RETENTION_CHUNK_MINUTES   : 첫 청크의 시간 구간 (기본 60분, 날짜 컬럼은 최소 1일)
+    RETENTION_CHUNK_SECONDS   : 청크 1회 삭제의 목표 소요 시간 (기본 2초, 이를 기준으로 구간을 늘리거나 줄임)
+    RETENTION_TIME_BUDGET     : 테이블 묶음 정리의 시간 예산(초, 기본 300, 0이면 무제한)
+"""
+import os
+import re
+import time
+import threading
+from datetime import datetime, date, timedelta
+
+try:
+    from toss_crawling.supabase_client import get_supabase
+except ImportError:
+    from supabase_client import get_supabase
+
+CHUNK_MINUTES = float(os.getenv("RETENTION_CHUNK_MINUTES", "60"))
+CHUNK_TARGET_SECONDS = float(os.getenv("RETENTION_CHUNK_SECONDS", "2"))
+TIME_BUDGET_SECONDS = float(os.getenv("RETENTION_TIME_BUDGET", "300"))
+
+MIN_CHUNK = timedelta(minutes=1)
+MAX_CHUNK = timedelta(days=7)
+
+# PostgREST는 소수 초의 끝자리 0을 잘라서 돌려줌 (예: .1234) -> Python 3.10 fromisoformat은 3/6자리만 허용
+_FRACTION = re.compile(r"\.(\d+)")
+
+
+def _parse_bound(value):
+    """타임스탬프/날짜 문자열(또는 datetime/date)을 (datetime, 날짜 컬럼 여부)로 변환합니다."""
+    if isinstance(value, datetime):
+        return value, False
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day), True
+    text = str(value)
+    if len(text) == 10:
+        return datetime.strptime(text, "%Y-%m-%d"), True
+    text = _FRACTION.sub(lambda m: "." + m.group(1)[:6].ljust(6, "0"), text.replace("Z", "+00:00"), count=1)
+    return datetime.fromisoformat(text), False
+
+
+def _format_bound(value, is_date):
+    return value.date().isoformat() if is_date else value.isoformat()
+
+
+def purge_before(table, column, threshold, chunk=None, deadline=None, label=None):
+    """
+    table에서 column < threshold 인 행을 오래된 것부터 시간 구간 단위로 삭제합니다.
+    (삭제 건수와 완료 여부를 반환, deadline(time.monotonic 기준)을 넘기면 남은 행을 두고 중단)
+    """
+    label = label or table
+    threshold_dt, is_date = _parse_bound(threshold)
+    threshold_str = _format_bound(threshold_dt, is_date)
+    min_chunk = timedelta(days=1) if is_date else MIN_CHUNK
+    step = max(chunk or timedelta(minutes=CHUNK_MINUTES), min_chunk)
+    client = get_supabase()
+
+    deleted = 0
+    chunks = 0
+    started = time.perf_counter()
+    while True:
+        if deadline is not None and time.monotonic() >= deadline:
+            print(f"⏸️ [{label}] 시간 예산 소진: {deleted}건 삭제 후 중단 (남은 데이터는 다음 실행에서 정리)")
+            return deleted, False
+
+        # 남아 있는 가장 오래된 행의 시각 (없으면 정리 완료)
+        res = client.table(table).select(column).lt(column, threshold_str).order(column).limit(1).execute()
+        if not res.data:
+            break
+
+        lower, _ = _parse_bound(res.data[0][column])
+        if lower.tzinfo is None and threshold_dt.tzinfo is not None:
+            lower = lower.replace(tzinfo=threshold_dt.tzinfo)
+        upper = min(lower + step, threshold_dt)
+
+        chunk_started = time.perf_counter()
+        res = client.table(table) \
+            .delete(count="exact", returning="minimal") \
+            .gte(column, _format_bound(lower, is_date)) \
+            .lt(column, _format_bound(upper, is_date)) \
+            .execute()
+        elapsed = time.perf_counter() - chunk_started
+        deleted += res.count or 0
+        chunks += 1
+        if res.count == 0:
+            # 가장 오래된 행이 구간에 들어가지 않으면(시간대/형식 차이) 같은 구간을 계속 반복하게 되므로 중단
+            print(f"⚠️ [{label}] 가장 오래된 행({_format_bound(lower, is_date)})이 삭제되지 않아 정리를 중단합니다.")
+            break
+
+        # 목표 소요 시간보다 빠르면 구간을 넓히고, 느리면 좁혀서 청크당 잠금 시간을 일정하게 유지
+        if elapsed < CHUNK_TARGET_SECONDS / 2:
+            step = min(step * 2, MAX_CHUNK)
+        elif elapsed > CHUNK_TARGET_SECONDS:
+            step = max(step / 2, min_chunk)
+
+    if deleted:
+        print(f"🧹 [{label}] 지난 데이터 {deleted}건 삭제 (청크 {chunks}회, {time.perf_counter() - started:.1f}s)")
+    return deleted, True
+
+
+def purge_tables(targets, threshold, time_budget=None, label=""):
+    """
+    (테이블, 컬럼) 목록을 순서대로 정리합니다. 테이블별 오류는 출력 후 다음 테이블로 진행합니다.
+    time_budget(초)은 목록 전체에 적용되며, None이면 RETENTION_TIME_BUDGET을 사용합니다. (0이면 무제한)
+    """
+    budget = TIME_BUDGET_SECONDS if time_budget is None else time_budget
+    deadline = time.monotonic() + budget if budget > 0 else None
+
+    total = 0
+    for table, column in targets:
+        try:
+            deleted, finished = purge_before(table, column, threshold, deadline=deadline,
+                                             label=f"{label} {table}".strip())
+            total += deleted
+            if not finished:
+                break
+        except Exception as e:
+            print(f"🚨 [{label} {table}] 지난 데이터 삭제 오류: {e}")
+    return total
+
+
+def start_background_purge(targets, threshold, time_budget=None, label=""):
+    """purge_tables를 데몬 스레드에서 실행하고 스레드를 반환합니다. (수집 턴을 막지 않음)"""
+    thread = threading.Thread(
+        target=purge_tables,
+        args=(targets, threshold),
+        kwargs={"time_budget": time_budget, "label": label},
+        name=f"retention-{label or 'purge'}",
+        daemon=True,
+    )
+    thread.start()
+    return thread
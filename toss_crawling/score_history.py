@@ -0,0 +1,342 @@
+"""
+장중 YG Score 이력 (프로세스 내 링 버퍼)
+
+턴마다 계산된 ETF별 점수(합계/외국인/기관)를 링 버퍼에 쌓아 두고, 창(5/15/30분)별 누적합을 턴마다 갱신하여
+    - 창 안에서의 점수 변화량(delta), 이동평균(ma)
+    - 창별 상위 N개 상승/하락 종목(top movers)
+을 DB의 하루치 이력을 다시 조회하지 않고 턴당 ETF 수에 비례하는 비용(종목당 상수 시간)으로 계산합니다.
+
+창에는 나이가 (창 길이 + WINDOW_SLACK_SECONDS) 이하인 턴이 포함됩니다. (턴 간격이 정확히 60초가 아니어도
+'5분 전' 턴이 창에서 빠지지 않도록 여유를 둠) 변화량은 창 안의 가장 오래된 턴 대비 현재 값이며, 창 안 표본이 2개
+미만이면 None 입니다. 이력은 프로세스 안에서만 유지되며, 오후 세션은 오전 세션의 체크포인트(checkpoint.py)가
+있으면 이어서 쌓고 없으면 비어 있는 상태에서 다시 쌓습니다.
+
+환경 변수:
+    SCORE_HISTORY_WINDOWS   : 창 길이(분) 목록 (기본 "5,15,30")
+    SCORE_HISTORY_CAPACITY  : 링 버퍼 크기(턴 수, 기본 512 - 가장 긴 창보다 커야 함)
+    SCORE_MOMENTUM_PERSIST  : 1이면 모멘텀 컬럼을 toss_yg_score_etf 에 점수와 함께 저장
+                              (score_delta_{w}m, score_ma_{w}m, foreign_delta_{w}m, institution_delta_{w}m 컬럼 필요,
+                               기본 창의 스키마 변경은 sql/score_momentum.sql)
+
+모멘텀 저장은 점수 저장과 같은 충돌 키(etf_code, updated_at - save_score_to_supabase의 기존 upsert 키)로 행 전체를 upsert 합니다.
+처음 저장하기 전에 테이블에 모멘텀 컬럼이 있는지 한 번 조회해 보고, 없으면 경고 후 이 프로세스에서는 저장을 끕니다.
+(점수 저장이 모멘텀 컬럼 때문에 실패하지 않도록) 저장 중 오류는 🚨 로그와 momentum_persist_errors 카운터로 드러내고,
+모멘텀이 붙은 레코드는 그대로 반환하여 발행(score_push)은 계속됩니다.
+"""
+import os
+from datetime import datetime
+
+import numpy as np
+
+WINDOW_MINUTES = tuple(int(w) for w in os.getenv("SCORE_HISTORY_WINDOWS", "5,15,30").split(",") if w.strip())
+CAPACITY = int(os.getenv("SCORE_HISTORY_CAPACITY", "512"))
+PERSIST_MOMENTUM = os.getenv("SCORE_MOMENTUM_PERSIST", "").strip().lower() in ("1", "true", "yes")
+WINDOW_SLACK_SECONDS = 30
+TOP_MOVERS = 5
+MOMENTUM_CONFLICT_KEY = "etf_code, updated_at"
+
+# 이력으로 쌓는 점수 필드와 모멘텀 컬럼 접두어
+SCORE_FIELDS = {
+    "total_score": "score",
+    "foreign_score": "foreign",
+    "institution_score": "institution",
+}
+
+
+def _to_epoch(timestamp):
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    return datetime.fromisoformat(str(timestamp).replace("Z", "+00:00")).timestamp()
+
+
+def _nullable(value):
+    return None if value is None or np.isnan(value) else round(float(value), 4)
+
+
+class ScoreHistory:
+    """
+    ETF별 점수 이력 링 버퍼. 행은 턴, 열은 ETF이며 처음 보는 ETF가 나오면 열을 늘립니다.
+    창마다 (시작 턴 번호, 필드별 합계/표본 수)를 유지하여 턴이 추가될 때 창에서 빠지는 턴만 빼 줍니다.
+    """
+
+    def __init__(self, windows=WINDOW_MINUTES, capacity=CAPACITY, fields=tuple(SCORE_FIELDS), key="etf_code"):
+        if max(windows) + 1 >= capacity:
+            raise ValueError(f"SCORE_HISTORY_CAPACITY({capacity})가 가장 긴 창({max(windows)}분)을 담기에 부족합니다.")
+        self.windows = tuple(sorted(windows))
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self.key = key
+        self.reset()
+
+    def reset(self):
+        self.codes = []
+        self.index = {}
+        self.times = np.full(self.capacity, np.nan)
+        self.values = {field: np.full((self.capacity, 0), np.nan) for field in self.fields}
+        self.turns = 0      # 지금까지 쌓인 턴 수 (다음 턴 번호, 슬롯은 turns % capacity)
+        self.state = {
+            w: {"start": 0,
+                "sum": {field: np.zeros(0) for field in self.fields},
+                "count": {field: np.zeros(0, dtype=np.int64) for field in self.fields}}
+            for w in self.windows
+        }
+
+    def _ensure_columns(self, codes):
+        new_codes = [code for code in codes if code not in self.index]
+        if not new_codes:
+            return
+        for code in new_codes:
+            self.index[code] = len(self.codes)
+            self.codes.append(code)
+        extra = len(new_codes)
+        for field in self.fields:
+            self.values[field] = np.hstack([self.values[field], np.full((self.capacity, extra), np.nan)])
+            for state in self.state.values():
+                state["sum"][field] = np.concatenate([state["sum"][field], np.zeros(extra)])
+                state["count"][field] = np.concatenate([state["count"][field], np.zeros(extra, dtype=np.int64)])
+
+    def _add(self, state, slot, sign):
+        for field in self.fields:
+            row = self.values[field][slot]
+            present = ~np.isnan(row)
+            state["sum"][field] += sign * np.where(present, row, 0.0)
+            state["count"][field] += sign * present
+
+    def push(self, timestamp, records):
+        """
+        한 턴의 점수 레코드(etf_code, total_score, ...)를 추가합니다. 이번 턴에 없는 ETF는 NaN으로 기록합니다.
+        직전 턴보다 이르거나 같은 시각이면 무시합니다. (추가 여부 반환)
+        """
+        now = _to_epoch(timestamp)
+        if self.turns and now <= self.times[(self.turns - 1) % self.capacity]:
+            return False
+
+        self._ensure_columns([str(record[self.key]) for record in records])
+        slot = self.turns % self.capacity
+
+        # 덮어쓸 슬롯이 아직 어떤 창 안에 있다면 먼저 창에서 뺌 (버퍼가 창보다 짧아진 경우의 안전장치)
+        for state in self.state.values():
+            if state["start"] <= self.turns - self.capacity:
+                self._add(state, state["start"] % self.capacity, -1)
+                state["start"] += 1
+
+        self.times[slot] = now
+        for field in self.fields:
+            row = np.full(len(self.codes), np.nan)
+            for record in records:
+                value = record.get(field)
+                if value is not None:
+                    row[self.index[str(record[self.key])]] = float(value)
+            self.values[field][slot] = row
+
+        for w, state in self.state.items():
+            self._add(state, slot, +1)
+            cutoff = now - w * 60 - WINDOW_SLACK_SECONDS
+            while state["start"] < self.turns and self.times[state["start"] % self.capacity] < cutoff:
+                self._add(state, state["start"] % self.capacity, -1)
+                state["start"] += 1
+
+        self.turns += 1
+        return True
+
+    def delta(self, window, field="total_score"):
+        """창 안의 가장 오래된 턴 대비 최신 턴의 변화량 (ETF 순서는 self.codes, 표본 2개 미만이면 NaN)"""
+        if not self.turns:
+            return np.zeros(0)
+        state = self.state[window]
+        latest = self.values[field][(self.turns - 1) % self.capacity]
+        oldest = self.values[field][state["start"] % self.capacity]
+        return np.where(state["count"][field] >= 2, latest - oldest, np.nan)
+
+    def moving_average(self, window, field="total_score"):
+        """창 안 턴들의 평균 (해당 ETF 값이 있는 턴만 평균, 없으면 NaN)"""
+        state = self.state[window]
+        count = state["count"][field]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(count > 0, state["sum"][field] / np.maximum(count, 1), np.nan)
+
+    def top_movers(self, window, n=TOP_MOVERS, field="total_score", ascending=False):
+        """창 기준 변화량 상위(ascending=True면 하위) n개 ETF를 [(etf_code, delta), ...]로 반환합니다."""
+        delta = self.delta(window, field)
+        valid = np.flatnonzero(~np.isnan(delta))
+        if not len(valid):
+            return []
+        scores = delta[valid] if ascending else -delta[valid]
+        n = min(n, len(valid))
+        order = np.argpartition(scores, n - 1)[:n]
+        order = order[np.argsort(scores[order], kind="stable")]
+        return [(self.codes[i], float(delta[i])) for i in valid[order]]
+
+    def export_state(self):
+        """체크포인트에 넣을 상태 (일반 데이터와 numpy 배열)"""
+        return {
+            "windows": list(self.windows),
+            "capacity": self.capacity,
+            "fields": list(self.fields),
+            "key": self.key,
+            "codes": list(self.codes),
+            "times": self.times,
+            "values": dict(self.values),
+            "turns": self.turns,
+            "state": {str(w): state for w, state in self.state.items()},
+        }
+
+    @classmethod
+    def from_state(cls, saved):
+        """export_state 결과로 이력을 만듭니다."""
+        history = cls(tuple(saved["windows"]), saved["capacity"], tuple(saved["fields"]), saved["key"])
+        history.codes = list(saved["codes"])
+        history.index = {code: i for i, code in enumerate(history.codes)}
+        history.times = saved["times"]
+        history.values = dict(saved["values"])
+        history.turns = int(saved["turns"])
+        history.state = {int(w): state for w, state in saved["state"].items()}
+        return history
+
+    def momentum(self):
+        """ETF별 모멘텀 컬럼 {etf_code: {"score_delta_5m": ..., "score_ma_5m": ..., ...}}"""
+        columns = {}
+        for w in self.windows:
+            for field, prefix in SCORE_FIELDS.items():
+                if field not in self.fields:
+                    continue
+                columns[f"{prefix}_delta_{w}m"] = self.delta(w, field)
+                if prefix == "score":
+                    columns[f"{prefix}_ma_{w}m"] = self.moving_average(w, field)
+        return {
+            code: {name: _nullable(values[i]) for name, values in columns.items()}
+            for i, code in enumerate(self.codes)
+        }
+
+
+def momentum_columns(windows=WINDOW_MINUTES):
+    """저장 대상 모멘텀 컬럼 이름 목록 (ScoreHistory.momentum과 같은 순서)"""
+    columns = []
+    for w in sorted(windows):
+        for prefix in SCORE_FIELDS.values():
+            columns.append(f"{prefix}_delta_{w}m")
+            if prefix == "score":
+                columns.append(f"{prefix}_ma_{w}m")
+    return columns
+
+
+_history = None
+_persist_checked = {}   # table -> 모멘텀 컬럼 확인 결과
+
+
+def momentum_persist_enabled(table="toss_yg_score_etf"):
+    """
+    SCORE_MOMENTUM_PERSIST가 켜져 있고 table에 모멘텀 컬럼이 모두 있으면 True를 반환합니다.
+    (테이블별로 처음 한 번만 조회, 컬럼이 없으면 적용할 스키마 파일과 함께 경고)
+    """
+    if not PERSIST_MOMENTUM:
+        return False
+    if table not in _persist_checked:
+        try:
+            from toss_crawling.supabase_client import get_supabase
+        except ImportError:
+            from supabase_client import get_supabase
+        try:
+            get_supabase().table(table).select(", ".join(momentum_columns())).limit(1).execute()
+            _persist_checked[table] = True
+        except Exception as e:
+            print(f"🚨 [ScoreHistory] {table}에 모멘텀 컬럼이 없어 SCORE_MOMENTUM_PERSIST를 끕니다. "
+                  f"sql/score_momentum.sql을 적용하세요: {e}")
+            _persist_checked[table] = False
+    return _persist_checked[table]
+
+
+def get_score_history():
+    """프로세스 공용 ScoreHistory를 반환합니다. (처음 호출 시 생성)"""
+    global _history
+    if _history is None:
+        _history = ScoreHistory()
+    return _history
+
+
+def restore_score_history(saved):
+    """
+    체크포인트에서 읽은 이력 상태(ScoreHistory.export_state)를 프로세스 공용 이력으로 사용합니다.
+    창/버퍼 크기/필드 설정이 현재와 다르면 복원하지 않고 False를 반환합니다.
+    """
+    global _history
+    if not isinstance(saved, dict) or (tuple(saved.get("windows", ())), saved.get("capacity"), tuple(saved.get("fields", ()))) != (
+        tuple(sorted(WINDOW_MINUTES)), CAPACITY, tuple(SCORE_FIELDS)
+    ):
+        return False
+    try:
+        history = ScoreHistory.from_state(saved)
+    except (KeyError, TypeError, ValueError) as e:
+        print(f"⚠️ [ScoreHistory] 이전 세션 이력을 복원하지 못했습니다: {e}")
+        return False
+    _history = history
+    print(f"♻️ [ScoreHistory] 이전 세션 이력 {min(history.turns, history.capacity)}턴, ETF {len(history.codes)}개 복원")
+    return True
+
+
+def observe_scores(timestamp, records, history=None):
+    """
+    한 턴의 점수를 이력에 추가하고, 각 레코드에 모멘텀 컬럼을 붙인 사본을 반환합니다.
+    창별 상위 상승/하락 종목도 함께 출력합니다.
+    """
+    history = history or get_score_history()
+    if not history.push(timestamp, records):
+        print(f"ℹ️ [ScoreHistory] 이미 반영된 시각입니다: {timestamp}")
+
+    momentum = history.momentum()
+    enriched = [{**record, **momentum.get(str(record[history.key]), {})} for record in records]
+
+    for w in history.windows:
+        gainers = history.top_movers(w)
+        if not gainers:
+            continue
+        losers = history.top_movers(w, ascending=True)
+        print(f"📈 [{w}분] 상승 " + ", ".join(f"{code}({d:+.2f})" for code, d in gainers)
+              + " | 하락 " + ", ".join(f"{code}({d:+.2f})" for code, d in losers))
+    return enriched
+
+
+def record_turn_scores(turn_timestamp, table="toss_yg_score_etf"):
+    """
+    서버에서 계산된 이번 턴 점수(updated_at = turn_timestamp)를 한 번 읽어 ETF 유니버스 안의 ETF만 이력에 반영하고,
+    SCORE_MOMENTUM_PERSIST가 켜져 있으면 모멘텀 컬럼을 같은 행에 저장합니다.
+    (모멘텀이 붙은 레코드 반환, 점수 조회/이력 반영 실패 시 빈 목록, 모멘텀 저장 실패는 로그만 남기고 레코드 반환)
+    """
+    try:
+        from toss_crawling.supabase_client import get_supabase, iter_table_pages
+        from toss_crawling.etf_universe import get_universe_codes
+        from toss_crawling import metrics
+    except ImportError:
+        from supabase_client import get_supabase, iter_table_pages
+        from etf_universe import get_universe_codes
+        import metrics
+
+    try:
+        records = []
+        for page in iter_table_pages(table, filters=[("eq", "updated_at", turn_timestamp)], order="etf_code"):
+            records.extend(page)
+        # 설정된 ETF 유니버스 밖의 ETF는 이력/발행 대상에서 제외
+        universe_codes = get_universe_codes()
+        if universe_codes is not None:
+            records = [record for record in records if str(record["etf_code"]).zfill(6) in universe_codes]
+        if not records:
+            return []
+        enriched = observe_scores(turn_timestamp, records)
+    except Exception as e:
+        print(f"⚠️ 점수 이력 갱신 실패: {e}")
+        return []
+
+    if momentum_persist_enabled(table):
+        try:
+            batch_size = 1000
+            for i in range(0, len(enriched), batch_size):
+                get_supabase().table(table) \
+                    .upsert(enriched[i:i + batch_size], on_conflict=MOMENTUM_CONFLICT_KEY, returning="minimal") \
+                    .execute()
+            print(f"✅ 모멘텀 컬럼 저장 완료: {len(enriched)}건")
+        except Exception as e:
+            metrics.inc("momentum_persist_errors")
+            print(f"🚨 모멘텀 컬럼 저장 실패 ({table}, on_conflict={MOMENTUM_CONFLICT_KEY}): {e}")
+    return enriched
@@ -0,0 +1,277 @@
+"""
+점수/시세 실시간 푸시 서비스 (Server-Sent Events)
+
+대시보드가 toss_yg_score_etf, naver_realtime_etf 등을 몇 초마다 조회하는 대신, 수집기가 턴마다 한 번 결과를 발행(publish)하면
+이 서비스가 직전 값과 달라진 항목만 구독 중인 클라이언트에 전달합니다.
+    - GET  /events?channels=toss_etf,naver_etf : SSE 구독. 접속 직후 채널별 전체 스냅샷(event: snapshot), 이후 변경분(event: update)
+    - POST /publish                            : 수집기 -> 서비스 발행. {"channel", "key", "records"} (PUSH_TOKEN 설정 시 X-Push-Token 필요)
+    - GET  /health                             : 채널별 항목 수와 접속 클라이언트 수
+
+클라이언트별로 크기가 제한된 큐를 두며, 느린 클라이언트의 큐가 가득 차면 밀린 변경분을 버리고 최신 스냅샷을 다시 보냅니다.
+(다른 클라이언트나 발행 쪽은 느린 클라이언트 때문에 기다리지 않음)
+
+실행:
+    PUSH_TOKEN=... python toss_crawling/score_push.py --port 8765
+수집기 쪽 설정:
+    PUSH_URL=http://<host>:8765  PUSH_TOKEN=...   (PUSH_URL이 없으면 발행하지 않음)
+"""
+import os
+import json
+import queue
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+PUSH_URL = os.getenv("PUSH_URL", "").strip().rstrip("/")
+PUSH_TOKEN = os.getenv("PUSH_TOKEN", "").strip()
+PUSH_TIMEOUT = float(os.getenv("PUSH_TIMEOUT", "2"))
+CLIENT_QUEUE_SIZE = int(os.getenv("PUSH_CLIENT_QUEUE", "64"))
+HEARTBEAT_SECONDS = 15
+
+# 변경 여부 비교에서 제외할 필드 (턴마다 바뀌는 시각 값)
+VOLATILE_FIELDS = ("updated_at", "collected_at")
+
+
+class ScoreHub:
+    """채널별 최신 스냅샷과 구독 클라이언트 큐를 관리합니다. (스레드 안전)"""
+
+    def __init__(self, client_queue_size=CLIENT_QUEUE_SIZE):
+        self.lock = threading.Lock()
+        self.snapshots = {}     # channel -> {key: record}
+        self.seq = {}           # channel -> 발행 번호
+        self.clients = set()
+        self.client_queue_size = client_queue_size
+
+    def publish(self, channel, records, key="etf_code"):
+        """records를 채널 스냅샷에 반영하고, 바뀐 항목만 모아 구독자에게 보냅니다. (변경 건수 반환)"""
+        with self.lock:
+            snapshot = self.snapshots.setdefault(channel, {})
+            changed = []
+            for record in records:
+                record_key = str(record.get(key))
+                previous = snapshot.get(record_key)
+                if previous is None or _comparable(previous) != _comparable(record):
+                    changed.append(record)
+                snapshot[record_key] = record
+            if not changed:
+                return 0
+
+            self.seq[channel] = self.seq.get(channel, 0) + 1
+            event = ("update", {"channel": channel, "seq": self.seq[channel], "records": changed})
+            for client in list(self.clients):
+                if channel in client.channels:
+                    client.offer(event)
+            return len(changed)
+
+    def snapshot_events(self, channels):
+        with self.lock:
+            return [
+                ("snapshot", {"channel": channel, "seq": self.seq.get(channel, 0),
+                              "records": list(self.snapshots.get(channel, {}).values())})
+                for channel in channels
+            ]
+
+    def subscribe(self, channels):
+        client = _Client(channels, self.client_queue_size)
+        with self.lock:
+            self.clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "channels": {channel: len(records) for channel, records in self.snapshots.items()},
+                "seq": dict(self.seq),
+                "clients": len(self.clients),
+                "resyncs": sum(client.resyncs for client in self.clients),
+            }
+
+
+class _Client:
+    def __init__(self, channels, queue_size):
+        self.channels = set(channels)
+        self.events = queue.Queue(maxsize=queue_size)
+        self.resyncs = 0
+
+    def offer(self, event):
+        """
+        이벤트를 큐에 넣습니다. 가득 차 있으면 밀린 변경분을 모두 버리고 재동기화 표시(resync)만 남겨,
+        전송 스레드가 곧바로 최신 스냅샷을 보내게 합니다. (ScoreHub.lock 안에서만 호출됨)
+        """
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            self.resyncs += 1
+            while True:
+                try:
+                    self.events.get_nowait()
+                except queue.Empty:
+                    break
+            self.events.put_nowait(("resync", None))
+
+
+def _comparable(record):
+    return {k: v for k, v in record.items() if k not in VOLATILE_FIELDS}
+
+
+def _format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n".encode("utf-8")
+
+
+def make_handler(hub, token=PUSH_TOKEN):
+    class PushHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/health":
+                self._send_json(200, hub.stats())
+                return
+            if url.path != "/events":
+                self._send_json(404, {"error": "not found"})
+                return
+
+            channels = [c for c in ",".join(parse_qs(url.query).get("channels", [])).split(",") if c]
+            if not channels:
+                self._send_json(400, {"error": "channels query parameter is required"})
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "keep-alive")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+
+            # 구독을 먼저 등록한 뒤 스냅샷을 보내, 그 사이 발행된 변경분을 놓치지 않음 (중복은 seq로 구분 가능)
+            client = hub.subscribe(channels)
+            try:
+                for event, data in hub.snapshot_events(channels):
+                    self.wfile.write(_format_event(event, data))
+                self.wfile.flush()
+
+                while True:
+                    try:
+                        event, data = client.events.get(timeout=HEARTBEAT_SECONDS)
+                    except queue.Empty:
+                        self.wfile.write(b": keep-alive\n\n")
+                        self.wfile.flush()
+                        continue
+
+                    if event == "resync":
+                        # 큐가 넘쳐 버려진 변경분 대신 현재 스냅샷 전체를 보냄
+                        for event, data in hub.snapshot_events(channels):
+                            self.wfile.write(_format_event(event, data))
+                    else:
+                        self.wfile.write(_format_event(event, data))
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                hub.unsubscribe(client)
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/publish":
+                self._send_json(404, {"error": "not found"})
+                return
+            if token and self.headers.get("X-Push-Token") != token:
+                self._send_json(401, {"error": "invalid token"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", "0"))
+                payload = json.loads(self.rfile.read(length))
+                changed = hub.publish(payload["channel"], payload.get("records", []), payload.get("key", "etf_code"))
+            except (ValueError, KeyError, TypeError) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            self._send_json(200, {"changed": changed})
+
+    return PushHandler
+
+
+def serve(host="0.0.0.0", port=8765, hub=None):
+    """푸시 서비스를 실행합니다. (블로킹)"""
+    hub = hub or ScoreHub()
+    server = ThreadingHTTPServer((host, port), make_handler(hub))
+    server.daemon_threads = True
+    print(f"📡 점수 푸시 서비스 시작: http://{host}:{port} (/events, /publish, /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def publish_scores(channel, records, key="etf_code"):
+    """
+    수집기 -> 푸시 서비스 발행. PUSH_URL이 설정되지 않았으면 아무것도 하지 않습니다.
+    발행 실패는 수집을 막지 않도록 출력만 하고 넘어갑니다. (변경 건수 반환, 실패/미설정 시 None)
+    """
+    if not PUSH_URL or not records:
+        return None
+
+    import requests
+
+    headers = {"Content-Type": "application/json"}
+    if PUSH_TOKEN:
+        headers["X-Push-Token"] = PUSH_TOKEN
+    try:
+        body = json.dumps({"channel": channel, "key": key, "records": records}, ensure_ascii=False, default=str)
+        response = requests.post(f"{PUSH_URL}/publish", data=body.encode("utf-8"), headers=headers, timeout=PUSH_TIMEOUT)
+        response.raise_for_status()
+        changed = response.json().get("changed", 0)
+        print(f"📡 [{channel}] 푸시 발행 완료 (변경 {changed}건 / 전체 {len(records)}건)")
+        return changed
+    except Exception as e:
+        print(f"⚠️ [{channel}] 푸시 발행 실패: {e}")
+        return None
+
+
+def publish_table(channel, table, key="etf_code", filters=()):
+    """
+    점수 계산 RPC 직후 결과 테이블을 한 번 읽어 발행합니다. (폴링하는 클라이언트 대신 턴마다 한 번만 조회)
+    filters는 (연산자, 컬럼, 값) 튜플 목록입니다.
+    """
+    if not PUSH_URL:
+        return None
+    try:
+        try:
+            from toss_crawling.supabase_client import iter_table_pages
+        except ImportError:
+            from supabase_client import iter_table_pages
+        records = []
+        for page in iter_table_pages(table, filters=filters, order=key):
+            records.extend(page)
+    except Exception as e:
+        print(f"⚠️ [{channel}] 푸시용 결과 조회 실패: {e}")
+        return None
+    return publish_scores(channel, records, key=key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="점수/시세 실시간 푸시 서비스 (SSE)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PUSH_PORT", "8765")))
+    args = parser.parse_args()
+    serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+YG Score 하루치 재계산(replay) / 백테스트
+
+하루치 toss_yg_score_stk 스냅샷과 ETF_PDF 구성종목으로 모든 턴의 ETF 점수를 한 번에(행렬 연산) 다시 계산하고,
+저장된 toss_yg_score_etf 값과 비교합니다. 점수 산식을 바꿨을 때 장중 세션을 기다리지 않고 오프라인으로 검증하기 위한 도구입니다.
+
+계산 방식 (턴 T 기준)
+    1. (투자자, 종목, 매매타입)별로 T 시점까지 가장 마지막에 수집된 금액을 사용합니다. (매수 +, 매도 -)
+       aggregate_toss_chunks 와 같은 규칙이며, carry_forward=False 이면 T 턴에 수집된 행만 사용합니다.
+    2. 투자자별 순매수 행렬 N[턴, 종목]을 만들고, 구성비중 행렬 W[종목, ETF](%)와 곱해 점수를 구합니다.
+    3. 종목수는 T 시점에 수급 데이터가 있는 구성종목 수입니다.
+
+기준 산식(reference_formula)
+    외국인 점수 = Σ 구성비중(%) / 100 × 외국인 순매수(억)
+    기관 점수   = Σ 구성비중(%) / 100 × 기관 순매수(억)
+    합계 점수   = 외국인 점수 + 기관 점수
+운영 점수는 서버 함수(calculate_yg_score_server)가 계산하며 그 SQL은 이 저장소에 없습니다. 위 산식은 비교 기준이 되는
+Python 구현이고, 바꾼 산식은 formula 인자로 넘겨 저장값과의 차이를 확인합니다.
+
+입력은 Supabase 또는 로컬 보관 파일(.json / .json.gz / .csv / .csv.gz, 원본 레코드 형식)에서 읽습니다.
+Supabase의 지난 데이터는 매일 아침 정리되므로, 지난 날짜는 보관 파일로 재계산합니다.
+
+사용 예:
+    python toss_crawling/score_replay.py --date 2026-10-19 --out replay.csv
+    python toss_crawling/score_replay.py --snapshots stk_1019.json.gz --pdf etf_pdf.json.gz --stored etf_1019.json.gz
+"""
+import sys
+import gzip
+import json
+import time
+import argparse
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+try:
+    from toss_crawling.supabase_client import iter_table_frames, prepare_toss_chunk, transform_etf_pdf, load_etf_pdf_from_supabase
+except ImportError:
+    from supabase_client import iter_table_frames, prepare_toss_chunk, transform_etf_pdf, load_etf_pdf_from_supabase
+
+KST = timezone(timedelta(hours=9))
+INVESTORS = {"외국인": "foreign_score", "기관": "institution_score"}
+SCORE_COLUMNS = ["total_score", "foreign_score", "institution_score"]
+
+
+def reference_formula(flows, weights):
+    """
+    기준 산식. flows는 {투자자: 순매수 행렬[턴, 종목](억)}, weights는 구성비중 행렬[종목, ETF](%)입니다.
+    {컬럼명: 점수 행렬[턴, ETF]}을 반환합니다.
+    """
+    scores = {column: flows[investor] @ weights / 100 for investor, column in INVESTORS.items()}
+    scores["total_score"] = scores["foreign_score"] + scores["institution_score"]
+    return scores
+
+
+def _read_records(path):
+    """보관 파일(JSON 레코드 목록 또는 CSV, gzip 가능)을 DataFrame으로 읽습니다."""
+    if path.endswith((".csv", ".csv.gz")):
+        return pd.read_csv(path, dtype={"stock_code": str, "etf_code": str, "holdings_code": str})
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("data", [])
+    return pd.DataFrame(data)
+
+
+def _day_bounds(day):
+    start = datetime.strptime(str(day)[:10], "%Y-%m-%d").replace(tzinfo=KST)
+    return start.isoformat(), (start + timedelta(days=1)).isoformat()
+
+
+def load_day_snapshots(day, path=None):
+    """하루치 toss_yg_score_stk 원본을 prepare_toss_chunk 형식(final_amount 포함)으로 읽습니다."""
+    if path:
+        df = _read_records(path)
+        if day:
+            stamps = pd.to_datetime(df["collected_at"], utc=True, format="ISO8601").dt.tz_convert(KST)
+            df = df[stamps.dt.strftime("%Y-%m-%d") == str(day)[:10]]
+        return prepare_toss_chunk(df)
+
+    start, end = _day_bounds(day)
+    filters = [("gte", "collected_at", start), ("lt", "collected_at", end)]
+    chunks = list(iter_table_frames("toss_yg_score_stk", filters=filters, transform=prepare_toss_chunk))
+    return pd.concat(chunks, ignore_index=True) if chunks else None
+
+
+def load_stored_scores(day, path=None):
+    """비교 대상인 저장된 toss_yg_score_etf 점수를 읽습니다."""
+    if path:
+        df = _read_records(path)
+    else:
+        start, end = _day_bounds(day)
+        filters = [("gte", "updated_at", start), ("lt", "updated_at", end)]
+        chunks = list(iter_table_frames("toss_yg_score_etf", filters=filters, order="updated_at"))
+        if not chunks:
+            return None
+        df = pd.concat(chunks, ignore_index=True)
+    df["etf_code"] = df["etf_code"].astype(str).str.zfill(6)
+    return df
+
+
+def replay_day(snapshots, df_pdf, formula=reference_formula, carry_forward=True):
+    """
+    모든 턴의 ETF 점수를 한 번에 계산하여 tidy DataFrame
+    (updated_at, etf_code, etf_name, total_score, foreign_score, institution_score, holdings_count)으로 반환합니다.
+    snapshots는 prepare_toss_chunk 형식, df_pdf는 transform_etf_pdf 형식입니다.
+    """
+    snapshots = snapshots[snapshots["stock_code"].astype(str) != ""]
+    snapshots = snapshots[snapshots["investor"].isin(list(INVESTORS))]
+    if snapshots.empty:
+        return pd.DataFrame(columns=["updated_at", "etf_code", "etf_name"] + SCORE_COLUMNS + ["holdings_count"])
+
+    # 턴 축: 수집 시각 순서 (같은 시각이 다른 문자열로 표기되어도 하나의 턴으로 묶음)
+    stamps = pd.to_datetime(snapshots["collected_at"], utc=True, format="ISO8601").dt.tz_localize(None)
+    turn_stamps, turn_idx = np.unique(stamps.to_numpy(), return_inverse=True)
+    turn_labels = pd.Series(snapshots["collected_at"].to_numpy()).groupby(turn_idx).first().to_numpy()
+
+    # 값 축: (투자자, 종목, 매매타입) -> 턴별 마지막 금액, 이후 턴으로 이어 붙임(carry_forward)
+    stock_codes, stock_idx = np.unique(snapshots["stock_code"].astype(str).to_numpy(), return_inverse=True)
+    investor_idx = pd.Categorical(snapshots["investor"], categories=list(INVESTORS)).codes.astype(np.int64)
+    type_idx = (snapshots["ranking_type"].to_numpy() == "buy").astype(np.int64)
+    key_idx = (investor_idx * len(stock_codes) + stock_idx) * 2 + type_idx
+    n_keys = len(INVESTORS) * len(stock_codes) * 2
+
+    values = np.full((len(turn_stamps), n_keys), np.nan)
+    order = np.argsort(turn_idx, kind="stable")   # 같은 턴에 같은 키가 여러 번 있으면 마지막 행이 남음
+    values[turn_idx[order], key_idx[order]] = snapshots["final_amount"].to_numpy(dtype=np.float64)[order]
+    if carry_forward:
+        filled = np.where(np.isnan(values), 0, np.arange(len(turn_stamps))[:, None])
+        np.maximum.accumulate(filled, axis=0, out=filled)
+        values = values[filled, np.arange(n_keys)]
+
+    present = ~np.isnan(values)
+    values = np.nan_to_num(values).reshape(len(turn_stamps), len(INVESTORS), len(stock_codes), 2).sum(axis=3)
+    has_flow = present.reshape(len(turn_stamps), len(INVESTORS), len(stock_codes), 2).any(axis=(1, 3))
+    flows = {investor: values[:, i, :] for i, investor in enumerate(INVESTORS)}
+
+    # 구성비중 행렬 W[종목, ETF] (수급 데이터에 나온 종목만)
+    etf_codes, etf_idx = np.unique(df_pdf["ETF종목코드"].astype(str).to_numpy(), return_inverse=True)
+    holding_codes = df_pdf["구성종목코드"].astype(str).to_numpy()
+    row = np.searchsorted(stock_codes, holding_codes)
+    matched = (row < len(stock_codes)) & (stock_codes[np.minimum(row, len(stock_codes) - 1)] == holding_codes)
+    weights = np.zeros((len(stock_codes), len(etf_codes)))
+    np.add.at(weights, (row[matched], etf_idx[matched]), df_pdf["구성비중(%)"].to_numpy(dtype=np.float64)[matched])
+
+    scores = formula(flows, weights)
+    holdings_count = has_flow.astype(np.float64) @ (weights > 0)
+
+    turns, etfs = np.nonzero(holdings_count > 0)
+    names = df_pdf.drop_duplicates("ETF종목코드").set_index("ETF종목코드")["ETF종목명"] \
+        if "ETF종목명" in df_pdf.columns else pd.Series(dtype=str)
+    result = pd.DataFrame({
+        "updated_at": turn_labels[turns],
+        "etf_code": etf_codes[etfs],
+        "etf_name": names.reindex(etf_codes).fillna("").to_numpy()[etfs],
+    })
+    for column in SCORE_COLUMNS:
+        result[column] = np.round(scores[column][turns, etfs], 4)
+    result["holdings_count"] = holdings_count[turns, etfs].astype(np.int64)
+    return result
+
+
+def compare_with_stored(replayed, stored):
+    """
+    재계산 결과와 저장값을 (etf_code, updated_at)으로 맞춰 비교합니다.
+    (비교 DataFrame, 요약 dict) 반환. 요약에는 일치/한쪽에만 있는 행 수와 점수 컬럼별 최대·평균 절대 오차, 상관계수가 들어 있습니다.
+    """
+    def keyed(df):
+        df = df.copy()
+        df["turn"] = pd.to_datetime(df["updated_at"], utc=True, format="ISO8601")
+        return df[["turn", "etf_code"] + [c for c in SCORE_COLUMNS if c in df.columns]]
+
+    merged = keyed(replayed).merge(keyed(stored), on=["turn", "etf_code"], how="outer",
+                                   suffixes=("_replay", "_stored"), indicator=True)
+    both = merged["_merge"] == "both"
+    summary = {
+        "turns": int(merged["turn"].nunique()),
+        "matched": int(both.sum()),
+        "replay_only": int((merged["_merge"] == "left_only").sum()),
+        "stored_only": int((merged["_merge"] == "right_only").sum()),
+    }
+    for column in SCORE_COLUMNS:
+        if f"{column}_stored" not in merged.columns:
+            continue
+        diff = merged[f"{column}_replay"] - merged[f"{column}_stored"]
+        merged[f"{column}_diff"] = diff
+        matched = diff[both]
+        summary[column] = {
+            "max_abs_diff": float(matched.abs().max()) if len(matched) else None,
+            "mean_abs_diff": float(matched.abs().mean()) if len(matched) else None,
+            "corr": float(merged.loc[both, f"{column}_replay"].corr(merged.loc[both, f"{column}_stored"])) if both.sum() > 1 else None,
+        }
+    return merged.drop(columns=["_merge"]).sort_values(["turn", "etf_code"], ignore_index=True), summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="YG Score 하루치 재계산 및 저장값 비교")
+    parser.add_argument("--date", default=datetime.now(KST).strftime("%Y-%m-%d"), help="재계산할 날짜 (KST, 기본 오늘)")
+    parser.add_argument("--snapshots", help="toss_yg_score_stk 보관 파일 (없으면 Supabase)")
+    parser.add_argument("--pdf", help="ETF_PDF 보관 파일 (없으면 Supabase)")
+    parser.add_argument("--stored", help="toss_yg_score_etf 보관 파일 (없으면 Supabase)")
+    parser.add_argument("--no-compare", action="store_true", help="저장값 비교 생략")
+    parser.add_argument("--latest-only", action="store_true", help="이전 턴 값을 이어 쓰지 않고 해당 턴 수집분만 사용")
+    parser.add_argument("--out", help="재계산 결과 CSV 경로")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    snapshots = load_day_snapshots(args.date, args.snapshots)
+    if snapshots is None or snapshots.empty:
+        print(f"🚨 [{args.date}] 재계산할 toss_yg_score_stk 데이터가 없습니다.")
+        sys.exit(1)
+    df_pdf = transform_etf_pdf(_read_records(args.pdf).to_dict("records")) if args.pdf else load_etf_pdf_from_supabase()
+    if df_pdf is None or df_pdf.empty:
+        print("🚨 ETF PDF 데이터가 없습니다.")
+        sys.exit(1)
+    loaded = time.perf_counter()
+
+    replayed = replay_day(snapshots, df_pdf, carry_forward=not args.latest_only)
+    print(f"✅ [{args.date}] 재계산 완료: 턴 {replayed['updated_at'].nunique()}개, {len(replayed)}행 "
+          f"(로드 {loaded - started:.1f}s, 계산 {time.perf_counter() - loaded:.2f}s)")
+    if args.out:
+        replayed.to_csv(args.out, index=False)
+        print(f"💾 {args.out} 저장")
+
+    if args.no_compare:
+        return
+    stored = load_stored_scores(args.date, args.stored)
+    if stored is None or stored.empty:
+        print(f"ℹ️ [{args.date}] 비교할 toss_yg_score_etf 저장값이 없습니다.")
+        return
+    _, summary = compare_with_stored(replayed, stored)
+    print(f"📊 비교: 일치 {summary['matched']}행, 재계산에만 {summary['replay_only']}행, 저장값에만 {summary['stored_only']}행")
+    for column in SCORE_COLUMNS:
+        stats = summary.get(column)
+        if stats and stats["max_abs_diff"] is not None:
+            corr = f"{stats['corr']:.4f}" if stats["corr"] is not None else "-"
+            print(f"   {column:<18} 최대 오차 {stats['max_abs_diff']:.4f} | 평균 오차 {stats['mean_abs_diff']:.4f} | 상관 {corr}")
+
+
+if __name__ == "__main__":
+    main()
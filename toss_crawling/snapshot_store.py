@@ -0,0 +1,361 @@
+"""
+수집기 간 최신 스냅샷 공유 저장소 (공유 메모리 mmap + seqlock)
+
+토스 수급, 네이버 실시간 시세, ETF 시세는 지금까지 Supabase를 거쳐서만 다른 프로세스와 주고받을 수 있어서,
+'종목 X의 최신 가격 + 최신 수급'이 필요하면 DB를 조회해야 했습니다. 같은 호스트에서 실행되는 수집기들이
+턴마다 최신 값을 이 저장소에 발행하면, 읽는 쪽은 네트워크 왕복 없이 마이크로초 단위로 소스 간 조인을 할 수 있습니다.
+
+구조 (파일 하나를 mmap, 고정 레이아웃):
+    - 헤더: 매직/레이아웃 해시, 용량, 등록된 코드 수
+    - 코드 사전: 종목/ETF 코드 -> 정수 인덱스 (추가만 함, 모든 소스가 같은 인덱스를 사용)
+    - 소스별(SOURCES) 필드 배열(float64, 필드 x 용량)과 행별 updated_at(epoch 초, 한 번도 발행되지 않은 행은 NaN)
+    - 소스별 seqlock 버전: 쓰는 동안 홀수, 다 쓰면 짝수. 읽는 쪽은 읽기 전후 버전이 같고 짝수일 때만 결과를 사용합니다.
+쓰기는 프로세스 간 파일 잠금(fcntl)으로 한 번에 하나씩만 하고, 읽기는 잠금 없이 mmap 배열을 그대로(zero-copy) 봅니다.
+발행은 키(코드)별 upsert이며, 레코드에 없는 필드(None)는 이전 값을 유지합니다. (updated_at은 행 단위 마지막 발행 시각)
+턴마다 소스 전체를 다시 발행하는 수집기는 full_turn으로 발행하여, 이번 턴에 없는 필드는 비우고(NaN)
+이번 턴에 빠진 코드는 해당 소스의 행을 지웁니다. (이전 턴 값이 새 updated_at으로 남지 않도록)
+
+환경 변수:
+    SNAPSHOT_STORE          : 1이면 수집기가 턴 결과를 저장소에 발행 (기본 0)
+    SNAPSHOT_STORE_PATH     : 저장소 파일 경로 (기본 /dev/shm/toss_snapshot_store, /dev/shm이 없으면 임시 디렉토리)
+    SNAPSHOT_STORE_CAPACITY : 코드 사전 크기 (기본 8192, 바꾸면 기존 파일과 레이아웃이 달라져 새 경로가 필요)
+
+사용 예:
+    python toss_crawling/snapshot_store.py 005930 069500
+"""
+import os
+import sys
+import math
+import time
+import zlib
+import mmap
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+
+KST = timezone(timedelta(hours=9))
+
+SNAPSHOT_STORE_ENABLED = os.getenv("SNAPSHOT_STORE", "0").strip() in ("1", "true", "yes")
+SNAPSHOT_STORE_PATH = os.getenv("SNAPSHOT_STORE_PATH", "").strip() or os.path.join(
+    "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "toss_snapshot_store"
+)
+SNAPSHOT_STORE_CAPACITY = int(os.getenv("SNAPSHOT_STORE_CAPACITY", "8192"))
+
+# 소스별 필드 (레코드 키 이름 그대로 사용)
+SOURCES = {
+    "quote": ("close_pric", "pre", "flu_rt", "trde_qty"),                                           # naver_realtime
+    "etf": ("current_price", "change_rate", "nav", "volume", "trading_value", "market_cap"),        # naver_etf_price
+    "flow": ("foreign", "institution"),                                                             # toss_yg_score_stk (순매수 금액, 매도는 음수)
+}
+
+MAGIC = b"TSNAPST1"
+CODE_BYTES = 12            # 코드 사전 항목 크기 (바이트, ASCII)
+HEADER_BYTES = 64
+SOURCE_HEADER_BYTES = 32
+READ_RETRIES = 1000
+
+
+def _layout_hash(capacity, sources):
+    spec = f"{capacity}|" + ";".join(f"{name}:{','.join(fields)}" for name, fields in sources.items())
+    return zlib.crc32(spec.encode("utf-8"))
+
+
+def _to_epoch(timestamp):
+    if timestamp is None:
+        return time.time()
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    return datetime.fromisoformat(str(timestamp).replace("Z", "+00:00")).timestamp()
+
+
+class SnapshotStore:
+    """mmap 파일 위의 고정 레이아웃 스냅샷 저장소. 같은 경로를 여는 모든 프로세스가 같은 메모리를 봅니다."""
+
+    def __init__(self, path=SNAPSHOT_STORE_PATH, capacity=SNAPSHOT_STORE_CAPACITY, sources=None):
+        import numpy as np
+
+        self.path = path
+        self.capacity = capacity
+        self.sources = dict(sources or SOURCES)
+        self.lock = threading.Lock()
+        self.codes = {}         # 이 프로세스가 알고 있는 코드 -> 인덱스 (공유 사전의 앞부분 복사본)
+
+        self._offsets = {}
+        offset = HEADER_BYTES + SOURCE_HEADER_BYTES * len(self.sources)
+        self._codes_offset = offset
+        offset += CODE_BYTES * capacity
+        offset += -offset % 8
+        for name, fields in self.sources.items():
+            self._offsets[name] = offset
+            offset += 8 * capacity * (len(fields) + 1)
+        self.size = offset
+
+        self._file = open(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), "r+b")
+        self._init_file()
+        self._mm = mmap.mmap(self._file.fileno(), self.size)
+
+        self._header = np.frombuffer(self._mm, dtype=np.uint64, count=HEADER_BYTES // 8)
+        self._source_headers = {
+            name: np.frombuffer(self._mm, dtype=np.float64, count=SOURCE_HEADER_BYTES // 8,
+                                offset=HEADER_BYTES + SOURCE_HEADER_BYTES * i)
+            for i, name in enumerate(self.sources)
+        }
+        self._versions = {
+            name: np.frombuffer(self._mm, dtype=np.uint64, count=1, offset=HEADER_BYTES + SOURCE_HEADER_BYTES * i)
+            for i, name in enumerate(self.sources)
+        }
+        self._code_array = np.frombuffer(self._mm, dtype=f"S{CODE_BYTES}", count=capacity, offset=self._codes_offset)
+        self._arrays = {
+            name: np.frombuffer(self._mm, dtype=np.float64, count=capacity * (len(fields) + 1),
+                                offset=self._offsets[name]).reshape(len(fields) + 1, capacity)
+            for name, fields in self.sources.items()
+        }
+
+    # --- 파일 잠금 (프로세스 간 쓰기 직렬화) ---
+
+    def _flock(self, exclusive=True):
+        try:
+            import fcntl
+        except ImportError:
+            return
+        fcntl.flock(self._file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_UN)
+
+    def _init_file(self):
+        """파일이 비어 있으면 레이아웃을 만들고, 이미 있으면 레이아웃이 같은지 확인합니다."""
+        import numpy as np
+
+        layout = _layout_hash(self.capacity, self.sources)
+        with self.lock:
+            self._flock()
+            try:
+                self._file.seek(0, os.SEEK_END)
+                if self._file.tell() == 0:
+                    self._file.truncate(self.size)
+                    header = np.zeros(HEADER_BYTES // 8, dtype=np.uint64)
+                    header[1] = layout
+                    header[2] = self.capacity
+                    self._file.seek(0)
+                    self._file.write(MAGIC + header[1:].tobytes())
+                    self._file.flush()
+                    with mmap.mmap(self._file.fileno(), self.size) as mm:
+                        for name, fields in self.sources.items():
+                            start = self._offsets[name]
+                            nan_block = np.full(self.capacity * (len(fields) + 1), np.nan).tobytes()
+                            mm[start:start + len(nan_block)] = nan_block
+                        mm.flush()
+                    return
+
+                self._file.seek(0)
+                head = self._file.read(HEADER_BYTES)
+                stored_layout = int(np.frombuffer(head, dtype=np.uint64)[1]) if len(head) == HEADER_BYTES else None
+                if head[:8] != MAGIC or stored_layout != layout:
+                    raise ValueError(f"스냅샷 저장소 레이아웃이 다릅니다(용량/소스 변경?). 다른 SNAPSHOT_STORE_PATH를 쓰거나 파일을 지우세요: {self.path}")
+            finally:
+                self._flock(False)
+
+    def close(self):
+        self._header = self._source_headers = self._versions = self._code_array = self._arrays = None
+        self._mm.close()
+        self._file.close()
+
+    # --- 코드 사전 ---
+
+    def _sync_codes(self):
+        """공유 사전에 새로 등록된 코드를 로컬 사전에 반영합니다. (추가만 하므로 등록 수까지는 항상 완성된 항목)"""
+        count = int(self._header[3])
+        known = len(self.codes)
+        if count > known:
+            for i, code in enumerate(self._code_array[known:count].tolist(), start=known):
+                self.codes[code.decode("ascii")] = i
+        return count
+
+    def _register(self, codes):
+        """(쓰기 잠금 안에서) 처음 보는 코드를 공유 사전에 추가하고 인덱스 배열을 반환합니다."""
+        import numpy as np
+
+        self._sync_codes()
+        count = len(self.codes)
+        new_codes = [code for code in dict.fromkeys(codes) if code not in self.codes]
+        if count + len(new_codes) > self.capacity:
+            raise ValueError(f"스냅샷 저장소 코드 사전이 가득 찼습니다. (SNAPSHOT_STORE_CAPACITY={self.capacity})")
+        for code in new_codes:
+            self._code_array[count] = code.encode("ascii")
+            self.codes[code] = count
+            count += 1
+        # 코드를 먼저 쓰고 마지막에 등록 수를 늘려, 읽는 쪽이 반쯤 쓴 코드를 보지 않도록 함
+        self._header[3] = count
+        return np.fromiter((self.codes[code] for code in codes), dtype=np.int64, count=len(codes))
+
+    def index_of(self, code):
+        """코드의 인덱스 (등록되지 않았으면 None)"""
+        if code not in self.codes:
+            self._sync_codes()
+        return self.codes.get(code)
+
+    # --- 쓰기 ---
+
+    def publish(self, source, records, key, timestamp=None, full_turn=False):
+        """
+        records(dict 리스트)를 source에 키별로 upsert합니다. 레코드에 없거나 None인 필드는 이전 값을 유지합니다.
+        full_turn이면 records를 source의 전체 상태로 보고, 없거나 None인 필드는 비우고 records에 없는 코드의 행을 지웁니다.
+        (발행한 행 수 반환)
+        """
+        import numpy as np
+
+        fields = self.sources[source]
+        rows = [record for record in records if record.get(key)]
+        if not rows:
+            return 0
+        codes = [str(record[key]) for record in rows]
+        turn_at = _to_epoch(timestamp)
+        columns = {}
+        for field in fields:
+            values = [record.get(field) for record in rows]
+            if full_turn or any(value is not None for value in values):
+                columns[field] = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+        with self.lock:
+            self._flock()
+            try:
+                index = self._register(codes)
+                array = self._arrays[source]
+                version = self._versions[source]
+                version += 1                    # 홀수: 쓰는 중
+                for position, field in enumerate(fields):
+                    if field not in columns:
+                        continue
+                    values = columns[field]
+                    if full_turn:
+                        array[position, index] = values
+                        continue
+                    present = ~np.isnan(values)
+                    array[position, index[present]] = values[present]
+                if full_turn:
+                    absent = np.ones(len(self.codes), dtype=bool)
+                    absent[index] = False
+                    array[:, :len(self.codes)][:, absent] = np.nan
+                array[len(fields), index] = turn_at
+                header = self._source_headers[source]
+                header[1] = turn_at
+                header[2] = len(rows)
+                version += 1                    # 짝수: 완료
+            finally:
+                self._flock(False)
+        return len(rows)
+
+    # --- 읽기 ---
+
+    def version(self, source):
+        return int(self._versions[source][0])
+
+    def read(self, source, fn=None):
+        """
+        source의 배열을 일관된 상태로 읽습니다. fn(views)가 주어지면 seqlock 안에서 zero-copy 뷰로 실행한 결과를,
+        없으면 필드별 배열 복사본(dict, 'updated_at' 포함)을 반환합니다. (뷰는 fn 밖으로 가지고 나가지 말 것)
+        """
+        fields = self.sources[source]
+        count = self._sync_codes()
+        array = self._arrays[source]
+        version = self._versions[source]
+        if fn is None:
+            def fn(views):
+                return {field: values.copy() for field, values in views.items()}
+
+        for _ in range(READ_RETRIES):
+            before = int(version[0])
+            if before & 1:
+                time.sleep(0)
+                continue
+            views = {field: array[position, :count] for position, field in enumerate(fields)}
+            views["updated_at"] = array[len(fields), :count]
+            result = fn(views)
+            if int(version[0]) == before:
+                return result
+        raise RuntimeError(f"스냅샷 저장소 읽기가 계속 쓰기와 겹칩니다: {source}")
+
+    def turn_at(self, source):
+        """source의 마지막 발행 시각(epoch 초, 없으면 None)"""
+        value = float(self._source_headers[source][1])
+        return None if value == 0 else value
+
+    def latest(self, code, sources=None):
+        """한 종목의 소스별 최신 값을 조인하여 반환합니다. {source: {field: 값, "updated_at": epoch}} (없는 소스는 제외)"""
+        index = self.index_of(code)
+        if index is None:
+            return {}
+        joined = {}
+        for source in sources or self.sources:
+            fields = self.sources[source] + ("updated_at",)
+            row = self.read(source, lambda views: [float(views[field][index]) for field in fields])
+            if math.isnan(row[-1]):
+                continue
+            joined[source] = {field: (None if math.isnan(value) else value) for field, value in zip(fields, row)}
+        return joined
+
+    def join(self, codes, sources=None):
+        """
+        여러 종목의 소스별 최신 값을 벡터로 조인합니다. {source: {field: 배열}} (등록되지 않은 코드는 NaN)
+        """
+        import numpy as np
+
+        self._sync_codes()
+        local = np.fromiter((self.codes.get(code, -1) for code in codes), dtype=np.int64, count=len(codes))
+        found = local >= 0
+        result = {}
+        for source in sources or self.sources:
+            def gather(views):
+                out = {}
+                for field, values in views.items():
+                    column = np.full(len(local), np.nan)
+                    column[found] = values[local[found]]
+                    out[field] = column
+                return out
+            result[source] = self.read(source, gather)
+        return result
+
+
+_store = None
+_store_failed = False
+
+
+def get_store():
+    """프로세스 공용 저장소를 엽니다. (처음 호출 시 파일 생성/연결)"""
+    global _store
+    if _store is None:
+        _store = SnapshotStore()
+    return _store
+
+
+def publish_snapshot(source, records, key, timestamp=None, full_turn=False):
+    """
+    SNAPSHOT_STORE가 켜져 있으면 턴 결과를 저장소에 발행합니다. (full_turn: SnapshotStore.publish 참고) 실패는 수집을 막지 않도록 출력만 하고,
+    저장소를 열 수 없으면 이 프로세스에서는 더 이상 시도하지 않습니다.
+    """
+    global _store_failed
+    if not SNAPSHOT_STORE_ENABLED or _store_failed:
+        return 0
+    try:
+        return get_store().publish(source, records, key, timestamp, full_turn=full_turn)
+    except (OSError, ValueError) as e:
+        if _store is None:
+            _store_failed = True
+        print(f"⚠️ 스냅샷 저장소 발행 실패 ({source}): {e}")
+        return 0
+
+
+def main():
+    store = get_store()
+    codes = sys.argv[1:]
+    print(f"ℹ️ 스냅샷 저장소 {store.path}: 코드 {store._sync_codes()}개 / {store.capacity}")
+    for source in store.sources:
+        turn_at = store.turn_at(source)
+        stamp = datetime.fromtimestamp(turn_at, KST).isoformat(timespec="seconds") if turn_at else "-"
+        print(f"   - {source}: 마지막 발행 {stamp}, 버전 {store.version(source)}")
+    for code in codes:
+        print(f"[{code}] {store.latest(code)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,64 @@
 import os
 from datetime import datetime, timedelta, timezone
-from dotenv import load_dotenv
-import pandas as pd
-from supabase import create_client, Client
 
-# .env 파일 로드 (로컬 개발 환경용)
-load_dotenv()
+# Supabase 클라이언트는 처음 사용할 때 생성합니다. (get_supabase 참고)
+# 짧게 실행되는 스냅샷 작업이 .env 로드, supabase SDK, pandas 임포트 비용을 임포트 시점에 치르지 않도록 하기 위함
+_client = None
 
-# Supabase 설정 (권한 문제를 피하기 위해 Service Role Key인 'Secret_keys'를 사용합니다)
-url = os.getenv("Project_URL", "").strip()
-key = os.getenv("Secret_keys", "").strip()
 
-if not url:
-    raise ValueError("❌ Project_URL environment variable is missing or empty.")
-if not key:
-    raise ValueError("❌ Secret_keys environment variable is missing or empty. (RLS 우회를 위해 Service Role Key가 필요합니다)")
+def _create_supabase_client():
+    from dotenv import load_dotenv
 
-# Supabase 클라이언트 생성 (Secret Key를 사용하여 모든 테이블에 대한 CRUD 권한을 확보)
-try:
-    supabase: Client = create_client(url, key)
-except Exception as e:
-    raise RuntimeError(f"❌ Supabase 클라이언트 초기화 실패: {e}")
+    # .env 파일 로드 (로컬 개발 환경용)
+    load_dotenv()
+
+    # 백엔드 선택: 'supabase'(기본, 실제 프로젝트) 또는 'memory'(로컬 부하 테스트용 메모리 대역, fake_supabase.py 참고)
+    backend = os.getenv("SUPABASE_BACKEND", "supabase").strip().lower()
+
+    if backend == "memory":
+        try:
+            from toss_crawling.fake_supabase import create_fake_client
+        except ImportError:
+            from fake_supabase import create_fake_client
+        return create_fake_client()
+
+    from supabase import create_client
+
+    # Supabase 설정 (권한 문제를 피하기 위해 Service Role Key인 'Secret_keys'를 사용합니다)
+    url = os.getenv("Project_URL", "").strip()
+    key = os.getenv("Secret_keys", "").strip()
+
+    if not url:
+        raise ValueError("❌ Project_URL environment variable is missing or empty.")
+    if not key:
+        raise ValueError("❌ Secret_keys environment variable is missing or empty. (RLS 우회를 위해 Service Role Key가 필요합니다)")
+
+    # Supabase 클라이언트 생성 (Secret Key를 사용하여 모든 테이블에 대한 CRUD 권한을 확보)
+    try:
+        return create_client(url, key)
+    except Exception as e:
+        raise RuntimeError(f"❌ Supabase 클라이언트 초기화 실패: {e}")
+
+
+def get_supabase():
+    """Supabase 클라이언트를 반환합니다. 최초 호출 시 환경 변수를 읽어 한 번만 생성합니다."""
+    global _client
+    if _client is None:
+        _client = _create_supabase_client()
+    return _client
+
+
+def set_supabase(client):
+    """사용할 클라이언트를 직접 지정합니다. (벤치마크 등에서 메모리 대역 주입용, None이면 다음 사용 시 다시 생성)"""
+    global _client
+    _client = client
+
+
+def __getattr__(name):
+    # 기존 코드 호환: `from toss_crawling.supabase_client import supabase` 는 그 시점에 클라이언트를 생성합니다.
+    if name == "supabase":
+        return get_supabase()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_kst_now():
@@ -29,21 +67,129 @@ def get_kst_now():
 
 def check_market_open(today_str: str) -> bool:
     """오늘(today_str, YYYY-MM-DD) 프리마켓 ETF 데이터가 있으면 True를 반환합니다."""
-    res = supabase.table("naver_premarket_etf") \
+    res = get_supabase().table("naver_premarket_etf") \
         .select("etf_code") \
         .gte("updated_at", today_str) \
         .limit(1) \
         .execute()
     return bool(res.data)
 
-def load_toss_data_from_supabase():
+def iter_table_pages(table, columns="*", filters=(), order="id", page_size=1000):
+    """
+    테이블을 page_size 단위로 읽어 페이지(레코드 리스트)를 하나씩 반환하는 제너레이터입니다.
+    filters는 (연산자, 컬럼, 값) 튜플 목록입니다. 예: [("gte", "collected_at", "2026-10-19")]
+    """
+    offset = 0
+    while True:
+        query = get_supabase().table(table).select(columns)
+        for op, column, value in filters:
+            query = getattr(query, op)(column, value)
+        response = query.order(order).range(offset, offset + page_size - 1).execute()
+
+        if not response.data:
+            return
+        yield response.data
+        if len(response.data) < page_size:
+            return
+        offset += page_size
+
+
+def iter_table_frames(table, columns="*", filters=(), order="id", page_size=1000, transform=None):
+    """
+    iter_table_pages의 DataFrame 버전: 페이지마다 DataFrame을 만들고 transform(선택)을 적용해 반환합니다.
+    페이지의 dict 리스트는 DataFrame으로 바뀐 뒤 바로 버려지므로, 전체를 리스트로 모으는 것보다 최대 메모리가 작습니다.
+    """
+    import pandas as pd
+
+    for page in iter_table_pages(table, columns, filters, order, page_size):
+        df = pd.DataFrame(page)
+        del page
+        yield transform(df) if transform else df
+
+
+TOSS_DEDUP_KEYS = ['investor', 'stock_code', 'stock_name', 'ranking_type']
+
+
+def prepare_toss_chunk(df):
+    """toss_yg_score_stk 청크에 부호가 반영된 금액(final_amount)을 붙이고 집계에 필요한 컬럼만 남깁니다."""
+    import numpy as np
+
+    df = df[['investor', 'stock_name', 'stock_code', 'ranking_type', 'amount', 'collected_at']].copy()
+    # 매수(buy)는 양수, 매도(sell)는 음수로 변환
+    df['final_amount'] = np.where(df['ranking_type'] == 'buy', df['amount'], -df['amount'])
+    return df.drop(columns=['amount'])
+
+
+def aggregate_toss_chunks(chunks):
+    """
+    prepare_toss_chunk를 거친 청크들을 차례로 받아 투자자/종목별 순매수 금액 DataFrame으로 통합합니다.
+    (투자자, 종목, 매매타입)별 최신 행만 키 사전에 남기므로, 누적 상태는 전체 행 수가 아니라 종목 수에 비례하고
+    청크마다 드는 시간은 누적 상태가 아니라 청크 크기에 비례합니다.
+    (통합 DataFrame과 데이터의 실제 최신 수집 시각(collected_at)을 함께 반환, 청크가 없으면 None, None)
+    """
+    import pandas as pd
+
+    latest = {}     # (투자자, 종목코드, 종목명, 매매타입) -> (collected_at, final_amount)
+    actual_latest_at = None
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        chunk_latest_at = chunk['collected_at'].max()
+        if actual_latest_at is None or chunk_latest_at > actual_latest_at:
+            actual_latest_at = chunk_latest_at
+
+        # 중복 제거: 동일 투자자, 종목, 매매타입에 대해 가장 마지막에 수집된 데이터만 사용
+        # (실시간 크롤링이 누적될 경우 최신 스냅샷을 사용하기 위함, 수집 시각이 같으면 나중에 읽은 행)
+        chunk = chunk.sort_values(by='collected_at', kind='stable').drop_duplicates(subset=TOSS_DEDUP_KEYS, keep='last')
+        keys = zip(*(chunk[column].tolist() for column in TOSS_DEDUP_KEYS))
+        for key, collected_at, amount in zip(keys, chunk['collected_at'].tolist(), chunk['final_amount'].tolist()):
+            previous = latest.get(key)
+            if previous is None or collected_at >= previous[0]:
+                latest[key] = (collected_at, amount)
+
+    if not latest:
+        return None, None
+
+    latest = pd.DataFrame(
+        [(*key, amount) for key, (_, amount) in latest.items()],
+        columns=[*TOSS_DEDUP_KEYS, 'final_amount'],
+    )
+
+    # 매수/매도 합산 (같은 종목에 대해 매수/매도 모두 있을 수 있음)
+    df_total = latest.groupby(['investor', 'stock_name', 'stock_code'], as_index=False)['final_amount'].sum()
+
+    # 컬럼명 매핑 (기존 로직과의 호환성을 위해)
+    df_total.rename(columns={
+        'investor': '투자자',
+        'stock_name': '종목명',
+        'stock_code': '종목코드',
+        'final_amount': '금액'
+    }, inplace=True)
+
+    return df_total, actual_latest_at
+
+
+def transform_toss_data(all_data):
+    """
+    toss_yg_score_stk 원본 레코드 리스트를 투자자/종목별 순매수 금액 DataFrame으로 통합합니다.
+    (통합 DataFrame과 데이터의 실제 최신 수집 시각(collected_at)을 함께 반환)
+    """
+    import pandas as pd
+
+    return aggregate_toss_chunks([prepare_toss_chunk(pd.DataFrame(all_data))])
+
+def load_toss_data_from_supabase(full=False):
     """
     Supabase에서 가장 최근 수집된 날짜의 데이터를 로드하여 DataFrame으로 반환합니다.
     (데이터프레임과 데이터의 실제 수집 시각(collected_at)을 함께 반환)
+    기본은 증분 로드(load_toss_data_incremental)이며, 같은 프로세스에서 반복 호출하면 새 행만 읽습니다.
+    full=True이면 매번 해당 날짜 전체를 다시 읽습니다. (증분 로드 검증 기준: benchmarks/check_toss_incremental.py)
     """
+    if not full:
+        return load_toss_data_incremental()
     try:
         # 1. 가장 최근 수집된 날짜 확인
-        res = supabase.table("toss_yg_score_stk") \
+        res = get_supabase().table("toss_yg_score_stk") \
             .select("collected_at") \
             .order("collected_at", desc=True) \
             .limit(1) \
@@ -63,135 +209,231 @@ def load_toss_data_from_supabase():
         end_date_dt = datetime.strptime(target_date, "%Y-%m-%d") + timedelta(days=1)
         end_date = end_date_dt.strftime("%Y-%m-%d")
 
-        # 2. 해당 날짜 데이터 쿼리 (페이지네이션 적용)
-        all_data = []
-        limit = 1000
-        offset = 0
-        
+        # 2. 해당 날짜 데이터를 페이지 단위로 읽으며 청크별로 전처리/중복 제거 (전체 레코드를 한 번에 메모리에 올리지 않음)
         print(f"⏳ 데이터 로드 중 (Range: {start_date} ~ {end_date})...", end='', flush=True)
-
-        while True:
-            response = supabase.table("toss_yg_score_stk") \
-                .select("*") \
-                .gte("collected_at", start_date) \
-                .lt("collected_at", end_date) \
-                .order("id") \
-                .range(offset, offset + limit - 1) \
-                .execute()
-
-            if not response.data:
-                break
-            
-            all_data.extend(response.data)
-            
-            if len(response.data) < limit:
-                break
-                
-            offset += limit
-            print(".", end='', flush=True)
-            
-        print(f"\n✅ 데이터 로드 완료: 총 {len(all_data)}건")
-
-        if not all_data:
+        row_count = 0
+
+        def counted(frames):
+            nonlocal row_count
+            for df in frames:
+                row_count += len(df)
+                print(".", end='', flush=True)
+                yield df
+
+        frames = iter_table_frames(
+            "toss_yg_score_stk",
+            columns="investor, stock_name, stock_code, amount, ranking_type, collected_at",
+            filters=[("gte", "collected_at", start_date), ("lt", "collected_at", end_date)],
+            transform=prepare_toss_chunk,
+        )
+        df_total, actual_latest_at = aggregate_toss_chunks(counted(frames))
+        print(f"\n✅ 데이터 로드 완료: 총 {row_count}건")
+
+        if df_total is None:
             print(f"🚨 {target_date} 날짜의 데이터를 가져오지 못했습니다.")
             return None, None
 
-        df = pd.DataFrame(all_data)
-        
-        # 실제 데이터 중 가장 최신 수집 시각 추출
-        actual_latest_at = df['collected_at'].max()
+        print(f"✅ Supabase 데이터 로드 및 통합 완료: {len(df_total)}건 (기준시각: {actual_latest_at})")
+        return df_total, actual_latest_at
 
-        # 3. 데이터 전처리
-        # 매수(buy)는 양수, 매도(sell)는 음수로 변환
-        df['final_amount'] = df.apply(lambda x: x['amount'] if x['ranking_type'] == 'buy' else -x['amount'], axis=1)
+    except Exception as e:
+        print(f"🚨 Supabase 데이터 로드 중 에러 발생: {e}")
+        return None, None
 
-        # 필요한 컬럼만 선택 및 이름 변경
-        df_processed = df[['investor', 'stock_name', 'stock_code', 'final_amount', 'collected_at']].copy()
-        
-        # 중복 제거: 동일 투자자, 종목, 매매타입에 대해 가장 마지막에 수집된 데이터만 사용
-        # (실시간 크롤링이 누적될 경우 최신 스냅샷을 사용하기 위함)
-        df_dedup = df.sort_values(by=['investor', 'stock_code', 'stock_name', 'collected_at']) \
-            .drop_duplicates(subset=['investor', 'stock_code', 'stock_name', 'ranking_type'], keep='last')
+class TossSnapshotLoader:
+    """
+    toss_yg_score_stk 증분 로더.
+    마지막으로 읽은 collected_at(워터마크) 이후의 행만 가져와 (투자자, 종목코드, 종목명, 매매타입)별 최신 스냅샷에 병합하고,
+    aggregate_toss_chunks(전체 재조회)와 동일한 통합 DataFrame을 만듭니다. 최신 날짜가 바뀌면 상태를 비우고 새 날짜를 처음부터 읽습니다.
+    워터마크 턴의 행은 확정하지 않고(pending) 매번 다시 읽어 통째로 교체하므로, 같은 턴에 나중에 저장된 행(매도 랭킹, 재시도 upsert로
+    바뀐 금액/종목명)도 전체 재조회와 같게 반영됩니다. 워터마크보다 앞선 턴의 행은 다시 쓰이지 않는다고 가정합니다.
+    (수집기는 턴마다 새 collected_at으로만 upsert 하고, 지난 데이터 정리는 이전 날짜만 삭제)
+    """
 
-        # 매수/매도 합산 (같은 종목에 대해 매수/매도 모두 있을 수 있음)
-        df_total = df_dedup.groupby(['investor', 'stock_name', 'stock_code'], as_index=False)['final_amount'].sum()
-        
-        # 컬럼명 매핑 (기존 로직과의 호환성을 위해)
+    def __init__(self, page_size=1000):
+        self.page_size = page_size
+        self.reset()
+
+    def reset(self):
+        self.target_date = None
+        self.watermark = None       # 지금까지 읽은 가장 늦은 collected_at
+        self.settled = {}           # 워터마크 이전 턴: (investor, stock_code, stock_name, ranking_type) -> (collected_at, final_amount)
+        self.pending = []           # 워터마크 턴의 행 (다음 refresh에서 다시 읽어 교체)
+        self.rows_fetched = 0
+
+    def _fetch_since(self, start, end_date):
+        rows = []
+        for page in iter_table_pages(
+            "toss_yg_score_stk",
+            columns="id, investor, stock_name, stock_code, amount, ranking_type, collected_at",
+            filters=[("gte", "collected_at", start), ("lt", "collected_at", end_date)],
+            page_size=self.page_size,
+        ):
+            rows.extend(page)
+        return rows
+
+    @staticmethod
+    def _merge(latest, rows):
+        # id 순서로 읽은 행을 병합 (수집 시각이 같으면 나중에 저장된 행, aggregate_toss_chunks와 같은 규칙)
+        for row in rows:
+            key = (row['investor'], row['stock_code'], row['stock_name'], row['ranking_type'])
+            collected_at = row['collected_at']
+            current = latest.get(key)
+            if current is None or collected_at >= current[0]:
+                latest[key] = (collected_at, row['amount'] if row['ranking_type'] == 'buy' else -row['amount'])
+
+    def refresh(self):
+        """새로 저장된 행을 반영합니다. (이번 호출에서 가져온 행 수를 반환, 데이터가 없으면 None)"""
+        res = get_supabase().table("toss_yg_score_stk") \
+            .select("collected_at") \
+            .order("collected_at", desc=True) \
+            .limit(1) \
+            .execute()
+        if not res.data:
+            return None
+
+        latest_timestamp = res.data[0]['collected_at']
+        target_date = latest_timestamp.replace('T', ' ').split(' ')[0]
+        if target_date != self.target_date:
+            self.reset()
+            self.target_date = target_date
+
+        end_date = (datetime.strptime(target_date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+        rows = self._fetch_since(self.watermark or target_date, end_date)
+        if rows:
+            watermark = max(row['collected_at'] for row in rows)
+            # 새 워터마크보다 앞선 행(직전 워터마크 턴 포함)은 확정, 새 워터마크 턴의 행은 다음 refresh까지 보류
+            self._merge(self.settled, [row for row in rows if row['collected_at'] < watermark])
+            self.pending = [row for row in rows if row['collected_at'] == watermark]
+            self.watermark = watermark
+        else:
+            self.pending = []
+        self.rows_fetched += len(rows)
+        return len(rows)
+
+    def aggregate(self):
+        """최신 스냅샷을 투자자/종목별 순매수 금액 DataFrame으로 통합합니다. (aggregate_toss_chunks와 같은 형태)"""
+        import pandas as pd
+
+        latest = dict(self.settled)
+        self._merge(latest, self.pending)
+        if not latest:
+            return None, None
+        latest = pd.DataFrame(
+            [(*key, amount) for key, (_, amount) in latest.items()],
+            columns=[*TOSS_DEDUP_KEYS, 'final_amount'],
+        )
+        df_total = latest.groupby(['investor', 'stock_name', 'stock_code'], as_index=False)['final_amount'].sum()
         df_total.rename(columns={
-            'investor': '투자자', 
-            'stock_name': '종목명', 
-            'stock_code': '종목코드', 
+            'investor': '투자자',
+            'stock_name': '종목명',
+            'stock_code': '종목코드',
             'final_amount': '금액'
         }, inplace=True)
+        return df_total, self.watermark
+
+    def load(self):
+        """refresh 후 통합 DataFrame과 실제 최신 수집 시각을 반환합니다. (오류 시 None, None)"""
+        try:
+            fetched = self.refresh()
+            if fetched is None:
+                print("🚨 Supabase에 데이터가 없습니다.")
+                return None, None
+            df_total, actual_latest_at = self.aggregate()
+            if df_total is None:
+                print(f"🚨 {self.target_date} 날짜의 데이터를 가져오지 못했습니다.")
+                return None, None
+            print(f"✅ Supabase 증분 로드 완료: {fetched}건 조회, 통합 {len(df_total)}건 (기준시각: {actual_latest_at})")
+            return df_total, actual_latest_at
+        except Exception as e:
+            # 상태가 어긋났을 수 있으므로 다음 호출은 처음부터 다시 읽음
+            self.reset()
+            print(f"🚨 Supabase 증분 로드 중 에러 발생: {e}")
+            return None, None
 
-        print(f"✅ Supabase 데이터 로드 및 통합 완료: {len(df_total)}건 (기준시각: {actual_latest_at})")
-        return df_total, actual_latest_at
 
-    except Exception as e:
-        print(f"🚨 Supabase 데이터 로드 중 에러 발생: {e}")
-        return None, None
+_toss_loader = None
+
+
+def load_toss_data_incremental():
+    """
+    load_toss_data_from_supabase의 기본 경로: 프로세스 안에서 하나의 로더를 재사용하여
+    첫 호출은 최신 날짜 전체를, 두 번째 호출부터는 마지막 워터마크 턴 이후의 행만 가져옵니다.
+    """
+    global _toss_loader
+    if _toss_loader is None:
+        _toss_loader = TossSnapshotLoader()
+    return _toss_loader.load()
 
 def load_etf_pdf_from_supabase():
     """
     Supabase의 etf_pdf 테이블에서 데이터를 로드하여 DataFrame으로 반환합니다.
     """
     try:
-        all_data = []
-        limit = 1000
-        offset = 0
-        
-        print("⏳ Supabase ETF PDF 데이터 로드 중...", end='', flush=True)
-        
-        while True:
-            response = supabase.table("ETF_PDF").select("*").range(offset, offset + limit - 1).execute()
-            
-            if not response.data:
-                break
-                
-            all_data.extend(response.data)
-            
-            if len(response.data) < limit:
-                break
-            
-            offset += limit
+        import pandas as pd
+
+        try:
+            from toss_crawling.etf_universe import get_universe_codes, describe_universe
+        except ImportError:
+            from etf_universe import get_universe_codes, describe_universe
+
+        # 설정된 ETF 유니버스가 있으면 해당 ETF의 구성종목만 읽음
+        universe_codes = get_universe_codes()
+        filters = [("in_", "etf_code", sorted(universe_codes))] if universe_codes is not None else []
+        print(f"⏳ Supabase ETF PDF 데이터 로드 중... ({describe_universe(universe_codes)})", end='', flush=True)
+
+        # 페이지마다 변환(컬럼명 매핑, 숫자 변환, 코드 보정)을 적용한 뒤 마지막에 한 번만 이어 붙임
+        chunks = []
+        for df_chunk in iter_table_frames("ETF_PDF", filters=filters, transform=transform_etf_pdf):
+            chunks.append(df_chunk)
             print(".", end='', flush=True)
 
-        print(f"\n✅ Supabase ETF PDF 데이터 로드 완료: {len(all_data)}건")
+        row_count = sum(len(df_chunk) for df_chunk in chunks)
+        print(f"\n✅ Supabase ETF PDF 데이터 로드 완료: {row_count}건")
 
-        if not all_data:
+        if not chunks:
             print("🚨 Supabase의 'ETF_PDF' 테이블에 데이터가 없습니다.")
             return None
 
-        df_pdf = pd.DataFrame(all_data)
-        
-        column_mapping = {
-            'etf_code': 'ETF종목코드',
-            'etf_name': 'ETF종목명',
-            'holdings_code': '구성종목코드',
-            'holdings_name': '구성종목명',
-            'holdings_weight': '구성비중(%)'
-        }
-        
-        existing_mapping = {k: v for k, v in column_mapping.items() if k in df_pdf.columns}
-        if existing_mapping:
-            df_pdf.rename(columns=existing_mapping, inplace=True)
-
-        if '시가총액기준구성비율' in df_pdf.columns:
-            df_pdf.rename(columns={'시가총액기준구성비율': '구성비중(%)'}, inplace=True)
-        
-        df_pdf['구성비중(%)'] = pd.to_numeric(df_pdf['구성비중(%)'], errors='coerce').fillna(0)
-        
-        if 'ETF종목코드' in df_pdf.columns:
-            df_pdf['ETF종목코드'] = df_pdf['ETF종목코드'].astype(str).str.zfill(6)
-        if '구성종목코드' in df_pdf.columns:
-            df_pdf['구성종목코드'] = df_pdf['구성종목코드'].astype(str).str.zfill(6)
-
-        return df_pdf
+        return pd.concat(chunks, ignore_index=True)
 
     except Exception as e:
         print(f"🚨 Supabase ETF PDF 로드 중 에러 발생: {e}")
         return None
 
+def transform_etf_pdf(all_data):
+    """
+    ETF_PDF 원본 레코드 리스트를 구성종목 DataFrame으로 변환합니다.
+    (컬럼명 한글 매핑, 구성비중 숫자 변환, 종목코드 6자리 보정)
+    """
+    import pandas as pd
+
+    df_pdf = pd.DataFrame(all_data)
+    
+    column_mapping = {
+        'etf_code': 'ETF종목코드',
+        'etf_name': 'ETF종목명',
+        'holdings_code': '구성종목코드',
+        'holdings_name': '구성종목명',
+        'holdings_weight': '구성비중(%)'
+    }
+    
+    existing_mapping = {k: v for k, v in column_mapping.items() if k in df_pdf.columns}
+    if existing_mapping:
+        df_pdf.rename(columns=existing_mapping, inplace=True)
+
+    if '시가총액기준구성비율' in df_pdf.columns:
+        df_pdf.rename(columns={'시가총액기준구성비율': '구성비중(%)'}, inplace=True)
+    
+    df_pdf['구성비중(%)'] = pd.to_numeric(df_pdf['구성비중(%)'], errors='coerce').fillna(0)
+    
+    if 'ETF종목코드' in df_pdf.columns:
+        df_pdf['ETF종목코드'] = df_pdf['ETF종목코드'].astype(str).str.zfill(6)
+    if '구성종목코드' in df_pdf.columns:
+        df_pdf['구성종목코드'] = df_pdf['구성종목코드'].astype(str).str.zfill(6)
+
+    return df_pdf
+
 def save_score_to_supabase(df, target_time=None):
     """
     계산된 YG Score 결과를 Supabase 'toss_yg_score_etf' 테이블에 저장(Upsert)합니다.
@@ -223,6 +465,15 @@ def save_score_to_supabase(df, target_time=None):
         
         data_to_upsert = df_new[upsert_cols].to_dict(orient='records')
 
+        # 장중 점수 이력에 반영하고, 설정된 경우 모멘텀 컬럼(score_delta_5m 등)을 함께 저장
+        try:
+            from toss_crawling import score_history
+        except ImportError:
+            import score_history
+        data_with_momentum = score_history.observe_scores(current_time, data_to_upsert)
+        if score_history.momentum_persist_enabled("toss_yg_score_etf"):
+            data_to_upsert = data_with_momentum
+
         batch_size = 1000
         total_count = len(data_to_upsert)
         
@@ -230,7 +481,7 @@ def save_score_to_supabase(df, target_time=None):
         
         for i in range(0, total_count, batch_size):
             batch = data_to_upsert[i:i+batch_size]
-            res = supabase.table("toss_yg_score_etf").upsert(batch, on_conflict="etf_code, updated_at").execute()
+            res = get_supabase().table("toss_yg_score_etf").upsert(batch, on_conflict="etf_code, updated_at").execute()
             print(f"   - {i} ~ {i+len(batch)}건 저장 완료")
             
         print(f"✅ Supabase 'toss_yg_score_etf' 테이블 전체 업데이트 완료: {total_count}건")
@@ -238,29 +489,21 @@ def save_score_to_supabase(df, target_time=None):
     except Exception as e:
         print(f"🚨 Supabase 저장 중 에러 발생: {e}")
 
-def delete_old_scores():
+def delete_old_scores(background=False):
     """
     toss_yg_score_etf 및 toss_yg_score_skt 테이블에서 오늘(KST 기준) 이전의 데이터를 모두 삭제합니다.
+    (시간 구간 단위로 나누어 삭제 건수만 받아오며, background=True이면 수집 루프를 막지 않도록 백그라운드에서 실행)
     """
     try:
-        now_kst = get_kst_now()
-        today_start_kst = now_kst.replace(hour=0, minute=0, second=0, microsecond=0)
-        threshold_str = today_start_kst.isoformat()
-
-        # 삭제 쿼리 1: toss_yg_score_etf 테이블
-        response = supabase.table("toss_yg_score_etf").delete().lt("updated_at", threshold_str).execute()
-        
-        deleted_count = len(response.data) if response.data else 0
-        if deleted_count > 0:
-            print(f"🧹 지난 Score 데이터 삭제 완료: {deleted_count}건 (기준: {today_start_kst.strftime('%Y-%m-%d')} KST 이전)")
-
-        # 삭제 쿼리 2: toss_yg_score_stk 테이블
-        response_top = supabase.table("toss_yg_score_stk").delete().lt("collected_at", threshold_str).execute()
-
-        deleted_count_top = len(response_top.data) if response_top.data else 0
-        if deleted_count_top > 0:
-            print(f"🧹 지난 STK 데이터 삭제 완료: {deleted_count_top}건")
-            
-    except Exception as e:
-        print(f"🚨 지난 데이터 삭제 오류: {e}")
-
+        from toss_crawling.retention import purge_tables, start_background_purge
+    except ImportError:
+        from retention import purge_tables, start_background_purge
+
+    now_kst = get_kst_now()
+    today_start_kst = now_kst.replace(hour=0, minute=0, second=0, microsecond=0)
+    targets = [("toss_yg_score_etf", "updated_at"), ("toss_yg_score_stk", "collected_at")]
+
+    if background:
+        start_background_purge(targets, today_start_kst, label="Score")
+        return
+    purge_tables(targets, today_start_kst, label="Score")
@@ -1,5 +1,5 @@
 import time
-from datetime import datetime, timedelta
+from datetime import datetime
 import re
 import sys
 import signal
@@ -24,77 +24,122 @@ signal.signal(signal.SIGTERM, signal_handler)
 
 # Supabase 클라이언트 임포트
 try:
-    from toss_crawling.supabase_client import supabase, delete_old_scores, load_etf_pdf_from_supabase, get_kst_now, check_market_open
+    from toss_crawling.supabase_client import get_supabase, delete_old_scores, load_etf_pdf_from_supabase, get_kst_now, check_market_open
+    from toss_crawling import metrics, profiling
+    from toss_crawling.score_push import publish_scores
+    from toss_crawling.score_history import record_turn_scores, get_score_history, restore_score_history
+    from toss_crawling.parsing import parse_amount
+    from toss_crawling.market_calendar import get_market_status, get_holiday_name, get_session, sleep_until
+    from toss_crawling.rate_limit import acquire
+    from toss_crawling.pipeline import TurnPipeline
+    from toss_crawling.checkpoint import save_checkpoint, load_checkpoint
+    from toss_crawling.snapshot_store import publish_snapshot
 except ImportError:
     import os
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-    from supabase_client import supabase, delete_old_scores, load_etf_pdf_from_supabase, get_kst_now, check_market_open
-
-
-def parse_amount(amount_str):
-    if not amount_str:
-        return 0
-    try:
-        amount_str = amount_str.replace("순매수", "").replace("순매도", "").replace(",", "").replace(" ", "").replace("-", "").replace("원", "")
-        total_amount = 0.0
-
-        if "조" in amount_str:
-            parts = amount_str.split("조")
-            try:
-                if parts[0].strip():
-                    total_amount += float(parts[0]) * 10000
-            except (ValueError, TypeError):
-                pass
-            amount_str = parts[1] if len(parts) > 1 else ""
-
-        if "억" in amount_str:
-            parts = amount_str.split("억")
-            try:
-                if parts[0].strip():
-                    total_amount += float(parts[0])
-            except (ValueError, TypeError):
-                pass
-            amount_str = parts[1] if len(parts) > 1 else ""
-
-        if "만" in amount_str:
-            parts = amount_str.split("만")
-            try:
-                if parts[0].strip():
-                    total_amount += float(parts[0]) / 10000
-            except (ValueError, TypeError):
-                pass
+    from supabase_client import get_supabase, delete_old_scores, load_etf_pdf_from_supabase, get_kst_now, check_market_open
+    import metrics
+    import profiling
+    from score_push import publish_scores
+    from score_history import record_turn_scores, get_score_history, restore_score_history
+    from parsing import parse_amount
+    from market_calendar import get_market_status, get_holiday_name, get_session, sleep_until
+    from rate_limit import acquire
+    from pipeline import TurnPipeline
+    from checkpoint import save_checkpoint, load_checkpoint
+    from snapshot_store import publish_snapshot
+
+
+def extract_toss_items(items, ranking_type, collected_at, base_times, is_opening_period):
+    """
+    토스증권 랭킹 페이지의 종목 링크 요소(items)에서 외국인/기관 순매수·순매도 데이터를 추출합니다.
+    items는 text 속성과 get_attribute("href")를 제공하는 WebElement(또는 동일한 인터페이스의 스냅샷 객체)입니다.
+    (추출 데이터 리스트와 투자자별 수집 건수를 함께 반환)
+    """
+    all_data = []
+    current_group_idx = 0
+    groups = ["외국인", "기관", "개인", "기타"]
+    group_counts = {"외국인": 0, "기관": 0}
+
+    for idx, item in enumerate(items):
+        try:
+            raw_text = item.text
+            if not raw_text:
+                continue
+            text_lines = [line.strip() for line in raw_text.split('\n') if line.strip()]
 
-        return round(total_amount, 4)
-    except Exception:
-        return 0
+            if len(text_lines) >= 2:
+                rank = text_lines[0]
+                name = text_lines[1]
 
+                if rank == '1' and idx > 10:
+                    if group_counts.get(groups[current_group_idx], 0) >= 80:
+                        current_group_idx += 1
 
-def parse_date(date_str):
-    """토스증권 날짜 형식(오늘, 어제, 1월 30일 등)을 YYYY-MM-DD 형식으로 변환"""
-    kst_now = get_kst_now()
-    today_str = kst_now.strftime('%Y-%m-%d')
-    current_year = kst_now.year
+                group_name = groups[current_group_idx] if current_group_idx < len(groups) else "Unknown"
 
-    if not date_str:
-        return today_str
-    if "오늘" in date_str:
-        return today_str
-    if "어제" in date_str:
-        return (kst_now - timedelta(days=1)).strftime('%Y-%m-%d')
+                if group_name not in ["외국인", "기관"]:
+                    continue
+                if group_counts[group_name] >= 100:
+                    continue
 
-    match = re.search(r'(\d+)월\s*(\d+)일', date_str)
-    if match:
-        month = int(match.group(1))
-        day = int(match.group(2))
-        return f"{current_year}-{month:02d}-{day:02d}"
+                try:
+                    href = item.get_attribute("href")
+                    code_match = re.search(r'/stocks/(?:A)?([0-9A-Z]{6,})', href)
+                    stock_code = code_match.group(1) if code_match else ""
+                except (AttributeError, TypeError):
+                    stock_code = ""
+
+                group_base_time = base_times.get(group_name, "")
+                is_yesterday = "어제" in group_base_time
+
+                if group_name == "기관" and is_opening_period:
+                    is_yesterday = True
+                    if group_counts[group_name] == 0:
+                        print("🛡️ [기관] 장 초반(09:00~10:00) 보호 로직 작동: 금액을 0으로 고정합니다.")
+
+                if group_name == "기관" and is_yesterday and group_counts[group_name] == 0 and not is_opening_period:
+                    print(f"ℹ️ [기관] 섹션이 '어제'로 감지되었습니다. 모든 금액을 0으로 처리합니다. (기준: {group_base_time})")
+
+                amount_str = ""
+                for line in text_lines:
+                    if "어제" in line:
+                        is_yesterday = True
+                    if any(unit in line for unit in ["조", "억", "만"]):
+                        amount_str = line.strip()
+
+                amount_val = 0.0 if is_yesterday else parse_amount(amount_str)
+
+                all_data.append({
+                    "investor": group_name,
+                    "stock_name": name,
+                    "stock_code": stock_code,
+                    "amount": amount_val,
+                    "ranking_type": ranking_type,
+                    "collected_at": collected_at,
+                })
+                group_counts[group_name] += 1
+        except Exception:
+            continue
 
-    if re.match(r'\d{4}-\d{2}-\d{2}', date_str):
-        return date_str
+    return all_data, group_counts
 
-    return today_str
+def publish_flow_snapshot(valid_data):
+    """
+    이번 턴에 저장한 순매수/순매도 랭킹 데이터를 종목별 외국인/기관 순매수 금액(매도는 음수)으로 묶어 공유 스냅샷 저장소에 발행합니다. (SNAPSHOT_STORE=1)
+    턴 전체(순매수 + 순매도)로 발행하므로, 이번 턴 랭킹에 없는 종목/투자자 값은 저장소에서 비워집니다.
+    """
+    fields = {"외국인": "foreign", "기관": "institution"}
+    flows = {}
+    for item in valid_data:
+        amount = item["amount"] if item["ranking_type"] == "buy" else -item["amount"]
+        flows.setdefault(item["stock_code"], {"stock_code": item["stock_code"]})[fields[item["investor"]]] = amount
+    if flows:
+        publish_snapshot("flow", list(flows.values()), key="stock_code", timestamp=valid_data[0]["collected_at"], full_turn=True)
 
 
 def get_toss_ranking(ranking_type="buy", collected_at=None):
+    """토스증권 투자자별 순매수/순매도 랭킹을 수집하여 저장합니다. (저장한 데이터 반환, 실패하면 None)"""
     ranking_name = "순매수" if ranking_type == "buy" else "순매도"
 
     if collected_at is None:
@@ -112,6 +157,8 @@ def get_toss_ranking(ranking_type="buy", collected_at=None):
     max_retries = 3
     for attempt in range(1, max_retries + 1):
         print(f"🚀 [{ranking_type}] 연결 시도 {attempt}/{max_retries}: https://www.tossinvest.com/?ranking-type=domestic_investor_trend&ranking={ranking_type}")
+        if attempt > 1:
+            metrics.inc("retries")
 
         chrome_options = Options()
         chrome_options.add_argument("--headless")
@@ -120,19 +167,23 @@ def get_toss_ranking(ranking_type="buy", collected_at=None):
         chrome_options.add_argument("--window-size=1920,5000")
         chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36")
 
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+        with metrics.span("browser_launch"):
+            driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
         url = f"https://www.tossinvest.com/?ranking-type=domestic_investor_trend&ranking={ranking_type}"
-        all_data = []
 
         try:
-            driver.get(url)
-            wait = WebDriverWait(driver, 20)
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "a[href*='/stocks/']")))
-            time.sleep(5)
+            with metrics.span("page_load"):
+                acquire(url)
+                driver.get(url)
+                wait = WebDriverWait(driver, 20)
+                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "a[href*='/stocks/']")))
+                time.sleep(5)
+
+                for _ in range(5):
+                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                    time.sleep(2)
 
-            for _ in range(5):
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(2)
+            extract_started = time.perf_counter()
 
             # 기준 시간 추출 (투자자별)
             base_times = {"외국인": "", "기관": ""}
@@ -183,71 +234,10 @@ def get_toss_ranking(ranking_type="buy", collected_at=None):
                 base_times["기관"] = default_time
 
             items = driver.find_elements(By.CSS_SELECTOR, "a[href*='/stocks/']")
-            current_group_idx = 0
-            groups = ["외국인", "기관", "개인", "기타"]
-            group_counts = {"외국인": 0, "기관": 0}
-
-            for idx, item in enumerate(items):
-                try:
-                    raw_text = item.text
-                    if not raw_text:
-                        continue
-                    text_lines = [line.strip() for line in raw_text.split('\n') if line.strip()]
-
-                    if len(text_lines) >= 2:
-                        rank = text_lines[0]
-                        name = text_lines[1]
-
-                        if rank == '1' and idx > 10:
-                            if group_counts.get(groups[current_group_idx], 0) >= 80:
-                                current_group_idx += 1
-
-                        group_name = groups[current_group_idx] if current_group_idx < len(groups) else "Unknown"
-
-                        if group_name not in ["외국인", "기관"]:
-                            continue
-                        if group_counts[group_name] >= 100:
-                            continue
-
-                        try:
-                            href = item.get_attribute("href")
-                            code_match = re.search(r'/stocks/(?:A)?([0-9A-Z]{6,})', href)
-                            stock_code = code_match.group(1) if code_match else ""
-                        except (AttributeError, TypeError):
-                            stock_code = ""
-
-                        group_base_time = base_times.get(group_name, "")
-                        is_yesterday = "어제" in group_base_time
-
-                        if group_name == "기관" and is_opening_period:
-                            is_yesterday = True
-                            if group_counts[group_name] == 0:
-                                print("🛡️ [기관] 장 초반(09:00~10:00) 보호 로직 작동: 금액을 0으로 고정합니다.")
-
-                        if group_name == "기관" and is_yesterday and group_counts[group_name] == 0 and not is_opening_period:
-                            print(f"ℹ️ [기관] 섹션이 '어제'로 감지되었습니다. 모든 금액을 0으로 처리합니다. (기준: {group_base_time})")
-
-                        amount_str = ""
-                        for line in text_lines:
-                            if "어제" in line:
-                                is_yesterday = True
-                            if any(unit in line for unit in ["조", "억", "만"]):
-                                amount_str = line.strip()
-
-                        amount_val = 0.0 if is_yesterday else parse_amount(amount_str)
-
-                        all_data.append({
-                            "investor": group_name,
-                            "stock_name": name,
-                            "stock_code": stock_code,
-                            "amount": amount_val,
-                            "ranking_type": ranking_type,
-                            "collected_at": collected_at,
-                        })
-                        group_counts[group_name] += 1
-                except Exception:
-                    continue
+            all_data, group_counts = extract_toss_items(items, ranking_type, collected_at, base_times, is_opening_period)
 
+            metrics.record_span("extract", time.perf_counter() - extract_started)
+            metrics.inc("rows_collected", len(all_data))
             print(f"📊 [{ranking_type}] 수집 결과 -> 外: {group_counts.get('외국인', 0)}, 機: {group_counts.get('기관', 0)}")
 
             if group_counts.get("외국인", 0) >= 100 and group_counts.get("기관", 0) >= 100:
@@ -268,12 +258,14 @@ def get_toss_ranking(ranking_type="buy", collected_at=None):
 
                 if valid_data:
                     try:
-                        supabase.table("toss_yg_score_stk").upsert(
-                            valid_data, on_conflict="investor, stock_code, ranking_type, collected_at"
-                        ).execute()
+                        with metrics.span("db_write"):
+                            get_supabase().table("toss_yg_score_stk").upsert(
+                                valid_data, on_conflict="investor, stock_code, ranking_type, collected_at"
+                            ).execute()
+                        metrics.inc("rows_written", len(valid_data))
                         print(f"🎉 [{ranking_type}] Supabase 저장 완료")
                         driver.quit()
-                        return
+                        return valid_data
                     except Exception as e:
                         print(f"❌ [{ranking_type}] 저장 에러: {e}")
             else:
@@ -289,16 +281,50 @@ def get_toss_ranking(ranking_type="buy", collected_at=None):
     print(f"🚨 [{ranking_type}] {max_retries}회 시도에도 불구하고 목표 데이터를 모두 수집하지 못했습니다.")
 
 
+def score_turn(turn_timestamp):
+    """이번 턴 수집 데이터로 서버 측 YG Score 계산을 요청하고, 결과를 장중 이력(모멘텀)에 반영하여 푸시로 발행합니다."""
+    print("\n📊 [Server-Side] YG Score 계산 및 업데이트 요청 중...")
+    try:
+        with metrics.span("rpc"):
+            get_supabase().rpc('calculate_yg_score_server', {'target_time': turn_timestamp}).execute()
+        print("✅ [Server-Side] YG Score 업데이트 완료")
+        # 이번 턴 점수를 한 번 읽어 장중 이력(모멘텀)에 반영하고 푸시로 발행
+        publish_scores("toss_etf", record_turn_scores(turn_timestamp))
+    except Exception as e:
+        print(f"❌ [Server-Side] YG Score 업데이트 중 오류 발생: {e}")
+
+
 if __name__ == "__main__":
 
     run_once = "--once" in sys.argv
     is_morning = "morning" in sys.argv
     is_afternoon = "afternoon" in sys.argv
+    if "--profile" in sys.argv:
+        profiling.enable()
+    # 파이프라인 모드: 점수 계산(RPC)을 작업 스레드에서 실행하여 다음 턴 수집과 겹칩니다. (수집과 저장은 get_toss_ranking 안에서 함께 진행)
+    pipeline = TurnPipeline("toss_yg_score_stk", [("score", score_turn)], enabled="--pipeline" in sys.argv or None)
 
+    now = get_kst_now()
+
+    # 거래일 캘린더로 시작 시점에 바로 개장 여부를 판단합니다. (연도 정보가 없으면 08:58 프리마켓 데이터 확인으로 대체)
+    today_str = now.strftime("%Y-%m-%d")
+    market_status = get_market_status(now)
+    if not run_once and market_status is False:
+        print(f"ℹ️ [{today_str}] KRX 휴장일({get_holiday_name(now)})입니다. 수집 없이 종료합니다. (기존 데이터 보존)")
+        sys.exit(0)
+    session = get_session(now)
+    if market_status:
+        print(f"📅 [{today_str}] 거래일 캘린더 기준 개장일 (정규장 {session[0].strftime('%H:%M')}~{session[1].strftime('%H:%M')})")
+    elif market_status is None:
+        print(f"📅 [{today_str}] 거래일 캘린더에 {now.year}년 정보가 없습니다. 08:58 프리마켓 데이터로 개장 여부를 확인합니다.")
+
+    # 같은 거래일의 직전 세션(오전) 체크포인트가 있으면 개장 판단과 장중 점수 이력을 이어받습니다.
+    warm_state = None if run_once else load_checkpoint("toss_yg_score_stk", now)
     print("Loading ETF PDF data...")
     cached_pdf_data = load_etf_pdf_from_supabase()
+    if warm_state:
+        restore_score_history(warm_state.get("score_history"))
 
-    now = get_kst_now()
     end_hour, end_minute = 15, 20
 
     if is_morning:
@@ -314,6 +340,11 @@ if __name__ == "__main__":
         sys.exit(0)
 
     is_market_open_confirmed = False
+    # 지난 데이터 정리는 프리마켓 데이터로 개장이 교차 확인된 뒤에만 수행합니다. (캘린더가 틀린 경우 기존 데이터 보존)
+    is_cleanup_done = run_once or is_afternoon
+    if warm_state:
+        is_market_open_confirmed = warm_state.get("market_open_confirmed", False)
+        is_cleanup_done = is_cleanup_done or warm_state.get("cleanup_done", False)
 
     while True:
         now = get_kst_now()
@@ -325,14 +356,27 @@ if __name__ == "__main__":
             time.sleep(30)
             continue
 
-        # 시장 개장 여부 확인 (08:58 이후 프리마켓 데이터 기준)
+        # 시장 개장 여부 확인
+        if not run_once and not is_market_open_confirmed and market_status:
+            # 캘린더로 개장일이 확정된 경우: 개장 전에 브라우저 드라이버를 미리 준비하고 정규장 시작 시각에 첫 턴을 시작
+            if now < session[0]:
+                print(f"\n🔥 개장 전 준비 중 (ChromeDriver 설치 확인)... 정규장 시작({session[0].strftime('%H:%M')})에 첫 수집을 시작합니다.")
+                try:
+                    ChromeDriverManager().install()
+                except Exception as e:
+                    print(f"⚠️ ChromeDriver 사전 준비 실패: {e} (첫 턴에서 다시 시도합니다)")
+                if not sleep_until(session[0], should_stop=lambda: stop_requested):
+                    break
+            is_market_open_confirmed = True
+            continue
+
+        # 캘린더에 정보가 없는 경우: 기존처럼 08:58 이후 프리마켓 데이터 기준으로 확인
         if not run_once and not is_market_open_confirmed:
             if current_time_str < "0858":
                 print(f"🕒 시장 개장 여부 확인을 위해 08:58까지 대기합니다... (현재: {now.strftime('%H:%M:%S')})", end='\r')
                 time.sleep(10)
                 continue
 
-            today_str = now.strftime("%Y-%m-%d")
             print(f"\n🔍 [{today_str}] 시장 개장 여부 확인 중 (프리마켓 데이터 기준)...")
             try:
                 if not check_market_open(today_str):
@@ -342,33 +386,47 @@ if __name__ == "__main__":
                 print(f"✅ [{today_str}] 개장일 확인됨. 기존 데이터를 정리하고 수집을 시작합니다.")
                 if not is_afternoon:
                     print("🧹 Cleaning up old data (older than today) before starting loop...")
-                    delete_old_scores()
+                    delete_old_scores(background=True)
                 is_market_open_confirmed = True
+                is_cleanup_done = True
             except Exception as e:
                 print(f"⚠️ 개장 확인 중 오류 발생: {e}. 안전을 위해 1분 후 재시도합니다.")
                 time.sleep(60)
                 continue
 
+        # 캘린더로 시작한 경우: 프리마켓 데이터로 개장을 교차 확인한 뒤 지난 데이터를 정리합니다.
+        if not is_cleanup_done:
+            try:
+                if check_market_open(today_str):
+                    print(f"✅ [{today_str}] 프리마켓 데이터로 개장 교차 확인됨. 지난 데이터를 정리합니다.")
+                    delete_old_scores(background=True)
+                    is_cleanup_done = True
+                else:
+                    print(f"⚠️ [{today_str}] 캘린더상 개장일이지만 프리마켓 데이터가 없습니다. 지난 데이터 정리는 다음 턴으로 미룹니다.")
+            except Exception as e:
+                print(f"⚠️ 개장 교차 확인 중 오류 발생: {e}. 다음 턴에 다시 확인합니다.")
+
         start_time = time.time()
+        metrics.start_turn("toss_yg_score_stk", turn_id=now.isoformat())
+        profiling.start_turn("toss_yg_score_stk", turn_id=now.isoformat())
 
         print(f"=== 토스증권 수급 데이터 수집 시작 (시작 시각 KST: {now.strftime('%H:%M:%S')}) ===")
         turn_timestamp = now.isoformat()
 
         try:
-            get_toss_ranking("buy", collected_at=turn_timestamp)
+            bought = get_toss_ranking("buy", collected_at=turn_timestamp)
             print("\n" + "=" * 30 + "\n")
-            get_toss_ranking("sell", collected_at=turn_timestamp)
-
-            print("\n📊 [Server-Side] YG Score 계산 및 업데이트 요청 중...")
-            try:
-                supabase.rpc('calculate_yg_score_server', {'target_time': turn_timestamp}).execute()
-                print("✅ [Server-Side] YG Score 업데이트 완료")
-            except Exception as e:
-                print(f"❌ [Server-Side] YG Score 업데이트 중 오류 발생: {e}")
+            sold = get_toss_ranking("sell", collected_at=turn_timestamp)
+            # 순매수/순매도가 모두 저장된 턴만 스냅샷 저장소에 발행 (한쪽만 있으면 다른 쪽 이전 값이 섞이므로 건너뜀)
+            if bought is not None and sold is not None:
+                publish_flow_snapshot(bought + sold)
+            pipeline.submit(turn_timestamp, turn_timestamp)
         except Exception as e:
             print(f"❌ 메인 루프 실행 중 오류 발생: {e}")
 
         print("=== 이번 턴 수집 완료 ===")
+        profiling.end_turn()
+        metrics.end_turn()
 
         if run_once:
             print("🚀 1회 실행 모드 완료. 종료합니다.")
@@ -396,3 +454,11 @@ if __name__ == "__main__":
                 time.sleep(wait_time - int(wait_time))
         else:
             print("⏳ 대기 없이 바로 다음 수집 시작")
+
+    pipeline.close()
+    if not run_once:
+        save_checkpoint("toss_yg_score_stk", {
+            "market_open_confirmed": is_market_open_confirmed,
+            "cleanup_done": is_cleanup_done,
+            "score_history": get_score_history().export_state(),
+        })